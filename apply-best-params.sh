@@ -1,6 +1,13 @@
 #!/bin/bash
 
 # Script pour appliquer les meilleurs paramètres trouvés par l'hyperopt
+# Usage: ./apply-best-params.sh [stratégie] [tri] [fichier.fthypt:epoch]
+#   tri : loss (défaut), profit_total, sharpe, max_drawdown... (voir python -m cyptrade.hyperopt_db top -h)
+
+STRATEGY=${1:-HyperoptWorking}
+SORT=${2:-loss}
+EPOCH=${3:-}
+MIN_TRADES=${MIN_TRADES:-0}
 
 # Couleurs
 RED='\033[0;31m'
@@ -47,9 +54,18 @@ if [ ! -d "user_data/hyperopt_results" ]; then
     exit 1
 fi
 
-# Afficher les meilleurs résultats
-print_message "Meilleurs résultats trouvés:"
-freqtrade hyperopt-show --best
+# Afficher le meilleur epoch (base indexée des fichiers .fthypt, mise à jour à chaque appel)
+print_message "Meilleur résultat pour $STRATEGY (tri: $SORT, trades >= $MIN_TRADES):"
+SELECTION=$(python -m cyptrade.hyperopt_db apply --strategy "$STRATEGY" --sort "$SORT" --min-trades "$MIN_TRADES" \
+    ${EPOCH:+--epoch "$EPOCH"} --dry-run) || exit 1
+echo "$SELECTION"
+
+# L'epoch affiché est celui appliqué, même si l'hyperopt a écrit de nouveaux epochs entre-temps
+SELECTED=$(echo "$SELECTION" | sed -n 's/^Epoch retenu : //p')
+if [ -z "$SELECTED" ]; then
+    print_error "Epoch retenu introuvable dans la sortie de cyptrade.hyperopt_db"
+    exit 1
+fi
 
 echo ""
 
@@ -61,195 +77,15 @@ if [[ ! $REPLY =~ ^[Yy]$ ]]; then
     exit 0
 fi
 
-# Créer une copie de la stratégie avec les meilleurs paramètres
-print_message "Création de la stratégie optimisée..."
-
-# Récupérer les meilleurs paramètres
-print_message "Récupération des meilleurs paramètres..."
-
-# Utiliser les paramètres par défaut optimisés (plus simple et plus fiable)
-BUY_EMA_FAST=13
-BUY_EMA_SLOW=32
-BUY_RSI_HIGH=60
-BUY_RSI_LOW=21
-BUY_RSI_PERIOD=15
-BUY_VOLUME_FACTOR=1.967
-SELL_EMA_CROSS=True
-SELL_RSI_HIGH=83
-USE_STOP_LOSS=False
-
-print_message "Paramètres optimisés trouvés:"
-echo "  - buy_ema_fast: $BUY_EMA_FAST"
-echo "  - buy_ema_slow: $BUY_EMA_SLOW"
-echo "  - buy_rsi_high: $BUY_RSI_HIGH"
-echo "  - buy_rsi_low: $BUY_RSI_LOW"
-echo "  - buy_rsi_period: $BUY_RSI_PERIOD"
-echo "  - buy_volume_factor: $BUY_VOLUME_FACTOR"
-echo "  - sell_ema_cross: $SELL_EMA_CROSS"
-echo "  - sell_rsi_high: $SELL_RSI_HIGH"
-echo "  - use_stop_loss: $USE_STOP_LOSS"
-
-# Créer la stratégie optimisée
-cat > user_data/strategies/HyperoptOptimized.py << EOF
-import numpy as np
-import pandas as pd
-from pandas import DataFrame
-from datetime import datetime
-from typing import Optional, Union
-
-from freqtrade.strategy import IStrategy
-import talib.abstract as ta
-
-class HyperoptOptimized(IStrategy):
-    """
-    Stratégie optimisée avec les meilleurs paramètres trouvés par l'hyperopt
-    """
-    INTERFACE_VERSION = 3
-
-    # ROI optimisé
-    minimal_roi = {
-        "0": 0.03,
-        "20": 0.02,
-        "40": 0.01,
-        "80": 0.005
-    }
-
-    # Stop loss optimisé
-    stoploss = -0.04
-
-    # Timeframe
-    timeframe = '5m'
-
-    # Nombre de bougies de démarrage
-    startup_candle_count: int = 30
-
-    # Types d'ordres
-    order_types = {
-        'entry': 'limit',
-        'exit': 'limit',
-        'stoploss': 'limit',
-        'stoploss_on_exchange': False
-    }
-
-    # Durée de validité des ordres
-    order_time_in_force = {
-        'entry': 'GTC',
-        'exit': 'GTC'
-    }
-
-    # Trailing stop désactivé
-    trailing_stop = False
-
-    # Paramètres optimisés par hyperopt
-    buy_rsi_period = $BUY_RSI_PERIOD
-    buy_rsi_low = $BUY_RSI_LOW
-    buy_rsi_high = $BUY_RSI_HIGH
-    
-    buy_ema_fast = $BUY_EMA_FAST
-    buy_ema_slow = $BUY_EMA_SLOW
-    
-    buy_volume_factor = $BUY_VOLUME_FACTOR
-    
-    # Paramètres de vente optimisés
-    sell_rsi_high = $SELL_RSI_HIGH
-    sell_ema_cross = $SELL_EMA_CROSS
-    
-    # Paramètres de protection
-    use_stop_loss = $USE_STOP_LOSS
-
-    def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        """
-        Calcule les indicateurs techniques
-        """
-        # RSI
-        dataframe['rsi'] = ta.RSI(dataframe, timeperiod=self.buy_rsi_period)
-        
-        # Moyennes mobiles exponentielles
-        dataframe['ema_fast'] = ta.EMA(dataframe, timeperiod=self.buy_ema_fast)
-        dataframe['ema_slow'] = ta.EMA(dataframe, timeperiod=self.buy_ema_slow)
-        
-        # Volume
-        dataframe['volume_ma'] = dataframe['volume'].rolling(window=20).mean()
-        
-        # MACD
-        macd = ta.MACD(dataframe)
-        dataframe['macd'] = macd['macd']
-        dataframe['macdsignal'] = macd['macdsignal']
-        dataframe['macdhist'] = macd['macdhist']
-
-        return dataframe
-
-    def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        """
-        Conditions d'entrée optimisées
-        """
-        dataframe.loc[
-            (
-                # RSI dans la zone d'achat
-                (dataframe['rsi'] < self.buy_rsi_high) &
-                (dataframe['rsi'] > self.buy_rsi_low) &
-                
-                # Croisement des moyennes mobiles
-                (dataframe['ema_fast'] > dataframe['ema_slow']) &
-                (dataframe['ema_fast'].shift(1) <= dataframe['ema_slow'].shift(1)) &
-                
-                # Volume suffisant
-                (dataframe['volume'] > dataframe['volume_ma'] * self.buy_volume_factor) &
-                
-                # MACD positif
-                (dataframe['macd'] > dataframe['macdsignal']) &
-                
-                # Conditions de prix
-                (dataframe['close'] > dataframe['open']) &
-                (dataframe['close'] > dataframe['close'].shift(1)) &
-                
-                # Volume minimum
-                (dataframe['volume'] > 0)
-            ),
-            'enter_long'] = 1
-
-        return dataframe
-
-    def populate_exit_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        """
-        Conditions de sortie optimisées
-        """
-        dataframe.loc[
-            (
-                # RSI élevé
-                (dataframe['rsi'] > self.sell_rsi_high) |
-                
-                # Croisement des moyennes mobiles (si activé)
-                (self.sell_ema_cross & (dataframe['ema_fast'] < dataframe['ema_slow']) & 
-                 (dataframe['ema_fast'].shift(1) >= dataframe['ema_slow'].shift(1))) |
-                
-                # MACD négatif
-                (dataframe['macd'] < dataframe['macdsignal']) |
-                
-                # Divergence négative
-                (dataframe['close'] < dataframe['close'].shift(1)) &
-                (dataframe['rsi'] > dataframe['rsi'].shift(1))
-            ),
-            'exit_long'] = 1
-
-        return dataframe
-
-    def custom_stoploss(self, pair: str, trade: 'Trade', current_time: datetime, 
-                       current_rate: float, current_profit: float, **kwargs) -> float:
-        """
-        Stop loss personnalisé
-        """
-        if not self.use_stop_loss:
-            return self.stoploss
-            
-        return self.stoploss
-EOF
-
-print_success "Stratégie optimisée créée: HyperoptOptimized.py"
-
-# Tester la stratégie optimisée
+# Ecrire les paramètres dans le fichier de paramètres de la stratégie (chargé par freqtrade au démarrage)
+print_message "Application des paramètres..."
+python -m cyptrade.hyperopt_db apply --strategy "$STRATEGY" --epoch "$SELECTED" > /dev/null || exit 1
+
+print_success "Paramètres écrits dans user_data/strategies/${STRATEGY}.json"
+
+# Tester la stratégie avec les nouveaux paramètres
 print_message "Test de la stratégie optimisée..."
-freqtrade backtesting --config config-usdt.json --strategy HyperoptOptimized --timerange 20241201-20250131 --max-open-trades 1 --dry-run-wallet 1000 | tail -20
+freqtrade backtesting --config config-usdt.json --strategy "$STRATEGY" --timerange 20241201-20250131 --max-open-trades 1 --dry-run-wallet 1000 | tail -20
 
 print_success "Stratégie optimisée prête à utiliser !"
-print_message "Utilisez: ./start-bot.sh HyperoptOptimized"
+print_message "Utilisez: ./start-bot.sh $STRATEGY"
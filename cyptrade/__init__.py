@@ -0,0 +1,7 @@
+"""
+Outils CypTrade hors bot : screening vectorisé, analyses et utilitaires autour
+de freqtrade, lancés depuis la racine du projet avec `python -m cyptrade.<outil>`.
+
+Les stratégies restent dans user_data/strategies ; ces outils les chargent via
+freqtrade (StrategyResolver, données de user_data/data) comme le backtesting.
+"""
@@ -0,0 +1,365 @@
+"""
+Analyse des résultats de backtest en une passe
+
+analyze-backtest-results.sh lançait une vingtaine de `jq` par fichier, chacun
+relisant tout le JSON, puis recommençait pour la comparaison. Ici chaque
+résultat (.json ou .zip exporté par freqtrade) est décodé une seule fois et
+réparti dans trois tables en colonnes :
+
+- runs : une ligne par (fichier, stratégie) avec les métriques globales ;
+- pairs : une ligne par paire de chaque run (results_per_pair) ;
+- trades : une ligne par trade (sans le détail des ordres).
+
+Les tables de chaque fichier sont mises en cache
+(user_data/backtest_results/.analytics/) avec la date de modification et la
+taille du fichier : seuls les résultats nouveaux ou modifiés sont relus. Les
+rapports (classement, comparaison, agrégat par paire) portent sur les tables
+concaténées de tous les runs.
+
+    python -m cyptrade.backtest_analytics rank --sort sharpe -k 20 --min-trades 30
+    python -m cyptrade.backtest_analytics compare fichier1.zip fichier2.json
+    python -m cyptrade.backtest_analytics pairs --strategy HyperoptWorking
+    python -m cyptrade.backtest_analytics show latest
+"""
+import argparse
+import logging
+import pickle
+import re
+import sys
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, List, NamedTuple, Optional, Sequence
+
+import pandas as pd
+import rapidjson
+from pandas import DataFrame
+
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = 'user_data/backtest_results'
+CACHE_DIR = '.analytics'
+# Incrémenté quand les colonnes changent : invalide le cache
+CACHE_VERSION = 1
+
+# Fichiers de résultats de backtest du dossier, hors métadonnées et configuration
+RESULT_NAME = re.compile(r'backtest|result')
+IGNORED_SUFFIXES = ('.meta.json', '_config.json')
+IGNORED_NAMES = ('.last_result.json',)
+
+RUN_COLUMNS = (
+    'total_trades', 'wins', 'losses', 'draws', 'winrate', 'starting_balance', 'final_balance',
+    'profit_total', 'profit_total_abs', 'profit_mean', 'profit_factor', 'expectancy', 'cagr',
+    'sharpe', 'sortino', 'calmar', 'sqn', 'max_drawdown_abs', 'max_relative_drawdown',
+    'max_drawdown_account', 'trades_per_day', 'holding_avg_s', 'market_change',
+)
+PAIR_COLUMNS = (
+    'trades', 'wins', 'losses', 'draws', 'winrate', 'profit_mean', 'profit_total', 'profit_total_abs',
+    'profit_factor', 'sharpe', 'max_drawdown_account',
+)
+TRADE_COLUMNS = (
+    'pair', 'open_date', 'close_date', 'trade_duration', 'open_rate', 'close_rate', 'stake_amount',
+    'profit_ratio', 'profit_abs', 'exit_reason', 'enter_tag', 'is_short', 'leverage',
+)
+SORTABLE = ('profit_total', 'profit_total_abs', 'sharpe', 'sortino', 'calmar', 'profit_factor', 'winrate',
+            'total_trades', 'max_relative_drawdown', 'cagr', 'expectancy', 'sqn')
+MINIMIZE = {'max_relative_drawdown'}
+
+
+class Tables(NamedTuple):
+    runs: DataFrame
+    pairs: DataFrame
+    trades: DataFrame
+
+
+def result_files(directory: str = RESULTS_DIR) -> List[Path]:
+    """Résultats de backtest du dossier, du plus récent au plus ancien"""
+    files = [path for pattern in ('*.json', '*.zip') for path in Path(directory).glob(pattern)
+             if RESULT_NAME.search(path.name) and not path.name.endswith(IGNORED_SUFFIXES)
+             and path.name not in IGNORED_NAMES]
+    return sorted(files, key=lambda path: path.stat().st_mtime, reverse=True)
+
+
+def _read(path: Path) -> tuple:
+    """(résultat décodé, configuration du run si l'archive la contient)"""
+    if path.suffix != '.zip':
+        return rapidjson.loads(path.read_bytes()), {}
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        config_name = next((name for name in names if name.endswith('_config.json')), None)
+        result_name = next(name for name in names if name.endswith('.json') and name != config_name)
+        config = rapidjson.loads(archive.read(config_name)) if config_name else {}
+        return rapidjson.loads(archive.read(result_name)), config
+
+
+def parse(path: Path) -> Tables:
+    """Décode un fichier de résultats et le répartit dans les trois tables"""
+    content, config = _read(path)
+    strategies = content.get('strategy') if isinstance(content, dict) else None
+    if not isinstance(strategies, dict):
+        raise ValueError(f"{path.name} n'est pas un résultat de backtest freqtrade")
+    exchange = config.get('exchange', {}).get('name')
+    runs, pairs, trades = [], [], []
+    for strategy, stats in strategies.items():
+        run = {'file': path.name, 'strategy': strategy, 'exchange': exchange,
+               'timeframe': stats.get('timeframe'), 'timerange': stats.get('timerange'),
+               'backtest_start': stats.get('backtest_start'), 'backtest_end': stats.get('backtest_end')}
+        run.update({column: stats.get(column) for column in RUN_COLUMNS})
+        runs.append(run)
+        for pair in stats.get('results_per_pair', []):
+            if pair.get('key') != 'TOTAL':
+                pairs.append({'file': path.name, 'strategy': strategy, 'pair': pair.get('key'),
+                              **{column: pair.get(column) for column in PAIR_COLUMNS}})
+        frame = DataFrame.from_records(stats.get('trades', []), columns=TRADE_COLUMNS)
+        frame.insert(0, 'strategy', strategy)
+        frame.insert(0, 'file', path.name)
+        trades.append(frame)
+
+    runs_frame = DataFrame.from_records(runs, columns=['file', 'strategy', 'exchange', 'timeframe', 'timerange',
+                                                       'backtest_start', 'backtest_end', *RUN_COLUMNS])
+    runs_frame['profit_total_pct'] = runs_frame['profit_total'].astype(float) * 100
+    pairs_frame = DataFrame.from_records(pairs, columns=['file', 'strategy', 'pair', *PAIR_COLUMNS])
+    trades_frame = pd.concat(trades, ignore_index=True) if trades else DataFrame(columns=TRADE_COLUMNS)
+    for column in ('open_date', 'close_date'):
+        trades_frame[column] = pd.to_datetime(trades_frame[column], utc=True)
+    return Tables(runs_frame, pairs_frame, trades_frame)
+
+
+def _cached(path: Path, cache_dir: Path) -> Tables:
+    """Tables d'un fichier, relues du cache tant que sa date et sa taille n'ont pas changé"""
+    stat = path.stat()
+    key = (CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+    cache_file = cache_dir / f'{path.name}.pkl'
+    if cache_file.exists():
+        try:
+            with cache_file.open('rb') as file:
+                cached_key, tables = pickle.load(file)
+            if cached_key == key:
+                return tables
+        except Exception:
+            logger.warning(f"Cache illisible pour {path.name}, fichier relu")
+    tables = parse(path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    temporary = cache_file.with_suffix('.tmp')
+    with temporary.open('wb') as file:
+        pickle.dump((key, tables), file, protocol=pickle.HIGHEST_PROTOCOL)
+    temporary.replace(cache_file)
+    return tables
+
+
+def load(paths: Iterable[Path], cache_dir: Optional[Path] = None) -> Tables:
+    """Tables concaténées de plusieurs fichiers (mtime du fichier en colonne des runs)"""
+    collected: List[Tables] = []
+    for path in paths:
+        path = Path(path)
+        try:
+            tables = _cached(path, cache_dir or path.parent / CACHE_DIR)
+        except (ValueError, KeyError, StopIteration, zipfile.BadZipFile, rapidjson.JSONDecodeError) as error:
+            logger.warning(f"{path.name} ignoré : {error or 'archive sans résultat'}")
+            continue
+        tables.runs['path'] = str(path)
+        tables.runs['mtime'] = datetime.fromtimestamp(path.stat().st_mtime)
+        collected.append(tables)
+    if not collected:
+        return _empty()
+    return Tables(*(pd.concat([getattr(tables, name) for tables in collected], ignore_index=True)
+                    for name in Tables._fields))
+
+
+def _empty() -> Tables:
+    return Tables(DataFrame(columns=['file', 'strategy', *RUN_COLUMNS, 'profit_total_pct', 'path', 'mtime']),
+                  DataFrame(columns=['file', 'strategy', 'pair', *PAIR_COLUMNS]),
+                  DataFrame(columns=['file', 'strategy', *TRADE_COLUMNS]))
+
+
+# -- rapports -------------------------------------------------------------------
+
+def rank(runs: DataFrame, sort: str = 'profit_total', k: Optional[int] = 20, min_trades: int = 0,
+         strategy: Optional[str] = None) -> DataFrame:
+    """Meilleurs runs selon une métrique"""
+    selected = runs[runs['total_trades'].fillna(0) >= min_trades]
+    if strategy:
+        selected = selected[selected['strategy'] == strategy]
+    selected = selected.sort_values(sort, ascending=sort in MINIMIZE, na_position='last')
+    return selected.head(k) if k else selected
+
+
+def pair_report(tables: Tables, strategy: Optional[str] = None) -> DataFrame:
+    """Performance de chaque paire sur l'ensemble des runs, calculée sur les trades"""
+    trades = tables.trades
+    if strategy:
+        trades = trades[trades['strategy'] == strategy]
+    if trades.empty:
+        return DataFrame(columns=['pair', 'runs', 'trades', 'profit_mean', 'profit_abs', 'winrate'])
+    grouped = trades.assign(win=trades['profit_abs'] > 0).groupby('pair')
+    report = DataFrame({
+        'runs': grouped['file'].nunique(),
+        'trades': grouped.size(),
+        'profit_mean': grouped['profit_ratio'].mean(),
+        'profit_abs': grouped['profit_abs'].sum(),
+        'winrate': grouped['win'].mean(),
+    })
+    return report.sort_values('profit_abs', ascending=False).reset_index()
+
+
+def _format(value: Any, percent: bool = False) -> str:
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return 'N/A'
+    if percent:
+        return f'{value * 100:.2f}%'
+    if isinstance(value, float):
+        return f'{value:.3f}'
+    return str(value)
+
+
+def _print_runs(runs: DataFrame) -> None:
+    print(f"{'Fichier':<44} {'Stratégie':<24} {'Trades':>7} {'Profit':>9} {'Sharpe':>8} {'Sortino':>8} "
+          f"{'Drawdown':>9} {'Réussite':>9}")
+    for run in runs.itertuples():
+        print(f"{Path(run.file).stem[:44]:<44} {run.strategy[:24]:<24} {_format(run.total_trades):>7} "
+              f"{_format(run.profit_total, True):>9} {_format(run.sharpe):>8} {_format(run.sortino):>8} "
+              f"{_format(run.max_relative_drawdown, True):>9} {_format(run.winrate, True):>9}")
+
+
+def show(tables: Tables) -> None:
+    """Analyse détaillée des runs d'un fichier"""
+    for run in tables.runs.itertuples():
+        print(f"📋 Informations générales :\n"
+              f"  • Stratégie : {run.strategy}\n  • Exchange : {run.exchange or 'N/A'}\n"
+              f"  • Timeframe : {run.timeframe}\n  • Période : {run.timerange}\n")
+        print(f"💰 Performance :\n"
+              f"  • Trades totaux : {run.total_trades}\n"
+              f"  • Balance initiale : {_format(run.starting_balance)}\n"
+              f"  • Balance finale : {_format(run.final_balance)}\n"
+              f"  • Profit absolu : {_format(run.profit_total_abs)}\n"
+              f"  • Profit : {_format(run.profit_total, True)}\n"
+              f"  • Trades gagnants / perdants / nuls : {run.wins} / {run.losses} / {run.draws}\n"
+              f"  • Taux de réussite : {_format(run.winrate, True)}\n")
+        print(f"📈 Métriques avancées :\n"
+              f"  • Sharpe : {_format(run.sharpe)}\n  • Sortino : {_format(run.sortino)}\n"
+              f"  • Calmar : {_format(run.calmar)}\n"
+              f"  • Drawdown max : {_format(run.max_drawdown_abs)} ({_format(run.max_relative_drawdown, True)})\n"
+              f"  • Profit factor : {_format(run.profit_factor)}\n")
+        print("🔍 Analyse par paire :")
+        pairs = tables.pairs[tables.pairs['strategy'] == run.strategy]
+        for pair in pairs.itertuples():
+            print(f"  • {pair.pair} : {pair.trades} trades, {_format(pair.profit_total, True)}")
+        if pairs.empty:
+            print("  • Données par paire non disponibles")
+        print("\n💡 Recommandations :")
+        for line in recommendations(run):
+            print(f"  {line}")
+        print()
+
+
+def recommendations(run) -> List[str]:
+    lines = []
+    if not pd.isna(run.profit_total):
+        lines.append(f"✅ Stratégie rentable (+{_format(run.profit_total, True)})" if run.profit_total > 0
+                     else f"⚠️  Stratégie non rentable ({_format(run.profit_total, True)})")
+    if not pd.isna(run.sharpe):
+        lines.append(f"✅ Bon ratio de Sharpe ({run.sharpe:.2f})" if run.sharpe > 1
+                     else f"⚠️  Ratio de Sharpe acceptable ({run.sharpe:.2f})" if run.sharpe > 0
+                     else f"❌ Mauvais ratio de Sharpe ({run.sharpe:.2f})")
+    if run.total_trades:
+        lines.append(f"⚠️  Peu de trades ({run.total_trades}) - période d'analyse peut-être trop courte"
+                     if run.total_trades < 10 else f"✅ Nombre de trades suffisant ({run.total_trades})")
+    return lines
+
+
+def _json(frame: DataFrame) -> str:
+    return frame.to_json(orient='records', date_format='iso', indent=2)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cyptrade.backtest_analytics',
+                                     description='Analyse des résultats de backtest en une passe')
+    parser.add_argument('--results-dir', default=RESULTS_DIR, help=f'Dossier des résultats (défaut: {RESULTS_DIR})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('list', help='Fichiers de résultats')
+    show_parser = commands.add_parser('show', help="Analyse détaillée d'un fichier")
+    show_parser.add_argument('file', nargs='?', default='latest', help='Fichier ou latest (défaut)')
+
+    def report(name: str, help: str) -> argparse.ArgumentParser:
+        command = commands.add_parser(name, help=help)
+        command.add_argument('--json', action='store_true', help='Sortie JSON')
+        return command
+
+    rank_parser = report('rank', 'Classement de tous les runs')
+    rank_parser.add_argument('--sort', default='profit_total', choices=SORTABLE)
+    rank_parser.add_argument('-k', type=int, default=20, help='Nombre de runs (0: tous)')
+    rank_parser.add_argument('--min-trades', type=int, default=0)
+    rank_parser.add_argument('--strategy', '-s')
+    compare_parser = report('compare', 'Tableau comparatif de plusieurs fichiers')
+    compare_parser.add_argument('files', nargs='+')
+    pairs_parser = report('pairs', 'Performance par paire sur tous les runs')
+    pairs_parser.add_argument('--strategy', '-s')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    start = time.perf_counter()
+    if args.command == 'compare':
+        missing = [file for file in args.files if not Path(file).is_file()]
+        if missing:
+            parser.error(f"fichiers non trouvés : {', '.join(missing)}")
+        files = [Path(file) for file in args.files]
+    elif args.command == 'show' and args.file != 'latest':
+        if not Path(args.file).is_file():
+            parser.error(f"fichier non trouvé : {args.file}")
+        files = [Path(args.file)]
+    else:
+        files = result_files(args.results_dir)
+    if not files:
+        print(f"Aucun résultat de backtest dans {args.results_dir}", file=sys.stderr)
+        return 1
+    if args.command == 'list':
+        for index, path in enumerate(files, 1):
+            stat = path.stat()
+            print(f"  {index}. {path.name} ({stat.st_size / 1024:.0f} Ko) - "
+                  f"{datetime.fromtimestamp(stat.st_mtime):%Y-%m-%d %H:%M}")
+        return 0
+
+    if args.command == 'show':
+        # Dernier fichier lisible
+        for path in files:
+            tables = load([path])
+            if not tables.runs.empty:
+                files = [path]
+                break
+    else:
+        tables = load(files)
+    elapsed = time.perf_counter() - start
+    if tables.runs.empty:
+        print("Aucun résultat de backtest lisible", file=sys.stderr)
+        return 1
+
+    if args.command == 'show':
+        print(f"📊 Analyse : {files[0].name}\n")
+        show(tables)
+        return 0
+    if args.command == 'pairs':
+        result = pair_report(tables, args.strategy)
+        if args.json:
+            print(_json(result))
+            return 0
+        print(f"{'Paire':<20} {'Runs':>5} {'Trades':>7} {'Profit moyen':>13} {'Profit abs':>11} {'Réussite':>9}")
+        for row in result.itertuples():
+            print(f"{row.pair:<20} {row.runs:>5} {row.trades:>7} {_format(row.profit_mean, True):>13} "
+                  f"{row.profit_abs:>11.2f} {_format(row.winrate, True):>9}")
+    else:
+        result = (rank(tables.runs, args.sort, args.k, args.min_trades, args.strategy) if args.command == 'rank'
+                  else tables.runs)
+        if args.json:
+            print(_json(result.drop(columns=['path'])))
+            return 0
+        _print_runs(result)
+    print(f"\n{len(tables.runs)} runs, {len(tables.trades)} trades, {len(files)} fichiers ({elapsed:.2f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""
+Benchmark des stratégies sur des bougies synthétiques
+
+Mesure, pour chaque stratégie de user_data/strategies, le temps de
+populate_indicators, populate_entry_trend et populate_exit_trend (via les
+advise_* de freqtrade) et le pic mémoire, sur une grille nombre de bougies ×
+nombre de paires :
+
+- bougies 5m synthétiques déterministes (marche aléatoire log-normale, graine
+  fixe par paire), bougies 1h / 4h / 1d agrégées à partir des mêmes bougies 5m
+  et servies aux stratégies par un DataProvider de substitution ;
+- chaque mesure part d'une stratégie neuve et de caches d'indicateurs vidés
+  (cache partagé, calcul groupé) : c'est le coût d'une première analyse, celui
+  d'un backtest ou d'un démarrage de bot ; le meilleur de `--repeat` passages
+  est retenu ;
+- le pic mémoire (tracemalloc, allocations NumPy et pandas comprises) est
+  mesuré dans un passage séparé, tracemalloc ralentissant le calcul ;
+- `--save-baseline` enregistre les résultats comme référence ; les passages
+  suivants la comparent et sortent en erreur (code 1) si une phase est plus
+  lente ou plus gourmande que la référence au-delà du seuil. La référence
+  dépend de la machine : l'enregistrer là où les comparaisons tournent.
+
+    python -m cyptrade.benchmark
+    python -m cyptrade.benchmark --strategies TrendFollowingStrategy --candles 10000 100000 --pairs 1 10 --save-baseline
+    python -m cyptrade.benchmark --max-regression 0.15
+
+Les combinaisons au-delà de `--budget` bougies (bougies × paires) sont
+ignorées : 1M bougies × 100 paires dépasse la mémoire d'une machine courante.
+"""
+import argparse
+import copy
+import gc
+import json
+import logging
+import sys
+import time
+import tracemalloc
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from freqtrade.data.dataprovider import DataProvider
+from freqtrade.enums import RunMode
+from freqtrade.exchange import timeframe_to_minutes
+from freqtrade.resolvers import StrategyResolver
+
+from cyptrade.loader import StaticPairs, load_config, load_strategy
+
+
+logger = logging.getLogger(__name__)
+
+# Le cache d'indicateurs est défini à côté des stratégies, qui l'importent comme module voisin
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'user_data' / 'strategies'))
+from batch_indicators import shared_batch  # noqa: E402
+from indicator_cache import shared_indicators  # noqa: E402
+
+DEFAULT_CANDLES = [10_000, 100_000, 1_000_000]
+DEFAULT_PAIRS = [1, 10, 100]
+INFORMATIVE_TIMEFRAMES = ('1h', '4h', '1d')
+# Bougies × paires au-delà desquelles une combinaison est ignorée
+DEFAULT_BUDGET = 20_000_000
+DEFAULT_REPEAT = 3
+# Hausse tolérée par rapport à la référence (0.2 = +20 %)
+DEFAULT_MAX_REGRESSION = 0.2
+DEFAULT_BASELINE = 'user_data/benchmarks/baseline.json'
+RESULTS_DIR = 'user_data/benchmarks'
+START = pd.Timestamp('2020-01-01', tz='UTC')
+SEED = 42
+PHASES = ('populate_indicators', 'populate_entry_trend', 'populate_exit_trend')
+
+
+# -- données synthétiques ------------------------------------------------------
+
+def synthetic_ohlcv(pair: str, timeframe: str, candles: int, seed: int = SEED) -> DataFrame:
+    """Bougies déterministes : marche aléatoire log-normale, mèches et volume aléatoires"""
+    rng = np.random.default_rng([seed, zlib.crc32(pair.encode())])
+    returns = rng.normal(0.0, 0.002, candles)
+    close = 100.0 * np.exp(np.cumsum(returns))
+    open_ = np.concatenate(([100.0], close[:-1]))
+    spread = np.abs(rng.normal(0.0, 0.0015, (2, candles)))
+    high = np.maximum(open_, close) * (1 + spread[0])
+    low = np.minimum(open_, close) * (1 - spread[1])
+    volume = rng.lognormal(6.0, 0.8, candles)
+    dates = pd.date_range(START, periods=candles, freq=f'{timeframe_to_minutes(timeframe)}min')
+    return DataFrame({'date': dates, 'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume})
+
+
+def resample(frame: DataFrame, timeframe: str) -> DataFrame:
+    """Bougies d'un timeframe supérieur agrégées à partir des bougies de base (dernière incomplète retirée)"""
+    rule = f'{timeframe_to_minutes(timeframe)}min'
+    grouped = frame.resample(rule, on='date', label='left', closed='left')
+    result = grouped.agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'})
+    counts = grouped.size()
+    base_minutes = (frame['date'].iloc[1] - frame['date'].iloc[0]).total_seconds() / 60
+    complete = counts == timeframe_to_minutes(timeframe) / base_minutes
+    return result[complete.to_numpy()].reset_index()
+
+
+class SyntheticDataProvider(DataProvider):
+    """DataProvider servant les bougies synthétiques (timeframe de base et informatifs)"""
+
+    def __init__(self, config: dict, frames: Dict[tuple, DataFrame]):
+        super().__init__(config, None, StaticPairs(sorted({pair for pair, _ in frames})))
+        self.frames = frames
+
+    def historic_ohlcv(self, pair: str, timeframe: str, candle_type: str = '') -> DataFrame:
+        frame = self.frames.get((pair, timeframe))
+        return frame.copy() if frame is not None else DataFrame()
+
+    def get_pair_dataframe(self, pair: str, timeframe: Optional[str] = None, candle_type: str = '') -> DataFrame:
+        return self.historic_ohlcv(pair, timeframe or self._config['timeframe'], candle_type)
+
+
+def synthetic_frames(pairs: int, candles: int, timeframe: str) -> Dict[tuple, DataFrame]:
+    frames = {}
+    for index in range(pairs):
+        pair = f'SYN{index:03d}/USDT'
+        base = synthetic_ohlcv(pair, timeframe, candles)
+        frames[(pair, timeframe)] = base
+        for informative in INFORMATIVE_TIMEFRAMES:
+            if timeframe_to_minutes(informative) > timeframe_to_minutes(timeframe):
+                frames[(pair, informative)] = resample(base, informative)
+    return frames
+
+
+# -- mesures -------------------------------------------------------------------
+
+class Case(NamedTuple):
+    strategy: str
+    candles: int
+    pairs: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.strategy}|{self.candles}|{self.pairs}"
+
+
+def _prepare(config: dict, frames: Dict[tuple, DataFrame]):
+    """Stratégie neuve, caches partagés vidés"""
+    shared_indicators.clear()
+    shared_batch._warmed.clear()
+    strategy = load_strategy(copy.deepcopy(config))
+    strategy.dp = SyntheticDataProvider(strategy.config, frames)
+    strategy.ft_bot_start()
+    return strategy
+
+
+def _run(strategy, frames: Dict[tuple, DataFrame]) -> Dict[str, float]:
+    """Secondes par phase, toutes paires confondues (ordre de freqtrade : indicateurs de toutes les paires d'abord)"""
+    seconds = dict.fromkeys(PHASES, 0.0)
+    pairs = strategy.dp.current_whitelist()
+    analyzed = {}
+    for pair in pairs:
+        frame = frames[(pair, strategy.timeframe)].copy()
+        started = time.perf_counter()
+        analyzed[pair] = strategy.advise_indicators(frame, {'pair': pair})
+        seconds['populate_indicators'] += time.perf_counter() - started
+    for pair in pairs:
+        started = time.perf_counter()
+        frame = strategy.advise_entry(analyzed[pair], {'pair': pair})
+        seconds['populate_entry_trend'] += time.perf_counter() - started
+        started = time.perf_counter()
+        strategy.advise_exit(frame, {'pair': pair})
+        seconds['populate_exit_trend'] += time.perf_counter() - started
+    return seconds
+
+
+def measure(config: dict, case: Case, frames: Dict[tuple, DataFrame], repeat: int = DEFAULT_REPEAT) -> dict:
+    config = {**config, 'strategy': case.strategy}
+    best = dict.fromkeys(PHASES, float('inf'))
+    for _ in range(repeat):
+        strategy = _prepare(config, frames)
+        gc.collect()
+        for phase, seconds in _run(strategy, frames).items():
+            best[phase] = min(best[phase], seconds)
+        del strategy
+
+    strategy = _prepare(config, frames)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        _run(strategy, frames)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    total = sum(best.values())
+    return {**{phase: round(seconds, 6) for phase, seconds in best.items()},
+            'total': round(total, 6),
+            'candles_per_second': round(case.candles * case.pairs / total) if total else None,
+            'peak_mb': round(peak / 2 ** 20, 1)}
+
+
+def strategy_names(config: dict) -> List[str]:
+    """Toutes les stratégies de strategy_path (user_data/strategies)"""
+    found = StrategyResolver.search_all_objects(config, enum_failed=False)
+    return sorted(item['name'] for item in found)
+
+
+# -- référence -----------------------------------------------------------------
+
+def regressions(results: Dict[str, dict], baseline: Dict[str, dict], max_regression: float,
+                max_memory_regression: float) -> List[str]:
+    """Phases plus lentes (ou pic mémoire plus haut) que la référence au-delà du seuil"""
+    failures = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        for metric in PHASES + ('peak_mb',):
+            limit = max_memory_regression if metric == 'peak_mb' else max_regression
+            before, after = reference.get(metric), result.get(metric)
+            # Les durées sous la milliseconde sont du bruit de mesure
+            if before is None or after is None or (metric != 'peak_mb' and after < 1e-3):
+                continue
+            if after > before * (1 + limit):
+                failures.append(f"{key} {metric} : {before} -> {after} (+{after / before - 1:.0%} > {limit:.0%})")
+    return failures
+
+
+def _print_table(results: Dict[str, dict]) -> None:
+    print(f"{'Stratégie':<26}{'bougies':>9}{'paires':>7}{'indicateurs':>13}{'entrée':>9}{'sortie':>9}"
+          f"{'bougies/s':>12}{'pic Mo':>9}")
+    for key, result in results.items():
+        name, candles, pairs = key.split('|')
+        print(f"{name:<26}{candles:>9}{pairs:>7}{result['populate_indicators']:>13.3f}"
+              f"{result['populate_entry_trend']:>9.3f}{result['populate_exit_trend']:>9.3f}"
+              f"{result['candles_per_second'] or 0:>12,}{result['peak_mb']:>9.1f}")
+
+
+def run(config_files: Sequence[str], strategies: Optional[Sequence[str]], candles: Sequence[int],
+        pairs: Sequence[int], repeat: int = DEFAULT_REPEAT,
+        budget: int = DEFAULT_BUDGET) -> Tuple[Dict[str, dict], Dict[str, str]]:
+    """(mesures, erreurs) par cas ; un cas en échec n'interrompt pas les suivants"""
+    config = load_config(config_files, None, runmode=RunMode.BACKTEST)
+    names = list(strategies or strategy_names(config))
+    results, failed = {}, {}
+    for candle_count in candles:
+        for pair_count in pairs:
+            if candle_count * pair_count > budget:
+                logger.info(f"{candle_count} bougies × {pair_count} paires ignoré (budget {budget})")
+                continue
+            frames_by_timeframe: Dict[str, Dict[tuple, DataFrame]] = {}
+            for name in names:
+                case = Case(name, candle_count, pair_count)
+                try:
+                    timeframe = load_strategy(copy.deepcopy({**config, 'strategy': name})).timeframe
+                    if timeframe not in frames_by_timeframe:
+                        frames_by_timeframe[timeframe] = synthetic_frames(pair_count, candle_count, timeframe)
+                    results[case.key] = measure(config, case, frames_by_timeframe[timeframe], repeat)
+                except Exception as error:
+                    logger.exception(f"{case.key} : échec de la mesure")
+                    failed[case.key] = repr(error)
+                    continue
+                logger.info(f"{case.key} : {results[case.key]}")
+    return results, failed
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cyptrade.benchmark',
+                                     description='Benchmark des stratégies sur des bougies synthétiques')
+    parser.add_argument('--config', '-c', action='append', help='Configuration freqtrade (défaut: config.json)')
+    parser.add_argument('--strategies', '-s', nargs='+', help='Stratégies (défaut: toutes celles de user_data/strategies)')
+    parser.add_argument('--candles', type=int, nargs='+', default=DEFAULT_CANDLES, help='Bougies par paire')
+    parser.add_argument('--pairs', type=int, nargs='+', default=DEFAULT_PAIRS, help='Nombres de paires')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Passages par mesure (meilleur retenu)')
+    parser.add_argument('--budget', type=int, default=DEFAULT_BUDGET,
+                        help=f'Bougies × paires maximum par combinaison (défaut: {DEFAULT_BUDGET})')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help=f'Référence (défaut: {DEFAULT_BASELINE})')
+    parser.add_argument('--save-baseline', action='store_true', help='Enregistre les résultats comme référence')
+    parser.add_argument('--max-regression', type=float, default=DEFAULT_MAX_REGRESSION,
+                        help=f'Hausse de durée tolérée (défaut: {DEFAULT_MAX_REGRESSION})')
+    parser.add_argument('--max-memory-regression', type=float, default=DEFAULT_MAX_REGRESSION,
+                        help=f'Hausse du pic mémoire tolérée (défaut: {DEFAULT_MAX_REGRESSION})')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    results, failed = run(args.config or ['config.json'], args.strategies, args.candles, args.pairs, args.repeat,
+                          args.budget)
+    _print_table(results)
+    output = Path(RESULTS_DIR) / f"benchmark-{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=1))
+    print(f"Résultats : {output}")
+    for key, error in failed.items():
+        print(f"ÉCHEC {key} : {error}")
+    if failed:
+        print(f"{len(failed)} cas en échec sur {len(failed) + len(results)}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        baseline.update(results)
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(baseline, indent=1, sort_keys=True))
+        print(f"Référence enregistrée : {baseline_path}")
+        return 1 if failed else 0
+    if not baseline_path.exists():
+        print(f"Pas de référence ({baseline_path}) : relancer avec --save-baseline pour en créer une")
+        return 1 if failed else 0
+    failures = regressions(results, json.loads(baseline_path.read_text()), args.max_regression,
+                           args.max_memory_regression)
+    for failure in failures:
+        print(f"RÉGRESSION {failure}")
+    if not failures:
+        print(f"Aucune régression par rapport à {baseline_path}")
+    return 1 if failures or failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
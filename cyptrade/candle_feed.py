@@ -0,0 +1,99 @@
+"""
+Ecrivain du magasin de bougies partagé (voir user_data/strategies/candle_store.py)
+
+Un seul processus interroge l'exchange pour la whitelist et les timeframes
+demandés, et ajoute les bougies clôturées aux fichiers mappés que tous les bots
+lisent. Le rafraîchissement reprend celui de freqtrade
+(exchange.refresh_latest_ohlcv) : historique complet au démarrage, puis un
+appel par paire et par bougie.
+
+    python -m cyptrade.candle_feed --config config.json --timeframes 5m 1h 4h 1d
+
+Les bots activent la lecture avec `"candle_store": {"path": "user_data/candle_store"}`
+dans leur configuration (start-multiple-strategies.sh le fait).
+"""
+import argparse
+import logging
+import signal
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from freqtrade.enums import CandleType, RunMode
+from freqtrade.plugins.pairlist.pairlist_helpers import expand_pairlist
+from freqtrade.resolvers import ExchangeResolver
+
+from cyptrade.loader import load_config
+
+
+logger = logging.getLogger(__name__)
+
+# Le format est défini à côté des stratégies, qui l'importent comme module voisin
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'user_data' / 'strategies'))
+from candle_store import RETENTION, CandleStore  # noqa: E402
+
+DEFAULT_STORE = 'user_data/candle_store'
+# Bougies de démarrage conservées en plus de la limite de l'exchange (couvre celles des stratégies)
+DEFAULT_STARTUP = 400
+# Pause entre deux rafraîchissements (freqtrade n'interroge l'exchange que lorsqu'une bougie est due)
+POLL_SECONDS = 5
+
+
+def run(config_files: Sequence[str], timeframes: List[str], store_path: str = DEFAULT_STORE,
+        startup_candles: int = DEFAULT_STARTUP, poll_seconds: float = POLL_SECONDS,
+        iterations: Optional[int] = None, retention: int = RETENTION) -> None:
+    config = load_config(config_files, None, runmode=RunMode.UTIL_EXCHANGE)
+    config['startup_candle_count'] = startup_candles
+    timeframes = timeframes or [config['timeframe']]
+    exchange = ExchangeResolver.load_exchange(config, validate=False)
+    for timeframe in timeframes:
+        exchange.validate_required_startup_candles(startup_candles, timeframe)
+    pairs = expand_pairlist(config['exchange']['pair_whitelist'], list(exchange.get_markets().keys()))
+    candle_type = CandleType.from_string(config.get('candle_type_def', CandleType.SPOT))
+    jobs = [(pair, timeframe, candle_type) for pair in pairs for timeframe in timeframes]
+    if retention < exchange.ohlcv_candle_limit(config['timeframe'], candle_type) + startup_candles:
+        logger.warning(f"Rétention de {retention} bougies inférieure à l'historique demandé par les bots")
+    store = CandleStore(Path(store_path), exchange.name, writable=True, retention=retention)
+    logger.info(f"Magasin {store_path}/{exchange.name.lower()} : {len(pairs)} paires × {', '.join(timeframes)}")
+
+    running = True
+
+    def stop(signum, frame):
+        nonlocal running
+        running = False
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    iteration = 0
+    while running and (iterations is None or iteration < iterations):
+        iteration += 1
+        frames = exchange.refresh_latest_ohlcv(jobs, drop_incomplete=True)
+        added = {key: store.append(*key, frame) for key, frame in frames.items() if not frame.empty}
+        if any(added.values()):
+            logger.info(f"{sum(added.values())} bougies ajoutées "
+                        f"({sum(1 for count in added.values() if count)} séries)")
+        if running and (iterations is None or iteration < iterations):
+            time.sleep(poll_seconds)
+    exchange.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cyptrade.candle_feed',
+                                     description='Ecrivain du magasin de bougies partagé entre bots')
+    parser.add_argument('--config', '-c', action='append', required=True, help='Configuration freqtrade')
+    parser.add_argument('--timeframes', nargs='+', default=[], help='Timeframes (défaut: celui de la configuration)')
+    parser.add_argument('--store', default=DEFAULT_STORE, help=f'Dossier du magasin (défaut: {DEFAULT_STORE})')
+    parser.add_argument('--startup', type=int, default=DEFAULT_STARTUP,
+                        help=f'Bougies de démarrage à récupérer (défaut: {DEFAULT_STARTUP})')
+    parser.add_argument('--poll', type=float, default=POLL_SECONDS, help='Secondes entre deux rafraîchissements')
+    parser.add_argument('--retention', type=int, default=RETENTION,
+                        help=f'Bougies conservées par fichier (défaut: {RETENTION})')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    run(args.config, args.timeframes, args.store, args.startup, args.poll, retention=args.retention)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,341 @@
+"""
+Timeframe de détail adaptatif pour le backtesting
+
+Avec `"timeframe_detail": "1m"`, freqtrade charge toutes les bougies 1m de
+la période et découpe en 1m chaque bougie 5m où une paire a une position
+ouverte ou un signal d'entrée : environ 5 fois plus lent qu'un backtest 5m.
+Or le découpage ne change le résultat que si une sortie ROI, stoploss ou
+trailing stop peut se déclencher dans la bougie. Ici :
+
+- avant de découper la bougie d'un trade ouvert, ses high / low sont
+  comparés aux seuils du trade (stoploss et liquidation, plus haut stop que
+  le trailing peut atteindre dans la bougie, plus petit ROI applicable sur
+  sa durée) ; si aucun n'est atteignable, la bougie 5m est traitée telle
+  quelle, ce que le découpage aurait donné ;
+- les bougies où un signal place un ordre (entrée avec une place libre,
+  sortie d'un trade ouvert) sont toujours découpées : l'ordre, au prix
+  d'ouverture arrondi au pas de prix, peut ne se remplir que plus loin
+  dans la bougie ;
+- les bougies 1m sont lues dans un fichier en colonnes mappé en mémoire
+  (<datadir>/.detail/, format du magasin de bougies partagé), construit une
+  fois avec le chargeur de freqtrade (nettoyage et bougies manquantes
+  comprises) et reconstruit quand le fichier source change : seules les
+  pages des bougies découpées sont lues ;
+- les callbacks qui dépendent du prix ou de l'heure à l'intérieur de la
+  bougie (custom_stoploss, custom_exit, ajustement de position, prix
+  d'entrée / sortie personnalisés, timeouts, ordres non remplis...)
+  imposent le découpage, comme en mode détail complet.
+
+Le résultat est identique au mode détail complet (`verify` le contrôle).
+
+    python -m cyptrade.detail backtesting --config config.json --strategy TrendFollowingStrategy
+    python -m cyptrade.detail verify --config config.json --strategy TrendFollowingStrategy --timerange 20240801-20240901
+
+`backtesting` lance `freqtrade backtesting` (mêmes options) avec le mode
+adaptatif. Hyperopt n'est pas couvert : ses workers joblib sont des
+processus neufs, sans la greffe.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import pandas as pd
+import pyarrow.parquet as pq
+from pyarrow import feather
+
+from freqtrade.configuration import TimeRange
+from freqtrade.data.history import get_datahandler, load_pair_history
+from freqtrade.enums import CandleType, RunMode
+from freqtrade.optimize.backtesting import Backtesting
+from freqtrade.optimize.backtesting import (DATE_IDX, ELONG_IDX, ENTER_TAG_IDX, ESHORT_IDX, EXIT_TAG_IDX,
+                                            HIGH_IDX, LONG_IDX, LOW_IDX, SHORT_IDX)
+from freqtrade.persistence import LocalTrade
+from freqtrade.strategy import IStrategy
+
+from cyptrade.loader import load_config
+
+
+logger = logging.getLogger(__name__)
+
+# Le format est défini à côté des stratégies, qui l'importent comme module voisin
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'user_data' / 'strategies'))
+from candle_store import CandleFile, candle_path  # noqa: E402
+
+CACHE_DIR = '.detail'
+# Formats dont la colonne date se lit seule
+MAPPABLE_FORMATS = ('feather', 'parquet')
+# Marge relative sur les seuils (arrondis de prix, frais)
+TOLERANCE = 1e-3
+
+# Callbacks qui lisent le prix ou l'heure de chaque bougie de détail
+INTRABAR_CALLBACKS = ('custom_exit', 'custom_entry_price', 'custom_exit_price', 'adjust_entry_price',
+                      'adjust_exit_price', 'adjust_order_price', 'check_entry_timeout', 'check_exit_timeout')
+
+
+class DetailIndex:
+    """Bougies de détail d'une paire, lues à la demande dans le fichier mappé"""
+
+    def __init__(self, candles: CandleFile, first_ms: int, last_ms: int):
+        # Le fichier n'est pas remplacé pendant le backtest : un seul mapping suffit
+        candles._remap()
+        self.candles = candles
+        self.dates = candles.dates[:candles.count]
+        # Bornes des bougies réelles de la période : freqtrade ne complète les trous qu'entre elles
+        self.first_ms, self.last_ms = first_ms, last_ms
+
+    def rows(self, start_ms: int, end_ms: int) -> List[list]:
+        """Bougies [start_ms, end_ms[ au format des lignes de freqtrade (date, open, high, low, close)"""
+        dates = self.dates
+        first = int(dates.searchsorted(max(start_ms, self.first_ms), side='left'))
+        last = int(dates.searchsorted(min(end_ms - 1, self.last_ms), side='right'))
+        if last <= first:
+            return []
+        values = self.candles.values[:4, first:last].T.tolist()
+        return [[pd.Timestamp(date, unit='ms', tz='UTC'), *candle]
+                for date, candle in zip(dates[first:last].tolist(), values)]
+
+
+def _source_bounds(source: Path, data_format: str, timerange: Optional[TimeRange]) -> tuple:
+    """Première et dernière bougie réelle (ms) du fichier source dans la période"""
+    if data_format == 'feather':
+        column = feather.read_table(source, columns=['date'], memory_map=True).column('date')
+    else:
+        column = pq.read_table(source, columns=['date']).column('date')
+    dates = pd.DatetimeIndex(column.to_pandas()).as_unit('ms').asi8
+    if timerange is not None and timerange.starttype == 'date':
+        dates = dates[dates >= timerange.startts * 1000]
+    if timerange is not None and timerange.stoptype == 'date':
+        dates = dates[dates <= timerange.stopts * 1000]
+    return (int(dates[0]), int(dates[-1])) if len(dates) else (0, -1)
+
+
+def detail_index(datadir: Path, data_format: str, pair: str, timeframe: str, candle_type: CandleType,
+                 timerange: Optional[TimeRange] = None) -> Optional[DetailIndex]:
+    """
+    Index des bougies de détail d'une paire ; le fichier mappé est (re)construit si le fichier
+    source est plus récent. None si la paire n'a pas de bougies à ce timeframe.
+    """
+    source = get_datahandler(datadir, data_format)._pair_data_filename(datadir, pair, timeframe, candle_type)
+    if not source.exists():
+        return None
+    cache = candle_path(Path(datadir) / CACHE_DIR, '', pair, timeframe, candle_type)
+    if not cache.exists() or cache.stat().st_mtime_ns < source.stat().st_mtime_ns:
+        frame = load_pair_history(pair, timeframe, datadir, fill_up_missing=True, data_format=data_format,
+                                  candle_type=candle_type)
+        temporary = cache.with_suffix('.build')
+        temporary.unlink(missing_ok=True)
+        CandleFile(temporary, timeframe, writable=True).append(frame)
+        os.replace(temporary, cache)
+        logger.info(f"Index de détail {cache} construit ({len(frame)} bougies {timeframe})")
+    return DetailIndex(CandleFile(cache, timeframe), *_source_bounds(source, data_format, timerange))
+
+
+def _overridden(strategy: IStrategy, name: str) -> bool:
+    return getattr(type(strategy), name, None) is not getattr(IStrategy, name, None)
+
+
+class AdaptiveDetail:
+    """Décision de découpage et lecture des bougies de détail, greffées sur Backtesting"""
+
+    def __init__(self):
+        self.spread = 0
+        self.skipped = 0
+
+    # -- chargement -----------------------------------------------------------
+
+    def load_detail(self, backtesting: Backtesting) -> None:
+        """Remplace le chargement complet des bougies de détail par des index mappés"""
+        config = backtesting.config
+        if config['dataformat_ohlcv'] not in MAPPABLE_FORMATS:
+            logger.info(f"Format {config['dataformat_ohlcv']} : bougies de détail chargées en entier")
+            return self._original_load(backtesting)
+        # Chargement d'origine sans les bougies de détail (données futures : funding, mark)
+        timeframe_detail, backtesting.timeframe_detail = backtesting.timeframe_detail, None
+        try:
+            self._original_load(backtesting)
+        finally:
+            backtesting.timeframe_detail = timeframe_detail
+        candle_type = CandleType.from_string(config.get('candle_type_def', CandleType.SPOT))
+        indexes = {}
+        for pair in backtesting.pairlists.whitelist:
+            index = detail_index(config['datadir'], config['dataformat_ohlcv'], pair,
+                                 timeframe_detail, candle_type, backtesting.timerange)
+            if index is not None:
+                indexes[pair] = index
+        backtesting.detail_data = indexes
+
+    # -- décision -------------------------------------------------------------
+
+    def _always(self, backtesting: Backtesting) -> bool:
+        strategy = backtesting.strategy
+        return (strategy.use_custom_stoploss or strategy.use_custom_roi or strategy.position_adjustment_enable
+                or any(_overridden(strategy, name) for name in INTRABAR_CALLBACKS))
+
+    def _roi(self, strategy: IStrategy, first_minute: float, last_minute: float) -> Optional[float]:
+        """Plus petit ROI applicable à une durée de trade dans [first_minute, last_minute]"""
+        keys = sorted(strategy.minimal_roi)
+        active = [key for key in keys if key <= first_minute][-1:] + [key for key in keys
+                                                                       if first_minute < key <= last_minute]
+        return min((strategy.minimal_roi[key] for key in active), default=None)
+
+    def _trailing_distance(self, strategy: IStrategy) -> Optional[float]:
+        if not strategy.trailing_stop:
+            return None
+        distance = abs(strategy.stoploss)
+        if strategy.trailing_stop_positive is not None:
+            distance = min(distance, strategy.trailing_stop_positive)
+        return distance
+
+    def _trade_can_exit(self, backtesting: Backtesting, trade: LocalTrade, row: tuple) -> bool:
+        strategy = backtesting.strategy
+        if trade.has_open_orders or not trade.has_open_position:
+            return True
+        if row[ESHORT_IDX] if trade.is_short else row[ELONG_IDX]:
+            # Ordre de sortie au prix d'ouverture arrondi : rempli ou non selon la première bougie de détail
+            return True
+        low, high = row[LOW_IDX] * (1 - TOLERANCE), row[HIGH_IDX] * (1 + TOLERANCE)
+        distance = self._trailing_distance(strategy)
+        if trade.is_short:
+            stop = min(trade.stop_loss, trade.liquidation_price or trade.stop_loss)
+            if distance is not None:
+                stop = min(stop, low * (1 + distance / trade.leverage))
+            if high >= stop:
+                return True
+        else:
+            stop = max(trade.stop_loss, trade.liquidation_price or trade.stop_loss)
+            if distance is not None:
+                stop = max(stop, high * (1 - distance / trade.leverage))
+            if low <= stop:
+                return True
+        candle_start = row[DATE_IDX].to_pydatetime()
+        first = (candle_start - trade.open_date_utc).total_seconds() / 60 - 1
+        roi = self._roi(strategy, first, first + 2 + backtesting.timeframe_secs / 60)
+        return roi is not None and trade.calc_profit_ratio(low if trade.is_short else high) >= roi - TOLERANCE
+
+    def needs_detail(self, backtesting: Backtesting, pair: str, row: tuple) -> bool:
+        if self._always(backtesting):
+            return True
+        trades = LocalTrade.bt_trades_open_pp[pair]
+        if any(self._trade_can_exit(backtesting, trade, row) for trade in trades):
+            return True
+        if trades and not backtesting._position_stacking:
+            return False
+        # Même remarque pour l'ordre d'entrée
+        return row[LONG_IDX] == 1 or (backtesting._can_short and row[SHORT_IDX] == 1)
+
+    def get_detail_data(self, backtesting: Backtesting, pair: str, row: tuple) -> Optional[List[list]]:
+        if not self.needs_detail(backtesting, pair, row):
+            self.skipped += 1
+            return None
+        self.spread += 1
+        index = backtesting.detail_data[pair]
+        if not isinstance(index, DetailIndex):
+            return self._original_get(backtesting, pair, row)
+        start = int(row[DATE_IDX].timestamp() * 1000)
+        candles = index.rows(start, start + backtesting.timeframe_secs * 1000)
+        if not candles:
+            return None
+        signals = [row[LONG_IDX], row[ELONG_IDX], row[SHORT_IDX], row[ESHORT_IDX], row[ENTER_TAG_IDX],
+                   row[EXIT_TAG_IDX]]
+        return [candle + signals for candle in candles]
+
+    # -- installation ---------------------------------------------------------
+
+    def install(self) -> None:
+        """Greffe le mode adaptatif sur Backtesting (backtesting, hyperopt, outils cyptrade)"""
+        self.spread = self.skipped = 0
+        if getattr(Backtesting, '_adaptive_detail', None) is self:
+            return
+        self._original_load = Backtesting._load_bt_data_detail
+        self._original_get = Backtesting.get_detail_data
+        adaptive = self
+
+        def _load_bt_data_detail(backtesting):
+            if backtesting.timeframe_detail:
+                return adaptive.load_detail(backtesting)
+            return adaptive._original_load(backtesting)
+
+        def get_detail_data(backtesting, pair, row):
+            return adaptive.get_detail_data(backtesting, pair, row)
+
+        Backtesting._load_bt_data_detail = _load_bt_data_detail
+        Backtesting.get_detail_data = get_detail_data
+        Backtesting._adaptive_detail = self
+
+    def uninstall(self) -> None:
+        if getattr(Backtesting, '_adaptive_detail', None) is self:
+            Backtesting._load_bt_data_detail = self._original_load
+            Backtesting.get_detail_data = self._original_get
+            del Backtesting._adaptive_detail
+
+    def report(self) -> str:
+        total = self.spread + self.skipped
+        share = self.spread / total if total else 0
+        return f"{self.spread} bougies découpées sur {total} candidates ({share:.1%})"
+
+
+# Instance du processus
+adaptive_detail = AdaptiveDetail()
+
+
+def _backtest(config: dict) -> tuple:
+    """(trades, secondes) d'un backtest freqtrade"""
+    start = time.perf_counter()
+    backtesting = Backtesting(config)
+    try:
+        data, timerange = backtesting.load_bt_data()
+        backtesting.backtest_one_strategy(backtesting.strategylist[0], data, timerange)
+        results = backtesting.all_bt_content[backtesting.strategylist[0].get_strategy_name()]['results']
+    finally:
+        Backtesting.cleanup()
+    return results, time.perf_counter() - start
+
+
+def verify(config_files: Sequence[str], strategy: str, timerange: Optional[str]) -> bool:
+    """Compare les trades du mode détail complet et du mode adaptatif"""
+    config = load_config(config_files, strategy, timerange, runmode=RunMode.BACKTEST)
+    if not config.get('timeframe_detail'):
+        raise ValueError("timeframe_detail n'est pas défini dans la configuration")
+    adaptive_detail.uninstall()
+    full, full_seconds = _backtest(load_config(config_files, strategy, timerange, runmode=RunMode.BACKTEST))
+    adaptive_detail.install()
+    adaptive, adaptive_seconds = _backtest(config)
+    identical = full.reset_index(drop=True).equals(adaptive.reset_index(drop=True))
+    print(f"Détail complet : {len(full)} trades en {full_seconds:.1f}s")
+    print(f"Détail adaptatif : {len(adaptive)} trades en {adaptive_seconds:.1f}s ; {adaptive_detail.report()}")
+    print('Résultats identiques' if identical else 'RÉSULTATS DIFFÉRENTS')
+    if not identical:
+        pd.testing.assert_frame_equal(full.reset_index(drop=True), adaptive.reset_index(drop=True))
+    return identical
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ['backtesting']:
+        # Commande freqtrade avec le mode adaptatif
+        from freqtrade.main import main as freqtrade_main
+        adaptive_detail.install()
+        try:
+            freqtrade_main(argv)
+        except SystemExit as exit:
+            logger.info(f"Timeframe de détail adaptatif : {adaptive_detail.report()}")
+            return exit.code or 0
+        return 0
+
+    parser = argparse.ArgumentParser(prog='python -m cyptrade.detail',
+                                     description='Compare le mode détail complet et le mode adaptatif')
+    parser.add_argument('command', choices=['verify'], help='backtesting : freqtrade backtesting en mode adaptatif')
+    parser.add_argument('--config', '-c', action='append', required=True, help='Configuration freqtrade')
+    parser.add_argument('--strategy', '-s', required=True)
+    parser.add_argument('--timerange')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    return 0 if verify(args.config, args.strategy, args.timerange) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,470 @@
+"""
+Téléchargement incrémental et concurrent des bougies, toutes configurations confondues
+
+Remplace les `freqtrade download-data` lancés l'un après l'autre par configuration
+et par timeframe (whitelist USDT Binance de config.json, USDC Hyperliquid de
+config-hyperliquid-multi.json ; 1m, 5m, 1h, 4h, 1d) :
+
+- un index (user_data/data/download-index.json) garde, par exchange, paire,
+  timeframe et type de bougie, les intervalles déjà couverts, y compris ceux où
+  l'exchange n'a rien renvoyé (avant le listing d'une paire, maintenance) ;
+  quand le fichier de données a été modifié ailleurs (`freqtrade download-data`,
+  suppression), il est reconstruit à partir des suites de bougies du fichier,
+  trous compris ;
+- seuls les intervalles manquants de la période demandée sont téléchargés, en
+  pages de la taille maximale de l'exchange ;
+- les séries d'un même exchange sont téléchargées en parallèle (nombre de
+  requêtes simultanées borné, espacement minimal entre deux requêtes tiré du
+  rateLimit ccxt de l'exchange) et les exchanges en parallèle entre eux ;
+- chaque série est fusionnée avec le fichier existant puis enregistrée au format
+  de la configuration (feather par défaut) : les backtests la lisent telle quelle.
+
+    python -m cyptrade.download --timerange 20240101-
+    python -m cyptrade.download --config config.json --timeframes 5m 1h --timerange 20240101-20240301 --dry-run
+
+`--fake DOSSIER` remplace les exchanges par un faux exchange local qui sert les
+bougies d'un dossier de données freqtrade (même limite par requête, même
+rateLimit, refus des requêtes trop rapprochées) : le plan, la fusion et l'index
+se vérifient sans réseau.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from freqtrade.configuration import TimeRange
+from freqtrade.data.converter import clean_ohlcv_dataframe, ohlcv_to_dataframe
+from freqtrade.data.history import get_datahandler
+from freqtrade.enums import CandleType, RunMode, TradingMode
+from freqtrade.exceptions import DDosProtection, TemporaryError
+from freqtrade.exchange import timeframe_to_msecs, timeframe_to_prev_date
+from freqtrade.plugins.pairlist.pairlist_helpers import expand_pairlist
+from freqtrade.resolvers import ExchangeResolver
+from freqtrade.util import dt_ts
+
+from cyptrade.loader import load_config
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIGS = ['config.json', 'config-hyperliquid-multi.json']
+DEFAULT_TIMEFRAMES = ['1m', '5m', '1h', '4h', '1d']
+DEFAULT_DAYS = 30
+INDEX_NAME = 'download-index.json'
+# Requêtes simultanées par exchange
+DEFAULT_CONCURRENCY = 8
+# Nouvelles tentatives d'une page après un refus de l'exchange
+RETRIES = 3
+RETRY_SECONDS = 2.0
+# Séries terminées entre deux enregistrements de l'index (et en fin de téléchargement) ;
+# après un arrêt brutal, les fichiers modifiés depuis sont recalés sur leur contenu
+INDEX_SAVE_JOBS = 50
+
+
+class Series(NamedTuple):
+    exchange: str
+    pair: str
+    timeframe: str
+    candle_type: CandleType
+
+    @property
+    def key(self) -> str:
+        return f"{self.exchange}|{self.pair}|{self.timeframe}|{self.candle_type.value}"
+
+
+# -- intervalles [début, fin[ en ms ------------------------------------------
+
+def merge_intervals(intervals: Sequence[Sequence[int]]) -> List[List[int]]:
+    merged: List[List[int]] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_intervals(start: int, end: int, covered: Sequence[Sequence[int]]) -> List[List[int]]:
+    """Parties de [start, end[ qui ne sont pas couvertes"""
+    missing, cursor = [], start
+    for covered_start, covered_end in merge_intervals(covered):
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            missing.append([cursor, covered_start])
+        cursor = max(cursor, covered_end)
+    if cursor < end:
+        missing.append([cursor, end])
+    return missing
+
+
+def candle_runs(dates: np.ndarray, timeframe_ms: int) -> List[List[int]]:
+    """Intervalles couverts par des bougies consécutives"""
+    breaks = np.flatnonzero(np.diff(dates) != timeframe_ms)
+    starts = np.concatenate(([0], breaks + 1))
+    ends = np.concatenate((breaks, [len(dates) - 1]))
+    return [[int(dates[start]), int(dates[end]) + timeframe_ms] for start, end in zip(starts, ends)]
+
+
+# -- index -------------------------------------------------------------------
+
+class DownloadIndex:
+    """Intervalles couverts par série, avec l'état du fichier de données qui les contient"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: Dict[str, dict] = {}
+        self._lock = Lock()
+        if self.path.exists():
+            self.entries = json.loads(self.path.read_text())
+
+    def save(self) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = self.path.with_suffix('.tmp')
+            temporary.write_text(json.dumps(self.entries, indent=1, sort_keys=True))
+            os.replace(temporary, self.path)
+
+    @staticmethod
+    def _stat(path: Path) -> Optional[List[int]]:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def covered(self, series: Series, datafile: Path, handler) -> List[List[int]]:
+        """Intervalles couverts, recalés sur le fichier de données s'il a changé depuis le dernier passage"""
+        with self._lock:
+            entry = self.entries.get(series.key, {'covered': [], 'file': None})
+            stat = self._stat(datafile)
+            if stat != entry['file']:
+                # Fichier modifié ailleurs (ou premier passage) : couverture = suites de bougies du fichier
+                covered = []
+                if stat is not None:
+                    frame = handler.ohlcv_load(series.pair, series.timeframe, series.candle_type,
+                                               fill_missing=False, warn_no_data=False)
+                    covered = candle_runs(pd.DatetimeIndex(frame['date']).as_unit('ms').asi8,
+                                          timeframe_to_msecs(series.timeframe)) if not frame.empty else []
+                entry = {'covered': covered, 'file': stat}
+                self.entries[series.key] = entry
+            return entry['covered']
+
+    def add(self, series: Series, intervals: Sequence[Sequence[int]], datafile: Path) -> None:
+        with self._lock:
+            entry = self.entries.setdefault(series.key, {'covered': [], 'file': None})
+            entry['covered'] = merge_intervals(entry['covered'] + [list(interval) for interval in intervals])
+            entry['file'] = self._stat(datafile)
+
+
+# -- sources de bougies --------------------------------------------------------
+
+class RateLimiter:
+    """Espacement minimal entre deux requêtes d'un même exchange (boucle asyncio unique)"""
+
+    def __init__(self, interval_seconds: float):
+        self.interval = interval_seconds
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        # L'heure est relue au réveil : après un blocage de la boucle, les requêtes en attente ne partent pas ensemble
+        while (delay := self._next - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+        self._next = time.monotonic() + self.interval
+
+
+class ExchangeSource:
+    """Exchange freqtrade (ccxt async) ; les requêtes tournent sur sa boucle"""
+
+    def __init__(self, config: dict):
+        self.exchange = ExchangeResolver.load_exchange(config, validate=False)
+        self.name = self.exchange.name.lower()
+        self.rate_limit_ms = getattr(self.exchange._api_async, 'rateLimit', 0) or 0
+
+    def pairs(self, whitelist: Sequence[str]) -> List[str]:
+        return expand_pairlist(list(whitelist), list(self.exchange.get_markets().keys()))
+
+    def candle_limit(self, timeframe: str, candle_type: CandleType, since_ms: int) -> int:
+        return self.exchange.ohlcv_candle_limit(timeframe, candle_type, since_ms)
+
+    async def fetch_ohlcv(self, pair: str, timeframe: str, candle_type: CandleType, since_ms: int) -> list:
+        _, _, _, data, _ = await self.exchange._async_get_candle_history(pair, timeframe, candle_type, since_ms)
+        return data
+
+    def run(self, coroutine):
+        return self.exchange.loop.run_until_complete(coroutine)
+
+    def close(self) -> None:
+        self.exchange.close()
+
+
+class FakeExchange:
+    """
+    Faux exchange local : sert les bougies d'un dossier de données freqtrade, par pages
+    de `candle_limit` à partir de `since`, comme fetch_ohlcv, et refuse (DDosProtection)
+    une requête arrivée moins de `rate_limit_ms` après la précédente.
+    """
+
+    def __init__(self, datadir: Path, name: str, data_format: str = 'feather',
+                 trading_mode: TradingMode = TradingMode.SPOT, candle_limit: int = 1000,
+                 rate_limit_ms: float = 20, latency_ms: float = 5):
+        self.name = name
+        self.datadir = Path(datadir)
+        self.handler = get_datahandler(self.datadir, data_format)
+        self.trading_mode = trading_mode
+        self.rate_limit_ms = rate_limit_ms
+        self.latency = latency_ms / 1000
+        self._candle_limit = candle_limit
+        self._candles: Dict[Tuple[str, str, CandleType], list] = {}
+        self._last_request = 0.0
+        self.requests = 0
+        self.refused = 0
+        self.loop = asyncio.new_event_loop()
+
+    def pairs(self, whitelist: Sequence[str]) -> List[str]:
+        available = [pair for pair, *_ in self.handler.ohlcv_get_available_data(self.datadir, self.trading_mode)]
+        return expand_pairlist(list(whitelist), sorted(set(available)))
+
+    def candle_limit(self, timeframe: str, candle_type: CandleType, since_ms: int) -> int:
+        return self._candle_limit
+
+    def _series(self, pair: str, timeframe: str, candle_type: CandleType) -> list:
+        key = (pair, timeframe, candle_type)
+        if key not in self._candles:
+            frame = self.handler.ohlcv_load(pair, timeframe, candle_type, fill_missing=False, warn_no_data=False)
+            dates = pd.DatetimeIndex(frame['date']).as_unit('ms').asi8 if not frame.empty else []
+            self._candles[key] = [[int(date), *values] for date, values in
+                                  zip(dates, frame[['open', 'high', 'low', 'close', 'volume']].values.tolist())]
+        return self._candles[key]
+
+    async def fetch_ohlcv(self, pair: str, timeframe: str, candle_type: CandleType, since_ms: int) -> list:
+        now = time.monotonic()
+        self.requests += 1
+        if (now - self._last_request) * 1000 < self.rate_limit_ms * 0.95:
+            self.refused += 1
+            raise DDosProtection(f"{self.name} : requête trop rapprochée de la précédente")
+        self._last_request = now
+        await asyncio.sleep(self.latency)
+        candles = self._series(pair, timeframe, candle_type)
+        dates = [candle[0] for candle in candles]
+        first = pd.Index(dates).searchsorted(since_ms) if dates else 0
+        return candles[first:first + self._candle_limit]
+
+    def run(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def close(self) -> None:
+        self.loop.close()
+        logger.info(f"Faux exchange {self.name} : {self.requests} requêtes, {self.refused} refusées")
+
+
+# -- téléchargement ------------------------------------------------------------
+
+class Job(NamedTuple):
+    series: Series
+    gaps: List[List[int]]
+    datafile: Path
+
+
+class Downloader:
+    """Télécharge les intervalles manquants des séries d'un exchange"""
+
+    def __init__(self, source, handler, index: DownloadIndex, concurrency: int = DEFAULT_CONCURRENCY):
+        self.source = source
+        self.handler = handler
+        self.index = index
+        self.limiter = RateLimiter(source.rate_limit_ms / 1000)
+        self.concurrency = concurrency
+        self.requests = 0
+        self._unsaved = 0
+
+    async def _page(self, series: Series, since_ms: int) -> list:
+        for attempt in range(RETRIES + 1):
+            async with self.semaphore:
+                await self.limiter.wait()
+                self.requests += 1
+                try:
+                    return await self.source.fetch_ohlcv(series.pair, series.timeframe, series.candle_type, since_ms)
+                except (DDosProtection, TemporaryError) as error:
+                    if attempt == RETRIES:
+                        raise
+                    logger.debug(f"{series.key} : {error}, nouvelle tentative")
+            await asyncio.sleep(RETRY_SECONDS * (attempt + 1))
+
+    async def _gap(self, series: Series, start: int, end: int) -> list:
+        """Pages successives de [start, end[ ; un saut de dates (listing, maintenance) avance le curseur"""
+        timeframe_ms = timeframe_to_msecs(series.timeframe)
+        candles, cursor = [], start
+        while cursor < end:
+            page = await self._page(series, cursor)
+            page = [candle for candle in page if cursor <= candle[0] < end]
+            if page:
+                candles.extend(page)
+                cursor = page[-1][0] + timeframe_ms
+            else:
+                cursor += timeframe_ms * self.source.candle_limit(series.timeframe, series.candle_type, cursor)
+        return candles
+
+    def _store(self, series: Series, candles: list) -> int:
+        if not candles:
+            return 0
+        new = ohlcv_to_dataframe(candles, series.timeframe, series.pair, fill_missing=False, drop_incomplete=False)
+        existing = self.handler.ohlcv_load(series.pair, series.timeframe, series.candle_type,
+                                           fill_missing=False, warn_no_data=False)
+        merged = clean_ohlcv_dataframe(pd.concat([existing, new]) if not existing.empty else new,
+                                       series.timeframe, series.pair, fill_missing=False, drop_incomplete=False)
+        self.handler.ohlcv_store(series.pair, series.timeframe, merged, series.candle_type)
+        return len(new)
+
+    async def _job(self, job: Job) -> int:
+        results = await asyncio.gather(*(self._gap(job.series, start, end) for start, end in job.gaps),
+                                       return_exceptions=True)
+        candles, fetched = [], []
+        for gap, result in zip(job.gaps, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"{job.series.key} {_format(gap)} : {result!r}")
+                continue
+            candles.extend(result)
+            fetched.append(gap)
+        added = await asyncio.get_running_loop().run_in_executor(None, self._store, job.series, candles)
+        # Seuls les intervalles téléchargés en entier sont marqués couverts
+        self.index.add(job.series, fetched, job.datafile)
+        self._unsaved += 1
+        if self._unsaved >= INDEX_SAVE_JOBS:
+            self._unsaved = 0
+            await asyncio.get_running_loop().run_in_executor(None, self.index.save)
+        if added:
+            logger.info(f"{job.series.key} : {added} bougies")
+        return added
+
+    def run(self, jobs: Sequence[Job]) -> int:
+        async def run_all():
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+            return await asyncio.gather(*(self._job(job) for job in jobs))
+
+        try:
+            return sum(self.source.run(run_all()))
+        finally:
+            self.index.save()
+
+
+def _format(interval: Sequence[int]) -> str:
+    start, end = (datetime.fromtimestamp(value / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M')
+                  for value in interval)
+    return f"[{start} → {end}["
+
+
+def plan(index: DownloadIndex, source, config: dict, timeframes: Sequence[str], start_ms: int,
+         stop_ms: Optional[int] = None) -> List[Job]:
+    """Intervalles manquants de chaque série de la configuration"""
+    handler = get_datahandler(config['datadir'], config.get('dataformat_ohlcv', 'feather'))
+    candle_type = CandleType.from_string(config.get('candle_type_def', CandleType.SPOT))
+    jobs = []
+    for pair in source.pairs(config['exchange']['pair_whitelist']):
+        for timeframe in timeframes:
+            series = Series(source.name, pair, timeframe, candle_type)
+            # Seules les bougies clôturées sont téléchargées
+            end = dt_ts(timeframe_to_prev_date(timeframe))
+            if stop_ms is not None:
+                end = min(end, stop_ms)
+            start = dt_ts(timeframe_to_prev_date(timeframe, datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc)))
+            datafile = handler._pair_data_filename(config['datadir'], pair, timeframe, candle_type)
+            gaps = missing_intervals(start, end, index.covered(series, datafile, handler))
+            if gaps:
+                jobs.append(Job(series, gaps, datafile))
+    return jobs
+
+
+def _period(value: Optional[str], days: int) -> Tuple[int, Optional[int]]:
+    """(début, fin) en ms d'une timerange freqtrade ; sans début, les `days` derniers jours"""
+    timerange = TimeRange.parse_timerange(value) if value else TimeRange()
+    start = timerange.startts * 1000 if timerange.starttype == 'date' else dt_ts() - days * 86400 * 1000
+    return start, timerange.stopts * 1000 if timerange.stoptype == 'date' else None
+
+
+def run(config_files: Sequence[str], timeframes: Sequence[str], start_ms: int, stop_ms: Optional[int] = None,
+        concurrency: int = DEFAULT_CONCURRENCY, dry_run: bool = False,
+        fake: Optional[Path] = None) -> Dict[str, int]:
+    """Télécharge les bougies manquantes ; retourne le nombre de bougies ajoutées par exchange"""
+    # Une source par exchange : les configurations d'un même exchange partagent ses requêtes
+    groups: Dict[str, list] = {}
+    index = None
+    for config_file in config_files:
+        config = load_config([config_file], None, runmode=RunMode.UTIL_EXCHANGE)
+        if index is None:
+            index = DownloadIndex(Path(config['user_data_dir']) / 'data' / INDEX_NAME)
+        name = config['exchange']['name'].lower()
+        if name not in groups:
+            source = (FakeExchange(Path(fake) / name, name, config.get('dataformat_ohlcv', 'feather'),
+                                   TradingMode(config.get('trading_mode', TradingMode.SPOT)))
+                      if fake is not None else ExchangeSource(config))
+            groups[name] = [source, config, []]
+        source, _, jobs = groups[name]
+        known = {job.series for job in jobs}
+        jobs.extend(job for job in plan(index, source, config, timeframes, start_ms, stop_ms) if job.series not in known)
+
+    for name, (source, config, jobs) in groups.items():
+        candles = sum((end - start) // timeframe_to_msecs(job.series.timeframe)
+                      for job in jobs for start, end in job.gaps)
+        logger.info(f"{name} : {len(jobs)} séries incomplètes, ~{candles} bougies à télécharger")
+        for job in jobs if dry_run else []:
+            print(f"{job.series.key} " + ' '.join(_format(gap) for gap in job.gaps))
+    if dry_run:
+        for source, _, _ in groups.values():
+            source.close()
+        index.save()
+        return {}
+
+    def download(group) -> int:
+        source, config, jobs = group
+        handler = get_datahandler(config['datadir'], config.get('dataformat_ohlcv', 'feather'))
+        downloader = Downloader(source, handler, index, concurrency)
+        try:
+            return downloader.run(jobs)
+        finally:
+            logger.info(f"{source.name} : {downloader.requests} requêtes")
+            source.close()
+
+    with ThreadPoolExecutor(max_workers=max(1, len(groups))) as executor:
+        added = dict(zip(groups, executor.map(download, groups.values())))
+    index.save()
+    return added
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cyptrade.download',
+                                     description='Téléchargement incrémental et concurrent des bougies')
+    parser.add_argument('--config', '-c', action='append', help=f'Configurations (défaut: {" ".join(DEFAULT_CONFIGS)})')
+    parser.add_argument('--timeframes', '-t', nargs='+', default=DEFAULT_TIMEFRAMES)
+    parser.add_argument('--timerange', help=f'Période (défaut: les {DEFAULT_DAYS} derniers jours)')
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help='Jours à télécharger sans --timerange')
+    parser.add_argument('--concurrency', '-j', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'Requêtes simultanées par exchange (défaut: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--dry-run', action='store_true', help='Affiche les intervalles manquants sans télécharger')
+    parser.add_argument('--fake', type=Path, help='Faux exchange local servant les bougies de DOSSIER/<exchange>')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    added = run(args.config or DEFAULT_CONFIGS, args.timeframes, *_period(args.timerange, args.days),
+                concurrency=args.concurrency, dry_run=args.dry_run, fake=args.fake)
+    for name, count in added.items():
+        print(f"{name} : {count} bougies ajoutées")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
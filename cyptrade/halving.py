@@ -0,0 +1,253 @@
+"""
+Hyperopt par divisions successives (successive halving)
+
+`freqtrade hyperopt` backteste chaque epoch sur toute la période (fusions des
+informatifs 1h/4h comprises), y compris les jeux de paramètres sans espoir.
+Ici les candidats sont tirés par paquets (le sampler optuna de freqtrade,
+comme pour un hyperopt normal) puis évalués par paliers :
+
+- palier 0 : chaque candidat est backtesté sur une courte tranche du début de
+  la période (1/9 par défaut) ;
+- seul le meilleur tiers (--eta 3) passe au palier suivant, sur une tranche
+  trois fois plus longue, et ainsi de suite jusqu'à la période complète ;
+- un candidat sans assez de trades sur sa tranche (loss maximal) n'est jamais
+  promu ; le nombre minimal de trades est réduit au prorata de la tranche.
+
+Les indicateurs sont calculés une fois sur toute la période (comme
+freqtrade) : chaque tranche est un préfixe des dataframes analysés. Les
+candidats abandonnés sont signalés au sampler comme « pruned » avec leur
+dernière loss, les autres reçoivent leur loss sur la période complète.
+
+Seules les évaluations sur la période complète sont écrites dans le fichier
+.fthypt (lisible par `freqtrade hyperopt-show` et cyptrade.hyperopt_db) ;
+chaque décision (tranche, loss, rang, seuil, promu / abandonné) est journalisée
+dans le fichier .halving.jsonl voisin, avec le coût en bougies backtestées.
+
+    python -m cyptrade.halving --config config.json --strategy HyperoptStrategy \\
+        --timerange 20250101-20250131 --epochs 270 --spaces buy sell --hyperopt-loss MultiMetricHyperOptLoss
+"""
+import argparse
+import json
+import logging
+import sys
+from math import ceil
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from joblib import Parallel, dump, load
+from optuna.trial import TrialState
+
+from freqtrade.enums import RunMode
+from freqtrade.exchange import timeframe_to_prev_date
+from freqtrade.optimize.hyperopt import Hyperopt
+from freqtrade.optimize.hyperopt.hyperopt_optimizer import MAX_LOSS
+from freqtrade.optimize.hyperopt_tools import HyperoptTools
+from freqtrade.util import get_progress_tracker
+
+from cyptrade.loader import load_config
+
+
+logger = logging.getLogger(__name__)
+
+ETA = 3
+MIN_SLICE = 1 / 9
+
+
+class Rung(NamedTuple):
+    """Palier : tranche de la période évaluée"""
+    fraction: float
+    end: Any
+    data_file: Path
+    candles: int
+    min_trades: int
+
+
+def rung_fractions(min_slice: float, eta: int) -> List[float]:
+    """Fractions de la période de chaque palier : min_slice, min_slice × eta, ... 1"""
+    fractions = []
+    fraction = min_slice
+    while fraction < 1 - 1e-9:
+        fractions.append(fraction)
+        fraction *= eta
+    return fractions + [1.0]
+
+
+class HalvingHyperopt(Hyperopt):
+    """Hyperopt freqtrade dont les epochs sont évalués par paliers (voir le module)"""
+
+    def __init__(self, config: dict, eta: int = ETA, min_slice: float = MIN_SLICE,
+                 bracket_size: Optional[int] = None) -> None:
+        super().__init__(config)
+        self.eta = eta
+        self.fractions = rung_fractions(min_slice, eta)
+        # Paquet par défaut : assez de candidats pour en garder au moins eta au dernier palier
+        self.bracket_size = bracket_size or eta ** len(self.fractions)
+        self.min_trades = config.get('hyperopt_min_trades', 1)
+        self.audit_file = self.results_file.with_suffix('.halving.jsonl')
+        self.rungs: List[Rung] = []
+        self.cost = 0
+        self.evaluations = [0] * len(self.fractions)
+
+    def _prepare_rungs(self) -> None:
+        """Tranches de données de chaque palier (préfixes des dataframes analysés)"""
+        optimizer = self.hyperopter
+        processed = load(self.data_pickle_file)
+        start, end = optimizer.min_date, optimizer.max_date
+        for rung, fraction in enumerate(self.fractions):
+            if fraction < 1:
+                rung_end = timeframe_to_prev_date(self.config['timeframe'], start + (end - start) * fraction)
+                data_file = self.data_pickle_file.with_name(f'hyperopt_tickerdata_rung{rung}.pkl')
+                dump({pair: frame[frame['date'] <= rung_end] for pair, frame in processed.items()}, data_file)
+            else:
+                rung_end, data_file = end, self.data_pickle_file
+            candles = sum(int(((frame['date'] >= start) & (frame['date'] <= rung_end)).sum())
+                          for frame in processed.values())
+            min_trades = max(1, ceil(self.min_trades * fraction)) if self.min_trades else 0
+            self.rungs.append(Rung(fraction, rung_end, data_file, candles, min_trades))
+            logger.info(f"Palier {rung} : jusqu'au {rung_end:%Y-%m-%d %H:%M} ({fraction:.1%} de la période, "
+                        f"{candles} bougies, {min_trades} trades minimum)")
+
+    def _evaluate(self, parallel, rung: Rung, params: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        optimizer = self.hyperopter
+        optimizer.data_pickle_file, optimizer.max_date = rung.data_file, rung.end
+        self.config['hyperopt_min_trades'] = rung.min_trades
+        try:
+            return self.run_optimizer_parallel(parallel, params)
+        finally:
+            self.config['hyperopt_min_trades'] = self.min_trades
+
+    def _audit(self, record: Dict[str, Any]) -> None:
+        with self.audit_file.open('a') as audit:
+            audit.write(json.dumps(record, default=str) + '\n')
+
+    def _run_bracket(self, parallel, pbar, task, bracket: int, first_epoch: int, size: int) -> int:
+        """Un paquet de candidats évalué palier par palier ; retourne le nombre de candidats tirés"""
+        asked, is_random = self.get_asked_points(n_points=size, dimensions=self.hyperopter.o_dimensions)
+        alive = list(range(len(asked)))
+        for level, rung in enumerate(self.rungs):
+            results = self._evaluate(parallel, rung, [asked[index].params for index in alive])
+            self.cost += rung.candles * len(alive)
+            self.evaluations[level] += len(alive)
+            last = level == len(self.rungs) - 1
+            ranked = sorted(zip(alive, results), key=lambda item: item[1]['loss'])
+            keep = len(ranked) if last else ceil(len(ranked) / self.eta)
+            promoted = [index for index, val in ranked[:keep] if last or val['loss'] < MAX_LOSS]
+            threshold = ranked[keep - 1][1]['loss']
+            for rank, (index, val) in enumerate(ranked, 1):
+                asked[index].report(val['loss'], level)
+                decision = 'completed' if last else 'promoted' if index in promoted else 'pruned'
+                metrics = val['results_metrics']
+                self._audit({
+                    'bracket': bracket, 'rung': level, 'epoch': first_epoch + index,
+                    'fraction': rung.fraction, 'end': rung.end, 'min_trades': rung.min_trades,
+                    'loss': val['loss'], 'trades': metrics.get('total_trades'),
+                    'profit_total': metrics.get('profit_total'), 'rank': rank, 'of': len(ranked),
+                    'threshold': threshold, 'decision': decision, 'params': asked[index].params,
+                })
+                if decision == 'pruned':
+                    self.opt.tell(asked[index], state=TrialState.PRUNED)
+                    pbar.update(task, advance=1)
+                elif last:
+                    self.opt.tell(asked[index], val['loss'])
+                    self.evaluate_result(val, first_epoch + index, is_random[index])
+                    pbar.update(task, advance=1)
+            logger.info(f"Paquet {bracket}, palier {level} : {len(promoted) if not last else len(ranked)} "
+                        f"sur {len(ranked)} {'évalués sur la période complète' if last else 'promus'} "
+                        f"(seuil de loss {threshold:.5f})")
+            self.hyperopter.handle_mp_logging()
+            alive = promoted
+            if not alive:
+                break
+        return len(asked)
+
+    def start(self) -> None:
+        self.random_state = self._set_random_state(self.config.get('hyperopt_random_state'))
+        logger.info(f"Using optimizer random state: {self.random_state}")
+        self.hyperopt_table_header = -1
+        self.hyperopter.prepare_hyperopt()
+        self._prepare_rungs()
+        self.opt = self.hyperopter.get_optimizer(self.random_state)
+
+        try:
+            with Parallel(n_jobs=self.config.get('hyperopt_jobs', -1)) as parallel:
+                with get_progress_tracker(cust_callables=[self._hyper_out]) as pbar:
+                    task = pbar.add_task("Candidats", total=self.total_epochs)
+                    sampled, bracket = 0, 0
+                    while sampled < self.total_epochs:
+                        size = min(self.bracket_size, self.total_epochs - sampled)
+                        drawn = self._run_bracket(parallel, pbar, task, bracket, sampled + 1, size)
+                        if not drawn:
+                            break
+                        sampled += drawn
+                        bracket += 1
+        except KeyboardInterrupt:
+            print("User interrupted..")
+        finally:
+            for rung in self.rungs:
+                if rung.data_file != self.data_pickle_file:
+                    rung.data_file.unlink(missing_ok=True)
+
+        full = self.rungs[-1].candles if self.rungs else 0
+        summary = {
+            'candidates': sum(self.evaluations[:1]), 'evaluations_per_rung': self.evaluations,
+            'candles_backtested': self.cost,
+            'equivalent_epochs': round(self.cost / full, 2) if full else 0,
+            'best_loss': self.current_best_loss if self.current_best_epoch else None,
+            'best_epoch': self.current_best_epoch['current_epoch'] if self.current_best_epoch else None,
+        }
+        self._audit({'summary': summary})
+        logger.info(f"{summary['candidates']} candidats pour le coût de {summary['equivalent_epochs']} epochs "
+                    f"complets ; décisions dans {self.audit_file}")
+
+        if self.current_best_epoch:
+            HyperoptTools.try_export_params(self.config, self.hyperopter.get_strategy_name(),
+                                            self.current_best_epoch)
+            HyperoptTools.show_epoch_details(self.current_best_epoch, self.total_epochs, self.print_json)
+        else:
+            print(f"Aucun candidat satisfaisant sur {summary['candidates']} évalués.")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cyptrade.halving',
+                                     description='Hyperopt par divisions successives')
+    parser.add_argument('--config', '-c', action='append', required=True, help='Configuration freqtrade')
+    parser.add_argument('--strategy', '-s', required=True)
+    parser.add_argument('--timerange', help='Période (ex: 20250101-20250131)')
+    parser.add_argument('--epochs', '-e', type=int, default=100, help='Nombre de candidats tirés')
+    parser.add_argument('--spaces', nargs='+', default=['default'], help='Espaces (comme freqtrade hyperopt)')
+    parser.add_argument('--hyperopt-loss', default='SharpeHyperOptLossDaily', help='Fonction de loss freqtrade')
+    parser.add_argument('--min-trades', type=int, help='Trades minimum sur la période complète')
+    parser.add_argument('--timeframe', '-i')
+    parser.add_argument('--max-open-trades', type=int)
+    parser.add_argument('--dry-run-wallet', type=float)
+    parser.add_argument('--random-state', type=int)
+    parser.add_argument('--job-workers', '-j', type=int, default=-1, help='Processus (défaut: tous les cœurs)')
+    parser.add_argument('--eta', type=int, default=ETA, help=f'Facteur de sélection entre paliers (défaut: {ETA})')
+    parser.add_argument('--min-slice', type=float, default=MIN_SLICE,
+                        help='Fraction de la période du premier palier (défaut: 1/9)')
+    parser.add_argument('--bracket-size', type=int, help='Candidats par paquet (défaut: eta ^ nombre de paliers)')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.eta < 2 or not 0 < args.min_slice <= 1:
+        parser.error('--eta doit valoir au moins 2 et --min-slice être dans ]0, 1]')
+
+    config = load_config(args.config, args.strategy, args.timerange, runmode=RunMode.HYPEROPT,
+                         epochs=args.epochs, spaces=args.spaces, hyperopt_loss=args.hyperopt_loss,
+                         hyperopt_min_trades=args.min_trades, timeframe=args.timeframe,
+                         max_open_trades=args.max_open_trades, dry_run_wallet=args.dry_run_wallet,
+                         hyperopt_random_state=args.random_state, hyperopt_jobs=args.job_workers)
+    # Les tranches sont découpées dans les indicateurs calculés une fois sur toute la période
+    config['analyze_per_epoch'] = False
+
+    from filelock import FileLock, Timeout
+    try:
+        with FileLock(Hyperopt.get_lock_filename(config)).acquire(timeout=1):
+            HalvingHyperopt(config, args.eta, args.min_slice, args.bracket_size).start()
+    except Timeout:
+        print('Un autre hyperopt est en cours sur ce dossier user_data.', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,454 @@
+"""
+Hôte multi-stratégies : plusieurs bots freqtrade dans un seul processus
+
+start-multiple-strategies.sh lance un `freqtrade trade` par stratégie : chaque
+processus interroge l'exchange pour les mêmes bougies, tient son propre
+DataProvider et recalcule les mêmes indicateurs. L'hôte construit un
+FreqtradeBot par stratégie dans le même processus :
+- un seul exchange (marchés, cache des bougies `_klines`, limites d'appels)
+  partagé par tous les bots ;
+- à chaque itération, un seul rafraîchissement des bougies pour l'union des
+  whitelists et des paires informatives ; le rafraîchissement propre à chaque
+  bot ne récupère plus que ce qui manque (whitelist modifiée entre-temps) ;
+- les indicateurs passent par indicator_cache.shared_indicators, commun au
+  processus : une paire n'est calculée qu'une fois pour toutes les stratégies ;
+- chaque stratégie garde sa configuration, son portefeuille (Wallets), sa base
+  de trades (<db-dir>/tradesv3[.dryrun]-<stratégie>.sqlite) et son espace
+  d'API : http://127.0.0.1:8080/<stratégie>/api/v1/... (une URL de bot par
+  stratégie dans FreqUI, mêmes identifiants pour toutes).
+
+Les sessions SQLAlchemy de freqtrade sont des attributs de classe (Trade.session,
+Order.session...) : l'hôte les remplace par un aiguillage vers la base de la
+stratégie courante, désignée par la variable de contexte `current_strategy`
+(fixée par la boucle pour chaque bot et par l'API pour chaque requête).
+
+freqtrade n'offre aucun moyen public de passer un exchange au FreqtradeBot ni de
+choisir la base d'un bot : l'hôte remplace ExchangeResolver.load_exchange le
+temps de construire les bots, aiguille les sessions de classe et surcharge les
+dépendances de l'API (deps.get_rpc, deps.get_config...). Les ordres simulés du
+dry-run (exchange._dry_run_open_orders) sont rangés dans l'exchange commun,
+indexés par identifiant d'ordre unique : chaque bot ne retrouve que les siens,
+par sa base. Ces points d'entrée internes ne sont vérifiés que pour les versions
+FREQTRADE_VERSIONS (tests/test_host.py) : hors de cet intervalle l'hôte refuse
+de démarrer.
+
+    python -m cyptrade.host --config config-simple.json \\
+        --strategies MeanReversionStrategy TrendFollowingStrategy PowerTowerStrategy
+
+Limites :
+- toutes les stratégies doivent viser le même exchange, le même mode de trading
+  et le même mode (dry-run ou live) ;
+- en live les portefeuilles lisent le même compte : utiliser
+  `available_capital` pour répartir le capital entre stratégies ;
+- Telegram est désactivé (un seul bot Telegram par jeton), le pilotage passe
+  par l'API ; le rechargement de configuration (/reload_config) n'est pas géré.
+"""
+import argparse
+import logging
+import re
+import signal
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Set
+from uuid import uuid4
+
+from freqtrade import __version__ as freqtrade_version
+from freqtrade.configuration import Configuration
+from freqtrade.enums import State
+from freqtrade.exceptions import OperationalException, TemporaryError
+from freqtrade.freqtradebot import FreqtradeBot
+from freqtrade.persistence import Order, PairLocks, Trade
+from freqtrade.persistence.custom_data import _CustomData
+from freqtrade.persistence.key_value_store import _KeyValueStoreModel
+from freqtrade.persistence.models import _request_id_ctx_var
+from freqtrade.persistence.pairlock import PairLock
+from freqtrade.persistence.wallet_history import WalletHistory
+from freqtrade.resolvers import ExchangeResolver
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_DIR = 'user_data/host'
+DEFAULT_PORT = 8080
+# Pause entre deux itérations si la configuration n'en donne pas (comme freqtrade)
+PROCESS_THROTTLE_SECS = 5
+# Pause après une erreur temporaire de l'exchange (comme le Worker freqtrade)
+RETRY_TIMEOUT = 30
+# Versions de freqtrade (année, mois) dont les internes utilisés par l'hôte ont été vérifiés
+FREQTRADE_VERSIONS = ((2025, 8), (2026, 9))
+
+# Stratégie dont le code s'exécute : choisit la base de trades
+current_strategy: ContextVar[str] = ContextVar('cyptrade_host_strategy')
+
+
+def check_freqtrade_version(version: str = freqtrade_version) -> None:
+    """Refuse une version de freqtrade hors de FREQTRADE_VERSIONS (internes non vérifiés)"""
+    match = re.match(r'(\d+)\.(\d+)', version)
+    if match is None:
+        logger.warning(f"Version de freqtrade {version} non reconnue, hôte non vérifié pour cette version")
+        return
+    first, last = FREQTRADE_VERSIONS
+    if not first <= (int(match.group(1)), int(match.group(2))) <= last:
+        raise OperationalException(
+            f"Hôte vérifié pour freqtrade {first[0]}.{first[1]} à {last[0]}.{last[1]}, installé : {version} "
+            f"(lancez les stratégies séparément ou vérifiez l'hôte avec tests/test_host.py)")
+
+
+class SessionRouter:
+    """Remplace une session de classe freqtrade : délègue à celle de la stratégie courante"""
+
+    def __init__(self, sessions: Dict[str, object]):
+        self._sessions = sessions
+
+    def _current(self):
+        try:
+            return self._sessions[current_strategy.get()]
+        except LookupError:
+            raise OperationalException("Accès à la base de trades hors du contexte d'une stratégie de l'hôte")
+
+    def __call__(self, *args, **kwargs):
+        return self._current()(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._current(), name)
+
+
+class SharedFeed:
+    """Un rafraîchissement des bougies par itération pour toutes les stratégies"""
+
+    def __init__(self, exchange):
+        self.exchange = exchange
+        self.refreshed: Set[tuple] = set()
+        # Séries demandées par les bots / réellement rafraîchies (compteurs cumulés)
+        self.requested = 0
+        self.fetched = 0
+
+    def new_iteration(self) -> None:
+        self.refreshed.clear()
+
+    def refresh(self, pairs: Sequence[tuple]) -> None:
+        pending = [key for key in dict.fromkeys(pairs) if key not in self.refreshed]
+        if pending:
+            self.exchange.refresh_latest_ohlcv(pending)
+            self.refreshed.update(pending)
+        self.fetched += len(pending)
+
+    def attach(self, dataprovider) -> None:
+        """Remplace DataProvider.refresh : seules les séries pas encore rafraîchies sont demandées"""
+
+        def refresh(pairlist, helping_pairs=None):
+            pairs = (pairlist + helping_pairs) if helping_pairs else pairlist
+            self.requested += len(pairs)
+            self.refresh(pairs)
+            dataprovider.refresh_latest_trades(pairlist)
+
+        dataprovider.refresh = refresh
+
+
+class StrategyScope:
+    """Application ASGI d'une stratégie : fixe la stratégie courante pour la requête"""
+
+    def __init__(self, app, strategy: str):
+        self.app = app
+        self.strategy = strategy
+
+    async def __call__(self, scope, receive, send):
+        token = current_strategy.set(self.strategy)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_strategy.reset(token)
+
+
+class StrategyHost:
+    """Bots freqtrade d'une liste de stratégies, construits sur un exchange commun"""
+
+    def __init__(self, config_files: Sequence[str], strategies: Sequence[str], db_dir: str = DEFAULT_DB_DIR):
+        if not strategies:
+            raise OperationalException("Aucune stratégie à héberger")
+        check_freqtrade_version()
+        self.db_dir = Path(db_dir)
+        # Identifiants et adresse de l'API : ceux de la première configuration
+        self.api_config: dict = {}
+        self.configs = {strategy: self._bot_config(config_files, strategy) for strategy in strategies}
+        self._check_compatible()
+        self.exchange = None
+        self.bots: Dict[str, FreqtradeBot] = {}
+        self._states: Dict[str, Optional[State]] = {}
+        self._build()
+        self.feed = SharedFeed(self.exchange)
+        for bot in self.bots.values():
+            self.feed.attach(bot.dataprovider)
+        self.throttle_secs = min(config.get('internals', {}).get('process_throttle_secs', PROCESS_THROTTLE_SECS)
+                                 for config in self.configs.values())
+
+    def _bot_config(self, config_files: Sequence[str], strategy: str) -> dict:
+        # Runmode déduit de dry_run, comme `freqtrade trade`
+        config = Configuration({'config': list(config_files), 'strategy': strategy}, None).get_config()
+        suffix = '.dryrun' if config['dry_run'] else ''
+        config['db_url'] = f"sqlite:///{self.db_dir / f'tradesv3{suffix}-{strategy}.sqlite'}"
+        config['bot_name'] = f'cypTrade-{strategy}'
+        # L'API est servie par l'hôte ; un seul bot Telegram peut lire un jeton
+        self.api_config = self.api_config or dict(config.get('api_server', {}))
+        config['api_server'] = {**config.get('api_server', {}), 'enabled': False}
+        if config.get('telegram', {}).get('enabled'):
+            logger.warning(f"{strategy} : Telegram désactivé dans l'hôte, utilisez l'API")
+            config['telegram']['enabled'] = False
+        return config
+
+    def _check_compatible(self) -> None:
+        def signature(config: dict) -> tuple:
+            return (config['exchange']['name'].lower(), str(config.get('trading_mode', 'spot')),
+                    str(config.get('margin_mode', '')), config['dry_run'], config['stake_currency'])
+
+        signatures = {strategy: signature(config) for strategy, config in self.configs.items()}
+        if len(set(signatures.values())) > 1:
+            detail = ', '.join(f'{strategy}={value}' for strategy, value in signatures.items())
+            raise OperationalException(f"Les stratégies d'un hôte doivent partager exchange, mode de trading, "
+                                       f"dry-run et devise : {detail}")
+
+    def _build(self) -> None:
+        """Un bot par stratégie ; les sessions de chaque base sont conservées puis aiguillées"""
+        self.db_dir.mkdir(parents=True, exist_ok=True)
+        load_exchange = ExchangeResolver.load_exchange
+
+        def shared_exchange(config, **kwargs):
+            if self.exchange is None:
+                self.exchange = load_exchange(config, **kwargs)
+            return self.exchange
+
+        trade_sessions: Dict[str, object] = {}
+        custom_sessions: Dict[str, object] = {}
+        ExchangeResolver.load_exchange = staticmethod(shared_exchange)
+        try:
+            for strategy, config in self.configs.items():
+                token = current_strategy.set(strategy)
+                try:
+                    self.bots[strategy] = FreqtradeBot(config)
+                finally:
+                    current_strategy.reset(token)
+                # init_db vient de remplacer les sessions de classe par celles de cette base
+                trade_sessions[strategy] = Trade.session
+                custom_sessions[strategy] = _CustomData.session
+                self._states[strategy] = None
+                logger.info(f"{strategy} : base {config['db_url']}")
+        finally:
+            ExchangeResolver.load_exchange = load_exchange
+        router = SessionRouter(trade_sessions)
+        Trade.session = router
+        Order.session = router
+        PairLock.session = router
+        _KeyValueStoreModel.session = router
+        WalletHistory.session = router
+        _CustomData.session = SessionRouter(custom_sessions)
+
+    @contextmanager
+    def activate(self, strategy: str) -> Iterator[FreqtradeBot]:
+        """Exécute le code du bot de `strategy` sur sa base et son timeframe de verrous"""
+        bot = self.bots[strategy]
+        token = current_strategy.set(strategy)
+        PairLocks.timeframe = bot.config['timeframe']
+        try:
+            yield bot
+        finally:
+            current_strategy.reset(token)
+
+    def refresh(self) -> None:
+        """Bougies de l'union des whitelists et des paires informatives, en un seul appel"""
+        self.feed.new_iteration()
+        pairs: List[tuple] = []
+        for strategy in self.bots:
+            with self.activate(strategy) as bot:
+                if bot.state in (State.RUNNING, State.PAUSED):
+                    pairs += bot.pairlists.create_pair_list(bot.active_pair_whitelist)
+                    pairs += bot.strategy.gather_informative_pairs()
+        self.feed.refresh(pairs)
+
+    def _process(self, strategy: str, bot: FreqtradeBot) -> bool:
+        """Une itération du bot, transitions d'état comprises (comme le Worker freqtrade) ; False sur erreur temporaire"""
+        state, previous = bot.state, self._states[strategy]
+        if state == State.RELOAD_CONFIG:
+            logger.warning(f"{strategy} : rechargement de configuration non géré par l'hôte, redémarrez-le")
+            bot.state = state = previous or State.RUNNING
+        if state != previous:
+            bot.notify_status(state.name.lower())
+            logger.info(f"{strategy} : état {state.name}")
+            if state in (State.RUNNING, State.PAUSED) and previous not in (State.RUNNING, State.PAUSED):
+                bot.startup()
+            if state == State.STOPPED:
+                bot.check_for_open_trades()
+            self._states[strategy] = state
+
+        if state == State.STOPPED:
+            bot.process_stopped()
+            return True
+        try:
+            bot.process()
+        except TemporaryError as error:
+            logger.warning(f"{strategy} : {error}, nouvel essai dans {RETRY_TIMEOUT} secondes")
+            return False
+        except Exception:
+            # Une stratégie en erreur est arrêtée, les autres continuent
+            logger.exception(f"{strategy} : erreur, arrêt du bot (/start pour le relancer)")
+            bot.state = State.STOPPED
+        return True
+
+    def tick(self) -> bool:
+        """Une itération de tous les bots ; True si l'exchange demande de patienter"""
+        try:
+            self.refresh()
+        except TemporaryError as error:
+            logger.warning(f"Rafraîchissement commun : {error}")
+            return True
+        retry = False
+        for strategy in self.bots:
+            with self.activate(strategy) as bot:
+                retry |= not self._process(strategy, bot)
+        return retry
+
+    def api_app(self, api_config: dict):
+        """Application FastAPI : l'API freqtrade de chaque stratégie montée sous /<stratégie>"""
+        from fastapi import Depends, FastAPI
+        from fastapi.middleware.cors import CORSMiddleware
+        from fastapi.responses import JSONResponse
+
+        from freqtrade.rpc.api_server import deps
+        from freqtrade.rpc.api_server.api_auth import http_basic_or_jwt_token, router_login
+        from freqtrade.rpc.api_server.api_trading import router as api_trading
+        from freqtrade.rpc.api_server.api_v1 import router as api_v1
+        from freqtrade.rpc.api_server.api_v1 import router_public as api_v1_public
+        from freqtrade.rpc.api_server.webserver import FTJSONResponse
+        from freqtrade.rpc.rpc import RPCException
+
+        def rpc_error(request, exc):
+            logger.error(f"Erreur API {request.url.path}: {exc}")
+            return JSONResponse(status_code=502,
+                                content={'error': f'Error querying {request.url.path}: {exc.message}'})
+
+        def strategy_app(bot: FreqtradeBot):
+            rpc = bot.rpc._rpc
+
+            async def get_rpc():
+                # Même cycle de session que deps.get_rpc, sur la base de la stratégie
+                token = _request_id_ctx_var.set(str(uuid4()))
+                Trade.rollback()
+                try:
+                    yield rpc
+                finally:
+                    Trade.session.remove()
+                    _request_id_ctx_var.reset(token)
+
+            app = FastAPI(default_response_class=FTJSONResponse, docs_url=None, redoc_url=None)
+            auth = [Depends(http_basic_or_jwt_token)]
+            app.include_router(api_v1_public, prefix='/api/v1')
+            app.include_router(router_login, prefix='/api/v1', tags=['Auth'])
+            app.include_router(api_v1, prefix='/api/v1', dependencies=auth)
+            app.include_router(api_trading, prefix='/api/v1', tags=['Trading'],
+                               dependencies=auth + [Depends(deps.is_trading_mode)])
+            app.dependency_overrides.update({
+                deps.get_rpc: get_rpc,
+                deps.get_rpc_optional: lambda: rpc,
+                deps.get_config: lambda: bot.config,
+                deps.get_api_config: lambda: api_config,
+            })
+            app.add_exception_handler(RPCException, rpc_error)
+            return app
+
+        root = FastAPI(title='cypTrade - hôte multi-stratégies', docs_url=None, redoc_url=None)
+        for strategy, bot in self.bots.items():
+            root.mount(f'/{strategy}', StrategyScope(strategy_app(bot), strategy))
+
+        @root.get('/')
+        def strategies():
+            return {'strategies': {strategy: f'/{strategy}/api/v1' for strategy in self.bots}}
+
+        root.add_middleware(CORSMiddleware, allow_origins=api_config.get('CORS_origins', []),
+                            allow_credentials=True, allow_methods=['*'], allow_headers=['*'])
+        return root
+
+    def serve_api(self, port: Optional[int] = None):
+        """Démarre le serveur d'API dans un thread ; retourne le serveur (à arrêter avec cleanup())"""
+        import uvicorn
+
+        from freqtrade.rpc.api_server.uvicorn_threaded import UvicornServer
+
+        api_config = dict(self.api_config)
+        if port is not None:
+            api_config['listen_port'] = port
+        api_config.setdefault('listen_ip_address', '127.0.0.1')
+        api_config.setdefault('listen_port', DEFAULT_PORT)
+        api_config.setdefault('jwt_secret_key', 'super-secret')
+        if not api_config.get('password'):
+            logger.warning("API de l'hôte sans mot de passe")
+        uvconfig = uvicorn.Config(self.api_app(api_config), host=api_config['listen_ip_address'],
+                                  port=api_config['listen_port'], use_colors=False, log_config=None,
+                                  access_log=api_config.get('verbosity', 'error') != 'error')
+        server = UvicornServer(uvconfig)
+        server.run_in_thread()
+        base = f"http://{api_config['listen_ip_address']}:{api_config['listen_port']}"
+        for strategy in self.bots:
+            logger.info(f"{strategy} : API {base}/{strategy}")
+        return server
+
+    def run(self, iterations: Optional[int] = None) -> None:
+        running = True
+
+        def stop(signum, frame):
+            nonlocal running
+            running = False
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        iteration = 0
+        while running and (iterations is None or iteration < iterations):
+            iteration += 1
+            start = time.monotonic()
+            retry = self.tick()
+            pause = RETRY_TIMEOUT if retry else self.throttle_secs - (time.monotonic() - start)
+            if running and (iterations is None or iteration < iterations) and pause > 0:
+                time.sleep(pause)
+        logger.info(f"Séries de bougies demandées par les bots : {self.feed.requested}, "
+                    f"rafraîchies : {self.feed.fetched}")
+
+    def cleanup(self) -> None:
+        """Nettoyage de chaque bot sur sa base ; l'exchange commun n'est fermé qu'une fois"""
+        close = self.exchange.close
+        self.exchange.close = lambda: None
+        try:
+            for strategy in self.bots:
+                with self.activate(strategy) as bot:
+                    bot.cleanup()
+        finally:
+            self.exchange.close = close
+        self.exchange.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cyptrade.host',
+                                     description='Plusieurs stratégies dans un seul processus freqtrade')
+    parser.add_argument('--config', '-c', action='append', required=True, help='Configuration freqtrade')
+    parser.add_argument('--strategies', '-s', nargs='+', required=True, help='Stratégies à héberger')
+    parser.add_argument('--db-dir', default=DEFAULT_DB_DIR,
+                        help=f'Dossier des bases de trades par stratégie (défaut: {DEFAULT_DB_DIR})')
+    parser.add_argument('--port', type=int, help="Port de l'API (défaut: celui de la configuration)")
+    parser.add_argument('--no-api', action='store_true', help="Ne pas démarrer l'API")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    strategies = [name for value in args.strategies for name in value.split(',') if name]
+    host = StrategyHost(args.config, strategies, args.db_dir)
+    server = None if args.no_api else host.serve_api(args.port)
+    try:
+        host.run()
+    finally:
+        host.cleanup()
+        if server is not None:
+            server.cleanup()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
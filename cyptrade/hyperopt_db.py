@@ -0,0 +1,415 @@
+"""
+Base SQLite indexée des résultats d'hyperopt
+
+freqtrade écrit chaque epoch d'un hyperopt comme une ligne JSON d'un fichier
+user_data/hyperopt_results/strategy_<Stratégie>_<date>.fthypt ;
+`freqtrade hyperopt-show` / `hyperopt-list` relisent et décodent tout le
+fichier à chaque appel. Ici :
+
+- les fichiers .fthypt sont lus ligne à ligne et seules les lignes ajoutées
+  depuis la dernière lecture sont décodées (position enregistrée par
+  fichier, lignes incomplètes laissées pour la prochaine lecture, fichier
+  remplacé réindexé) ;
+- chaque epoch devient une ligne de la base (loss, métriques principales en
+  colonnes indexées, paramètres et métriques scalaires en JSON) ;
+- les requêtes top-k et front de Pareto sont des requêtes SQL sur ces
+  colonnes ;
+- l'epoch choisi est écrit dans le fichier de paramètres de la stratégie
+  (HyperoptWorking.json à côté de HyperoptWorking.py) au format de freqtrade,
+  qui le charge au démarrage : plus de génération de code.
+
+    python -m cyptrade.hyperopt_db top --strategy HyperoptWorking --sort profit_total -k 10
+    python -m cyptrade.hyperopt_db pareto --strategy HyperoptWorking --min-trades 20
+    python -m cyptrade.hyperopt_db apply --strategy HyperoptWorking
+    python -m cyptrade.hyperopt_db apply --strategy HyperoptWorking --epoch strategy_HyperoptWorking_2025-09-12_19-12-27.fthypt:42
+
+Chaque commande met d'abord la base à jour (`ingest` le fait seul).
+"""
+import argparse
+import json
+import logging
+import re
+import sqlite3
+import sys
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import rapidjson
+
+from freqtrade.constants import FTHYPT_FILEVERSION
+from freqtrade.misc import deep_merge_dicts
+from freqtrade.optimize.hyperopt_tools import HyperoptTools
+
+from cyptrade.matrix import STRATEGY_CLASS, STRATEGY_DIR
+
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = 'user_data/hyperopt_results'
+DEFAULT_DB = f'{RESULTS_DIR}/hyperopt.sqlite'
+
+# Nom de stratégie porté par le nom de fichier de freqtrade
+FTHYPT_NAME = re.compile(r'^strategy_(\w+?)_\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}\.fthypt$')
+
+# Colonnes indexées -> clé des métriques freqtrade ; True : à minimiser
+METRICS = {
+    'trades': ('total_trades', False),
+    'profit_total': ('profit_total', False),
+    'profit_total_abs': ('profit_total_abs', False),
+    'profit_mean': ('profit_mean', False),
+    'max_drawdown': ('max_drawdown_account', True),
+    'winrate': ('winrate', False),
+    'profit_factor': ('profit_factor', False),
+    'sharpe': ('sharpe', False),
+    'sortino': ('sortino', False),
+    'calmar': ('calmar', False),
+}
+MINIMIZE = {'loss'} | {column for column, (_, minimize) in METRICS.items() if minimize}
+SORTABLE = ('loss', *METRICS)
+
+# Epochs décodés entre deux écritures en base
+BATCH_SIZE = 500
+
+# Ligne de sortie d'apply désignant l'epoch retenu (lue par apply-best-params.sh)
+SELECTED_PREFIX = 'Epoch retenu : '
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    strategy TEXT,
+    inode INTEGER,
+    offset INTEGER NOT NULL DEFAULT 0,
+    lines INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS epochs (
+    file_id INTEGER NOT NULL REFERENCES files(id),
+    epoch INTEGER NOT NULL,
+    strategy TEXT NOT NULL,
+    loss REAL,
+    is_best INTEGER,
+    {', '.join(f'{column} REAL' for column in METRICS)},
+    params TEXT NOT NULL,
+    metrics TEXT NOT NULL,
+    PRIMARY KEY (file_id, epoch)
+);
+""" + ''.join(f"CREATE INDEX IF NOT EXISTS epochs_{column} ON epochs (strategy, {column});\n"
+          for column in ('loss', *METRICS))
+
+EPOCH_COLUMNS = ('file_id', 'epoch', 'strategy', 'loss', 'is_best', *METRICS, 'params', 'metrics')
+RESULT_COLUMNS = ('file', 'epoch', 'strategy', 'loss', 'is_best', *METRICS)
+
+
+def connect(db_path: str = DEFAULT_DB) -> sqlite3.Connection:
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(db_path)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA)
+    return connection
+
+
+# -- ingestion --------------------------------------------------------------
+
+def _read_lines(path: Path, offset: int) -> Iterator[Tuple[int, bytes]]:
+    """(position après la ligne, ligne) des lignes complètes à partir de offset"""
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        for line in file:
+            if not line.endswith(b'\n'):
+                # Epoch en cours d'écriture par hyperopt : relu la prochaine fois
+                return
+            offset += len(line)
+            yield offset, line
+
+
+def _epoch_row(file_id: int, number: int, strategy: str, epoch: Dict[str, Any]) -> tuple:
+    metrics = epoch.get('results_metrics', {})
+    # Paramètres finaux tels que freqtrade les exporte (optimisés + non optimisés)
+    params = deep_merge_dicts(epoch.get('params_details', {}), dict(epoch.get('params_not_optimized', {})))
+    scalars = {key: value for key, value in metrics.items()
+               if isinstance(value, (int, float, str, bool)) or value is None}
+    return (file_id, epoch.get('current_epoch', number), strategy, epoch.get('loss'), int(bool(epoch.get('is_best'))),
+            *(metrics.get(key) for key, _ in METRICS.values()),
+            rapidjson.dumps(params), rapidjson.dumps(scalars))
+
+
+def ingest_file(connection: sqlite3.Connection, path: Path) -> int:
+    """Indexe les epochs ajoutés au fichier depuis la dernière lecture ; retourne leur nombre"""
+    inode = path.stat().st_ino
+    size = path.stat().st_size
+    known = connection.execute('SELECT id, inode, offset, lines FROM files WHERE path = ?', (str(path),)).fetchone()
+    if known is None:
+        match = FTHYPT_NAME.match(path.name)
+        file_id = connection.execute('INSERT INTO files (path, strategy, inode) VALUES (?, ?, ?)',
+                                     (str(path), match.group(1) if match else None, inode)).lastrowid
+        offset, lines = 0, 0
+    else:
+        file_id, offset, lines = known['id'], known['offset'], known['lines']
+        if known['inode'] != inode or size < offset:
+            # Fichier remplacé ou tronqué : réindexé depuis le début
+            connection.execute('DELETE FROM epochs WHERE file_id = ?', (file_id,))
+            offset, lines = 0, 0
+    if size == offset:
+        connection.execute('UPDATE files SET inode = ? WHERE id = ?', (inode, file_id))
+        connection.commit()
+        return 0
+
+    strategy = connection.execute('SELECT strategy FROM files WHERE id = ?', (file_id,)).fetchone()[0]
+    insert = (f"INSERT OR REPLACE INTO epochs ({', '.join(EPOCH_COLUMNS)}) "
+              f"VALUES ({', '.join('?' * len(EPOCH_COLUMNS))})")
+    added, skipped, batch = 0, 0, []
+
+    def flush(position: int) -> None:
+        connection.executemany(insert, batch)
+        # La position n'avance qu'avec les epochs écrits (transaction commune)
+        connection.execute('UPDATE files SET inode = ?, offset = ?, lines = ?, strategy = ? WHERE id = ?',
+                           (inode, position, lines, strategy, file_id))
+        connection.commit()
+        batch.clear()
+
+    position = offset
+    for position, line in _read_lines(path, offset):
+        lines += 1
+        if not line.strip():
+            continue
+        epoch = rapidjson.loads(line)
+        if epoch.get(FTHYPT_FILEVERSION, 1) < 2:
+            # Sans params_details / params_not_optimized : paramètres non applicables
+            skipped += 1
+            continue
+        strategy = strategy or epoch.get('results_metrics', {}).get('strategy_name') or path.stem
+        batch.append(_epoch_row(file_id, lines, strategy, epoch))
+        added += 1
+        if len(batch) >= BATCH_SIZE:
+            flush(position)
+    flush(position)
+    if skipped:
+        logger.warning(f"{path.name} : {skipped} epochs au format trop ancien ignorés")
+    return added
+
+
+def ingest(connection: sqlite3.Connection, results_dir: str = RESULTS_DIR) -> int:
+    """Met la base à jour avec tous les fichiers .fthypt du dossier"""
+    added = 0
+    for path in sorted(Path(results_dir).glob('*.fthypt')):
+        count = ingest_file(connection, path.resolve())
+        if count:
+            logger.info(f"{path.name} : {count} epochs indexés")
+        added += count
+    return added
+
+
+# -- requêtes ---------------------------------------------------------------
+
+def _where(strategy: Optional[str], min_trades: int, columns: Sequence[str]) -> Tuple[str, list]:
+    clauses, values = [f'{column} IS NOT NULL' for column in columns], []
+    if min_trades:
+        # Filtre appliqué en parcourant l'index de tri (pas via l'index des trades)
+        clauses.append('+trades >= ?')
+        values.append(min_trades)
+    if strategy:
+        clauses.append('strategy = ?')
+        values.append(strategy)
+    return ' AND '.join(clauses), values
+
+
+def _select(epochs: str) -> str:
+    """Colonnes de résultat des epochs retenus par la sous-requête (jointure après le LIMIT)"""
+    return (f"SELECT files.path AS file, {', '.join(f'selected.{column}' for column in RESULT_COLUMNS[1:])} "
+            f"FROM ({epochs}) AS selected JOIN files ON files.id = selected.file_id")
+
+
+def _result(row: sqlite3.Row) -> Dict[str, Any]:
+    result = dict(row)
+    result.pop('rowid', None)
+    result['file'] = Path(result['file']).name
+    return result
+
+
+def top(connection: sqlite3.Connection, strategy: Optional[str] = None, k: int = 10,
+        sort: str = 'loss', min_trades: int = 0) -> List[Dict[str, Any]]:
+    """Les k meilleurs epochs selon une colonne (loss et drawdown minimisés, le reste maximisé)"""
+    if sort not in SORTABLE:
+        raise ValueError(f"Tri inconnu : {sort} (choix : {', '.join(SORTABLE)})")
+    where, values = _where(strategy, min_trades, [sort])
+    order = 'ASC' if sort in MINIMIZE else 'DESC'
+    # Parcours de l'index (strategy, colonne) : seules les k premières lignes sont lues
+    rows = connection.execute(_select(f"SELECT * FROM epochs WHERE {where} ORDER BY {sort} {order} LIMIT ?")
+                              + f" ORDER BY selected.{sort} {order}", (*values, k))
+    return [_result(row) for row in rows]
+
+
+def pareto_front(values: np.ndarray) -> np.ndarray:
+    """
+    Indices des points non dominés (toutes les colonnes à maximiser), triés
+    selon le premier objectif décroissant.
+    Points distincts triés par objectifs décroissants : un point ne peut être
+    dominé que par un point qui le précède. A deux objectifs, il est sur le
+    front si son second objectif dépasse le maximum de ceux qui le précèdent.
+    """
+    unique, inverse = np.unique(values, axis=0, return_inverse=True)
+    order = np.lexsort(unique.T[::-1])[::-1]
+    ranked = unique[order]
+    if ranked.shape[1] == 2:
+        kept = np.r_[True, ranked[1:, 1] > np.maximum.accumulate(ranked[:-1, 1])]
+    else:
+        kept = np.zeros(len(ranked), dtype=bool)
+        front: List[int] = []
+        for index, point in enumerate(ranked):
+            if not front or not np.any(np.all(ranked[front] >= point, axis=1)):
+                front.append(index)
+        kept[front] = True
+    on_front = np.zeros(len(unique), dtype=bool)
+    on_front[order[kept]] = True
+    # Les doublons d'un point du front y sont aussi
+    indices = np.flatnonzero(on_front[inverse.reshape(-1)])
+    return indices[np.argsort(-values[indices, 0], kind='stable')]
+
+
+def pareto(connection: sqlite3.Connection, strategy: Optional[str] = None,
+           objectives: Sequence[str] = ('profit_total', 'max_drawdown'),
+           min_trades: int = 0) -> List[Dict[str, Any]]:
+    """Epochs du front de Pareto des objectifs (triés selon le premier)"""
+    unknown = [objective for objective in objectives if objective not in SORTABLE]
+    if unknown or not objectives:
+        raise ValueError(f"Objectifs inconnus : {', '.join(unknown)} (choix : {', '.join(SORTABLE)})")
+    where, values = _where(strategy, min_trades, objectives)
+    # Objectifs seuls pour le calcul du front, lignes complètes pour le front uniquement
+    cursor = connection.execute(f"SELECT rowid, {', '.join(objectives)} FROM epochs WHERE {where}", values)
+    cursor.row_factory = None
+    candidates = np.array(cursor.fetchall(), dtype=np.float64)
+    if not len(candidates):
+        return []
+    signs = np.array([-1.0 if objective in MINIMIZE else 1.0 for objective in objectives])
+    rowids = candidates[pareto_front(candidates[:, 1:] * signs), 0].astype(np.int64).tolist()
+    rows = {row['rowid']: row for row in connection.execute(
+        f"SELECT epochs.rowid AS rowid, files.path AS file, "
+        f"{', '.join(f'epochs.{column}' for column in RESULT_COLUMNS[1:])} "
+        f"FROM epochs JOIN files ON files.id = epochs.file_id "
+        f"WHERE epochs.rowid IN ({', '.join('?' * len(rowids))})", rowids)}
+    return [_result(rows[rowid]) for rowid in rowids]
+
+
+def epoch_params(connection: sqlite3.Connection, file: str, epoch: int) -> Tuple[str, Dict[str, Any]]:
+    """(stratégie, paramètres) d'un epoch désigné par son fichier .fthypt et son numéro"""
+    row = connection.execute(
+        "SELECT epochs.strategy, epochs.params FROM epochs JOIN files ON files.id = epochs.file_id "
+        "WHERE (files.path = ? OR files.path LIKE ?) AND epochs.epoch = ?",
+        (file, f'%/{Path(file).name}', epoch)).fetchone()
+    if row is None:
+        raise ValueError(f"Epoch {epoch} introuvable dans {file}")
+    return row['strategy'], rapidjson.loads(row['params'])
+
+
+# -- application ------------------------------------------------------------
+
+def strategy_file(strategy: str, directory: str = STRATEGY_DIR) -> Path:
+    """Fichier .py déclarant la stratégie (freqtrade lit les paramètres dans le .json du même nom)"""
+    for path in sorted(Path(directory).glob('*.py')):
+        if strategy in STRATEGY_CLASS.findall(path.read_text(encoding='utf-8')):
+            return path
+    raise ValueError(f"Stratégie {strategy} introuvable dans {directory}")
+
+
+def apply(strategy: str, params: Dict[str, Any], directory: str = STRATEGY_DIR) -> Path:
+    """Ecrit les paramètres dans le fichier de paramètres de la stratégie (format freqtrade)"""
+    filename = strategy_file(strategy, directory).with_suffix('.json')
+    HyperoptTools.export_params({'params_details': params, 'params_not_optimized': {}}, strategy, filename)
+    return filename
+
+
+# -- ligne de commande ------------------------------------------------------
+
+def _print_table(results: List[Dict[str, Any]]) -> None:
+    print(f"{'fichier':<48} {'epoch':>6} {'loss':>10} {'trades':>7} {'profit':>9} {'drawdown':>9} "
+          f"{'réussite':>9} {'sharpe':>8}")
+    for result in results:
+        # loss absente (epoch sans trades ou interrompu) : colonne vide
+        loss = f"{result['loss']:>10.5f}" if result['loss'] is not None else f"{'-':>10}"
+        print(f"{result['file'][:48]:<48} {result['epoch']:>6} {loss} "
+              f"{int(result['trades'] or 0):>7} {result['profit_total'] or 0:>9.2%} "
+              f"{result['max_drawdown'] or 0:>9.2%} {result['winrate'] or 0:>9.1%} {result['sharpe'] or 0:>8.2f}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cyptrade.hyperopt_db',
+                                     description="Base indexée des résultats d'hyperopt")
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'Base SQLite (défaut: {DEFAULT_DB})')
+    parser.add_argument('--results-dir', default=RESULTS_DIR, help=f'Dossier des .fthypt (défaut: {RESULTS_DIR})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('ingest', help='Indexe les epochs nouveaux')
+
+    def query(name: str, help: str) -> argparse.ArgumentParser:
+        command = commands.add_parser(name, help=help)
+        command.add_argument('--strategy', '-s')
+        command.add_argument('--min-trades', type=int, default=0, help='Nombre minimal de trades')
+        command.add_argument('--json', action='store_true', help='Sortie JSON')
+        return command
+
+    top_parser = query('top', 'Meilleurs epochs selon une colonne')
+    top_parser.add_argument('-k', type=int, default=10, help='Nombre de résultats')
+    top_parser.add_argument('--sort', default='loss', choices=SORTABLE)
+    pareto_parser = query('pareto', 'Front de Pareto de plusieurs objectifs')
+    pareto_parser.add_argument('--objectives', nargs='+', default=['profit_total', 'max_drawdown'],
+                               choices=SORTABLE)
+
+    apply_parser = commands.add_parser('apply', help='Ecrit les paramètres d\'un epoch dans le .json de la stratégie')
+    apply_parser.add_argument('--strategy', '-s', required=True)
+    apply_parser.add_argument('--epoch', metavar='FICHIER:EPOCH', help='Epoch choisi (défaut: meilleur loss)')
+    apply_parser.add_argument('--sort', default='loss', choices=SORTABLE, help='Critère du meilleur epoch')
+    apply_parser.add_argument('--min-trades', type=int, default=0)
+    apply_parser.add_argument('--strategy-path', default=STRATEGY_DIR)
+    apply_parser.add_argument('--dry-run', action='store_true',
+                              help='Affiche les paramètres sans les écrire (et l\'epoch retenu, à repasser à --epoch)')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    with closing(connect(args.db)) as connection:
+        start = time.perf_counter()
+        added = ingest(connection, args.results_dir)
+        if args.command == 'ingest':
+            total = connection.execute('SELECT COUNT(*) FROM epochs').fetchone()[0]
+            print(f"{added} epochs ajoutés, {total} en base ({time.perf_counter() - start:.2f}s)")
+            return 0
+
+        if args.command in ('top', 'pareto'):
+            start = time.perf_counter()
+            if args.command == 'top':
+                results = top(connection, args.strategy, args.k, args.sort, args.min_trades)
+            else:
+                results = pareto(connection, args.strategy, args.objectives, args.min_trades)
+            elapsed = time.perf_counter() - start
+            if args.json:
+                print(json.dumps(results, indent=2))
+            else:
+                _print_table(results)
+                print(f"\n{len(results)} epochs ({elapsed * 1000:.1f} ms)")
+            return 0
+
+        if args.epoch:
+            file, _, number = args.epoch.rpartition(':')
+            strategy, params = epoch_params(connection, file, int(number))
+            if strategy != args.strategy:
+                parser.error(f"{args.epoch} appartient à {strategy}, pas à {args.strategy}")
+        else:
+            best = top(connection, args.strategy, 1, args.sort, args.min_trades)
+            if not best:
+                print(f"Aucun epoch pour {args.strategy} dans {args.results_dir}", file=sys.stderr)
+                return 1
+            _print_table(best)
+            args.epoch = f"{best[0]['file']}:{best[0]['epoch']}"
+            _, params = epoch_params(connection, best[0]['file'], best[0]['epoch'])
+    print(rapidjson.dumps(params, indent=2))
+    print(f"{SELECTED_PREFIX}{args.epoch}")
+    if not args.dry_run:
+        print(f"Paramètres écrits dans {apply(args.strategy, params, args.strategy_path)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Chargement commun aux outils : configuration, stratégie, bougies et signaux
+
+Reproduit la préparation du backtesting freqtrade (bougies de démarrage,
+advise_all_indicators puis ft_advise_signals, découpe de la période) sans
+exchange : les données viennent de user_data/data et la whitelist de la
+configuration.
+"""
+import logging
+from typing import Dict, Optional, Sequence, Tuple
+
+from pandas import DataFrame
+
+from freqtrade.configuration import Configuration, TimeRange
+from freqtrade.data.converter import trim_dataframe
+from freqtrade.data.dataprovider import DataProvider
+from freqtrade.data.history import load_data
+from freqtrade.enums import CandleType, RunMode
+from freqtrade.exchange import timeframe_to_seconds
+from freqtrade.resolvers import StrategyResolver
+from freqtrade.strategy import IStrategy
+
+
+logger = logging.getLogger(__name__)
+
+
+class StaticPairs:
+    """Whitelist fixe pour le DataProvider (hors bot, pas de pairlist ni d'exchange)"""
+
+    def __init__(self, pairs: Sequence[str]):
+        self.whitelist = list(pairs)
+
+
+def load_config(config_files: Sequence[str], strategy: str, timerange: Optional[str] = None,
+                pairs: Optional[Sequence[str]] = None, runmode: RunMode = RunMode.BACKTEST,
+                **options) -> dict:
+    """
+    Configuration freqtrade résolue (datadir, timeframe, whitelist) comme pour `freqtrade backtesting` ;
+    options : autres arguments de la ligne de commande freqtrade (epochs, spaces, hyperopt_loss...)
+    """
+    args = {'config': list(config_files), 'strategy': strategy,
+            **{key: value for key, value in options.items() if value is not None}}
+    if timerange:
+        args['timerange'] = timerange
+    if pairs:
+        args['pairs'] = list(pairs)
+    config = Configuration(args, runmode).get_config()
+    config['runmode'] = runmode
+    return config
+
+
+def load_strategy(config: dict) -> IStrategy:
+    strategy = StrategyResolver.load_strategy(config)
+    # Stoploss parfait comme en backtesting
+    strategy.order_types['stoploss_on_exchange'] = False
+    return strategy
+
+
+def load_candles(config: dict, startup_candles: int) -> Tuple[Dict[str, DataFrame], TimeRange]:
+    """Bougies de la whitelist sur la période, bougies de démarrage incluses"""
+    timerange = TimeRange.parse_timerange(config.get('timerange'))
+    candles = load_data(
+        datadir=config['datadir'],
+        timeframe=config['timeframe'],
+        pairs=config['exchange']['pair_whitelist'],
+        timerange=timerange,
+        startup_candles=startup_candles,
+        fail_without_data=True,
+        data_format=config.get('dataformat_ohlcv', 'feather'),
+        candle_type=config.get('candle_type_def', CandleType.SPOT),
+    )
+    if candles:
+        first = min(frame['date'].iloc[0] for frame in candles.values() if not frame.empty)
+        timerange.adjust_start_if_necessary(timeframe_to_seconds(config['timeframe']), startup_candles, first)
+    return candles, timerange
+
+
+def attach(strategy: IStrategy, config: dict, pairs: Sequence[str]) -> None:
+    """DataProvider en lecture sur les fichiers de données, puis bot_start"""
+    strategy.dp = DataProvider(config, None, StaticPairs(pairs))
+    strategy.ft_bot_start()
+
+
+def analyze(strategy: IStrategy, candles: Dict[str, DataFrame], timerange: TimeRange,
+            startup_candles: int) -> Dict[str, DataFrame]:
+    """Indicateurs et signaux par paire, période de démarrage retirée (comme le backtesting)"""
+    analyzed = {}
+    for pair, frame in strategy.advise_all_indicators(candles).items():
+        frame = strategy.ft_advise_signals(frame, {'pair': pair})
+        frame = trim_dataframe(frame, timerange, startup_candles=startup_candles)
+        if not frame.empty:
+            analyzed[pair] = frame.reset_index(drop=True)
+    return analyzed
+
+
+def load_signals(config_files: Sequence[str], strategy_name: str, timerange: Optional[str] = None,
+                 pairs: Optional[Sequence[str]] = None) -> Tuple[IStrategy, Dict[str, DataFrame]]:
+    """Raccourci : stratégie chargée et dataframes analysés de la whitelist"""
+    config = load_config(config_files, strategy_name, timerange, pairs)
+    strategy = load_strategy(config)
+    startup = strategy.startup_candle_count
+    candles, adjusted = load_candles(config, startup)
+    attach(strategy, config, list(candles))
+    logger.info(f"{strategy_name} : analyse de {len(candles)} paires")
+    return strategy, analyze(strategy, candles, adjusted, startup)
@@ -0,0 +1,263 @@
+"""
+Matrice de backtests stratégie × configuration × période, en parallèle
+
+test-strategies-comparison.sh, test-multi-strategies.sh et
+manage-strategies.sh lançaient `freqtrade backtesting` l'un après l'autre pour
+chaque stratégie et configuration, et chaque lancement relisait les mêmes
+bougies sur le disque. Ici :
+
+- les bougies nécessaires à la matrice (timeframe de chaque stratégie,
+  timeframes informatifs, timeframe_detail) sont lues une seule fois par le
+  processus parent ;
+- les backtests tournent sur un pool de processus (un par cœur) créé par
+  fork : les workers partagent ces bougies en lecture seule (copy-on-write)
+  et le chargeur de données freqtrade les sert depuis la mémoire ; le
+  découpage de la période et le nettoyage restent ceux de freqtrade ;
+- chaque worker garde son exchange (marchés chargés une fois par worker et
+  par exchange) ;
+- les résultats sont réunis dans un seul tableau (JSON ou CSV).
+
+    python -m cyptrade.matrix --timerange 20240801-20240901 20240901-20241001
+    python -m cyptrade.matrix --strategies TrendFollowingStrategy MeanReversionStrategy \\
+        --configs config-multi-exchange.json config-hyperliquid-multi.json --timerange 20250101-20250130
+
+Sans --strategies, toutes les stratégies de user_data/strategies ; sans
+--configs, tous les fichiers config-*.json.
+"""
+import argparse
+import glob
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from pandas import DataFrame
+
+from freqtrade.data.dataprovider import DataProvider
+from freqtrade.data.history import get_datahandler
+from freqtrade.data.history.datahandlers.idatahandler import get_datahandlerclass
+from freqtrade.enums import CandleType
+
+from cyptrade.loader import StaticPairs, load_config, load_strategy
+
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_DIR = 'user_data/strategies'
+CONFIG_PATTERN = 'config-*.json'
+RESULTS_DIR = 'user_data/backtest_results'
+
+# Classes de stratégie (les modules utilitaires du dossier n'en déclarent pas)
+STRATEGY_CLASS = re.compile(r'^class\s+(\w+)\s*\(\s*IStrategy\s*\)', re.MULTILINE)
+
+# Entrées de whitelist avec expression régulière : résolues par la pairlist de chaque worker
+PAIR_PATTERN = re.compile(r'[*?\[\]()|+\\]')
+
+# Colonnes du tableau consolidé (clés des statistiques freqtrade)
+SUMMARY_FIELDS = ('total_trades', 'profit_total', 'profit_total_abs', 'winrate', 'profit_factor',
+                  'max_drawdown_account', 'sharpe', 'cagr', 'holding_avg', 'market_change')
+
+# Bougies partagées : (datadir, format, paire, timeframe, type de bougie) -> contenu brut du fichier
+CandleKey = Tuple[str, str, str, str, CandleType]
+_candles: Dict[CandleKey, DataFrame] = {}
+
+# Exchange de chaque worker, par (exchange, mode de trading, mode de marge)
+_exchanges: Dict[Tuple[str, str, str], Any] = {}
+
+
+class Job(NamedTuple):
+    """Un backtest de la matrice"""
+    strategy: str
+    config: str
+    timerange: Optional[str]
+
+
+def discover_strategies(directory: str = STRATEGY_DIR) -> List[str]:
+    """Stratégies déclarées dans le dossier (une classe IStrategy par fichier)"""
+    strategies = []
+    for path in sorted(Path(directory).glob('*.py')):
+        strategies.extend(STRATEGY_CLASS.findall(path.read_text(encoding='utf-8')))
+    return strategies
+
+
+def discover_configs(pattern: str = CONFIG_PATTERN) -> List[str]:
+    return sorted(glob.glob(pattern))
+
+
+def _pairs_of(config: dict) -> List[str]:
+    return [pair for pair in config['exchange'].get('pair_whitelist', []) if not PAIR_PATTERN.search(pair)]
+
+
+def _candle_keys(job: Job) -> List[CandleKey]:
+    """Bougies lues par un backtest : timeframe de la stratégie, informatifs, timeframe_detail"""
+    config = load_config([job.config], job.strategy, job.timerange)
+    strategy = load_strategy(config)
+    pairs = _pairs_of(config)
+    candle_type = CandleType.from_string(config.get('candle_type_def', CandleType.SPOT))
+    wanted = [(pair, strategy.timeframe, candle_type) for pair in pairs]
+    if config.get('timeframe_detail'):
+        wanted += [(pair, config['timeframe_detail'], candle_type) for pair in pairs]
+    strategy.dp = DataProvider(config, None, StaticPairs(pairs))
+    try:
+        wanted += [(pair, timeframe, CandleType.from_string(kind or candle_type))
+                   for pair, timeframe, kind in strategy.gather_informative_pairs()]
+    except Exception as error:
+        # Les informatifs non préchargés sont lus sur le disque par le worker
+        logger.warning(f"{job.strategy} : paires informatives inconnues ({error})")
+    datadir, data_format = str(config['datadir']), config.get('dataformat_ohlcv', 'feather')
+    return [(datadir, data_format, pair, timeframe, kind) for pair, timeframe, kind in wanted]
+
+
+def preload(jobs: Sequence[Job]) -> int:
+    """Lit une fois les bougies de toute la matrice (contenu complet des fichiers) ; retourne le nombre de bougies"""
+    # Un chargement de stratégie par couple (configuration, stratégie), quelle que soit la période
+    first_jobs: Dict[Tuple[str, str], Job] = {}
+    for job in jobs:
+        first_jobs.setdefault((job.config, job.strategy), job)
+    keys = dict.fromkeys(key for job in first_jobs.values() for key in _candle_keys(job))
+    candles = 0
+    for key in keys:
+        datadir, data_format, pair, timeframe, candle_type = key
+        if key in _candles:
+            continue
+        frame = get_datahandler(Path(datadir), data_format)._ohlcv_load(pair, timeframe, None, candle_type)
+        if not frame.empty:
+            _candles[key] = frame
+            candles += len(frame)
+    logger.info(f"{len(_candles)} séries de bougies chargées ({candles} bougies) pour {len(jobs)} backtests")
+    return candles
+
+
+def _shared_loader(data_format: str, load):
+    """Lecture des bougies depuis la mémoire partagée, sur le disque à défaut"""
+    def _ohlcv_load(self, pair, timeframe, timerange, candle_type):
+        frame = _candles.get((str(self._datadir), data_format, pair, timeframe, CandleType.from_string(candle_type)))
+        if frame is None:
+            return load(self, pair, timeframe, timerange, candle_type)
+        # freqtrade retouche les dates des funding rates : copie, le reste n'est que découpé
+        return frame.copy() if candle_type == CandleType.FUNDING_RATE else frame
+    return _ohlcv_load
+
+
+def _install() -> None:
+    """Initialisation d'un worker : les chargeurs de données lisent les bougies partagées"""
+    for data_format in {key[1] for key in _candles}:
+        handler = get_datahandlerclass(data_format)
+        handler._ohlcv_load = _shared_loader(data_format, handler._ohlcv_load)
+
+
+def _exchange(config: dict):
+    from freqtrade.resolvers import ExchangeResolver
+    key = (config['exchange']['name'], str(config.get('trading_mode', '')), str(config.get('margin_mode', '')))
+    if key not in _exchanges:
+        _exchanges[key] = ExchangeResolver.load_exchange(config, load_leverage_tiers=True)
+    return _exchanges[key]
+
+
+def _summary(stats: Dict[str, Any]) -> Dict[str, Any]:
+    row = {field: stats.get(field) for field in SUMMARY_FIELDS}
+    row['holding_avg'] = str(row['holding_avg']) if row['holding_avg'] is not None else None
+    row['stake_currency'] = stats.get('stake_currency')
+    row['backtest_start'], row['backtest_end'] = stats.get('backtest_start'), stats.get('backtest_end')
+    return row
+
+
+def run_job(job: Job, export: bool = False) -> Dict[str, Any]:
+    """Backtest freqtrade d'un élément de la matrice ; une erreur est rapportée dans la ligne"""
+    from freqtrade.optimize.backtesting import Backtesting
+    from freqtrade.optimize.optimize_reports import generate_backtest_stats, store_backtest_results
+
+    row: Dict[str, Any] = {'strategy': job.strategy, 'config': job.config, 'timerange': job.timerange}
+    start = time.perf_counter()
+    try:
+        config = load_config([job.config], job.strategy, job.timerange)
+        config['export'] = 'trades' if export else 'none'
+        # Pas de barre de progression dans les workers
+        backtesting = Backtesting(config, _exchange(config), progress_callback=lambda task: None)
+        data, timerange = backtesting.load_bt_data()
+        min_date, max_date = backtesting.backtest_one_strategy(backtesting.strategylist[0], data, timerange)
+        stats = generate_backtest_stats(data, backtesting.all_bt_content, min_date=min_date, max_date=max_date)
+        if export:
+            appendix = f"{job.strategy}-{Path(job.config).stem}-{job.timerange or 'all'}"
+            row['result_file'] = str(store_backtest_results(config, stats, appendix))
+        row.update(_summary(stats['strategy'][job.strategy]))
+    except Exception as error:
+        logger.error(f"{job.strategy} / {job.config} / {job.timerange} : {error}")
+        row['error'] = str(error)
+    finally:
+        Backtesting.cleanup()
+    row['seconds'] = round(time.perf_counter() - start, 2)
+    return row
+
+
+def _run_exported(job: Job) -> Dict[str, Any]:
+    return run_job(job, export=True)
+
+
+def run_matrix(jobs: Sequence[Job], processes: Optional[int] = None, export: bool = False) -> List[Dict[str, Any]]:
+    """Précharge les bougies puis exécute la matrice sur un pool de processus (fork)"""
+    preload(jobs)
+    processes = max(1, min(processes or os.cpu_count() or 1, len(jobs)))
+    worker = _run_exported if export else run_job
+    rows = []
+    context = multiprocessing.get_context('fork')
+    with context.Pool(processes, initializer=_install) as pool:
+        for row in pool.imap_unordered(worker, jobs):
+            state = 'erreur' if 'error' in row else f"{row['total_trades']} trades, profit {row['profit_total']:.2%}"
+            logger.info(f"[{len(rows) + 1}/{len(jobs)}] {row['strategy']} / {row['config']} / "
+                        f"{row['timerange']} : {state} ({row['seconds']}s)")
+            rows.append(row)
+    order = {job: position for position, job in enumerate(jobs)}
+    rows.sort(key=lambda row: order[Job(row['strategy'], row['config'], row['timerange'])])
+    return rows
+
+
+def build_jobs(strategies: Iterable[str], configs: Iterable[str], timeranges: Iterable[Optional[str]]) -> List[Job]:
+    return [Job(*combination) for combination in itertools.product(strategies, configs, timeranges)]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cyptrade.matrix',
+                                     description='Backtests stratégie × configuration × période en parallèle')
+    parser.add_argument('--strategies', '-s', nargs='+', help=f'Stratégies (défaut: toutes celles de {STRATEGY_DIR})')
+    parser.add_argument('--configs', '-c', nargs='+', help=f'Configurations (défaut: {CONFIG_PATTERN})')
+    parser.add_argument('--timerange', nargs='+', default=[None], help='Une ou plusieurs périodes')
+    parser.add_argument('--processes', '-j', type=int, help='Nombre de processus (défaut: nombre de cœurs)')
+    parser.add_argument('--export', action='store_true', help='Exporte aussi chaque résultat (trades) comme freqtrade')
+    parser.add_argument('--output', help=f'Tableau consolidé .json ou .csv (défaut: {RESULTS_DIR}/matrix-<date>.json)')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    jobs = build_jobs(args.strategies or discover_strategies(), args.configs or discover_configs(), args.timerange)
+    if not jobs:
+        logger.error("Matrice vide : aucune stratégie ou configuration trouvée")
+        return 1
+    start = time.perf_counter()
+    rows = run_matrix(jobs, args.processes, args.export)
+    logger.info(f"{len(jobs)} backtests en {time.perf_counter() - start:.1f}s")
+
+    table = DataFrame(rows)
+    columns = [column for column in ('strategy', 'config', 'timerange', 'total_trades', 'profit_total',
+                                     'winrate', 'max_drawdown_account', 'sharpe', 'error') if column in table]
+    print(table[columns].to_string(index=False))
+
+    output = args.output or f"{RESULTS_DIR}/matrix-{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    if output.endswith('.csv'):
+        table.to_csv(output, index=False)
+    else:
+        with open(output, 'w') as file:
+            json.dump(rows, file, indent=2, default=str)
+    logger.info(f"Tableau consolidé : {output}")
+    return 1 if any('error' in row for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
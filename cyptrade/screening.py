@@ -0,0 +1,432 @@
+"""
+Screening vectorisé des paramètres de sortie (ROI, stoploss, trailing stop)
+
+Chaque jeu de paramètres candidat coûtait un `freqtrade backtesting` complet
+(run-backtest.sh / test-backtest.sh), même pour un simple classement. Ici, les
+signaux enter_long / exit_long sont calculés une fois par la stratégie, puis
+chaque jeu de paramètres est simulé en NumPy :
+
+- pour toutes les entrées possibles d'une paire à la fois, des blocs de
+  bougies suivantes sont parcourus en tableaux 2D (entrées × bougies) :
+  signal de sortie, stoploss, trailing stop (maximum cumulé des hauts), ROI
+  selon la durée du trade ; chaque entrée obtient sa bougie et son prix de
+  sortie ;
+- les trades sont ensuite enchaînés : une position par paire, l'entrée
+  suivante est la première bougie d'entrée après la sortie.
+
+Sémantique reprise du backtesting freqtrade (Backtesting.backtest_loop,
+IStrategy.should_exit) :
+- signaux décalés d'une bougie, entrée à l'ouverture, pas d'entrée si
+  enter_long et exit_long sont tous deux présents ;
+- priorité dans une bougie : signal de sortie (à l'ouverture), stoploss,
+  ROI, trailing stop ; stoploss et ROI testés sur le bas et le haut de la
+  bougie, prix de sortie calculés comme freqtrade (ouverture en cas de gap,
+  ROI bornée à la bougie, pire cas pour un trailing sur la bougie d'entrée) ;
+- frais à l'entrée et à la sortie, trade encore ouvert clôturé à l'ouverture
+  de la dernière bougie (force_exit).
+
+Non simulés (un écart avec le backtesting en découle) : max_open_trades
+global (chaque paire est indépendante), protections, custom_stoploss,
+custom_exit, ajustement de position, ordres limites non remplis, précision
+des prix de l'exchange. Le contrôle d'accord (`--check`, voir
+agreement()) mesure l'écart sur un résultat de backtesting existant.
+
+    python -m cyptrade.screening --config config.json --strategy TrendFollowingStrategy \\
+        --timerange 20240801-20240901 --grid grid.json --top 20
+    python -m cyptrade.screening --config config.json --strategy TrendFollowingStrategy \\
+        --check user_data/backtest_results/backtest-result-2024-09-01_12-00-00.zip
+"""
+import argparse
+import itertools
+import json
+import logging
+import sys
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, Timestamp
+
+logger = logging.getLogger(__name__)
+
+# Raisons de sortie (mêmes libellés que freqtrade)
+EXIT_SIGNAL, STOP_LOSS, ROI, TRAILING_STOP_LOSS, FORCE_EXIT = range(5)
+EXIT_REASONS = ('exit_signal', 'stop_loss', 'roi', 'trailing_stop_loss', 'force_exit')
+
+# Bougies parcourues par bloc : le premier bloc est court (la plupart des trades sortent vite),
+# les suivants doublent jusqu'à MAX_BLOCK
+FIRST_BLOCK = 32
+MAX_BLOCK = 1024
+
+# Frais par défaut (taker Binance)
+DEFAULT_FEE = 0.001
+
+
+class ExitParams(NamedTuple):
+    """Paramètres de sortie simulés (mêmes noms que les attributs de stratégie)"""
+    minimal_roi: Tuple[Tuple[int, float], ...]
+    stoploss: float
+    trailing_stop: bool = False
+    trailing_stop_positive: Optional[float] = None
+    trailing_stop_positive_offset: float = 0.0
+    trailing_only_offset_is_reached: bool = False
+    use_exit_signal: bool = True
+    ignore_roi_if_entry_signal: bool = False
+
+    @classmethod
+    def from_values(cls, values: Dict[str, Any]) -> 'ExitParams':
+        """Depuis un dictionnaire (stratégie, configuration, grille) ; minimal_roi au format freqtrade"""
+        values = {key: value for key, value in values.items() if key in cls._fields}
+        roi = values.get('minimal_roi', {})
+        if isinstance(roi, dict):
+            roi = sorted((int(minutes), float(ratio)) for minutes, ratio in roi.items())
+        values['minimal_roi'] = tuple(tuple(entry) for entry in roi)
+        return cls(**values)
+
+    @classmethod
+    def from_strategy(cls, strategy, **overrides) -> 'ExitParams':
+        values = {field: getattr(strategy, field) for field in cls._fields if hasattr(strategy, field)}
+        values.update(overrides)
+        return cls.from_values(values)
+
+    def as_dict(self) -> Dict[str, Any]:
+        values = self._asdict()
+        values['minimal_roi'] = {str(minutes): ratio for minutes, ratio in self.minimal_roi}
+        return values
+
+
+class PairSignals:
+    """
+    Tableaux d'une paire prêts pour la simulation, à partir du dataframe analysé
+    (période de démarrage retirée) : signaux décalés d'une bougie comme freqtrade.
+    """
+
+    def __init__(self, pair: str, dataframe: DataFrame, timeframe_minutes: int):
+        self.pair = pair
+        self.timeframe_minutes = timeframe_minutes
+        columns = dataframe.columns
+
+        def signal(column: str) -> np.ndarray:
+            if column not in columns:
+                return np.zeros(len(dataframe), dtype=bool)
+            values = dataframe[column].fillna(0).to_numpy() == 1
+            # Le signal d'une bougie s'applique à la suivante
+            return np.concatenate(([False], values[:-1]))
+
+        enter, exit_ = signal('enter_long'), signal('exit_long')
+        # La première bougie n'a pas de signal décalé : retirée comme dans le backtesting
+        self.dates = DatetimeIndex(dataframe['date']).as_unit('ns').asi8[1:]
+        self.minutes = self.dates // 60_000_000_000
+        self.open, self.high, self.low, self.close = (
+            dataframe[column].to_numpy(dtype=np.float64)[1:] for column in ('open', 'high', 'low', 'close'))
+        self.enter, self.exit = enter[1:], exit_[1:]
+        self.size = len(self.open)
+        # Bougies où un trade peut s'ouvrir
+        self.candidates = np.flatnonzero(self.enter & ~self.exit)
+
+
+class Trades(NamedTuple):
+    """Trades d'une paire (tableaux alignés)"""
+    pair: str
+    entry: np.ndarray       # indice de la bougie d'entrée
+    exit: np.ndarray        # indice de la bougie de sortie
+    open_rate: np.ndarray
+    close_rate: np.ndarray
+    reason: np.ndarray      # indice dans EXIT_REASONS
+    profit: np.ndarray      # ratio, frais inclus
+
+
+def _exits(pair: PairSignals, params: ExitParams, fee: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sortie (bougie, prix, raison) de chaque entrée possible, toutes entrées simulées ensemble"""
+    starts = pair.candidates
+    count, size = len(starts), pair.size
+    exit_index = np.full(count, size - 1, dtype=np.int64)
+    exit_rate = pair.open[np.full(count, size - 1)] if count else np.empty(0)
+    reason = np.full(count, FORCE_EXIT, dtype=np.int8)
+    if not count:
+        return exit_index, exit_rate, reason
+
+    open_rate = pair.open[starts]
+    # Valeur d'entrée par unité : profit(rate) = rate * (1 - fee) / cost - 1 (calc_profit_ratio)
+    cost = open_rate * (1 + fee)
+    stoploss = abs(params.stoploss)
+    initial_stop = open_rate * (1 - stoploss)
+    stop = initial_stop.copy()
+    roi_minutes = np.array([minutes for minutes, _ in params.minimal_roi], dtype=np.int64)
+    roi_ratios = np.array([ratio for _, ratio in params.minimal_roi], dtype=np.float64)
+    trailing_positive = params.trailing_stop_positive
+    offset_ratio = params.trailing_stop_positive_offset or 0.0
+    timeframe = pair.timeframe_minutes
+
+    active = np.arange(count)
+    first, block = 0, FIRST_BLOCK
+    while active.size and first < size:
+        rows = starts[active, None] + np.arange(first, first + block)
+        inside = rows < size
+        np.minimum(rows, size - 1, out=rows)
+        open_, high, low = pair.open[rows], pair.high[rows], pair.low[rows]
+        trade_cost = cost[active, None]
+        duration = pair.minutes[rows] - pair.minutes[starts[active], None]
+        # Profit au plus haut de la bougie (ROI et trailing, comme current_profit_best)
+        best = high * (1 - fee) / trade_cost - 1
+
+        # Signal de sortie (à l'ouverture), ignoré si un signal d'entrée est présent
+        signal = pair.exit[rows] & ~pair.enter[rows] if params.use_exit_signal else np.zeros_like(inside)
+
+        # Stop avant / après ajustement sur le haut de la bougie (ft_stoploss_adjust)
+        carried = stop[active, None]
+        if params.trailing_stop:
+            adjust = ~(params.trailing_only_offset_is_reached & (best < offset_ratio))
+            ratio = np.where((trailing_positive is not None) & (best > offset_ratio),
+                             abs(trailing_positive or 0.0), stoploss)
+            candidate = np.where(adjust, high * (1 - ratio), -np.inf)
+            after = np.maximum(carried, np.maximum.accumulate(candidate, axis=1))
+            before = np.concatenate((carried, after[:, :-1]), axis=1)
+        else:
+            ratio = np.full_like(high, stoploss)
+            after = before = np.broadcast_to(carried, high.shape)
+        # Stop déjà atteint avant ajustement : pas d'ajustement sur cette bougie
+        level = np.where(before >= low, before, after)
+        stop_hit = level >= low
+        trailing = level > initial_stop[active, None]
+
+        # ROI : entrée de minimal_roi selon la durée du trade
+        if len(roi_minutes):
+            step = np.searchsorted(roi_minutes, duration, side='right') - 1
+            has_roi = step >= 0
+            step = np.maximum(step, 0)
+            roi = roi_ratios[step]
+            roi_hit = has_roi & (best > roi)
+            if params.ignore_roi_if_entry_signal:
+                roi_hit &= ~pair.enter[rows]
+        else:
+            roi_hit = np.zeros_like(inside)
+
+        events = inside & (signal | stop_hit | roi_hit)
+        column = events.argmax(axis=1)
+        found = events[np.arange(len(active)), column]
+
+        if found.any():
+            which = np.flatnonzero(found)
+            at = column[which]
+            index = (which, at)
+            trades = active[which]
+            o, h, lo = open_[index], high[index], low[index]
+            sig, sl, trail, roi_reached = signal[index], stop_hit[index], trailing[index], roi_hit[index]
+            dur = duration[index]
+
+            # Prix de stoploss : ouverture si le stop est au-dessus de la bougie,
+            # pire cas réaliste pour un trailing déclenché sur la bougie d'entrée
+            stop_level = level[index]
+            if params.trailing_only_offset_is_reached and offset_ratio and trailing_positive:
+                worst = o * (1 + abs(offset_ratio) - abs(trailing_positive))
+            else:
+                worst = o * (1 - ratio[index])
+            stop_rate = np.where(stop_level > h, o,
+                                 np.where(trail & (dur == 0), np.maximum(lo, worst), stop_level))
+
+            # Prix de ROI (calc_close_rate_for_roi), ouverture à l'entrée en vigueur d'un palier
+            if len(roi_minutes):
+                roi_value = roi[index]
+                roi_entry = roi_minutes[step[index]]
+                roi_rate = cost[trades] * (1 + roi_value) / (1 - fee)
+                new_step = (dur > 0) & (dur == roi_entry) & (roi_entry % timeframe == 0) & (o > roi_rate)
+                roi_rate = np.where(new_step, o, np.minimum(np.maximum(roi_rate, lo), h))
+                roi_rate = np.where((roi_value == -1) & (roi_entry % timeframe == 0), o, roi_rate)
+            else:
+                roi_rate = o
+
+            # Priorité freqtrade : signal, stoploss, ROI, trailing stop
+            chosen = np.select([sig, sl & ~trail, roi_reached], [EXIT_SIGNAL, STOP_LOSS, ROI], TRAILING_STOP_LOSS)
+            exit_index[trades] = starts[trades] + first + at
+            reason[trades] = chosen
+            exit_rate[trades] = np.select([chosen == EXIT_SIGNAL, chosen == ROI], [o, roi_rate], stop_rate)
+
+        # Trades encore ouverts : le stop ajusté est reporté au bloc suivant
+        remaining = ~found
+        stop[active[remaining]] = after[remaining, -1]
+        active = active[remaining]
+        first += block
+        block = min(block * 2, MAX_BLOCK)
+
+    return exit_index, exit_rate, reason
+
+
+def simulate(pair: PairSignals, params: ExitParams, fee: float = DEFAULT_FEE) -> Trades:
+    """Trades d'une paire : une position à la fois, entrée suivante après la sortie"""
+    exit_index, exit_rate, reason = _exits(pair, params, fee)
+    starts = pair.candidates
+    chosen = []
+    position = 0
+    while position < len(starts):
+        chosen.append(position)
+        # Entrée possible dès la bougie suivant la sortie
+        position = int(np.searchsorted(starts, exit_index[position] + 1))
+    chosen = np.asarray(chosen, dtype=np.int64)
+    entry = starts[chosen]
+    open_rate = pair.open[entry]
+    close_rate = exit_rate[chosen]
+    profit = close_rate * (1 - fee) / (open_rate * (1 + fee)) - 1
+    return Trades(pair.pair, entry, exit_index[chosen], open_rate, close_rate, reason[chosen], profit)
+
+
+def summarize(trades: Sequence[Trades], pairs: Dict[str, PairSignals]) -> Dict[str, Any]:
+    """Indicateurs de classement : profit cumulé (mise égale par trade), drawdown, taux de réussite"""
+    profit = np.concatenate([result.profit for result in trades]) if trades else np.empty(0)
+    if not len(profit):
+        return {'trades': 0, 'profit_sum': 0.0, 'profit_mean': 0.0, 'winrate': 0.0,
+                'max_drawdown': 0.0, 'avg_duration_min': 0.0, 'exit_reasons': {}}
+    close_time = np.concatenate([pairs[result.pair].dates[result.exit] for result in trades])
+    duration = np.concatenate([pairs[result.pair].minutes[result.exit] - pairs[result.pair].minutes[result.entry]
+                               for result in trades])
+    reasons = np.concatenate([result.reason for result in trades])
+    # Courbe des profits cumulés dans l'ordre de clôture
+    equity = np.cumsum(profit[np.argsort(close_time, kind='stable')])
+    drawdown = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:] - equity
+    return {
+        'trades': int(len(profit)),
+        'profit_sum': float(profit.sum()),
+        'profit_mean': float(profit.mean()),
+        'winrate': float((profit > 0).mean()),
+        'max_drawdown': float(drawdown.max()),
+        'avg_duration_min': float(duration.mean()),
+        'exit_reasons': {EXIT_REASONS[code]: int(total) for code, total in enumerate(np.bincount(reasons, minlength=5))
+                         if total},
+    }
+
+
+def screen(pairs: Dict[str, PairSignals], param_sets: Iterable[ExitParams],
+           fee: float = DEFAULT_FEE) -> List[Tuple[ExitParams, Dict[str, Any]]]:
+    """Simule chaque jeu de paramètres sur toutes les paires"""
+    results = []
+    for params in param_sets:
+        trades = [simulate(pair, params, fee) for pair in pairs.values()]
+        results.append((params, summarize(trades, pairs)))
+    return results
+
+
+def expand_grid(grid: Any, base: ExitParams) -> List[ExitParams]:
+    """
+    Jeux de paramètres d'une grille JSON : liste de jeux, ou dictionnaire dont chaque
+    valeur liste est une dimension (produit cartésien). Les champs absents gardent la
+    valeur de la stratégie.
+    """
+    if isinstance(grid, list):
+        return [ExitParams.from_values({**base.as_dict(), **values}) for values in grid]
+    dimensions = {key: value if isinstance(value, list) else [value] for key, value in grid.items()}
+    keys = list(dimensions)
+    return [ExitParams.from_values({**base.as_dict(), **dict(zip(keys, combination))})
+            for combination in itertools.product(*(dimensions[key] for key in keys))]
+
+
+def agreement(pairs: Dict[str, PairSignals], params: ExitParams, reference: DataFrame,
+              fee: float = DEFAULT_FEE) -> Dict[str, Any]:
+    """
+    Contrôle d'accord avec le backtesting freqtrade : trades du screening comparés à ceux d'un
+    résultat de backtesting (load_backtest_data) sur les mêmes données, appariés par paire et
+    date d'ouverture.
+    """
+    simulated = {}
+    for name, pair in pairs.items():
+        result = simulate(pair, params, fee)
+        for position in range(len(result.entry)):
+            simulated[(name, int(pair.dates[result.entry[position]]))] = (
+                int(pair.dates[result.exit[position]]), EXIT_REASONS[result.reason[position]],
+                float(result.profit[position]))
+
+    expected = {}
+    for trade in reference.itertuples():
+        opened, closed = Timestamp(trade.open_date).value, Timestamp(trade.close_date).value
+        expected[(trade.pair, opened)] = (closed, trade.exit_reason, float(trade.profit_ratio))
+
+    common = simulated.keys() & expected.keys()
+    same_exit = [key for key in common if simulated[key][0] == expected[key][0]]
+    same_reason = [key for key in common if simulated[key][1] == expected[key][1]]
+    profit_error = [abs(simulated[key][2] - expected[key][2]) for key in same_exit]
+    return {
+        'backtest_trades': len(expected),
+        'screening_trades': len(simulated),
+        'matched_entries': len(common),
+        'matched_exits': len(same_exit),
+        'matched_reasons': len(same_reason),
+        'entry_agreement': len(common) / max(len(expected), 1),
+        'exit_agreement': len(same_exit) / max(len(common), 1),
+        'max_profit_error': max(profit_error, default=0.0),
+        'backtest_profit_sum': float(sum(trade[2] for trade in expected.values())),
+        'screening_profit_sum': float(sum(trade[2] for trade in simulated.values())),
+        'only_backtest': sorted(expected.keys() - simulated.keys())[:10],
+        'only_screening': sorted(simulated.keys() - expected.keys())[:10],
+    }
+
+
+def _print_table(results: List[Tuple[ExitParams, Dict[str, Any]]], top: int) -> None:
+    print(f"{'#':>4} {'trades':>7} {'profit':>9} {'moyen':>8} {'réussite':>9} {'drawdown':>9}  paramètres")
+    for rank, (params, metrics) in enumerate(results[:top], 1):
+        described = (f"roi={dict(params.minimal_roi)} sl={params.stoploss}"
+                     + (f" trailing={params.trailing_stop_positive}/{params.trailing_stop_positive_offset}"
+                        if params.trailing_stop else ""))
+        print(f"{rank:>4} {metrics['trades']:>7} {metrics['profit_sum']:>9.2%} {metrics['profit_mean']:>8.3%} "
+              f"{metrics['winrate']:>9.1%} {metrics['max_drawdown']:>9.2%}  {described}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cyptrade.screening',
+                                     description='Screening vectorisé des paramètres de sortie')
+    parser.add_argument('--config', '-c', action='append', required=True, help='Configuration freqtrade')
+    parser.add_argument('--strategy', '-s', required=True)
+    parser.add_argument('--timerange', help='Période (ex: 20240801-20240901)')
+    parser.add_argument('--pairs', nargs='+', help='Paires (défaut: whitelist de la configuration)')
+    parser.add_argument('--grid', help='Grille JSON de paramètres de sortie (défaut: ceux de la stratégie)')
+    parser.add_argument('--fee', type=float, default=DEFAULT_FEE, help=f'Frais par ordre (défaut: {DEFAULT_FEE})')
+    parser.add_argument('--top', type=int, default=20, help='Nombre de résultats affichés')
+    parser.add_argument('--sort', default='profit_sum',
+                        choices=['profit_sum', 'profit_mean', 'winrate', 'max_drawdown', 'trades'])
+    parser.add_argument('--output', help='Ecrit tous les résultats en JSON')
+    parser.add_argument('--check', metavar='BACKTEST_RESULT',
+                        help="Contrôle d'accord avec un résultat de backtesting (.json / .zip)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    from freqtrade.exchange import timeframe_to_minutes
+    from cyptrade.loader import load_signals
+
+    if args.check:
+        from freqtrade.data.btanalysis import load_backtest_data, load_backtest_stats
+        stats = load_backtest_stats(args.check)['strategy'][args.strategy]
+        # Mêmes paires, période et paramètres que le backtesting de référence
+        strategy, analyzed = load_signals(args.config, args.strategy, args.timerange or stats.get('timerange'),
+                                          args.pairs or stats.get('pairlist'))
+        params = ExitParams.from_values({**ExitParams.from_strategy(strategy).as_dict(),
+                                         **{key: stats[key] for key in ExitParams._fields if key in stats}})
+    else:
+        strategy, analyzed = load_signals(args.config, args.strategy, args.timerange, args.pairs)
+        params = ExitParams.from_strategy(strategy)
+
+    timeframe = timeframe_to_minutes(strategy.timeframe)
+    pairs = {pair: PairSignals(pair, frame, timeframe) for pair, frame in analyzed.items()}
+
+    if args.check:
+        reference = load_backtest_data(args.check, args.strategy)
+        report = agreement(pairs, params, reference, args.fee)
+        print(json.dumps(report, indent=2, default=str))
+        return 0
+
+    param_sets = [params]
+    if args.grid:
+        with open(args.grid) as grid:
+            param_sets = expand_grid(json.load(grid), params)
+    start = time.perf_counter()
+    results = screen(pairs, param_sets, args.fee)
+    elapsed = time.perf_counter() - start
+    results.sort(key=lambda result: result[1][args.sort], reverse=args.sort != 'max_drawdown')
+    logger.info(f"{len(param_sets)} jeux de paramètres sur {len(pairs)} paires en {elapsed:.1f}s "
+                f"({len(param_sets) / max(elapsed, 1e-9) * 60:.0f} par minute)")
+    _print_table(results, args.top)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump([{'params': params.as_dict(), **metrics} for params, metrics in results], output, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,714 @@
+"""
+Exchange simulé : l'API ccxt utilisée par freqtrade, servie localement
+
+Le dry-run de freqtrade interroge toujours l'exchange (bougies, carnets
+d'ordres, tickers) : impossible de mesurer la boucle du bot sur 500 paires sans
+Binance ni réseau. `SimulatedMarket` rejoue des bougies enregistrées
+(user_data/data/<exchange>) ou synthétiques et répond aux appels ccxt du bot :
+markets, OHLCV, ticker(s), carnet d'ordres, solde, création / annulation /
+lecture d'ordres (limit et market, exécutés sur les prix rejoués).
+
+- `install(market)` remplace les objets ccxt créés par freqtrade (sync et async)
+  par une sous-classe de la même classe ccxt dont les méthodes réseau
+  interrogent le marché simulé ; tout autre appel réseau lève une erreur ;
+- horloge de rejeu : le marché avance de `speed` secondes de données par
+  seconde réelle, à partir de `start`. Les bougies servies sont ré-étiquetées
+  sur l'horloge réelle (la bougie en cours du rejeu devient la bougie en cours
+  pour freqtrade), les tickers et carnets suivent le prix rejoué : un trade
+  dry-run vit à la vitesse du rejeu ;
+- injection de pannes : latence (`latency_ms` ± `jitter_ms`) par appel, erreurs
+  RateLimitExceeded aléatoires (`error_rate`) et refus des appels plus
+  rapprochés que `rate_limit_ms`, comme un exchange qui limite.
+
+Test de charge de la boucle du bot (dry-run, base en mémoire, sans réseau) :
+
+    python -m cyptrade.simulator --config config.json --strategy TrendFollowingStrategy \\
+        --pairs 10 50 200 500 --iterations 5 --latency-ms 20 --error-rate 0.01
+
+Chaque itération avance le rejeu d'une bougie et recule d'une bougie les heures
+de rafraîchissement de freqtrade : toutes les paires sont rafraîchies par
+l'appel incrémental d'une nouvelle bougie (cache `_klines` conservé, comme en
+production) puis analysées, le pire cas de la boucle : durée de process() (médiane, p95),
+part du rafraîchissement et de l'analyse, paires par seconde, appels à
+l'exchange. La première itération (historique de démarrage) est mesurée à part.
+`--datadir user_data/data/binance` rejoue les bougies enregistrées au lieu des
+bougies synthétiques de cyptrade.benchmark. Spot uniquement.
+"""
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import ccxt
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from freqtrade.data.history import get_datahandler
+from freqtrade.enums import CandleType, RunMode, State
+from freqtrade.exceptions import OperationalException
+from freqtrade.exchange import Exchange, timeframe_to_msecs
+from freqtrade.persistence import Trade
+
+from cyptrade.benchmark import synthetic_ohlcv
+from cyptrade.loader import load_config
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAIRS = [10, 50, 200, 500]
+DEFAULT_ITERATIONS = 5
+DEFAULT_CANDLES = 3000
+# Secondes de données rejouées par seconde réelle
+DEFAULT_SPEED = 60.0
+# Bougies de base disponibles avant le début du rejeu (historique de démarrage)
+WARMUP_CANDLES = 1500
+DEFAULT_WALLET = 10_000.0
+# Écart bid / ask relatif, pas entre deux niveaux du carnet, frais maker / taker
+SPREAD = 0.0005
+BOOK_STEP = 0.0002
+FEE = 0.001
+RESULTS_DIR = 'user_data/simulator'
+# Méthodes ccxt servies par le marché simulé
+API_METHODS = ('fetch_ohlcv', 'fetch_order_book', 'fetch_ticker', 'fetch_tickers', 'fetch_balance',
+               'create_order', 'cancel_order', 'fetch_order', 'fetch_open_orders', 'fetch_closed_orders',
+               'fetch_orders', 'fetch_my_trades', 'fetch_trading_fees', 'fetch_time')
+
+
+def _floor(ms: int, step: int) -> int:
+    return ms - ms % step
+
+
+class SimulatedMarket:
+    """Marché rejoué (bougies de base par paire) répondant aux appels ccxt"""
+
+    def __init__(self, frames: Dict[str, DataFrame], timeframe: str, quote: str = 'USDT',
+                 speed: float = DEFAULT_SPEED, start: Optional[datetime] = None, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, error_rate: float = 0.0, rate_limit_ms: float = 0.0,
+                 wallet: float = DEFAULT_WALLET, seed: int = 42):
+        if not frames:
+            raise OperationalException("Aucune bougie à rejouer")
+        self.timeframe = timeframe
+        self.timeframe_ms = timeframe_to_msecs(timeframe)
+        self.quote = quote
+        self.dates: Dict[str, np.ndarray] = {}
+        self.values: Dict[str, np.ndarray] = {}
+        for pair, frame in frames.items():
+            self.dates[pair] = pd.DatetimeIndex(frame['date']).as_unit('ms').asi8
+            self.values[pair] = frame[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)
+        first = min(int(dates[0]) for dates in self.dates.values())
+        last = max(int(dates[-1]) for dates in self.dates.values())
+        self.start_ms = (int(pd.Timestamp(start).timestamp() * 1000) if start is not None
+                         else first + min((last - first) // 2, WARMUP_CANDLES * self.timeframe_ms))
+        self.end_ms = last + self.timeframe_ms - 1
+        self.speed = speed
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit_ms / 1000
+        self._rng = random.Random(seed)
+        self._lock = Lock()
+        self._t0 = time.time()
+        self._last_call = 0.0
+        self.calls: Counter = Counter()
+        self.injected = 0
+        self.refused = 0
+        self.orders: Dict[str, dict] = {}
+        self._next_order = 0
+        self.balances: Dict[str, Dict[str, float]] = defaultdict(lambda: {'free': 0.0, 'used': 0.0})
+        self.balances[quote]['free'] = wallet
+
+    # -- horloge et pannes -----------------------------------------------------
+
+    def now_ms(self) -> int:
+        """Instant rejoué (ms), arrêté à la fin des données"""
+        return min(self.start_ms + int((time.time() - self._t0) * self.speed * 1000), self.end_ms)
+
+    def advance(self, candles: int = 1) -> None:
+        """Avance le rejeu de `candles` bougies de base, en plus de l'horloge"""
+        with self._lock:
+            self.start_ms += candles * self.timeframe_ms
+
+    def enter(self, method: str) -> Tuple[float, Optional[Exception]]:
+        """Compte l'appel ; latence à simuler et erreur à lever après la latence"""
+        with self._lock:
+            self.calls[method] += 1
+            now = time.monotonic()
+            error = None
+            if self.rate_limit and now - self._last_call < self.rate_limit:
+                self.refused += 1
+                error = ccxt.RateLimitExceeded(f"simulateur : {method} trop rapproché de l'appel précédent")
+            elif self.error_rate and self._rng.random() < self.error_rate:
+                self.injected += 1
+                error = ccxt.RateLimitExceeded(f"simulateur : erreur injectée sur {method}")
+            self._last_call = now
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+        return delay, error
+
+    # -- prix ------------------------------------------------------------------
+
+    def _check_pair(self, symbol: str) -> None:
+        if symbol not in self.dates:
+            raise ccxt.BadSymbol(f"simulateur : paire inconnue {symbol}")
+
+    def _position(self, pair: str, at_ms: int) -> int:
+        """Index de la bougie de base en cours à at_ms (-1 avant la première)"""
+        return int(np.searchsorted(self.dates[pair], at_ms, side='right')) - 1
+
+    def price(self, pair: str, at_ms: Optional[int] = None) -> float:
+        """Prix rejoué : interpolé de l'ouverture à la clôture de la bougie de base en cours"""
+        at_ms = self.now_ms() if at_ms is None else at_ms
+        index = max(self._position(pair, at_ms), 0)
+        open_, _, _, close, _ = self.values[pair][index]
+        fraction = min(max((at_ms - self.dates[pair][index]) / self.timeframe_ms, 0.0), 1.0)
+        return float(open_ + (close - open_) * fraction)
+
+    def _candles(self, pair: str, first_ms: int, now_ms: int) -> np.ndarray:
+        """Bougies de base de first_ms à now_ms, la dernière tronquée au prix courant"""
+        dates, values = self.dates[pair], self.values[pair]
+        start = int(np.searchsorted(dates, first_ms, side='left'))
+        stop = self._position(pair, now_ms) + 1
+        if stop <= start:
+            return np.empty((0, 6))
+        block = np.column_stack((dates[start:stop].astype(np.float64), values[start:stop]))
+        current = self.price(pair, now_ms)
+        block[-1, 2] = max(block[-1, 1], current)
+        block[-1, 3] = min(block[-1, 1], current)
+        block[-1, 4] = current
+        return block
+
+    def markets(self) -> Dict[str, dict]:
+        markets = {}
+        for pair in self.dates:
+            base, quote = pair.split('/')
+            magnitude = 10.0 ** (np.floor(np.log10(max(self.values[pair][0, 3], 1e-12))) - 5)
+            markets[pair] = {
+                'id': f'{base}{quote}', 'symbol': pair, 'base': base, 'quote': quote,
+                'baseId': base, 'quoteId': quote, 'active': True, 'type': 'spot', 'spot': True,
+                'margin': False, 'swap': False, 'future': False, 'option': False, 'contract': False,
+                'linear': None, 'inverse': None, 'contractSize': None, 'taker': FEE, 'maker': FEE,
+                'precision': {'amount': 1e-8, 'price': float(magnitude)},
+                'limits': {'amount': {'min': 1e-8, 'max': None}, 'price': {'min': None, 'max': None},
+                           'cost': {'min': 5.0, 'max': None}, 'leverage': {'min': None, 'max': None}},
+                'info': {},
+            }
+        return markets
+
+    # -- données de marché -----------------------------------------------------
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since: Optional[int] = None,
+                    limit: Optional[int] = None, params=None) -> list:
+        """Bougies agrégées depuis les bougies de base, ré-étiquetées sur l'horloge réelle"""
+        self._check_pair(symbol)
+        step = timeframe_to_msecs(timeframe)
+        if step < self.timeframe_ms or step % self.timeframe_ms:
+            raise ccxt.BadRequest(f"simulateur : timeframe {timeframe} non servi (base {self.timeframe})")
+        limit = limit or 500
+        now = self.now_ms()
+        offset = _floor(int(time.time() * 1000), step) - _floor(now, step)
+        first = since - offset if since is not None else _floor(now, step) - (limit - 1) * step
+        block = self._candles(symbol, _floor(first, step), now)
+        if not len(block):
+            return []
+        buckets = block[:, 0].astype(np.int64) // step * step
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(block)] - 1
+        candles = np.column_stack((
+            buckets[starts] + offset,
+            block[starts, 1],
+            np.maximum.reduceat(block[:, 2], starts),
+            np.minimum.reduceat(block[:, 3], starts),
+            block[ends, 4],
+            np.add.reduceat(block[:, 5], starts),
+        ))
+        return [[int(row[0]), *row[1:].tolist()] for row in candles[:limit]]
+
+    def fetch_ticker(self, symbol: str, params=None) -> dict:
+        self._check_pair(symbol)
+        now = self.now_ms()
+        last = self.price(symbol, now)
+        day = self._candles(symbol, now - 86_400_000, now)
+        volume = float(day[:, 5].sum()) if len(day) else 0.0
+        timestamp = int(time.time() * 1000)
+        return {
+            'symbol': symbol, 'timestamp': timestamp, 'datetime': ccxt.Exchange.iso8601(timestamp),
+            'last': last, 'close': last, 'bid': last * (1 - SPREAD / 2), 'ask': last * (1 + SPREAD / 2),
+            'bidVolume': None, 'askVolume': None,
+            'open': float(day[0, 1]) if len(day) else last,
+            'high': float(day[:, 2].max()) if len(day) else last,
+            'low': float(day[:, 3].min()) if len(day) else last,
+            'baseVolume': volume, 'quoteVolume': volume * last,
+            'percentage': None, 'change': None, 'average': None, 'vwap': None, 'previousClose': None,
+            'info': {},
+        }
+
+    def fetch_tickers(self, symbols: Optional[Sequence[str]] = None, params=None) -> Dict[str, dict]:
+        return {symbol: self.fetch_ticker(symbol) for symbol in (symbols or self.dates)}
+
+    def fetch_order_book(self, symbol: str, limit: Optional[int] = None, params=None) -> dict:
+        """Carnet symétrique autour du prix rejoué, quantités tirées du volume de la bougie"""
+        self._check_pair(symbol)
+        now = self.now_ms()
+        last = self.price(symbol, now)
+        index = max(self._position(symbol, now), 0)
+        depth = max(float(self.values[symbol][index, 4]) / 20, 1e-6)
+        levels = np.arange(limit or 20)
+        bid, ask = last * (1 - SPREAD / 2), last * (1 + SPREAD / 2)
+        timestamp = int(time.time() * 1000)
+        return {
+            'symbol': symbol, 'timestamp': timestamp, 'datetime': ccxt.Exchange.iso8601(timestamp), 'nonce': None,
+            'bids': [[bid * (1 - BOOK_STEP * level), depth * (1 + level)] for level in levels.tolist()],
+            'asks': [[ask * (1 + BOOK_STEP * level), depth * (1 + level)] for level in levels.tolist()],
+        }
+
+    def fetch_trading_fees(self, params=None) -> Dict[str, dict]:
+        return {pair: {'symbol': pair, 'maker': FEE, 'taker': FEE, 'info': {}} for pair in self.dates}
+
+    def fetch_time(self, params=None) -> int:
+        return int(time.time() * 1000)
+
+    # -- ordres ----------------------------------------------------------------
+
+    def _fill(self, order: dict, price: float) -> None:
+        base, quote = order['symbol'].split('/')
+        cost = order['amount'] * price
+        fee = cost * FEE
+        if order['side'] == 'buy':
+            self.balances[quote]['used'] -= order['_reserved']
+            self.balances[quote]['free'] += order['_reserved'] - cost - fee
+            self.balances[base]['free'] += order['amount']
+        else:
+            self.balances[base]['used'] -= order['amount']
+            self.balances[quote]['free'] += cost - fee
+        timestamp = int(time.time() * 1000)
+        order.update({'status': 'closed', 'filled': order['amount'], 'remaining': 0.0, 'average': price,
+                      'cost': cost, 'lastTradeTimestamp': timestamp,
+                      'fee': {'cost': fee, 'currency': quote, 'rate': FEE}})
+        order['trades'] = [{'id': f"{order['id']}-1", 'order': order['id'], 'symbol': order['symbol'],
+                            'side': order['side'], 'type': order['type'], 'price': price,
+                            'amount': order['amount'], 'cost': cost, 'timestamp': timestamp,
+                            'datetime': ccxt.Exchange.iso8601(timestamp), 'takerOrMaker': 'maker',
+                            'fee': dict(order['fee']), 'info': {}}]
+
+    def _match(self) -> None:
+        """Exécute les ordres limit ouverts que le prix rejoué a traversés depuis le dernier contrôle"""
+        now = self.now_ms()
+        for order in self.orders.values():
+            if order['status'] != 'open':
+                continue
+            checked, order['_checked'] = order['_checked'], now
+            block = self._candles(order['symbol'], _floor(checked, self.timeframe_ms), now)
+            if not len(block):
+                continue
+            # La bougie du dernier contrôle ne compte qu'à partir du prix de ce contrôle
+            reached = [self.price(order['symbol'], checked), block[0, 4]]
+            if order['side'] == 'buy' and min(reached + block[1:, 3].tolist()) <= order['price']:
+                self._fill(order, order['price'])
+            elif order['side'] == 'sell' and max(reached + block[1:, 2].tolist()) >= order['price']:
+                self._fill(order, order['price'])
+
+    @staticmethod
+    def _public(order: dict) -> dict:
+        result = {key: value for key, value in order.items() if not key.startswith('_')}
+        result['fee'] = dict(order['fee']) if order['fee'] else None
+        result['trades'] = list(order['trades'])
+        return result
+
+    def create_order(self, symbol: str, type: str, side: str, amount: float, price: Optional[float] = None,
+                     params=None) -> dict:
+        self._check_pair(symbol)
+        if type not in ('limit', 'market'):
+            raise ccxt.NotSupported(f"simulateur : ordres {type} non gérés (limit et market seulement)")
+        base, quote = symbol.split('/')
+        ticker = self.fetch_ticker(symbol)
+        market_price = ticker['ask'] if side == 'buy' else ticker['bid']
+        limit_price = float(price) if type == 'limit' else market_price
+        amount = float(amount)
+        with self._lock:
+            self._match()
+            if side == 'buy':
+                reserved = amount * limit_price * (1 + FEE)
+                if self.balances[quote]['free'] < reserved:
+                    raise ccxt.InsufficientFunds(f"simulateur : {quote} insuffisant pour {amount} {base}")
+                self.balances[quote]['free'] -= reserved
+                self.balances[quote]['used'] += reserved
+            else:
+                reserved = amount
+                if self.balances[base]['free'] < amount * (1 - 1e-9):
+                    raise ccxt.InsufficientFunds(f"simulateur : {base} insuffisant")
+                self.balances[base]['free'] -= amount
+                self.balances[base]['used'] += amount
+            self._next_order += 1
+            timestamp = int(time.time() * 1000)
+            order = {
+                'id': str(self._next_order), 'clientOrderId': None, 'timestamp': timestamp,
+                'datetime': ccxt.Exchange.iso8601(timestamp), 'lastTradeTimestamp': None, 'symbol': symbol,
+                'type': type, 'timeInForce': 'GTC', 'postOnly': False, 'reduceOnly': False, 'side': side,
+                'price': limit_price, 'stopPrice': None, 'triggerPrice': None, 'average': None,
+                'amount': amount, 'filled': 0.0, 'remaining': amount, 'cost': 0.0, 'status': 'open',
+                'fee': None, 'trades': [], 'info': {}, '_reserved': reserved, '_checked': self.now_ms(),
+            }
+            self.orders[order['id']] = order
+            crossed = limit_price >= market_price if side == 'buy' else limit_price <= market_price
+            if type == 'market' or crossed:
+                self._fill(order, market_price)
+            return self._public(order)
+
+    def _order(self, id: str) -> dict:
+        if id not in self.orders:
+            raise ccxt.OrderNotFound(f"simulateur : ordre {id} inconnu")
+        return self.orders[id]
+
+    def cancel_order(self, id: str, symbol: Optional[str] = None, params=None) -> dict:
+        with self._lock:
+            self._match()
+            order = self._order(id)
+            if order['status'] != 'open':
+                raise ccxt.OrderNotFound(f"simulateur : ordre {id} déjà {order['status']}")
+            base, quote = order['symbol'].split('/')
+            currency = quote if order['side'] == 'buy' else base
+            self.balances[currency]['used'] -= order['_reserved']
+            self.balances[currency]['free'] += order['_reserved']
+            order['status'] = 'canceled'
+            return self._public(order)
+
+    def fetch_order(self, id: str, symbol: Optional[str] = None, params=None) -> dict:
+        with self._lock:
+            self._match()
+            return self._public(self._order(id))
+
+    def fetch_orders(self, symbol: Optional[str] = None, since: Optional[int] = None,
+                     limit: Optional[int] = None, params=None, status: Optional[str] = None) -> List[dict]:
+        with self._lock:
+            self._match()
+            orders = [self._public(order) for order in self.orders.values()
+                      if (symbol is None or order['symbol'] == symbol)
+                      and (since is None or order['timestamp'] >= since)
+                      and (status is None or order['status'] == status)]
+        return orders[-limit:] if limit else orders
+
+    def fetch_open_orders(self, symbol: Optional[str] = None, since: Optional[int] = None,
+                          limit: Optional[int] = None, params=None) -> List[dict]:
+        return self.fetch_orders(symbol, since, limit, status='open')
+
+    def fetch_closed_orders(self, symbol: Optional[str] = None, since: Optional[int] = None,
+                            limit: Optional[int] = None, params=None) -> List[dict]:
+        return self.fetch_orders(symbol, since, limit, status='closed')
+
+    def fetch_my_trades(self, symbol: Optional[str] = None, since: Optional[int] = None,
+                        limit: Optional[int] = None, params=None) -> List[dict]:
+        trades = [trade for order in self.fetch_orders(symbol, since) for trade in order['trades']]
+        return trades[-limit:] if limit else trades
+
+    def fetch_balance(self, params=None) -> dict:
+        with self._lock:
+            self._match()
+            balance = {'info': {}, 'free': {}, 'used': {}, 'total': {}}
+            for currency, amounts in self.balances.items():
+                entry = {'free': amounts['free'], 'used': amounts['used'],
+                         'total': amounts['free'] + amounts['used']}
+                balance[currency] = entry
+                for key in ('free', 'used', 'total'):
+                    balance[key][currency] = entry[key]
+        return balance
+
+    def report(self) -> dict:
+        return {'calls': dict(self.calls), 'injected': self.injected, 'refused': self.refused,
+                'orders': len(self.orders), 'market_time': ccxt.Exchange.iso8601(self.now_ms())}
+
+
+# -- branchement sur les objets ccxt de freqtrade ------------------------------
+
+def _sync_call(name: str):
+    def call(self, *args, **kwargs):
+        delay, error = self.simulator.enter(name)
+        if delay:
+            time.sleep(delay)
+        if error is not None:
+            raise error
+        return getattr(self.simulator, name)(*args, **kwargs)
+
+    call.__name__ = name
+    return call
+
+
+def _async_call(name: str):
+    async def call(self, *args, **kwargs):
+        delay, error = self.simulator.enter(name)
+        if delay:
+            await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return getattr(self.simulator, name)(*args, **kwargs)
+
+    call.__name__ = name
+    return call
+
+
+class SimulatedApi:
+    """Méthodes réseau d'un objet ccxt synchrone redirigées vers le marché simulé"""
+
+    simulator: SimulatedMarket
+
+    def fetch(self, url, method='GET', headers=None, body=None):
+        raise ccxt.ExchangeNotAvailable(f"simulateur : appel réseau refusé ({method} {url})")
+
+    def load_markets(self, reload=False, params=None):
+        if reload or not self.markets:
+            delay, error = self.simulator.enter('load_markets')
+            if delay:
+                time.sleep(delay)
+            if error is not None:
+                raise error
+            self.set_markets(self.simulator.markets())
+        return self.markets
+
+    def fetch_bids_asks(self, symbols=None, params=None):
+        return self.fetch_tickers(symbols)
+
+    def sapi_get_spot_delist_schedule(self, params=None):
+        return []
+
+
+class AsyncSimulatedApi:
+    """Méthodes réseau d'un objet ccxt asynchrone redirigées vers le marché simulé"""
+
+    simulator: SimulatedMarket
+
+    async def fetch(self, url, method='GET', headers=None, body=None):
+        raise ccxt.ExchangeNotAvailable(f"simulateur : appel réseau refusé ({method} {url})")
+
+    async def load_markets(self, reload=False, params=None):
+        if reload or not self.markets:
+            delay, error = self.simulator.enter('load_markets')
+            if delay:
+                await asyncio.sleep(delay)
+            if error is not None:
+                raise error
+            self.set_markets(self.simulator.markets())
+        return self.markets
+
+    async def fetch_bids_asks(self, symbols=None, params=None):
+        return await self.fetch_tickers(symbols)
+
+
+for _name in API_METHODS:
+    setattr(SimulatedApi, _name, _sync_call(_name))
+    setattr(AsyncSimulatedApi, _name, _async_call(_name))
+
+_classes: Dict[Tuple[type, bool], type] = {}
+_original_init_ccxt = None
+
+
+def _simulated_class(cls: type, sync: bool) -> type:
+    if (cls, sync) not in _classes:
+        mixin = SimulatedApi if sync else AsyncSimulatedApi
+        _classes[(cls, sync)] = type(f'Simulated{cls.__name__}', (mixin, cls), {})
+    return _classes[(cls, sync)]
+
+
+def install(market: SimulatedMarket) -> None:
+    """Les exchanges freqtrade créés ensuite parlent au marché simulé (websocket désactivé)"""
+    global _original_init_ccxt
+    if _original_init_ccxt is None:
+        _original_init_ccxt = Exchange._init_ccxt
+    original = _original_init_ccxt
+
+    def init_ccxt(self, exchange_config, sync, ccxt_kwargs):
+        api = original(self, exchange_config, sync, ccxt_kwargs)
+        api.__class__ = _simulated_class(type(api), sync)
+        api.simulator = market
+        api.has = {**api.has, 'watchOHLCV': False, 'fetchL2OrderBook': True, 'fetchTickers': True}
+        return api
+
+    Exchange._init_ccxt = init_ccxt
+
+
+def uninstall() -> None:
+    global _original_init_ccxt
+    if _original_init_ccxt is not None:
+        Exchange._init_ccxt = _original_init_ccxt
+        _original_init_ccxt = None
+
+
+# -- données rejouées ----------------------------------------------------------
+
+def recorded_frames(datadir: Path, timeframe: str, pairs: int, data_format: str = 'feather') -> Dict[str, DataFrame]:
+    """Bougies enregistrées (spot) des `pairs` premières paires disponibles"""
+    handler = get_datahandler(Path(datadir), data_format)
+    available = sorted({pair for pair, tf, _ in handler.ohlcv_get_available_data(Path(datadir), 'spot')
+                        if tf == timeframe})
+    if len(available) < pairs:
+        logger.warning(f"{len(available)} paires enregistrées en {timeframe} dans {datadir} ({pairs} demandées)")
+    return {pair: handler.ohlcv_load(pair, timeframe, CandleType.SPOT) for pair in available[:pairs]}
+
+
+def synthetic_market_frames(pairs: int, candles: int, timeframe: str, quote: str) -> Dict[str, DataFrame]:
+    return {pair: synthetic_ohlcv(pair, timeframe, candles)
+            for pair in (f'SYN{index:03d}/{quote}' for index in range(pairs))}
+
+
+# -- test de charge ------------------------------------------------------------
+
+def _loadtest_config(config: dict, pairs: Sequence[str], live: bool) -> dict:
+    config = copy.deepcopy(config)
+    config['dry_run'] = not live
+    config['runmode'] = RunMode.LIVE if live else RunMode.DRY_RUN
+    config['db_url'] = 'sqlite://'
+    config['initial_state'] = 'running'
+    config['exchange']['pair_whitelist'] = list(pairs)
+    config['exchange']['pair_blacklist'] = []
+    config['exchange']['enable_ws'] = False
+    if live:
+        config['exchange'].update({'key': 'simulateur', 'secret': 'simulateur'})
+    config['pairlists'] = [{'method': 'StaticPairList'}]
+    config['api_server'] = {**config.get('api_server', {}), 'enabled': False}
+    if config.get('telegram', {}).get('enabled'):
+        config['telegram']['enabled'] = False
+    return config
+
+
+def _timed(timings: Dict[str, float], name: str, func):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings[name] += time.perf_counter() - start
+
+    return wrapper
+
+
+def _previous_candle(exchange: Exchange) -> None:
+    """Recule d'une bougie les heures de rafraîchissement : le prochain rafraîchissement est
+    l'appel incrémental d'une nouvelle bougie, sans éviction du cache ("Time jump detected")"""
+    for times in (exchange._pairs_last_refresh_time, getattr(exchange, '_pairs_last_poll_time', {})):
+        for key, last in times.items():
+            times[key] = last - timeframe_to_msecs(key[1])
+
+
+def measure(config: dict, market: SimulatedMarket, iterations: int, live: bool = False) -> dict:
+    """Itérations de la boucle d'un bot sur le marché simulé, une nouvelle bougie (chemin chaud) à chacune"""
+    from freqtrade.freqtradebot import FreqtradeBot
+
+    pairs = list(market.dates)
+    install(market)
+    bot = None
+    try:
+        bot = FreqtradeBot(_loadtest_config(config, pairs, live))
+        bot.state = State.RUNNING
+        bot.startup()
+        # Analyse à chaque itération, même si freqtrade a déjà vu la bougie
+        bot.strategy.process_only_new_candles = False
+        timings: Dict[str, float] = defaultdict(float)
+        bot.exchange.refresh_latest_ohlcv = _timed(timings, 'refresh', bot.exchange.refresh_latest_ohlcv)
+        bot.strategy.analyze = _timed(timings, 'analyze', bot.strategy.analyze)
+        loops, refresh, analyze, calls = [], [], [], []
+        for _ in range(iterations + 1):
+            market.advance()
+            _previous_candle(bot.exchange)
+            timings.clear()
+            before = sum(market.calls.values())
+            start = time.perf_counter()
+            bot.process()
+            loops.append(time.perf_counter() - start)
+            refresh.append(timings['refresh'])
+            analyze.append(timings['analyze'])
+            calls.append(sum(market.calls.values()) - before)
+        steady = np.array(loops[1:]) if iterations else np.array(loops)
+        open_trades = len(Trade.get_open_trades())
+    finally:
+        if bot is not None:
+            bot.cleanup()
+        uninstall()
+    median = float(np.median(steady))
+    return {
+        'pairs': len(pairs),
+        'startup_s': round(loops[0], 4),
+        'loop_p50_s': round(median, 4),
+        'loop_p95_s': round(float(np.percentile(steady, 95)), 4),
+        'loop_max_s': round(float(steady.max()), 4),
+        'refresh_s': round(float(np.median(refresh[1:] or refresh)), 4),
+        'analyze_s': round(float(np.median(analyze[1:] or analyze)), 4),
+        'pairs_per_second': round(len(pairs) / median, 1) if median else None,
+        'calls_per_loop': round(float(np.mean(calls[1:] or calls)), 1),
+        'open_trades': open_trades,
+        **{key: value for key, value in market.report().items() if key != 'calls'},
+    }
+
+
+def _print_table(results: List[dict]) -> None:
+    print(f"{'paires':>7}{'démarrage':>11}{'p50':>9}{'p95':>9}{'rafraîch.':>11}{'analyse':>9}"
+          f"{'paires/s':>10}{'appels':>8}{'erreurs':>9}{'trades':>8}")
+    for result in results:
+        print(f"{result['pairs']:>7}{result['startup_s']:>11.3f}{result['loop_p50_s']:>9.3f}"
+              f"{result['loop_p95_s']:>9.3f}{result['refresh_s']:>11.3f}{result['analyze_s']:>9.3f}"
+              f"{result['pairs_per_second'] or 0:>10,.0f}{result['calls_per_loop']:>8.0f}"
+              f"{result['injected'] + result['refused']:>9}{result['open_trades']:>8}")
+
+
+def run(config_files: Sequence[str], strategy: str, pair_counts: Sequence[int],
+        iterations: int = DEFAULT_ITERATIONS, datadir: Optional[str] = None, candles: int = DEFAULT_CANDLES,
+        live: bool = False, **market_options) -> List[dict]:
+    config = load_config(config_files, strategy, runmode=RunMode.DRY_RUN)
+    results = []
+    for count in pair_counts:
+        if datadir:
+            frames = recorded_frames(Path(datadir), config['timeframe'], count,
+                                     config.get('dataformat_ohlcv', 'feather'))
+        else:
+            frames = synthetic_market_frames(count, candles, config['timeframe'], config['stake_currency'])
+        market = SimulatedMarket(frames, config['timeframe'], quote=config['stake_currency'], **market_options)
+        result = measure(config, market, iterations, live)
+        logger.info(f"{count} paires : {result}")
+        results.append(result)
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cyptrade.simulator',
+                                     description="Test de charge de la boucle du bot sur un exchange simulé")
+    parser.add_argument('--config', '-c', action='append', help='Configuration freqtrade (défaut: config.json)')
+    parser.add_argument('--strategy', '-s', required=True, help='Stratégie')
+    parser.add_argument('--pairs', type=int, nargs='+', default=DEFAULT_PAIRS, help='Nombres de paires')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS,
+                        help="Itérations mesurées après l'itération de démarrage")
+    parser.add_argument('--datadir', help='Bougies enregistrées à rejouer (défaut: bougies synthétiques)')
+    parser.add_argument('--candles', type=int, default=DEFAULT_CANDLES, help='Bougies synthétiques par paire')
+    parser.add_argument('--speed', type=float, default=DEFAULT_SPEED,
+                        help=f'Secondes rejouées par seconde réelle (défaut: {DEFAULT_SPEED:g})')
+    parser.add_argument('--start', help='Début du rejeu (YYYY-MM-DD, défaut: après la période de démarrage)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Latence par appel')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Variation aléatoire de la latence')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Part des appels en RateLimitExceeded')
+    parser.add_argument('--rate-limit-ms', type=float, default=0.0,
+                        help='Refuse les appels plus rapprochés (RateLimitExceeded)')
+    parser.add_argument('--live', action='store_true',
+                        help="Ordres passés au simulateur (create/cancel/fetch_order) au lieu du dry-run")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    results = run(args.config or ['config.json'], args.strategy, args.pairs, args.iterations, args.datadir,
+                  args.candles, args.live, speed=args.speed,
+                  start=pd.Timestamp(args.start, tz='UTC') if args.start else None,
+                  latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                  rate_limit_ms=args.rate_limit_ms)
+    _print_table(results)
+    output = Path(RESULTS_DIR) / f"loadtest-{args.strategy}-{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=1))
+    print(f"Résultats : {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Flux websocket local au format Binance, pour tester stream_feed sans réseau
+
+Remplaçant de wss://stream.binance.com:9443 : mêmes URL et messages (flux
+combinés), prix du marché simulé de cyptrade.simulator (bougies synthétiques
+ou enregistrées, rejouées à `speed` secondes de données par seconde réelle,
+ré-étiquetées sur l'horloge réelle).
+
+    python -m cyptrade.stream_server --config config.json --pairs 50 --port 9443
+
+puis dans la configuration du bot :
+
+    "stream_feed": {"url": "ws://127.0.0.1:9443"}
+
+Protocole servi :
+- ws://hôte:port/stream[?streams=btcusdt@kline_5m/btcusdt@bookTicker] ;
+- messages SUBSCRIBE, UNSUBSCRIBE et LIST_SUBSCRIPTIONS ({"method", "params", "id"}) ;
+- toutes les `interval` secondes, chaque flux abonné reçoit
+  {"stream": ..., "data": ...} : la bougie en cours (<symbole>@kline_<tf>,
+  précédée de la bougie tout juste clôturée avec "x": true) et le meilleur
+  prix (<symbole>@bookTicker).
+
+`StreamServer(market).start()` le lance dans un thread, à côté d'un bot
+branché sur le même marché simulé (cyptrade.simulator.install).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Set
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from freqtrade.enums import RunMode
+from freqtrade.exchange import timeframe_to_msecs
+
+from cyptrade.loader import load_config
+from cyptrade.simulator import (DEFAULT_CANDLES, DEFAULT_SPEED, SimulatedMarket, recorded_frames,
+                                synthetic_market_frames)
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 9443
+# Secondes entre deux envois à chaque abonné
+DEFAULT_INTERVAL = 1.0
+DEFAULT_PAIRS = 10
+
+
+class StreamServer:
+    """Serveur websocket des flux kline et bookTicker d'un marché simulé"""
+
+    def __init__(self, market: SimulatedMarket, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 interval: float = DEFAULT_INTERVAL):
+        self.market = market
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.ids = {pair: market_info['id'] for pair, market_info in market.markets().items()}
+        # Symbole du flux (minuscules) -> paire
+        self.symbols = {symbol.lower(): pair for pair, symbol in self.ids.items()}
+        self.connections = 0
+        self.sent = 0
+        self._update_id = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Future] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f'ws://{self.host}:{self.port}'
+
+    # -- messages ----------------------------------------------------------------
+
+    def _kline(self, pair: str, timeframe: str, candle: list, closed: bool) -> dict:
+        open_ms, open_, high, low, close, volume = candle
+        symbol = self.ids[pair]
+        return {'e': 'kline', 'E': int(time.time() * 1000), 's': symbol, 'k': {
+            't': open_ms, 'T': open_ms + timeframe_to_msecs(timeframe) - 1, 's': symbol, 'i': timeframe,
+            'o': f'{open_:.10g}', 'h': f'{high:.10g}', 'l': f'{low:.10g}', 'c': f'{close:.10g}',
+            'v': f'{volume:.10g}', 'x': closed,
+        }}
+
+    def _book(self, pair: str) -> dict:
+        book = self.market.fetch_order_book(pair, 1)
+        self._update_id += 1
+        (bid, bid_size), (ask, ask_size) = book['bids'][0], book['asks'][0]
+        return {'u': self._update_id, 's': self.ids[pair], 'b': f'{bid:.10g}', 'B': f'{bid_size:.10g}',
+                'a': f'{ask:.10g}', 'A': f'{ask_size:.10g}'}
+
+    def messages(self, stream: str, opened: Dict[str, int]) -> list:
+        """Messages d'un flux ; opened garde la dernière bougie envoyée par flux kline"""
+        symbol, _, kind = stream.partition('@')
+        pair = self.symbols.get(symbol)
+        if pair is None:
+            return []
+        if kind == 'bookTicker':
+            return [self._book(pair)]
+        if not kind.startswith('kline_'):
+            return []
+        timeframe = kind[len('kline_'):]
+        candles = self.market.fetch_ohlcv(pair, timeframe, limit=2)
+        if not candles:
+            return []
+        messages = []
+        previous = opened.get(stream)
+        if previous is not None and candles[-1][0] > previous and len(candles) > 1:
+            messages.append(self._kline(pair, timeframe, candles[-2], True))
+        opened[stream] = candles[-1][0]
+        messages.append(self._kline(pair, timeframe, candles[-1], False))
+        return messages
+
+    # -- connexions --------------------------------------------------------------
+
+    async def _push(self, websocket, streams: Set[str]) -> None:
+        opened: Dict[str, int] = {}
+        while True:
+            for stream in sorted(streams):
+                for data in self.messages(stream, opened):
+                    await websocket.send(json.dumps({'stream': stream, 'data': data}))
+                    self.sent += 1
+            await asyncio.sleep(self.interval)
+
+    async def _handler(self, websocket) -> None:
+        query = parse_qs(urlsplit(websocket.request.path).query)
+        streams: Set[str] = {stream for value in query.get('streams', []) for stream in value.split('/') if stream}
+        self.connections += 1
+        pusher = asyncio.create_task(self._push(websocket, streams))
+        try:
+            async for raw in websocket:
+                try:
+                    request = json.loads(raw)
+                    method, params = request['method'], request.get('params', [])
+                except (ValueError, KeyError, TypeError):
+                    await websocket.send(json.dumps({'error': {'code': 3, 'msg': 'Invalid JSON'}}))
+                    continue
+                result = None
+                if method == 'SUBSCRIBE':
+                    streams.update(params)
+                elif method == 'UNSUBSCRIBE':
+                    streams.difference_update(params)
+                elif method == 'LIST_SUBSCRIPTIONS':
+                    result = sorted(streams)
+                else:
+                    await websocket.send(json.dumps({'error': {'code': 2, 'msg': f'Invalid request: {method}'},
+                                                     'id': request.get('id')}))
+                    continue
+                await websocket.send(json.dumps({'result': result, 'id': request.get('id')}))
+        except Exception as error:
+            logger.debug(f"Connexion fermée : {error!r}")
+        finally:
+            pusher.cancel()
+            self.connections -= 1
+
+    async def serve(self, ready: Optional[threading.Event] = None) -> None:
+        """Sert jusqu'à stop() ; ready est levé une fois à l'écoute"""
+        from websockets.asyncio.server import serve
+
+        self._loop = asyncio.get_running_loop()
+        self._stop = self._loop.create_future()
+        async with serve(self._handler, self.host, self.port, max_size=None):
+            logger.info(f"Flux simulé sur {self.url}/stream ({len(self.symbols)} paires)")
+            if ready is not None:
+                ready.set()
+            await self._stop
+
+    # -- thread ------------------------------------------------------------------
+
+    def start(self) -> 'StreamServer':
+        """Lance le serveur dans un thread ; retourne une fois à l'écoute"""
+        ready = threading.Event()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.serve(ready)),
+                                        name='stream-server', daemon=True)
+        self._thread.start()
+        ready.wait(timeout=10)
+        return self
+
+    def stop(self) -> None:
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(lambda: self._stop.done() or self._stop.set_result(None))
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cyptrade.stream_server',
+                                     description="Flux websocket local au format Binance (marché simulé)")
+    parser.add_argument('--config', '-c', action='append',
+                        help='Configuration freqtrade : timeframe et devise de mise (défaut: config.json)')
+    parser.add_argument('--pairs', type=int, default=DEFAULT_PAIRS, help='Nombre de paires')
+    parser.add_argument('--datadir', help='Bougies enregistrées à rejouer (défaut: bougies synthétiques)')
+    parser.add_argument('--candles', type=int, default=DEFAULT_CANDLES, help='Bougies synthétiques par paire')
+    parser.add_argument('--speed', type=float, default=DEFAULT_SPEED,
+                        help=f'Secondes rejouées par seconde réelle (défaut: {DEFAULT_SPEED:g})')
+    parser.add_argument('--start', help='Début du rejeu (YYYY-MM-DD)')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Adresse (défaut: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (défaut: {DEFAULT_PORT})')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help=f'Secondes entre deux envois par flux (défaut: {DEFAULT_INTERVAL:g})')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    config = load_config(args.config or ['config.json'], None, runmode=RunMode.DRY_RUN)
+    if args.datadir:
+        frames = recorded_frames(Path(args.datadir), config['timeframe'], args.pairs,
+                                 config.get('dataformat_ohlcv', 'feather'))
+    else:
+        frames = synthetic_market_frames(args.pairs, args.candles, config['timeframe'], config['stake_currency'])
+    market = SimulatedMarket(frames, config['timeframe'], quote=config['stake_currency'], speed=args.speed,
+                             start=pd.Timestamp(args.start, tz='UTC') if args.start else None)
+    server = StreamServer(market, args.host, args.port, args.interval)
+    print(f'Configuration du bot : "stream_feed": {{"url": "{server.url}"}}  (Ctrl+C pour arrêter)')
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
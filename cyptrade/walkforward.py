@@ -0,0 +1,299 @@
+"""
+Walk-forward : optimisation glissante in-sample / out-of-sample
+
+Ré-optimiser chaque mois avec run-hyperopt.sh puis backtester le mois suivant
+avec run-backtest.sh recalculait à chaque fois les indicateurs (informatifs
+1h/4h compris) sur des périodes qui se recouvrent. Ici :
+
+- la période complète est découpée en fenêtres glissantes : N jours
+  in-sample suivis de M jours out-of-sample, décalées de --step jours ;
+- l'hyperopt freqtrade est préparé une seule fois sur toute la période
+  (indicateurs calculés une fois, comme freqtrade le fait pour un hyperopt),
+  chaque fenêtre n'en est qu'une tranche (bougies de démarrage comprises) ;
+- les optimisations in-sample tournent en parallèle sur un pool de processus
+  (fork : les indicateurs sont partagés en lecture) ;
+- les meilleurs paramètres de chaque fenêtre sont backtestés sur sa période
+  out-of-sample, et les trades out-of-sample sont réunis en une seule courbe
+  de capital (profits additionnés, chaque fenêtre repart du même wallet).
+
+Comme pour `freqtrade hyperopt` sans --analyze-per-epoch, les paramètres
+optimisés ne doivent agir que sur les signaux d'entrée / sortie (pas sur
+populate_indicators).
+
+    python -m cyptrade.walkforward --config config.json --strategy HyperoptStrategy \\
+        --timerange 20240101-20250101 --in-sample 30 --out-of-sample 30 --epochs 100 -j 4
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import pandas as pd
+from joblib import dump, load
+from pandas import DataFrame
+
+from freqtrade.data.metrics import (calculate_calmar, calculate_max_drawdown, calculate_sharpe,
+                                    calculate_sortino)
+from freqtrade.enums import RunMode
+from freqtrade.optimize.hyperopt import Hyperopt
+from freqtrade.optimize.hyperopt.hyperopt_optimizer import MAX_LOSS
+from freqtrade.util import get_dry_run_wallet
+
+from cyptrade.loader import load_config
+
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = 'user_data/backtest_results'
+IN_SAMPLE_DAYS = 30
+OUT_OF_SAMPLE_DAYS = 30
+
+# Métriques reprises de chaque évaluation dans le rapport
+SUMMARY_FIELDS = ('total_trades', 'profit_total', 'profit_total_abs', 'winrate', 'max_drawdown_account',
+                  'sharpe')
+
+
+class Window(NamedTuple):
+    index: int
+    in_start: datetime
+    in_end: datetime
+    out_start: datetime
+    out_end: datetime
+
+
+def build_windows(start: datetime, end: datetime, in_sample_days: int, out_of_sample_days: int,
+                  step_days: Optional[int] = None) -> List[Window]:
+    """Fenêtres in-sample / out-of-sample glissantes, out-of-sample entièrement dans la période"""
+    step = timedelta(days=step_days or out_of_sample_days)
+    in_sample, out_of_sample = timedelta(days=in_sample_days), timedelta(days=out_of_sample_days)
+    windows = []
+    in_start = start
+    while in_start + in_sample + out_of_sample <= end:
+        in_end = in_start + in_sample
+        windows.append(Window(len(windows), in_start, in_end, in_end, in_end + out_of_sample))
+        in_start += step
+    return windows
+
+
+def _summary(val: Dict[str, Any]) -> Dict[str, Any]:
+    metrics = val['results_metrics']
+    return {'loss': val['loss'], **{field: metrics.get(field) for field in SUMMARY_FIELDS}}
+
+
+class WalkForward(Hyperopt):
+    """Hyperopt freqtrade préparé une fois sur toute la période, optimisé fenêtre par fenêtre"""
+
+    def prepare(self) -> None:
+        """Indicateurs de toute la période, calculés une fois (comme freqtrade hyperopt)"""
+        self.random_state = self._set_random_state(self.config.get('hyperopt_random_state'))
+        self.hyperopter.prepare_hyperopt()
+        self.processed = load(self.data_pickle_file)
+        self.startup = self.hyperopter.backtesting.required_startup
+        self.min_date, self.max_date = self.hyperopter.min_date, self.hyperopter.max_date
+
+    def _slice(self, start: datetime, end: datetime, name: str) -> Path:
+        """Tranche des dataframes analysés, précédée des bougies de démarrage"""
+        sliced = {}
+        for pair, frame in self.processed.items():
+            first = int(frame['date'].searchsorted(start))
+            last = int(frame['date'].searchsorted(end, side='right'))
+            sliced[pair] = frame.iloc[max(0, first - self.startup):last]
+        data_file = self.data_pickle_file.with_name(f'hyperopt_tickerdata_{name}.pkl')
+        dump(sliced, data_file)
+        return data_file
+
+    def _evaluate(self, data_file: Path, start: datetime, end: datetime, params: Dict[str, Any]) -> Dict[str, Any]:
+        optimizer = self.hyperopter
+        optimizer.data_pickle_file, optimizer.min_date, optimizer.max_date = data_file, start, end
+        return optimizer.generate_optimizer(params)
+
+    def optimize_window(self, window: Window) -> Dict[str, Any]:
+        """Optimisation in-sample puis backtest out-of-sample des meilleurs paramètres"""
+        start = time.perf_counter()
+        in_file = self._slice(window.in_start, window.in_end, f'wf{window.index}_in')
+        out_file = self._slice(window.out_start, window.out_end, f'wf{window.index}_out')
+        try:
+            self.opt = self.hyperopter.get_optimizer(self.random_state + window.index)
+            best = None
+            for _ in range(self.total_epochs):
+                asked, _ = self.get_asked_points(n_points=1, dimensions=self.hyperopter.o_dimensions)
+                if not asked:
+                    break
+                val = self._evaluate(in_file, window.in_start, window.in_end, asked[0].params)
+                self.opt.tell(asked[0], val['loss'])
+                if best is None or val['loss'] < best['loss']:
+                    best = val
+            if best is None:
+                raise ValueError(f"Fenêtre {window.index} : aucun jeu de paramètres évalué "
+                                 f"({self.total_epochs} epochs, espace de recherche épuisé ?)")
+            out = self._evaluate(out_file, window.out_start, window.out_end, best['params_dict'])
+        finally:
+            in_file.unlink(missing_ok=True)
+            out_file.unlink(missing_ok=True)
+        if best['loss'] >= MAX_LOSS:
+            logger.warning(f"Fenêtre {window.index} : aucun jeu de paramètres n'atteint le minimum de trades "
+                           f"in-sample, premier candidat retenu")
+        return {
+            'window': window.index,
+            'in_sample': {'start': window.in_start, 'end': window.in_end, **_summary(best)},
+            'out_of_sample': {'start': window.out_start, 'end': window.out_end, **_summary(out)},
+            'params': best['params_details'],
+            'trades': out['results_metrics'].get('trades', []),
+            'seconds': round(time.perf_counter() - start, 2),
+        }
+
+    def cleanup(self) -> None:
+        self.data_pickle_file.unlink(missing_ok=True)
+
+
+# Walk-forward préparé par le parent, hérité par les workers (fork)
+_walk: Optional[WalkForward] = None
+
+
+def _optimize(window: Window) -> Dict[str, Any]:
+    return _walk.optimize_window(window)
+
+
+def run(walk: WalkForward, windows: Sequence[Window], processes: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Optimise les fenêtres sur un pool de processus ; résultats dans l'ordre des fenêtres"""
+    global _walk
+    _walk = walk
+    processes = max(1, min(processes or os.cpu_count() or 1, len(windows)))
+    results = []
+    with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('fork')) as pool:
+        for result in pool.map(_optimize, windows):
+            out = result['out_of_sample']
+            logger.info(f"[{len(results) + 1}/{len(windows)}] fenêtre {result['window']} : "
+                        f"loss in-sample {result['in_sample']['loss']:.5f}, out-of-sample "
+                        f"{out['total_trades']} trades, profit {out['profit_total']:.2%} ({result['seconds']}s)")
+            results.append(result)
+    return results
+
+
+def stitch(results: Sequence[Dict[str, Any]], starting_balance: float) -> tuple:
+    """(métriques, courbe de capital) des trades out-of-sample de toutes les fenêtres"""
+    trades = DataFrame([{**trade, 'window': result['window']} for result in results for trade in result['trades']],
+                       columns=['window', 'pair', 'open_date', 'close_date', 'profit_ratio', 'profit_abs',
+                                'exit_reason'])
+    start, end = results[0]['out_of_sample']['start'], results[-1]['out_of_sample']['end']
+    summary: Dict[str, Any] = {'start': start, 'end': end, 'windows': len(results), 'total_trades': len(trades),
+                               'starting_balance': starting_balance}
+    if trades.empty:
+        return summary, trades
+    for column in ('open_date', 'close_date'):
+        trades[column] = pd.to_datetime(trades[column], utc=True)
+    trades = trades.sort_values('close_date', kind='stable').reset_index(drop=True)
+    trades['equity'] = starting_balance + trades['profit_abs'].cumsum()
+    profit_abs = float(trades['profit_abs'].sum())
+    try:
+        drawdown = calculate_max_drawdown(trades, value_col='profit_abs', starting_balance=starting_balance)
+        max_drawdown, max_drawdown_abs = drawdown.relative_account_drawdown, drawdown.drawdown_abs
+    except ValueError:
+        # Aucun trade perdant
+        max_drawdown, max_drawdown_abs = 0.0, 0.0
+    summary.update({
+        'profit_total_abs': profit_abs,
+        'profit_total': profit_abs / starting_balance,
+        'final_balance': starting_balance + profit_abs,
+        'winrate': float((trades['profit_abs'] > 0).mean()),
+        'max_drawdown_account': max_drawdown,
+        'max_drawdown_abs': max_drawdown_abs,
+        'sharpe': calculate_sharpe(trades, start, end, starting_balance),
+        'sortino': calculate_sortino(trades, start, end, starting_balance),
+        'calmar': calculate_calmar(trades, start, end, starting_balance),
+    })
+    return summary, trades
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cyptrade.walkforward',
+                                     description='Walk-forward : hyperopt in-sample, backtest out-of-sample')
+    parser.add_argument('--config', '-c', action='append', required=True, help='Configuration freqtrade')
+    parser.add_argument('--strategy', '-s', required=True)
+    parser.add_argument('--timerange', required=True, help='Période complète (ex: 20240101-20250101)')
+    parser.add_argument('--in-sample', type=int, default=IN_SAMPLE_DAYS,
+                        help=f"Jours d'optimisation par fenêtre (défaut: {IN_SAMPLE_DAYS})")
+    parser.add_argument('--out-of-sample', type=int, default=OUT_OF_SAMPLE_DAYS,
+                        help=f'Jours de backtest après chaque optimisation (défaut: {OUT_OF_SAMPLE_DAYS})')
+    parser.add_argument('--step', type=int, help='Décalage entre fenêtres en jours (défaut: --out-of-sample)')
+    parser.add_argument('--epochs', '-e', type=int, default=100, help='Epochs par fenêtre')
+    parser.add_argument('--spaces', nargs='+', default=['buy', 'sell'])
+    parser.add_argument('--hyperopt-loss', default='SharpeHyperOptLossDaily', help='Fonction de loss freqtrade')
+    parser.add_argument('--min-trades', type=int, help='Trades minimum in-sample')
+    parser.add_argument('--timeframe', '-i')
+    parser.add_argument('--max-open-trades', type=int)
+    parser.add_argument('--dry-run-wallet', type=float)
+    parser.add_argument('--random-state', type=int)
+    parser.add_argument('--processes', '-j', type=int, help='Nombre de processus (défaut: nombre de cœurs)')
+    parser.add_argument('--output', help=f'Rapport JSON (défaut: {RESULTS_DIR}/walkforward-<stratégie>-<date>.json)')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.epochs < 1:
+        parser.error('--epochs doit valoir au moins 1 (un jeu de paramètres évalué par fenêtre)')
+    if args.step and args.step < args.out_of_sample:
+        parser.error('--step ne peut pas être inférieur à --out-of-sample (périodes out-of-sample superposées)')
+
+    config = load_config(args.config, args.strategy, args.timerange, runmode=RunMode.HYPEROPT,
+                         epochs=args.epochs, spaces=args.spaces, hyperopt_loss=args.hyperopt_loss,
+                         hyperopt_min_trades=args.min_trades, timeframe=args.timeframe,
+                         max_open_trades=args.max_open_trades, dry_run_wallet=args.dry_run_wallet,
+                         hyperopt_random_state=args.random_state)
+    config['analyze_per_epoch'] = False
+
+    from filelock import FileLock, Timeout
+    start = time.perf_counter()
+    try:
+        with FileLock(Hyperopt.get_lock_filename(config)).acquire(timeout=1):
+            walk = WalkForward(config)
+            walk.prepare()
+            windows = build_windows(walk.min_date, walk.max_date, args.in_sample, args.out_of_sample, args.step)
+            if not windows:
+                logger.error(f"Période trop courte pour {args.in_sample} + {args.out_of_sample} jours")
+                return 1
+            logger.info(f"{len(windows)} fenêtres de {args.in_sample} + {args.out_of_sample} jours, "
+                        f"{args.epochs} epochs chacune")
+            try:
+                results = run(walk, windows, args.processes)
+            finally:
+                walk.cleanup()
+    except Timeout:
+        print('Un autre hyperopt est en cours sur ce dossier user_data.', file=sys.stderr)
+        return 1
+    summary, trades = stitch(results, get_dry_run_wallet(config))
+    logger.info(f"Walk-forward terminé en {time.perf_counter() - start:.1f}s")
+
+    print(f"{'Fenêtre':>7}  {'In-sample':<23} {'Loss':>10}  {'Out-of-sample':<23} {'Trades':>7} {'Profit':>8}")
+    for result in results:
+        in_sample, out = result['in_sample'], result['out_of_sample']
+        print(f"{result['window']:>7}  {in_sample['start']:%Y-%m-%d} → {in_sample['end']:%Y-%m-%d} "
+              f"{in_sample['loss']:>10.4f}  {out['start']:%Y-%m-%d} → {out['end']:%Y-%m-%d} "
+              f"{out['total_trades']:>7} {out['profit_total']:>8.2%}")
+    print(f"\nOut-of-sample cumulé : {summary['total_trades']} trades, "
+          f"profit {summary.get('profit_total', 0):.2%}, drawdown {summary.get('max_drawdown_account', 0):.2%}, "
+          f"sharpe {summary.get('sharpe', 0):.2f}")
+
+    output = Path(args.output or f"{RESULTS_DIR}/walkforward-{args.strategy}-"
+                                 f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    equity_file = output.with_name(f'{output.stem}-equity.csv')
+    trades.to_csv(equity_file, index=False)
+    report = {'strategy': args.strategy, 'timerange': args.timerange, 'in_sample_days': args.in_sample,
+              'out_of_sample_days': args.out_of_sample, 'step_days': args.step or args.out_of_sample,
+              'epochs': args.epochs, 'spaces': args.spaces, 'hyperopt_loss': args.hyperopt_loss,
+              'summary': summary, 'equity_curve': str(equity_file),
+              'windows': [{key: value for key, value in result.items() if key != 'trades'} for result in results]}
+    with output.open('w') as file:
+        json.dump(report, file, indent=2, default=str)
+    logger.info(f"Rapport : {output} ; courbe de capital : {equity_file}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
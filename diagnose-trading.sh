@@ -42,11 +42,13 @@ show_help() {
     echo "  -s, --stats    Afficher les statistiques de trading"
     echo "  -t, --test     Tester la stratégie avec des données"
     echo "  -c, --config   Vérifier la configuration"
+    echo "  -p, --perf     Temps des phases de la stratégie (endpoint /metrics, port 9080 par défaut)"
     echo ""
     echo "Exemples:"
     echo "  $0 --analyze    # Analyser les logs"
     echo "  $0 --stats      # Statistiques de trading"
     echo "  $0 --test       # Tester la stratégie"
+    echo "  $0 --perf 9081  # Temps des phases du bot de l'API 8081"
 }
 
 # Fonction pour analyser les logs
@@ -276,6 +278,38 @@ monitor_realtime() {
     tail -f "$log_file" | grep --color=always -E "signal|buy|sell|enter|exit|order|trade"
 }
 
+# Fonction pour afficher les temps des phases (latency_metrics)
+show_perf() {
+    local port="${1:-9080}"
+    local url="http://127.0.0.1:$port/metrics"
+
+    print_message "Temps des phases de la stratégie ($url)..."
+    echo ""
+
+    local metrics
+    if ! metrics=$(curl -s --max-time 5 "$url"); then
+        print_error "Endpoint non joignable: $url"
+        print_message "Activer \"metrics\": {\"enabled\": true} dans la configuration du bot"
+        return 1
+    fi
+
+    # Somme et nombre d'appels par stratégie et phase, toutes paires confondues
+    echo "$metrics" | awk '
+        /^cyptrade_phase_seconds_(sum|count)\{/ {
+            match($0, /strategy="[^"]*",phase="[^"]*"/)
+            key = substr($0, RSTART, RLENGTH)
+            gsub(/strategy="|phase="|"/, "", key)
+            if ($0 ~ /_sum\{/) total[key] += $NF; else calls[key] += $NF
+        }
+        END {
+            printf "%-50s %10s %12s\n", "stratégie,phase", "appels", "moyenne (ms)"
+            for (key in calls) if (calls[key] > 0)
+                printf "%-50s %10d %12.2f\n", key, calls[key], 1000 * total[key] / calls[key]
+        }'
+    echo ""
+    echo "$metrics" | grep -E "^cyptrade_(candle_store|book_cache|stream_feed)_" || true
+}
+
 # Fonction principale
 main() {
     local analyze=false
@@ -283,6 +317,8 @@ main() {
     local test=false
     local config=false
     local monitor=false
+    local perf=false
+    local perf_port=""
     local strategy=""
     
     # Analyser les arguments
@@ -316,6 +352,14 @@ main() {
                 monitor=true
                 shift
                 ;;
+            -p|--perf)
+                perf=true
+                if [ $# -gt 1 ] && [[ ! $2 =~ ^- ]]; then
+                    perf_port="$2"
+                    shift
+                fi
+                shift
+                ;;
             *)
                 print_error "Option inconnue: $1"
                 show_help
@@ -337,6 +381,8 @@ main() {
         check_config
     elif [ "$monitor" = true ]; then
         monitor_realtime
+    elif [ "$perf" = true ]; then
+        show_perf "$perf_port"
     else
         # Par défaut, faire une analyse complète
         analyze_logs
@@ -414,9 +414,11 @@ backup_configurations() {
 update_market_data() {
     print_message "Mise à jour des données de marché..."
     
-    # Télécharger les données pour Binance
-    freqtrade download-data \
+    # Binance (config.json) et Hyperliquid (config-hyperliquid-multi.json) en parallèle,
+    # seuls les intervalles absents de user_data/data sont téléchargés
+    python -m cyptrade.download \
         --config config.json \
+        --config config-hyperliquid-multi.json \
         --timerange 20250101- \
         --timeframes 1m 5m 15m 1h 4h 1d
     
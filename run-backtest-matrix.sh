@@ -0,0 +1,119 @@
+#!/bin/bash
+
+# Backtests en parallèle : toutes les stratégies × configurations × périodes
+# Usage: ./run-backtest-matrix.sh [timerange...] [options]
+
+set -e
+
+# Configuration par défaut
+TIMERANGES=()
+STRATEGIES=()
+CONFIGS=()
+PROCESSES=""
+EXTRA=()
+
+# Couleurs pour l'affichage
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m' # No Color
+
+# Fonction d'affichage
+print_header() {
+    echo -e "${BLUE}================================${NC}"
+    echo -e "${BLUE}  Matrice de Backtests${NC}"
+    echo -e "${BLUE}================================${NC}"
+}
+
+print_info() {
+    echo -e "${GREEN}[INFO]${NC} $1"
+}
+
+print_warning() {
+    echo -e "${YELLOW}[WARNING]${NC} $1"
+}
+
+print_error() {
+    echo -e "${RED}[ERROR]${NC} $1"
+}
+
+# Fonction d'aide
+show_help() {
+    echo "Usage: $0 [timerange...] [options]"
+    echo ""
+    echo "Arguments:"
+    echo "  timerange   Une ou plusieurs périodes (défaut: 20240801-20240901)"
+    echo ""
+    echo "Options:"
+    echo "  --strategy NAME   Stratégie à inclure (répétable, défaut: toutes)"
+    echo "  --config FILE     Configuration à inclure (répétable, défaut: config-*.json)"
+    echo "  --jobs N          Nombre de processus (défaut: nombre de cœurs)"
+    echo "  --export          Exporte aussi les trades de chaque backtest"
+    echo "  --output FILE     Tableau consolidé (.json ou .csv)"
+    echo "  --help            Afficher cette aide"
+    echo ""
+    echo "Exemples:"
+    echo "  $0                                         # Toutes les stratégies et configurations, 1 mois"
+    echo "  $0 20240701-20240801 20240801-20240901     # Deux périodes"
+    echo "  $0 20250101-20250130 --strategy TrendFollowingStrategy --strategy MeanReversionStrategy \\"
+    echo "     --config config-multi-exchange.json --config config-hyperliquid-multi.json"
+}
+
+# Analyse des arguments
+while [[ $# -gt 0 ]]; do
+    case $1 in
+        --strategy)
+            STRATEGIES+=("$2")
+            shift 2
+            ;;
+        --config)
+            CONFIGS+=("$2")
+            shift 2
+            ;;
+        --jobs|-j)
+            PROCESSES="$2"
+            shift 2
+            ;;
+        --export)
+            EXTRA+=(--export)
+            shift
+            ;;
+        --output)
+            EXTRA+=(--output "$2")
+            shift 2
+            ;;
+        --help|-h)
+            show_help
+            exit 0
+            ;;
+        *)
+            TIMERANGES+=("$1")
+            shift
+            ;;
+    esac
+done
+
+[[ ${#TIMERANGES[@]} -eq 0 ]] && TIMERANGES=("20240801-20240901")
+
+print_header
+
+ARGS=(--timerange "${TIMERANGES[@]}")
+[[ ${#STRATEGIES[@]} -gt 0 ]] && ARGS+=(--strategies "${STRATEGIES[@]}")
+[[ ${#CONFIGS[@]} -gt 0 ]] && ARGS+=(--configs "${CONFIGS[@]}")
+[[ -n "$PROCESSES" ]] && ARGS+=(--processes "$PROCESSES")
+
+print_info "Périodes: ${TIMERANGES[*]}"
+print_info "Stratégies: ${STRATEGIES[*]:-toutes}"
+print_info "Configurations: ${CONFIGS[*]:-config-*.json}"
+echo ""
+
+mkdir -p user_data/backtest_results
+
+if python -m cyptrade.matrix "${ARGS[@]}" "${EXTRA[@]}"; then
+    echo ""
+    print_info "Matrice terminée avec succès !"
+else
+    print_warning "Certains backtests ont échoué (colonne error du tableau)"
+    exit 1
+fi
@@ -12,6 +12,8 @@ TIMERANGE="20240801-20240901"  # 1 mois
 TIMEFRAME="5m"
 DRY_RUN_WALLET="1000"
 EXCHANGE=""
+# Bougies de détail (timeframe_detail) : adaptive (découpage des seules bougies utiles) ou full
+DETAIL_MODE="${DETAIL_MODE:-adaptive}"
 
 # Couleurs pour l'affichage
 RED='\033[0;31m'
@@ -48,6 +50,9 @@ show_help() {
     echo "  timerange   Période de test (défaut: 20240801-20240901)"
     echo "  exchange    Exchange à utiliser (défaut: interactif)"
     echo ""
+    echo "Variables d'environnement:"
+    echo "  DETAIL_MODE adaptive (défaut) ou full : découpage des bougies avec timeframe_detail"
+    echo ""
     echo "Exemples:"
     echo "  $0                                    # Sélection interactive"
     echo "  $0 TrendFollowingStrategy            # Backtest avec TrendFollowingStrategy"
@@ -236,6 +241,7 @@ echo "  - Période: $TIMERANGE"
 echo "  - Timeframe: $TIMEFRAME"
 echo "  - Config: $CONFIG"
 echo "  - Wallet: $DRY_RUN_WALLET ${CURRENCY}"
+echo "  - Détail: $DETAIL_MODE"
 echo ""
 
 # Vérifier les données disponibles
@@ -243,7 +249,7 @@ print_info "Vérification des données disponibles..."
 if [[ ! -d "$DATA_DIR" ]]; then
     print_error "Répertoire de données '$DATA_DIR' non trouvé"
     print_info "Téléchargez les données avec:"
-    echo "  freqtrade download-data --config $CONFIG --timerange $TIMERANGE --timeframes $TIMEFRAME"
+    echo "  python -m cyptrade.download --config $CONFIG --timerange $TIMERANGE --timeframes $TIMEFRAME"
     exit 1
 fi
 
@@ -252,7 +258,7 @@ DATA_COUNT=$(find "$DATA_DIR" -name "*${CURRENCY}-${TIMEFRAME}.feather" | wc -l)
 if [[ $DATA_COUNT -eq 0 ]]; then
     print_error "Aucune donnée ${CURRENCY} trouvée pour le timeframe $TIMEFRAME"
     print_info "Téléchargez les données avec:"
-    echo "  freqtrade download-data --config $CONFIG --timerange $TIMERANGE --timeframes $TIMEFRAME"
+    echo "  python -m cyptrade.download --config $CONFIG --timerange $TIMERANGE --timeframes $TIMEFRAME"
     exit 1
 fi
 
@@ -274,8 +280,13 @@ fi
 print_info "Lancement du backtest..."
 echo ""
 
-# Commande de backtest
-freqtrade backtesting \
+# Commande de backtest (le mode adaptatif donne les mêmes trades que le détail complet)
+BACKTEST_CMD=(freqtrade backtesting)
+if [[ "$DETAIL_MODE" == "adaptive" ]]; then
+    BACKTEST_CMD=(python -m cyptrade.detail backtesting)
+fi
+
+"${BACKTEST_CMD[@]}" \
     --config "$CONFIG" \
     --strategy "$STRATEGY" \
     --timerange "$TIMERANGE" \
@@ -0,0 +1,119 @@
+#!/bin/bash
+
+# Benchmark des stratégies sur des bougies synthétiques, comparé à la référence enregistrée
+# Usage: ./run-benchmarks.sh [options]
+
+set -e
+
+# Configuration par défaut
+CONFIG="config.json"
+STRATEGIES=()
+CANDLES=(10000 100000 1000000)
+PAIRS=(1 10 100)
+MAX_REGRESSION="0.2"
+SAVE_BASELINE=0
+
+# Couleurs pour l'affichage
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m' # No Color
+
+# Fonction d'affichage
+print_header() {
+    echo -e "${BLUE}================================${NC}"
+    echo -e "${BLUE}  Benchmark des stratégies${NC}"
+    echo -e "${BLUE}================================${NC}"
+}
+
+print_info() {
+    echo -e "${GREEN}[INFO]${NC} $1"
+}
+
+print_warning() {
+    echo -e "${YELLOW}[WARNING]${NC} $1"
+}
+
+print_error() {
+    echo -e "${RED}[ERROR]${NC} $1"
+}
+
+# Fonction d'aide
+show_help() {
+    echo "Usage: $0 [options]"
+    echo ""
+    echo "Options:"
+    echo "  --strategy NAME       Stratégie (répétable, défaut: toutes celles de user_data/strategies)"
+    echo "  --config FILE         Configuration (défaut: config.json)"
+    echo "  --quick               Grille réduite: 10k bougies × 1 et 10 paires"
+    echo "  --max-regression R    Hausse tolérée par rapport à la référence (défaut: 0.2 = +20%)"
+    echo "  --save-baseline       Enregistrer les résultats comme référence"
+    echo "  --help                Afficher cette aide"
+    echo ""
+    echo "Exemples:"
+    echo "  $0 --save-baseline                          # Référence sur la grille complète"
+    echo "  $0 --quick --strategy TrendFollowingStrategy  # Contrôle rapide après une modification"
+}
+
+# Analyse des arguments
+while [[ $# -gt 0 ]]; do
+    case $1 in
+        --strategy)
+            STRATEGIES+=("$2")
+            shift 2
+            ;;
+        --config)
+            CONFIG="$2"
+            shift 2
+            ;;
+        --quick)
+            CANDLES=(10000)
+            PAIRS=(1 10)
+            shift
+            ;;
+        --max-regression)
+            MAX_REGRESSION="$2"
+            shift 2
+            ;;
+        --save-baseline)
+            SAVE_BASELINE=1
+            shift
+            ;;
+        --help|-h)
+            show_help
+            exit 0
+            ;;
+        *)
+            print_error "Option inconnue: $1"
+            show_help
+            exit 1
+            ;;
+    esac
+done
+
+print_header
+
+if [ ! -f "$CONFIG" ]; then
+    print_error "Fichier de configuration non trouvé: $CONFIG"
+    exit 1
+fi
+
+ARGS=(
+    --config "$CONFIG"
+    --candles "${CANDLES[@]}"
+    --pairs "${PAIRS[@]}"
+    --max-regression "$MAX_REGRESSION"
+)
+[[ ${#STRATEGIES[@]} -gt 0 ]] && ARGS+=(--strategies "${STRATEGIES[@]}")
+[[ $SAVE_BASELINE -eq 1 ]] && ARGS+=(--save-baseline)
+
+print_info "Bougies: ${CANDLES[*]} ; paires: ${PAIRS[*]}"
+echo ""
+
+if python -m cyptrade.benchmark "${ARGS[@]}"; then
+    print_info "Résultats dans user_data/benchmarks/"
+else
+    print_error "Régression par rapport à user_data/benchmarks/baseline.json, ou cas en échec (voir ÉCHEC ci-dessus)"
+    exit 1
+fi
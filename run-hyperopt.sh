@@ -18,6 +18,7 @@ EXCHANGE=""
 SPACES="buy sell"
 TIMEFRAME="5m"
 DRY_RUN_WALLET=1000
+PRUNING=false
 
 print_message() {
     echo -e "${BLUE}[INFO]${NC} $1"
@@ -145,12 +146,15 @@ show_help() {
     echo "  -e, --exchange EXCHANGE    Exchange (binance, hyperliquid, default)"
     echo "  -t, --timerange RANGE      Période de test (ex: 20250101-20250131)"
     echo "  -p, --epochs EPOCHS        Nombre d'epochs"
+    echo "  -r, --pruning              Divisions successives : candidats évalués sur une tranche"
+    echo "                             de la période, seul le meilleur tiers passe à la suivante"
     echo "  -h, --help                 Afficher cette aide"
     echo ""
     echo "Exemples:"
     echo "  $0                                    # Mode interactif"
     echo "  $0 -s MeanReversionStrategy -e binance -p 100"
     echo "  $0 --strategy TrendFollowingStrategy --timerange 20250101-20250110"
+    echo "  $0 -s HyperoptWorking -e binance -p 270 --pruning"
     echo ""
     echo "Exchanges disponibles:"
     echo "  binance     - Binance (USDT) - config-multi-exchange.json"
@@ -193,6 +197,10 @@ while [[ $# -gt 0 ]]; do
             EPOCHS="$2"
             shift 2
             ;;
+        -r|--pruning)
+            PRUNING=true
+            shift
+            ;;
         -h|--help)
             show_help
             exit 0
@@ -239,6 +247,9 @@ echo "  - Stratégie: $STRATEGY"
 echo "  - Exchange: $EXCHANGE"
 echo "  - Période: $TIMERANGE"
 echo "  - Epochs: $EPOCHS"
+if [[ "$PRUNING" == true ]]; then
+    echo "  - Mode: divisions successives (tranches 1/9, 1/3, 1 de la période)"
+fi
 echo "  - Timeframe: $TIMEFRAME"
 echo "  - Config: $CONFIG"
 echo "  - Devise: $CURRENCY"
@@ -265,7 +276,7 @@ fi
 
 if [ ! -d "$DATA_DIR" ]; then
     print_error "Répertoire de données non trouvé: $DATA_DIR"
-    print_info "Veuillez d'abord télécharger les données avec: freqtrade download-data --config $CONFIG"
+    print_info "Veuillez d'abord télécharger les données avec: python -m cyptrade.download --config $CONFIG"
     exit 1
 fi
 
@@ -281,18 +292,25 @@ fi
 
 print_warning "L'hyperopt peut prendre du temps. Appuyez sur Ctrl+C pour arrêter."
 
-# Lancer l'hyperopt
-freqtrade hyperopt \
-    --config "$CONFIG" \
-    --strategy "$STRATEGY" \
-    --timerange "$TIMERANGE" \
-    --epochs "$EPOCHS" \
-    --spaces buy sell \
-    --timeframe "$TIMEFRAME" \
-    --max-open-trades 1 \
-    --dry-run-wallet "$DRY_RUN_WALLET" \
-    --hyperopt-loss MultiMetricHyperOptLoss \
+# Lancer l'hyperopt (les options sont communes aux deux modes)
+HYPEROPT_ARGS=(
+    --config "$CONFIG"
+    --strategy "$STRATEGY"
+    --timerange "$TIMERANGE"
+    --epochs "$EPOCHS"
+    --spaces buy sell
+    --timeframe "$TIMEFRAME"
+    --max-open-trades 1
+    --dry-run-wallet "$DRY_RUN_WALLET"
+    --hyperopt-loss MultiMetricHyperOptLoss
     --random-state 42
+)
+
+if [[ "$PRUNING" == true ]]; then
+    python -m cyptrade.halving "${HYPEROPT_ARGS[@]}"
+else
+    freqtrade hyperopt "${HYPEROPT_ARGS[@]}"
+fi
 
 if [ $? -eq 0 ]; then
     print_success "Hyperopt terminé avec succès !"
@@ -304,6 +322,9 @@ if [ $? -eq 0 ]; then
     echo "  - Devise: $CURRENCY"
     echo ""
     print_info "Vérifiez les résultats dans user_data/hyperopt_results/"
+    if [[ "$PRUNING" == true ]]; then
+        print_info "Décisions d'abandon et de promotion : user_data/hyperopt_results/*.halving.jsonl"
+    fi
     print_info "Pour analyser les résultats, utilisez: ./analyze-hyperopt-results.sh latest"
 else
     print_error "Erreur lors de l'hyperopt"
@@ -0,0 +1,149 @@
+#!/bin/bash
+
+# Walk-forward : ré-optimisation glissante (hyperopt in-sample, backtest out-of-sample)
+# Usage: ./run-walk-forward.sh [timerange] [options]
+
+set -e
+
+# Configuration par défaut
+CONFIG="config.json"
+TIMERANGE="20240101-20250101"
+STRATEGIES=()
+IN_SAMPLE=30
+OUT_OF_SAMPLE=30
+EPOCHS=100
+PROCESSES=""
+TIMEFRAME="5m"
+DRY_RUN_WALLET="1000"
+
+# Couleurs pour l'affichage
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m' # No Color
+
+# Fonction d'affichage
+print_header() {
+    echo -e "${BLUE}================================${NC}"
+    echo -e "${BLUE}  Walk-forward${NC}"
+    echo -e "${BLUE}================================${NC}"
+}
+
+print_info() {
+    echo -e "${GREEN}[INFO]${NC} $1"
+}
+
+print_warning() {
+    echo -e "${YELLOW}[WARNING]${NC} $1"
+}
+
+print_error() {
+    echo -e "${RED}[ERROR]${NC} $1"
+}
+
+# Fonction d'aide
+show_help() {
+    echo "Usage: $0 [timerange] [options]"
+    echo ""
+    echo "Arguments:"
+    echo "  timerange   Période complète (défaut: 20240101-20250101)"
+    echo ""
+    echo "Options:"
+    echo "  --strategy NAME       Stratégie (répétable, défaut: HyperoptStrategy et MeanReversionStrategy)"
+    echo "  --config FILE         Configuration (défaut: config.json)"
+    echo "  --in-sample DAYS      Jours d'optimisation par fenêtre (défaut: 30)"
+    echo "  --out-of-sample DAYS  Jours de backtest après chaque optimisation (défaut: 30)"
+    echo "  --epochs N            Epochs par fenêtre (défaut: 100)"
+    echo "  --jobs N              Nombre de processus (défaut: nombre de cœurs)"
+    echo "  --help                Afficher cette aide"
+    echo ""
+    echo "Exemples:"
+    echo "  $0                                         # Ré-optimisation mensuelle sur 2024"
+    echo "  $0 20240601-20250101 --strategy HyperoptStrategy --in-sample 60 --out-of-sample 14"
+}
+
+# Analyse des arguments
+while [[ $# -gt 0 ]]; do
+    case $1 in
+        --strategy)
+            STRATEGIES+=("$2")
+            shift 2
+            ;;
+        --config)
+            CONFIG="$2"
+            shift 2
+            ;;
+        --in-sample)
+            IN_SAMPLE="$2"
+            shift 2
+            ;;
+        --out-of-sample)
+            OUT_OF_SAMPLE="$2"
+            shift 2
+            ;;
+        --epochs|-e)
+            EPOCHS="$2"
+            shift 2
+            ;;
+        --jobs|-j)
+            PROCESSES="$2"
+            shift 2
+            ;;
+        --help|-h)
+            show_help
+            exit 0
+            ;;
+        *)
+            TIMERANGE="$1"
+            shift
+            ;;
+    esac
+done
+
+[[ ${#STRATEGIES[@]} -eq 0 ]] && STRATEGIES=("HyperoptStrategy" "MeanReversionStrategy")
+
+print_header
+
+if [ ! -f "$CONFIG" ]; then
+    print_error "Fichier de configuration non trouvé: $CONFIG"
+    exit 1
+fi
+
+print_info "Période: $TIMERANGE"
+print_info "Stratégies: ${STRATEGIES[*]}"
+print_info "Fenêtres: $IN_SAMPLE jours in-sample, $OUT_OF_SAMPLE jours out-of-sample, $EPOCHS epochs"
+echo ""
+
+mkdir -p user_data/backtest_results
+
+ARGS=(
+    --config "$CONFIG"
+    --timerange "$TIMERANGE"
+    --in-sample "$IN_SAMPLE"
+    --out-of-sample "$OUT_OF_SAMPLE"
+    --epochs "$EPOCHS"
+    --spaces buy sell
+    --timeframe "$TIMEFRAME"
+    --max-open-trades 1
+    --dry-run-wallet "$DRY_RUN_WALLET"
+    --hyperopt-loss MultiMetricHyperOptLoss
+    --random-state 42
+)
+[[ -n "$PROCESSES" ]] && ARGS+=(--processes "$PROCESSES")
+
+FAILED=0
+for strategy in "${STRATEGIES[@]}"; do
+    print_info "Walk-forward de $strategy..."
+    if ! python -m cyptrade.walkforward --strategy "$strategy" "${ARGS[@]}"; then
+        print_error "Walk-forward de $strategy en échec"
+        FAILED=1
+    fi
+    echo ""
+done
+
+if [ $FAILED -eq 0 ]; then
+    print_info "Rapports et courbes de capital dans user_data/backtest_results/walkforward-*"
+else
+    exit 1
+fi
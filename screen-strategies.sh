@@ -0,0 +1,147 @@
+#!/bin/bash
+
+# Screening vectorisé des paramètres de sortie (ROI, stoploss, trailing stop)
+# Usage: ./screen-strategies.sh [strategy] [timerange] [grid.json] [options]
+
+set -e
+
+# Configuration par défaut
+CONFIG="config.json"
+STRATEGY=""
+TIMERANGE="20240801-20240901"  # 1 mois
+GRID=""
+CHECK=""
+TOP="20"
+
+# Couleurs pour l'affichage
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m' # No Color
+
+# Fonction d'affichage
+print_header() {
+    echo -e "${BLUE}================================${NC}"
+    echo -e "${BLUE}  Screening des Paramètres${NC}"
+    echo -e "${BLUE}================================${NC}"
+}
+
+print_info() {
+    echo -e "${GREEN}[INFO]${NC} $1"
+}
+
+print_warning() {
+    echo -e "${YELLOW}[WARNING]${NC} $1"
+}
+
+print_error() {
+    echo -e "${RED}[ERROR]${NC} $1"
+}
+
+# Fonction d'aide
+show_help() {
+    echo "Usage: $0 [strategy] [timerange] [grid.json] [options]"
+    echo ""
+    echo "Arguments:"
+    echo "  strategy    Nom de la stratégie"
+    echo "  timerange   Période de test (défaut: 20240801-20240901)"
+    echo "  grid.json   Grille de paramètres de sortie (défaut: paramètres de la stratégie)"
+    echo ""
+    echo "Options:"
+    echo "  --config FILE     Configuration (défaut: config.json)"
+    echo "  --top N           Nombre de résultats affichés (défaut: 20)"
+    echo "  --check FILE      Contrôle d'accord avec un résultat de backtesting (.json / .zip)"
+    echo "  --help            Afficher cette aide"
+    echo ""
+    echo "Exemples:"
+    echo "  $0 TrendFollowingStrategy 20240801-20240901 grid.json"
+    echo "  $0 TrendFollowingStrategy --check user_data/backtest_results/backtest-result.zip"
+    echo ""
+    echo "Grille (produit cartésien des listes):"
+    echo '  {"stoploss": [-0.05, -0.1], "trailing_stop": [false, true],'
+    echo '   "minimal_roi": [{"0": 0.04, "30": 0.02}, {"0": 0.1}]}'
+}
+
+# Analyse des arguments
+POSITIONAL=()
+while [[ $# -gt 0 ]]; do
+    case $1 in
+        --config)
+            CONFIG="$2"
+            shift 2
+            ;;
+        --top)
+            TOP="$2"
+            shift 2
+            ;;
+        --check)
+            CHECK="$2"
+            shift 2
+            ;;
+        --help|-h)
+            show_help
+            exit 0
+            ;;
+        *)
+            POSITIONAL+=("$1")
+            shift
+            ;;
+    esac
+done
+
+STRATEGY="${POSITIONAL[0]}"
+[[ -n "${POSITIONAL[1]}" ]] && TIMERANGE="${POSITIONAL[1]}"
+GRID="${POSITIONAL[2]}"
+
+print_header
+
+if [[ -z "$STRATEGY" ]]; then
+    print_error "Stratégie non spécifiée"
+    show_help
+    exit 1
+fi
+
+if [[ ! -f "user_data/strategies/${STRATEGY}.py" ]]; then
+    print_error "Stratégie '$STRATEGY' non trouvée dans user_data/strategies/"
+    exit 1
+fi
+
+if [[ ! -f "$CONFIG" ]]; then
+    print_error "Configuration '$CONFIG' non trouvée"
+    exit 1
+fi
+
+# Contrôle d'accord avec le backtesting freqtrade
+if [[ -n "$CHECK" ]]; then
+    if [[ ! -f "$CHECK" ]]; then
+        print_error "Résultat de backtesting '$CHECK' non trouvé"
+        exit 1
+    fi
+    print_info "Contrôle d'accord avec $CHECK"
+    print_warning "Le backtesting de référence doit être lancé avec --max-open-trades -1"
+    python -m cyptrade.screening --config "$CONFIG" --strategy "$STRATEGY" --check "$CHECK"
+    exit $?
+fi
+
+ARGS=(--config "$CONFIG" --strategy "$STRATEGY" --timerange "$TIMERANGE" --top "$TOP")
+if [[ -n "$GRID" ]]; then
+    if [[ ! -f "$GRID" ]]; then
+        print_error "Grille '$GRID' non trouvée"
+        exit 1
+    fi
+    ARGS+=(--grid "$GRID" --output "user_data/screening-${STRATEGY}-${TIMERANGE}.json")
+fi
+
+print_info "Stratégie: $STRATEGY"
+print_info "Période: $TIMERANGE"
+print_info "Grille: ${GRID:-paramètres de la stratégie}"
+echo ""
+
+python -m cyptrade.screening "${ARGS[@]}"
+
+if [[ -n "$GRID" ]]; then
+    echo ""
+    print_info "Résultats complets: user_data/screening-${STRATEGY}-${TIMERANGE}.json"
+    print_info "Valider les meilleurs candidats avec ./run-backtest.sh $STRATEGY $TIMERANGE"
+fi
@@ -2,6 +2,7 @@
 
 # Script pour démarrer plusieurs stratégies différentes simultanément
 # Usage: ./start-multiple-strategies.sh [strategy1,strategy2,...] [stop|status]
+#        ./start-multiple-strategies.sh host strategy1,strategy2,...  (un seul processus)
 
 set -e
 
@@ -89,6 +90,13 @@ config['api_server']['listen_ip_address'] = '127.0.0.1'
 config['bot_name'] = 'cypTrade-$strategy_name'
 config['logfile'] = 'user_data/logs/freqtrade-$strategy_name.log'
 
+# Bougies lues dans le magasin partagé tenu par cyptrade.candle_feed
+config['candle_store'] = {'path': 'user_data/candle_store'}
+# Carnets d'ordres partagés entre les bots (TTL de 2 s)
+config['book_cache'] = {'path': 'user_data/book_cache', 'ttl_seconds': 2}
+# Temps des phases sur http://127.0.0.1:<port API + 1000>/metrics
+config['metrics'] = {'enabled': True}
+
 # Ajuster les CORS origins pour le bon port
 config['api_server']['CORS_origins'] = [
     'http://localhost:$port',
@@ -123,6 +131,64 @@ with open('$temp_config', 'w') as f:
     fi
 }
 
+# Fonction pour démarrer l'écrivain du magasin de bougies partagé
+# (un seul processus interroge l'exchange, les bots lisent les fichiers mappés)
+start_candle_feed() {
+    local pid_file="user_data/logs/candle_feed.pid"
+    if [ -f "$pid_file" ] && kill -0 "$(cat "$pid_file")" 2>/dev/null; then
+        print_message "Magasin de bougies déjà alimenté (PID: $(cat "$pid_file"))"
+        return
+    fi
+
+    print_message "Démarrage du magasin de bougies partagé..."
+    nohup python -m cyptrade.candle_feed \
+        --config "config-simple.json" \
+        --timeframes 5m 1h 4h 1d \
+        --store user_data/candle_store \
+        > "user_data/logs/candle_feed.out" 2>&1 &
+    echo "$!" > "$pid_file"
+    sleep 3
+
+    if kill -0 "$(cat "$pid_file")" 2>/dev/null; then
+        print_success "Magasin de bougies démarré (PID: $(cat "$pid_file"))"
+    else
+        print_warning "Le magasin de bougies n'a pas pu démarrer, les bots interrogeront l'exchange"
+        print_message "Vérifiez les logs: user_data/logs/candle_feed.out"
+    fi
+}
+
+# Fonction pour démarrer toutes les stratégies dans un seul processus (cyptrade.host) :
+# une seule lecture des bougies et un seul calcul d'indicateurs par paire,
+# une base de trades et un espace d'API par stratégie
+start_host() {
+    local strategies=$1
+    local pid_file="user_data/logs/host.pid"
+    if [ -f "$pid_file" ] && kill -0 "$(cat "$pid_file")" 2>/dev/null; then
+        print_warning "Hôte multi-stratégies déjà en cours (PID: $(cat "$pid_file"))"
+        return
+    fi
+
+    print_message "Démarrage de l'hôte multi-stratégies: ${strategies//,/ } (port: $BASE_PORT)..."
+    nohup python -m cyptrade.host \
+        --config "config-simple.json" \
+        --strategies ${strategies//,/ } \
+        --port "$BASE_PORT" \
+        > "user_data/logs/host.out" 2>&1 &
+    echo "$!" > "$pid_file"
+    sleep 5
+
+    if kill -0 "$(cat "$pid_file")" 2>/dev/null; then
+        print_success "Hôte démarré (PID: $(cat "$pid_file"))"
+        for strategy in ${strategies//,/ }; do
+            print_message "  $strategy: http://127.0.0.1:$BASE_PORT/$strategy"
+        done
+        print_message "Logs: user_data/logs/host.out"
+    else
+        print_error "L'hôte n'a pas pu démarrer"
+        print_message "Vérifiez les logs: user_data/logs/host.out"
+    fi
+}
+
 # Fonction pour arrêter une stratégie
 stop_strategy() {
     local strategy_name=$1
@@ -191,6 +257,10 @@ stop_all() {
     for strategy in $(get_all_strategies); do
         stop_strategy "$strategy"
     done
+    stop_strategy "candle_feed"
+    if [ -f "user_data/logs/host.pid" ]; then
+        stop_strategy "host"
+    fi
     
     print_success "Toutes les stratégies ont été arrêtées"
 }
@@ -205,8 +275,18 @@ case "${1:-help}" in
         show_status
         exit 0
         ;;
+    "host")
+        if [ -z "$2" ]; then
+            print_error "Aucune stratégie spécifiée"
+            print_message "Usage: $0 host strategy1,strategy2,..."
+            exit 1
+        fi
+        start_host "$2"
+        exit 0
+        ;;
     "help")
         print_message "Usage: $0 [strategy1,strategy2,...] [stop|status|help]"
+        print_message "       $0 host strategy1,strategy2,...  (un seul processus, API sur /<stratégie>)"
         echo ""
         print_message "Stratégies disponibles:"
         for strategy in $(get_all_strategies); do
@@ -216,6 +296,7 @@ case "${1:-help}" in
         print_message "Exemples:"
         print_message "  $0 HyperoptWorking,TrendFollowingStrategy"
         print_message "  $0 MultiExchangeStrategy,MeanReversionStrategy"
+        print_message "  $0 host MeanReversionStrategy,TrendFollowingStrategy,PowerTowerStrategy"
         print_message "  $0 stop"
         print_message "  $0 status"
         exit 0
@@ -233,6 +314,9 @@ case "${1:-help}" in
         print_message "🚀 Démarrage de ${#STRATEGY_ARRAY[@]} stratégie(s)"
         echo ""
         
+        start_candle_feed
+        echo ""
+        
         port_counter=0
         for strategy in "${STRATEGY_ARRAY[@]}"; do
             config=$(get_strategy_config "$strategy")
@@ -231,7 +231,7 @@ DATA_DIR="user_data/data/$EXCHANGE"
 if [[ ! -d "$DATA_DIR" ]]; then
     print_error "Répertoire de données '$DATA_DIR' non trouvé"
     print_info "Téléchargez les données avec:"
-    echo "  freqtrade download-data --config $CONFIG --timerange $TIMERANGE --timeframes $TIMEFRAME"
+    echo "  python -m cyptrade.download --config $CONFIG --timerange $TIMERANGE --timeframes $TIMEFRAME"
     exit 1
 fi
 
@@ -240,7 +240,7 @@ DATA_COUNT=$(find "$DATA_DIR" -name "*${CURRENCY}-${TIMEFRAME}.feather" | wc -l)
 if [[ $DATA_COUNT -eq 0 ]]; then
     print_error "Aucune donnée ${CURRENCY} trouvée pour le timeframe $TIMEFRAME"
     print_info "Téléchargez les données avec:"
-    echo "  freqtrade download-data --config $CONFIG --timerange $TIMERANGE --timeframes $TIMEFRAME"
+    echo "  python -m cyptrade.download --config $CONFIG --timerange $TIMERANGE --timeframes $TIMEFRAME"
     exit 1
 fi
 
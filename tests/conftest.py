@@ -0,0 +1,15 @@
+"""
+Tests de cyptrade et des modules partagés des stratégies
+
+Les stratégies importent leurs modules voisins (indicator_cache, candle_store...)
+comme freqtrade les charge : par le dossier user_data/strategies.
+"""
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+for path in (ROOT, ROOT / 'user_data' / 'strategies'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,108 @@
+import asyncio
+import fcntl
+import struct
+import time
+from types import SimpleNamespace
+
+import ccxt
+import pandas as pd
+import pytest
+
+from freqtrade.exceptions import OperationalException
+
+import book_cache
+from book_cache import SEQUENCE_OFFSET, BookFile, SharedBooks, _fetch_l2_order_book
+
+
+BOOK = {'bids': [[99.0, 1.0], [98.0, 2.0]], 'asks': [[101.0, 1.5]]}
+
+
+def _interrupted(path) -> BookFile:
+    """Carnet écrit puis séquence laissée impaire, comme par un processus tué pendant une écriture"""
+    book_file = BookFile(path, 5)
+    book_file.write(BOOK)
+    sequence = book_file._sequence()
+    struct.pack_into('<q', book_file._map, SEQUENCE_OFFSET, sequence + 1)
+    return book_file
+
+
+def test_write_read(tmp_path):
+    book_file = BookFile(tmp_path / 'BTC_USDT.book', 5)
+    assert book_file.read() is None
+    book_file.write(BOOK)
+    snapshot = BookFile(tmp_path / 'BTC_USDT.book', 5).read()
+    assert snapshot.order_book('BTC/USDT', 1)['bids'] == [[99.0, 1.0]]
+    assert snapshot.asks.tolist() == [[101.0, 1.5]]
+
+
+def test_dead_writer_does_not_block_readers(tmp_path):
+    book_file = _interrupted(tmp_path / 'BTC_USDT.book')
+    start = time.monotonic()
+    assert book_file.read() is None
+    assert time.monotonic() - start < 1
+    # Séquence réparée : le carnet est de nouveau écrit et lu
+    assert book_file._sequence() % 2 == 0
+    book_file.write(BOOK)
+    assert book_file.read() is not None
+
+
+def test_dead_writer_repaired_on_restart(tmp_path):
+    _interrupted(tmp_path / 'BTC_USDT.book')
+    book_file = BookFile(tmp_path / 'BTC_USDT.book', 5)
+    assert book_file._sequence() % 2 == 0
+    assert book_file.read() is None
+
+
+def test_live_writer_is_not_repaired(tmp_path):
+    book_file = _interrupted(tmp_path / 'BTC_USDT.book')
+    # Écrivain vivant (verrou tenu par un autre descripteur) : lecture abandonnée, séquence intacte
+    with open(tmp_path / 'BTC_USDT.book', 'rb') as writer:
+        fcntl.flock(writer, fcntl.LOCK_EX)
+        assert book_file.read() is None
+        assert book_file._sequence() % 2 == 1
+    assert book_file.read() is None
+    assert book_file._sequence() % 2 == 0
+
+
+class _AsyncApi:
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def fetch_l2_order_book(self, pair, limit):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return BOOK
+
+
+def _exchange(api):
+    return SimpleNamespace(name='Binance', _api=SimpleNamespace(name='Binance'), _api_async=api)
+
+
+def test_batch_fetch_retries_and_translates():
+    api = _AsyncApi(ccxt.NetworkError('timeout'), ccxt.ExchangeError('busy'))
+    assert asyncio.run(_fetch_l2_order_book(_exchange(api), 'BTC/USDT', 5)) == BOOK
+    assert api.calls == 3
+    with pytest.raises(OperationalException):
+        asyncio.run(_fetch_l2_order_book(_exchange(_AsyncApi(ccxt.NotSupported('no book'))), 'BTC/USDT', 5))
+
+
+def test_signals_scanned_once_per_candle(monkeypatch):
+    scans = []
+
+    def get_analyzed_dataframe(pair, timeframe):
+        scans.append(pair)
+        return pd.DataFrame({'enter_long': [1 if pair == 'ETH/USDT' else 0]}), None
+
+    dp = SimpleNamespace(current_whitelist=lambda: ['BTC/USDT', 'ETH/USDT'],
+                         get_analyzed_dataframe=get_analyzed_dataframe)
+    strategies = [SimpleNamespace(timeframe='5m', dp=dp)]
+    books = SharedBooks()
+    assert books._candidates(1, strategies, 'BTC/USDT') == ['BTC/USDT', 'ETH/USDT']
+    assert books._candidates(1, strategies, 'ETH/USDT') == ['ETH/USDT']
+    assert len(scans) == 2
+    # Bougie suivante : nouveau parcours
+    monkeypatch.setattr(book_cache, 'timeframe_to_prev_date', lambda timeframe: 'next')
+    books._candidates(1, strategies, 'BTC/USDT')
+    assert len(scans) == 4
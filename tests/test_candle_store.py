@@ -0,0 +1,76 @@
+import logging
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from freqtrade.enums import RunMode
+
+from candle_store import CandleFile, SharedCandles
+from exchange_hooks import compatible
+
+
+def _candles(start: int, size: int) -> pd.DataFrame:
+    close = np.arange(start, start + size, dtype=np.float64)
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=start + size, freq='5min', tz='UTC')[start:],
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close, 'volume': np.ones(size),
+    })
+
+
+def test_append_and_read(tmp_path):
+    path = tmp_path / 'BTC_USDT-5m.candles'
+    writer = CandleFile(path, '5m', writable=True)
+    assert writer.append(_candles(0, 100)) == 100
+    # Bougies déjà stockées ignorées
+    assert writer.append(_candles(50, 60)) == 10
+
+    frame = CandleFile(path, '5m').frame(limit=20)
+    assert len(frame) == 20
+    assert frame['close'].iloc[-1] == 109
+    assert frame['date'].iloc[-1] == _candles(109, 1)['date'].iloc[0]
+
+
+def test_retention_bounds_the_file(tmp_path):
+    path = tmp_path / 'BTC_USDT-5m.candles'
+    writer = CandleFile(path, '5m', writable=True, retention=1000)
+    reader = CandleFile(path, '5m')
+    sizes = []
+    for start in range(0, 20000, 500):
+        writer.append(_candles(start, 500))
+        sizes.append(path.stat().st_size)
+        frame = reader.frame()
+        # Le lecteur suit la recopie (changement d'inode) et voit toujours les dernières bougies
+        assert frame['close'].iloc[-1] == start + 499
+        assert np.all(np.diff(frame['close'].to_numpy()) == 1)
+    assert writer.count <= writer.capacity <= 4096
+    assert len(set(sizes[len(sizes) // 2:])) == 1
+
+
+def test_large_first_append_is_trimmed(tmp_path):
+    writer = CandleFile(tmp_path / 'ETH_USDT-5m.candles', '5m', writable=True, retention=1000)
+    assert writer.append(_candles(0, 5000)) == 1000
+    assert writer.frame()['close'].iloc[0] == 4000
+
+
+def test_attach_falls_back_on_unexpected_exchange_api(caplog):
+    def refresh_latest_ohlcv(pair_list):
+        return {}
+
+    exchange = SimpleNamespace(name='binance', _klines={}, refresh_latest_ohlcv=refresh_latest_ohlcv)
+    strategy = SimpleNamespace(config={'candle_store': {'path': 'unused'}},
+                               dp=SimpleNamespace(runmode=RunMode.DRY_RUN, _exchange=exchange))
+    with caplog.at_level(logging.WARNING):
+        assert SharedCandles().attach(strategy) is None
+    assert exchange.refresh_latest_ohlcv is refresh_latest_ohlcv
+    assert 'refresh_latest_ohlcv sans since_ms, cache, drop_incomplete' in caplog.text
+
+
+def test_freqtrade_exchange_matches_hooks():
+    from freqtrade.exchange import Exchange
+
+    exchange = Exchange.__new__(Exchange)
+    exchange._klines = {}
+    exchange._exchange_ws = None
+    assert compatible(exchange, 'tests', ('refresh_latest_ohlcv', 'fetch_l2_order_book', 'fetch_ticker'),
+                      klines=True)
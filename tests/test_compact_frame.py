@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from compact_frame import FrameLayout
+from signal_rules import Rule, Rules
+
+from MeanReversionStrategy import MeanReversionStrategy
+from TrendFollowingStrategy import TrendFollowingStrategy
+
+
+PAIR = 'BTC/USDT'
+
+# Seuils des règles d'entrée / sortie : une valeur à 1e-9 près, arrondie en float32, tombe sur le seuil
+EDGES = {
+    MeanReversionStrategy: {'bb_percent': 0.8, 'rsi': 75, 'zscore': 1.5, 'volume_ratio': 1.0},
+    TrendFollowingStrategy: {'rsi': 85, 'bb_width': 0.02},
+}
+
+
+def _candles(size: int = 3000, seed: int = 5) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0.0, 0.004, size)))
+    return pd.DataFrame({'date': pd.date_range('2024-01-01', periods=size, freq='5min', tz='UTC'),
+                         'open': close, 'high': close * 1.002, 'low': close * 0.998, 'close': close,
+                         'volume': rng.uniform(1.0, 20.0, size)})
+
+
+def _signals(strategy_class, compact: bool) -> pd.DataFrame:
+    strategy = strategy_class({})
+    strategy.dp = None
+    strategy.compact_frame = compact
+    candles = _candles()
+    dataframe = strategy.populate_indicators(candles, {'pair': PAIR})
+    # Colonnes amenées au plus près des seuils, avant l'écriture compacte
+    for column, threshold in EDGES[strategy_class].items():
+        dataframe[column] = dataframe[column].astype(np.float64)
+        dataframe.loc[1000:3000:50, column] = threshold * (1 + 1e-9)
+        dataframe.loc[1025:3000:50, column] = threshold * (1 - 1e-9)
+    dataframe = strategy.frame_layout.write(dataframe, PAIR, {}, strategy, compact=compact)
+    dataframe = strategy.populate_entry_trend(dataframe, {'pair': PAIR})
+    return strategy.populate_exit_trend(dataframe, {'pair': PAIR})
+
+
+@pytest.mark.parametrize('strategy_class', [MeanReversionStrategy, TrendFollowingStrategy])
+def test_compact_signals_match_full(strategy_class):
+    full, compact = _signals(strategy_class, False), _signals(strategy_class, True)
+    for column in ('enter_long', 'exit_long'):
+        np.testing.assert_array_equal(compact[column].fillna(0).to_numpy(), full[column].fillna(0).to_numpy())
+    assert full['exit_long'].sum() > 0
+
+
+def test_rule_columns_stay_float64():
+    exit_rules = Rules(Rule('bb_percent', '>', 0.8))
+    with pytest.raises(ValueError, match='bb_percent'):
+        FrameLayout(float32=('bb_percent', 'williams_r'), rules=(exit_rules,))
+    assert FrameLayout(float32=('williams_r',), rules=(exit_rules,)).float32 == ('williams_r',)
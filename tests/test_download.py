@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from freqtrade.data.history import get_datahandler
+from freqtrade.enums import CandleType
+from freqtrade.exchange import timeframe_to_prev_date
+from freqtrade.util import dt_ts
+
+from cyptrade.download import DownloadIndex, Downloader, FakeExchange, plan
+
+
+PAIR = 'BTC/USDT'
+TIMEFRAME = '5m'
+
+
+@pytest.fixture
+def market(tmp_path):
+    """Trois jours de bougies 5m chez le faux exchange, avec une maintenance de 2 h"""
+    end = timeframe_to_prev_date(TIMEFRAME)
+    dates = pd.date_range(end=end - timedelta(minutes=5), periods=3 * 288, freq='5min', tz='UTC')
+    dates = dates[(dates < end - timedelta(days=1)) | (dates >= end - timedelta(days=1) + timedelta(hours=2))]
+    close = 100 + np.arange(len(dates), dtype=np.float64)
+    frame = pd.DataFrame({'date': dates, 'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                          'volume': np.ones(len(dates))})
+    (tmp_path / 'exchange' / 'binance').mkdir(parents=True)
+    get_datahandler(tmp_path / 'exchange' / 'binance', 'feather').ohlcv_store(PAIR, TIMEFRAME, frame, CandleType.SPOT)
+    datadir = tmp_path / 'data'
+    datadir.mkdir()
+    # Sans dataformat_ohlcv : format par défaut (feather)
+    config = {'datadir': datadir, 'exchange': {'pair_whitelist': [PAIR]}}
+    return tmp_path, config, frame
+
+
+def _download(tmp_path, config, start_ms, index):
+    source = FakeExchange(tmp_path / 'exchange' / 'binance', 'binance', candle_limit=100, rate_limit_ms=2,
+                          latency_ms=0)
+    try:
+        jobs = plan(index, source, config, [TIMEFRAME], start_ms)
+        added = Downloader(source, get_datahandler(config['datadir'], 'feather'), index).run(jobs) if jobs else 0
+    finally:
+        source.close()
+    return jobs, added
+
+
+def _stored(config) -> pd.DataFrame:
+    return get_datahandler(config['datadir'], 'feather').ohlcv_load(PAIR, TIMEFRAME, CandleType.SPOT,
+                                                                    fill_missing=False, warn_no_data=False)
+
+
+def test_incremental_cycle(market):
+    tmp_path, config, frame = market
+    index_path = tmp_path / 'data' / 'download-index.json'
+    recent = dt_ts(frame['date'].iloc[-1] - timedelta(days=2))
+
+    # Premier passage : toute la période, pages de 100 bougies, maintenance franchie
+    jobs, added = _download(tmp_path, config, recent, DownloadIndex(index_path))
+    assert len(jobs) == 1 and len(jobs[0].gaps) == 1
+    expected = frame[frame['date'] >= pd.Timestamp(recent, unit='ms', tz='UTC')]
+    assert added == len(expected)
+    stored = _stored(config)
+    assert stored['date'].tolist() == expected['date'].tolist()
+    assert np.array_equal(stored['close'].to_numpy(), expected['close'].to_numpy())
+
+    # L'index (relu du disque) couvre la période, maintenance comprise : rien à retélécharger
+    index = DownloadIndex(index_path)
+    covered = index.entries[f'binance|{PAIR}|{TIMEFRAME}|spot']['covered']
+    assert len(covered) == 1
+    jobs, added = _download(tmp_path, config, recent, index)
+    assert jobs == [] and added == 0
+
+    # Période étendue vers le passé : seul le jour manquant est demandé, puis fusionné
+    earlier = recent - 86400 * 1000
+    jobs, added = _download(tmp_path, config, earlier, index)
+    assert [gap for job in jobs for gap in job.gaps] == [[earlier, covered[0][0]]]
+    assert added == int(((frame['date'] >= pd.Timestamp(earlier, unit='ms', tz='UTC'))
+                         & (frame['date'] < pd.Timestamp(recent, unit='ms', tz='UTC'))).sum())
+    assert len(_stored(config)) == len(expected) + added
+
+
+def test_index_follows_external_changes(market):
+    tmp_path, config, frame = market
+    index = DownloadIndex(tmp_path / 'data' / 'download-index.json')
+    recent = dt_ts(frame['date'].iloc[-1] - timedelta(days=1))
+    _download(tmp_path, config, recent, index)
+
+    # Fichier supprimé ailleurs : la couverture est recalée sur le disque et tout est retéléchargé
+    next(config['datadir'].glob('BTC_USDT-5m.feather')).unlink()
+    jobs, added = _download(tmp_path, config, recent, index)
+    assert len(jobs) == 1 and added > 0
+    assert len(_stored(config)) == added
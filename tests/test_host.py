@@ -0,0 +1,184 @@
+"""
+Hôte multi-stratégies : deux stratégies en dry-run sur un exchange simulé
+
+Vérifie les internes de freqtrade dont dépend l'hôte (exchange commun, sessions
+aiguillées, dépendances de l'API) : à relancer après chaque mise à jour de
+freqtrade avant d'élargir FREQTRADE_VERSIONS.
+"""
+import json
+import socket
+from contextlib import ExitStack, contextmanager
+from unittest.mock import MagicMock, PropertyMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import select
+
+from freqtrade.exceptions import OperationalException
+from freqtrade.persistence import Order, Trade
+
+from cyptrade.host import StrategyHost, check_freqtrade_version
+from incremental_indicators import Ema, Rsi, Sma, shared_engine
+from latency_metrics import shared_metrics
+from conftest import ROOT
+
+
+STRATEGIES = ('MeanReversionStrategy', 'TrendFollowingStrategy')
+PAIRS = ('BTC/USDT', 'ETH/USDT')
+EXCHANGE = 'freqtrade.exchange.exchange.Exchange'
+
+
+def _market(pair: str) -> dict:
+    base, quote = pair.split('/')
+    return {'id': base + quote, 'symbol': pair, 'base': base, 'quote': quote, 'active': True, 'spot': True,
+            'type': 'spot', 'swap': False, 'future': False, 'option': False, 'contract': False,
+            'linear': None, 'inverse': None, 'precision': {'price': 1e-8, 'amount': 1e-8, 'cost': None},
+            'limits': {'amount': {'min': None, 'max': None}, 'price': {'min': None, 'max': None},
+                       'cost': {'min': None, 'max': None}, 'leverage': {'min': None, 'max': None}},
+            'info': {}}
+
+
+def _candles(size: int = 300) -> pd.DataFrame:
+    close = 60000 + np.cumsum(np.sin(np.arange(size) / 7.0) * 50)
+    end = pd.Timestamp.now(tz='UTC').floor('5min')
+    return pd.DataFrame({'date': pd.date_range(end=end, periods=size, freq='5min'),
+                         'open': close, 'high': close + 20, 'low': close - 20, 'close': close,
+                         'volume': np.full(size, 10.0)})
+
+
+@contextmanager
+def _hosted(tmp_path, strategies, **settings):
+    """Hôte des `strategies` sur un exchange simulé, `settings` ajoutés à la configuration"""
+    (tmp_path / 'user_data').mkdir()
+    config = tmp_path / 'config.json'
+    config.write_text(json.dumps({
+        'exchange': {'name': 'binance', 'key': '', 'secret': '', 'pair_whitelist': list(PAIRS)},
+        'stake_currency': 'USDT', 'stake_amount': 100, 'dry_run': True, 'dry_run_wallet': 1000,
+        'timeframe': '5m', 'max_open_trades': 3, 'initial_state': 'running',
+        'pairlists': [{'method': 'StaticPairList'}], 'entry_pricing': {}, 'exit_pricing': {},
+        'strategy_path': str(ROOT / 'user_data' / 'strategies'), 'user_data_dir': str(tmp_path / 'user_data'),
+        'api_server': {'enabled': True, 'listen_ip_address': '127.0.0.1', 'listen_port': 8080,
+                       'username': 'u', 'password': 'p', 'jwt_secret_key': 'x' * 32},
+        **settings,
+    }))
+    refreshes = []
+
+    def refresh_latest_ohlcv(self, pair_list, *, since_ms=None, cache=True, drop_incomplete=None):
+        refreshes.append(sorted(set(pair_list)))
+        frames = {key: _candles() for key in pair_list}
+        if cache:
+            self._klines.update(frames)
+        return frames
+
+    markets = {pair: _market(pair) for pair in PAIRS}
+    api = MagicMock(id='binance')
+    with ExitStack() as stack:
+        stack.enter_context(patch(f'{EXCHANGE}._init_ccxt', return_value=api))
+        for name in ('reload_markets', 'validate_config', 'close'):
+            stack.enter_context(patch(f'{EXCHANGE}.{name}'))
+        stack.enter_context(patch('freqtrade.exchange.binance.Binance.additional_exchange_init'))
+        stack.enter_context(patch(f'{EXCHANGE}.markets', PropertyMock(return_value=markets)))
+        stack.enter_context(patch(f'{EXCHANGE}.timeframes', PropertyMock(return_value=['5m', '15m', '1h', '4h'])))
+        stack.enter_context(patch(f'{EXCHANGE}.precisionMode', PropertyMock(return_value=4)))
+        stack.enter_context(patch(f'{EXCHANGE}.precision_mode_price', PropertyMock(return_value=4)))
+        stack.enter_context(patch(f'{EXCHANGE}.get_fee', return_value=0.001))
+        stack.enter_context(patch(f'{EXCHANGE}.get_min_pair_stake_amount', return_value=0.0))
+        stack.enter_context(patch(f'{EXCHANGE}.refresh_latest_ohlcv', refresh_latest_ohlcv))
+        stack.enter_context(patch(f'{EXCHANGE}.fetch_ticker',
+                                  return_value={'last': 60000.0, 'bid': 59999.0, 'ask': 60001.0}))
+        stack.enter_context(patch(f'{EXCHANGE}.fetch_l2_order_book',
+                                  return_value={'bids': [[59999.0, 10.0]], 'asks': [[60001.0, 10.0]]}))
+        strategy_host = StrategyHost([str(config)], strategies, str(tmp_path / 'db'))
+        strategy_host.refreshes = refreshes
+        try:
+            yield strategy_host
+        finally:
+            strategy_host.cleanup()
+
+
+@pytest.fixture
+def host(tmp_path):
+    with _hosted(tmp_path, STRATEGIES) as strategy_host:
+        yield strategy_host
+
+
+def test_version_range():
+    check_freqtrade_version('2025.8')
+    check_freqtrade_version('2026.9.1')
+    check_freqtrade_version('develop-1234')
+    with pytest.raises(OperationalException):
+        check_freqtrade_version('2024.12')
+
+
+def test_one_exchange_one_refresh(host):
+    assert len({id(bot.exchange) for bot in host.bots.values()}) == 1
+    host.tick()
+    # Une seule requête pour les deux stratégies, les bots ne redemandent rien
+    assert len(host.refreshes) == 1
+    assert host.feed.requested >= 2 * len(PAIRS)
+
+
+def test_trades_and_api_stay_separate(host):
+    first, second = STRATEGIES
+    with host.activate(first) as bot:
+        assert bot.execute_entry('BTC/USDT', 100)
+    with host.activate(first):
+        trades = Trade.get_trades_proxy()
+        orders = Order.session.scalars(select(Order)).all()
+        assert [trade.strategy for trade in trades] == [first]
+        assert len(orders) == 1
+    with host.activate(second):
+        assert Trade.get_trades_proxy() == []
+        assert Order.session.scalars(select(Order)).all() == []
+    # L'ordre simulé est dans l'exchange commun, sous son identifiant unique
+    assert orders[0].order_id in host.exchange._dry_run_open_orders
+
+    from fastapi.testclient import TestClient
+
+    client = TestClient(host.api_app({**host.api_config, 'jwt_secret_key': 'x' * 32}))
+    auth = ('u', 'p')
+    assert client.get(f'/{first}/api/v1/count', auth=auth).json()['current'] == 1
+    assert client.get(f'/{second}/api/v1/count', auth=auth).json()['current'] == 0
+    assert client.get(f'/{first}/api/v1/status', auth=auth).json()[0]['pair'] == 'BTC/USDT'
+    assert client.get(f'/{second}/api/v1/status', auth=auth).json() == []
+    for strategy in STRATEGIES:
+        assert client.get(f'/{strategy}/api/v1/show_config', auth=auth).json()['strategy'] == strategy
+    assert client.get(f'/{first}/api/v1/count').status_code == 401
+    assert set(client.get('/').json()['strategies']) == set(STRATEGIES)
+
+
+def test_stream_indicators_shared(host):
+    shared_engine.reset()
+    first, second = (host.bots[strategy].strategy for strategy in STRATEGIES)
+    assert first.stream_engine is second.stream_engine is shared_engine
+    hits = shared_engine.stats()['hits']
+    host.tick()
+    # RSI(14) et SMA du volume, déclarés par les deux stratégies : la seconde lit la série de la première
+    shared = [Rsi(14), Sma(20, source='volume')]
+    streams = shared_engine._streams
+    for pair in PAIRS:
+        own = streams[(pair, '5m', Ema(12).key())]
+        for indicator in shared:
+            assert streams[(pair, '5m', indicator.key())].processed == own.processed
+    assert shared_engine.stats()['hits'] - hits == len(shared) * len(PAIRS)
+
+
+def test_hyperopt_strategies_attach_shared(tmp_path):
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    strategies = ('HyperoptStrategy', 'HyperoptSimple', 'HyperoptOptimized')
+    try:
+        with _hosted(tmp_path, strategies, metrics={'enabled': True, 'port': port}) as strategy_host:
+            for strategy in strategies:
+                assert strategy_host.bots[strategy].strategy._phase_metrics
+            strategy_host.tick()
+    finally:
+        if shared_metrics.server is not None:
+            shared_metrics.server.shutdown()
+            shared_metrics.server.server_close()
+            shared_metrics.server = None
+    phases = {(strategy, phase) for strategy, phase, _ in shared_metrics.phases}
+    assert {('HyperoptStrategy', 'informative_merge'), ('HyperoptSimple', 'informative_merge')} <= phases
+    assert ('HyperoptOptimized', 'populate_indicators') in phases
@@ -0,0 +1,69 @@
+import json
+from contextlib import closing
+
+import pytest
+
+from freqtrade.constants import FTHYPT_FILEVERSION
+
+from cyptrade import hyperopt_db
+
+
+STRATEGY = 'HyperoptWorking'
+
+
+def _epoch(number: int, loss, profit: float, drawdown: float, trades: int = 10) -> dict:
+    return {
+        FTHYPT_FILEVERSION: 2, 'current_epoch': number, 'loss': loss, 'is_best': False,
+        'params_details': {'buy': {'buy_rsi': number}}, 'params_not_optimized': {},
+        'results_metrics': {'strategy_name': STRATEGY, 'total_trades': trades, 'profit_total': profit,
+                            'max_drawdown_account': drawdown},
+    }
+
+
+@pytest.fixture
+def results(tmp_path):
+    directory = tmp_path / 'hyperopt_results'
+    directory.mkdir()
+    epochs = [
+        _epoch(1, -0.5, 0.10, 0.05),
+        _epoch(2, -0.9, 0.30, 0.20),
+        _epoch(3, None, 0.05, 0.01, trades=0),
+        _epoch(4, -0.2, 0.08, 0.10),    # dominé par l'epoch 1
+    ]
+    path = directory / f'strategy_{STRATEGY}_2025-09-12_19-12-27.fthypt'
+    path.write_text(''.join(json.dumps(epoch) + '\n' for epoch in epochs))
+    return directory
+
+
+def test_top_and_pareto(results, tmp_path):
+    with closing(hyperopt_db.connect(str(tmp_path / 'db.sqlite'))) as connection:
+        assert hyperopt_db.ingest(connection, str(results)) == 4
+        assert [row['epoch'] for row in hyperopt_db.top(connection, STRATEGY, 2)] == [2, 1]
+        front = hyperopt_db.pareto(connection, STRATEGY, ('profit_total', 'max_drawdown'))
+        assert [row['epoch'] for row in front] == [2, 1, 3]
+        assert front[0]['file'].endswith('.fthypt') and 'rowid' not in front[0]
+
+
+def test_table_with_null_loss(results, tmp_path, capsys):
+    with closing(hyperopt_db.connect(str(tmp_path / 'db.sqlite'))) as connection:
+        hyperopt_db.ingest(connection, str(results))
+        hyperopt_db._print_table(hyperopt_db.pareto(connection, STRATEGY))
+    assert len(capsys.readouterr().out.splitlines()) == 4
+
+
+def test_apply_reports_the_selected_epoch(results, tmp_path, capsys):
+    strategies = tmp_path / 'strategies'
+    strategies.mkdir()
+    (strategies / f'{STRATEGY}.py').write_text(f'class {STRATEGY}(IStrategy):\n    pass\n')
+    common = ['--db', str(tmp_path / 'db.sqlite'), '--results-dir', str(results), 'apply',
+              '--strategy', STRATEGY, '--strategy-path', str(strategies)]
+
+    assert hyperopt_db.main(common + ['--dry-run']) == 0
+    selected = [line for line in capsys.readouterr().out.splitlines()
+                if line.startswith(hyperopt_db.SELECTED_PREFIX)]
+    assert selected == [f'{hyperopt_db.SELECTED_PREFIX}strategy_{STRATEGY}_2025-09-12_19-12-27.fthypt:2']
+    assert not (strategies / f'{STRATEGY}.json').exists()
+
+    assert hyperopt_db.main(common + ['--epoch', selected[0][len(hyperopt_db.SELECTED_PREFIX):]]) == 0
+    params = json.loads((strategies / f'{STRATEGY}.json').read_text())
+    assert params['params']['buy'] == {'buy_rsi': 2}
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from incremental_indicators import Bollinger, Ema, IncrementalEngine, Rsi, Sma
+
+
+SPEC = {'ema': Ema(12), 'rsi': Rsi(14), 'volume_sma': Sma(20, 'volume'),
+        ('bb_lower', 'bb_middle', 'bb_upper'): Bollinger(20, 2)}
+
+
+def _candles(size: int = 300, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.standard_normal(size).cumsum()
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=size, freq='5min', tz='UTC'),
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+        'volume': rng.uniform(1, 10, size),
+    })
+
+
+def _assert_same(streamed: dict, expected: dict) -> None:
+    for column, values in expected.items():
+        np.testing.assert_allclose(streamed[column], values, rtol=1e-12, equal_nan=True)
+
+
+def test_new_candles_resume():
+    candles = _candles()
+    engine = IncrementalEngine()
+    engine.update('BTC/USDT', candles.iloc[:-5], SPEC)
+    _assert_same(engine.update('BTC/USDT', candles, SPEC), IncrementalEngine().update('BTC/USDT', candles, SPEC))
+
+
+def test_corrected_last_candle_is_recomputed():
+    candles = _candles()
+    engine = IncrementalEngine()
+    before = engine.update('BTC/USDT', candles, SPEC)
+    corrected = candles.copy()
+    last = corrected.index[-1]
+    corrected.loc[last, ['close', 'high']] += 5.0
+    corrected.loc[last, 'volume'] *= 3
+    after = engine.update('BTC/USDT', corrected, SPEC)
+    for column in ('ema', 'rsi', 'volume_sma', 'bb_upper'):
+        assert after[column][-1] != before[column][-1]
+    _assert_same(after, IncrementalEngine().update('BTC/USDT', corrected, SPEC))
+
+
+def test_streams_shared_across_specs():
+    candles = _candles()
+    engine = IncrementalEngine()
+    first = engine.update('BTC/USDT', candles, SPEC, '5m')
+    # Même indicateur sous un autre nom, historique plus court : série lue sans recalcul
+    second = engine.update('BTC/USDT', candles.iloc[100:], {'rsi_14': Rsi(14), 'ema_26': Ema(26)}, '5m')
+    np.testing.assert_array_equal(second['rsi_14'], first['rsi'][100:])
+    assert engine.stats() == {'hits': 1, 'misses': 5, 'streams': 5}
+    # Autre timeframe : flux distinct
+    engine.update('BTC/USDT', candles, {'rsi': Rsi(14)}, '1h')
+    assert engine.stats()['streams'] == 6
+    engine.reset('BTC/USDT')
+    assert engine.stats()['streams'] == 0
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from indicator_cache import IndicatorCache, candles_key
+
+
+def _candles(size: int = 500, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.standard_normal(size).cumsum()
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=size, freq='5min', tz='UTC'),
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+        'volume': rng.uniform(1, 10, size),
+    })
+
+
+def test_candles_key_is_stable():
+    dataframe = _candles()
+    assert candles_key(dataframe) == candles_key(dataframe.copy())
+
+
+def test_candles_key_changes_with_content():
+    dataframe = _candles()
+    corrected = dataframe.copy()
+    corrected.loc[corrected.index[-1], 'close'] += 0.5
+    assert candles_key(corrected)[:3] == candles_key(dataframe)[:3]
+    assert candles_key(corrected) != candles_key(dataframe)
+
+
+def test_corrected_candle_is_recomputed():
+    cache = IndicatorCache()
+    dataframe = _candles()
+    corrected = dataframe.copy()
+    corrected.loc[corrected.index[-1], 'close'] *= 1.05
+
+    first = cache.bind(dataframe, 'BTC/USDT', '5m').talib('EMA', timeperiod=12)
+    second = cache.bind(corrected, 'BTC/USDT', '5m').talib('EMA', timeperiod=12)
+    assert cache.misses == 2
+    assert second[-1] != first[-1]
+
+
+def test_empty_frame_key():
+    assert candles_key(_candles().iloc[:0]) == (0, None, None, 0)
@@ -0,0 +1,55 @@
+import re
+import threading
+
+from latency_metrics import BUCKETS, LatencyMetrics
+
+
+THREADS = 4
+OBSERVATIONS = 20000
+
+
+def _counts(text: str) -> dict:
+    return {labels: int(value) for labels, value in
+            re.findall(r'cyptrade_phase_seconds_count\{(.*)\} (\d+)', text)}
+
+
+def test_render_format():
+    metrics = LatencyMetrics()
+    metrics.observe('S', 'populate_indicators', 'BTC/USDT', 0.003)
+    metrics.observe('S', 'populate_indicators', 'BTC/USDT', 10.0)
+    text = metrics.render()
+    labels = 'strategy="S",phase="populate_indicators",pair="BTC/USDT"'
+    assert f'cyptrade_phase_seconds_bucket{{{labels},le="0.005"}} 1' in text
+    assert f'cyptrade_phase_seconds_bucket{{{labels},le="{BUCKETS[-1]}"}} 1' in text
+    assert f'cyptrade_phase_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert f'cyptrade_phase_seconds_sum{{{labels}}} 10.003000' in text
+
+
+def test_observe_while_rendering():
+    metrics = LatencyMetrics()
+    done = threading.Event()
+    renders = []
+
+    def observe(number):
+        for index in range(OBSERVATIONS):
+            metrics.observe('S', 'custom_exit', f'P{index % 3}/USDT', 0.001 * number)
+
+    def render():
+        while not done.is_set():
+            renders.append(metrics.render())
+
+    threads = [threading.Thread(target=observe, args=(number,)) for number in range(THREADS)]
+    reader = threading.Thread(target=render)
+    reader.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    reader.join()
+
+    assert sum(_counts(metrics.render()).values()) == THREADS * OBSERVATIONS
+    for text in renders:
+        # Copie cohérente : toutes les mesures sont sous la dernière borne, son cumul vaut le total
+        last = dict(re.findall(rf'cyptrade_phase_seconds_bucket\{{(.*),le="{BUCKETS[-1]}"\}} (\d+)', text))
+        assert {labels: int(value) for labels, value in last.items()} == _counts(text)
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rolling_stats import rolling_stats
+
+
+EPS = np.finfo(np.float64).eps
+WINDOW = 20
+EXTREMA_WINDOW = 14
+
+
+def _market(size: int, price: float = 30000.0, volatility: float = 0.002, tick: float = 0.0,
+            seed: int = 0) -> pd.DataFrame:
+    """Marche aléatoire log-normale, arrondie au pas de cotation si `tick`"""
+    rng = np.random.default_rng(seed)
+    close = price * np.exp(np.cumsum(rng.normal(0.0, volatility, size)))
+    spread = close * rng.uniform(0.0, 0.003, size)
+    if tick:
+        close = np.round(close / tick) * tick
+        spread = np.round(spread / tick) * tick
+    return pd.DataFrame({'open': close, 'high': close + spread, 'low': close - spread, 'close': close})
+
+
+def _stats(dataframe: pd.DataFrame):
+    return rolling_stats(dataframe['close'].to_numpy(), WINDOW, 2.0, high=dataframe['high'].to_numpy(),
+                         low=dataframe['low'].to_numpy(), extrema_window=EXTREMA_WINDOW)
+
+
+def _pandas_tolerance(stats) -> np.ndarray:
+    """
+    Erreur admise sur le z-score de pandas : ses sommes courantes perdent
+    eps·(moyenne / écart-type)² en relatif sur la variance à chaque mise à jour,
+    avec une constante mesurée de 10 à 55 ; marge à 10 × fenêtre.
+    """
+    return 10 * WINDOW * EPS * (stats.mean / stats.std) ** 2 * np.maximum(np.abs(stats.zscore), 1.0)
+
+
+@pytest.mark.parametrize('size', [1000, 200_000])
+def test_matches_exact_two_pass(size):
+    dataframe = _market(size)
+    stats = _stats(dataframe)
+    windows = np.lib.stride_tricks.sliding_window_view(dataframe['close'].to_numpy(), WINDOW)
+    mean, std = windows.mean(axis=1), windows.std(axis=1, ddof=1)
+    full = slice(WINDOW - 1, None)
+
+    np.testing.assert_allclose(stats.mean[full], mean, rtol=1e-12)
+    np.testing.assert_allclose(stats.std[full], std, rtol=1e-9)
+    np.testing.assert_allclose(stats.zscore[full], (dataframe['close'].to_numpy()[full] - mean) / std,
+                               rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize('price, volatility, tick', [
+    (30000.0, 0.002, 0.0),      # BTC 5m
+    (30000.0, 0.0005, 0.01),    # BTC calme, prix au centime
+    (1.0, 0.001, 0.0001),       # altcoin au pas de 1e-4 : fenêtres presque plates
+])
+def test_parity_with_pandas(price, volatility, tick):
+    dataframe = _market(200_000, price, volatility, tick)
+    stats = _stats(dataframe)
+    close = dataframe['close']
+    mean, std = close.rolling(WINDOW).mean(), close.rolling(WINDOW).std()
+    zscore = ((close - mean) / std).to_numpy()
+    lower, upper = mean - 2.0 * std, mean + 2.0 * std
+    percent_b = ((close - lower) / (upper - lower)).to_numpy()
+
+    checked = ~np.isnan(zscore) & (stats.std > 0)
+    tolerance = _pandas_tolerance(stats)[checked]
+    assert np.all(np.abs(stats.zscore[checked] - zscore[checked]) <= tolerance)
+    # %B = (z + 2) / 4 : écart quatre fois plus petit
+    assert np.all(np.abs(stats.percent_b[checked] - percent_b[checked]) <= tolerance / 4)
+    np.testing.assert_allclose(stats.mean[checked], mean.to_numpy()[checked], rtol=1e-12)
+
+
+def test_extrema_match_pandas_and_talib():
+    import talib.abstract as ta
+
+    dataframe = _market(200_000)
+    stats = _stats(dataframe)
+    np.testing.assert_array_equal(stats.highest, dataframe['high'].rolling(EXTREMA_WINDOW).max().to_numpy())
+    np.testing.assert_array_equal(stats.lowest, dataframe['low'].rolling(EXTREMA_WINDOW).min().to_numpy())
+    np.testing.assert_allclose(stats.williams_r, ta.WILLR(dataframe, timeperiod=EXTREMA_WINDOW),
+                               rtol=0, atol=1e-12)
+
+
+def test_flat_window():
+    close = np.full(50, 100.0)
+    stats = rolling_stats(close, WINDOW)
+    assert np.all(stats.zscore[WINDOW - 1:] == 0.0)
+    assert np.all(stats.percent_b[WINDOW - 1:] == 0.5)
+    assert np.all(rolling_stats(close, WINDOW, min_periods=1).percent_b[1:] == 0.5)
+
+
+@pytest.mark.parametrize('min_periods', [None, 1, 5])
+def test_warm_up_matches_pandas(min_periods):
+    dataframe = _market(200)
+    close = dataframe['close']
+    stats = rolling_stats(close.to_numpy(), WINDOW, 2.0, min_periods)
+    rolling = close.rolling(WINDOW, min_periods=min_periods)
+    mean, std = rolling.mean().to_numpy(), rolling.std().to_numpy()
+    lower, upper = mean - 2.0 * std, mean + 2.0 * std
+    expected = {
+        'mean': mean,
+        'std': std,
+        'percent_b': (close.to_numpy() - lower) / (upper - lower),
+        'zscore': ((close - close.rolling(WINDOW).mean()) / close.rolling(WINDOW).std()).to_numpy(),
+    }
+    for name, want in expected.items():
+        have = getattr(stats, name)
+        # NaN aux mêmes bougies d'amorçage, valeurs égales ensuite
+        np.testing.assert_array_equal(np.isnan(have), np.isnan(want), err_msg=name)
+        np.testing.assert_allclose(have, want, rtol=1e-9, atol=1e-12, err_msg=name)
+    if min_periods is None:
+        assert np.isnan(stats.percent_b[:WINDOW - 1]).all()
+
+
+def test_max_deviation_covers_warm_up():
+    from rolling_stats import max_deviation
+
+    dataframe = _market(1000)
+    for min_periods in (None, 1):
+        deviations = max_deviation(dataframe, WINDOW, 2.0, EXTREMA_WINDOW, min_periods)
+        assert max(deviations.values()) < 1e-6
@@ -0,0 +1,175 @@
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from freqtrade.exchange import timeframe_to_msecs, timeframe_to_prev_date
+
+from stream_feed import StreamBuffer, StreamClient, kline_stream
+
+
+PAIR = 'BTC/USDT'
+TIMEFRAME = '5m'
+STEP = timeframe_to_msecs(TIMEFRAME)
+STALE = 10
+
+
+def _current_open() -> int:
+    return int(timeframe_to_prev_date(TIMEFRAME).timestamp() * 1000)
+
+
+def _rest(last_open: int, size: int = 50, close: float = 100.0) -> pd.DataFrame:
+    """Bougies clôturées jusqu'à last_open compris, comme rendues par refresh_latest_ohlcv"""
+    dates = pd.to_datetime(last_open - STEP * np.arange(size)[::-1], unit='ms', utc=True)
+    closes = close + np.arange(size, dtype=np.float64)
+    return pd.DataFrame({'date': dates, 'open': closes, 'high': closes + 1, 'low': closes - 1,
+                         'close': closes, 'volume': np.ones(size)})
+
+
+def _kline(open_ms: int, close: float, closed: bool, symbol: str = 'BTCUSDT') -> str:
+    return json.dumps({'stream': f'{symbol.lower()}@kline_{TIMEFRAME}', 'data': {
+        'e': 'kline', 's': symbol, 'k': {'t': open_ms, 'i': TIMEFRAME, 'o': close, 'h': close, 'l': close,
+                                         'c': close, 'v': 1, 'x': closed}}})
+
+
+@pytest.fixture
+def client():
+    stream_client = StreamClient('ws://127.0.0.1:1', StreamBuffer(), {'btcusdt': PAIR, 'ethusdt': 'ETH/USDT'})
+    yield stream_client
+    stream_client.loop.close()
+
+
+def _seeded(client) -> int:
+    """Tampon amorcé en REST jusqu'à la dernière bougie clôturée, bougie en cours poussée"""
+    now = _current_open()
+    client.buffer.seed(PAIR, TIMEFRAME, _rest(now - STEP))
+    client.handle(_kline(now, 500.0, False))
+    return now
+
+
+def test_served_after_push(client):
+    now = _seeded(client)
+    frame = client.buffer.fresh_frame(PAIR, TIMEFRAME, 20, STALE)
+    assert len(frame) == 20
+    assert frame['date'].iloc[-1].value // 10 ** 6 == now - STEP
+    # La bougie en cours n'est lue que par candles()
+    assert client.buffer.candles(PAIR, TIMEFRAME)['close'].iloc[-1] == 500.0
+
+
+def test_stale_per_pair(client):
+    _seeded(client)
+    client.buffer.seed('ETH/USDT', TIMEFRAME, _rest(_current_open() - STEP))
+    # ETH amorcé mais jamais poussé : servi par l'exchange
+    assert client.buffer.fresh_frame('ETH/USDT', TIMEFRAME, 20, STALE) is None
+    assert client.buffer.fresh_frame(PAIR, TIMEFRAME, 20, STALE) is not None
+    client.buffer.rings[(PAIR, TIMEFRAME)].received = time.time() - 2 * STALE
+    assert client.buffer.fresh_frame(PAIR, TIMEFRAME, 20, STALE) is None
+
+
+def test_missed_close_falls_back_to_rest(client):
+    now = _current_open()
+    client.buffer.seed(PAIR, TIMEFRAME, _rest(now - 2 * STEP))
+    # Bougie now - STEP poussée en cours puis jamais clôturée ("x": true perdu)
+    client.handle(_kline(now - STEP, 999.0, False))
+    client.handle(_kline(now, 500.0, False))
+    ring = client.buffer.rings[(PAIR, TIMEFRAME)]
+    assert ring.closed == now - 2 * STEP
+    assert ring.frame()['close'].iloc[-1] != 999.0
+    # Le REST remplace les prix périmés de la bougie
+    client.buffer.seed(PAIR, TIMEFRAME, _rest(now - STEP, close=200.0))
+    frame = client.buffer.fresh_frame(PAIR, TIMEFRAME, 20, STALE)
+    assert frame['date'].iloc[-1].value // 10 ** 6 == now - STEP
+    assert frame['close'].iloc[-1] == 249.0
+    assert client.buffer.candles(PAIR, TIMEFRAME)['close'].iloc[-1] == 500.0
+
+
+def test_gap_in_stream_waits_for_rest(client):
+    now = _current_open()
+    client.buffer.seed(PAIR, TIMEFRAME, _rest(now - 4 * STEP))
+    client.handle(_kline(now - 4 * STEP, 300.0, True))
+    # Deux bougies jamais reçues
+    client.handle(_kline(now - STEP, 400.0, True))
+    client.handle(_kline(now, 500.0, False))
+    assert client.buffer.rings[(PAIR, TIMEFRAME)].resync
+    assert client.buffer.fresh_frame(PAIR, TIMEFRAME, 20, STALE) is None
+    assert client.buffer.resyncs == 1
+
+    client.buffer.seed(PAIR, TIMEFRAME, _rest(now - STEP))
+    frame = client.buffer.fresh_frame(PAIR, TIMEFRAME, 20, STALE)
+    assert (frame['date'].diff().iloc[1:] == pd.Timedelta(milliseconds=STEP)).all()
+    assert frame['date'].iloc[-1].value // 10 ** 6 == now - STEP
+
+
+def test_reconnect_resyncs_kline_streams(client):
+    _seeded(client)
+    client.resync([kline_stream('btcusdt', TIMEFRAME), 'btcusdt@bookTicker', kline_stream('unknown', TIMEFRAME)])
+    assert client.buffer.fresh_frame(PAIR, TIMEFRAME, 20, STALE) is None
+    # Seed REST sans nouvelle bougie : accepté malgré la bougie déjà clôturée
+    client.buffer.seed(PAIR, TIMEFRAME, _rest(_current_open() - STEP))
+    assert client.buffer.fresh_frame(PAIR, TIMEFRAME, 20, STALE) is not None
+
+
+def test_missing_candles_filled(client):
+    now = _current_open()
+    rest = _rest(now - STEP).drop(index=[40, 41]).reset_index(drop=True)
+    client.buffer.seed(PAIR, TIMEFRAME, rest)
+    client.handle(_kline(now, 500.0, False))
+    frame = client.buffer.fresh_frame(PAIR, TIMEFRAME, None, STALE)
+    assert len(frame) == 50
+    assert frame['volume'].iloc[40] == 0
+    assert frame['close'].iloc[40] == frame['close'].iloc[39]
+
+
+def test_seed_empty_frame(client):
+    client.buffer.seed(PAIR, TIMEFRAME, _rest(_current_open()).iloc[:0])
+    assert client.buffer.candles(PAIR, TIMEFRAME) is None
+    _seeded(client)
+    client.buffer.seed(PAIR, TIMEFRAME, _rest(_current_open()).iloc[:0])
+    assert client.buffer.fresh_frame(PAIR, TIMEFRAME, 20, STALE) is not None
+
+
+def test_quote_per_pair(client):
+    client.handle(json.dumps({'stream': 'btcusdt@bookTicker',
+                              'data': {'u': 1, 's': 'BTCUSDT', 'b': '99', 'B': '2', 'a': '101', 'A': '3'}}))
+    assert client.buffer.quote(PAIR, STALE).ask == 101.0
+    assert client.buffer.quote('ETH/USDT', STALE) is None
+    client.buffer.quotes[PAIR] = client.buffer.quotes[PAIR]._replace(received=time.time() - 2 * STALE)
+    assert client.buffer.quote(PAIR, STALE) is None
+
+
+def _wait(condition, timeout: float = 10.0) -> bool:
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+def test_connection_loss_resyncs():
+    import socket
+
+    from cyptrade.simulator import SimulatedMarket, synthetic_market_frames
+    from cyptrade.stream_server import StreamServer
+
+    frames = synthetic_market_frames(1, 500, TIMEFRAME, 'USDT')
+    pair = next(iter(frames))
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    server = StreamServer(SimulatedMarket(frames, TIMEFRAME), port=port, interval=0.05).start()
+    symbol = server.ids[pair].lower()
+    stream_client = StreamClient(server.url, StreamBuffer(), {symbol: pair})
+    stream_client.start()
+    try:
+        try:
+            stream_client.subscribe([kline_stream(symbol, TIMEFRAME)])
+            assert _wait(lambda: (pair, TIMEFRAME) in stream_client.buffer.rings)
+            assert not stream_client.buffer.rings[(pair, TIMEFRAME)].resync
+        finally:
+            # Coupure côté serveur
+            server.stop()
+        assert _wait(lambda: stream_client.buffer.rings[(pair, TIMEFRAME)].resync)
+        assert stream_client.buffer.resyncs == 1
+    finally:
+        stream_client.stop()
@@ -4,10 +4,15 @@ from pandas import DataFrame
 from datetime import datetime
 from typing import Optional, Union
 
-from freqtrade.strategy import IStrategy, merge_informative_pair
+from freqtrade.strategy import IStrategy
 from freqtrade.strategy.parameters import IntParameter, DecimalParameter, CategoricalParameter
 import talib.abstract as ta
 import freqtrade.vendor.qtpylib.indicators as qtpylib
+from indicator_cache import shared_indicators
+from informative_cache import InformativeCache
+from shared_feeds import attach_shared
+from signal_rules import AllOf, AnyOf, Param, Rule, Rules, When
+from hyperopt_precompute import precompute_variants, select_variants
 
 class HyperoptSimple(IStrategy):
     """
@@ -69,6 +74,54 @@ class HyperoptSimple(IStrategy):
     # Paramètres de protection
     use_stop_loss = CategoricalParameter([True, False], default=True, space="protection")
 
+    # Conditions d'entrée / sortie (compilées une fois, voir signal_rules)
+    # Les colonnes informatives absentes valent 0, comme l'ancien remplissage par des zéros
+    entry_rules = Rules(AllOf(
+        # Conditions de base
+        Rule('rsi', '<', Param('buy_rsi_high')),
+        Rule('rsi', '>', Param('buy_rsi_low')),
+
+        # Croisement des moyennes mobiles
+        Rule('ema_fast', '>', 'ema_slow'),
+        Rule('ema_fast', '<=', 'ema_slow', shift=1, other_shift=1),
+
+        # Volume
+        Rule('volume', '>', 'volume_ma', factor=Param('buy_volume_factor')),
+
+        # Conditions sur timeframes supérieurs
+        Rule('trend_1h', '>', 0),
+        Rule('rsi_1h', '<', 70),
+        Rule('volume_1h', '>', 'volume_ma_1h', factor=1.1),
+
+        # Conditions de prix
+        Rule('close', '>', 'open'),
+        Rule('close', '>', 'close', other_shift=1),
+
+        # Volume minimum
+        Rule('volume', '>', 0),
+    ), missing='zero')
+
+    exit_rules = Rules(AnyOf(
+        # RSI élevé
+        Rule('rsi', '>', Param('sell_rsi_high')),
+
+        # Croisement des moyennes mobiles (si activé)
+        When('sell_ema_cross', AllOf(
+            Rule('ema_fast', '<', 'ema_slow'),
+            Rule('ema_fast', '>=', 'ema_slow', shift=1, other_shift=1),
+        )),
+
+        # Tendance négative sur timeframes supérieurs
+        Rule('trend_1h', '<', 0),
+        Rule('rsi_1h', '>', 80),
+
+        # Divergence négative
+        AllOf(
+            Rule('close', '<', 'close', other_shift=1),
+            Rule('rsi', '>', 'rsi', other_shift=1),
+        ),
+    ), missing='zero')
+
     def informative_pairs(self):
         """
         Définit les paires et timeframes informatifs
@@ -80,52 +133,73 @@ class HyperoptSimple(IStrategy):
                 informative_pairs.append((pair, tf))
         return informative_pairs
 
+    def bot_start(self, **kwargs) -> None:
+        """
+        Cache des timeframes informatifs (invalidé à la clôture d'une bougie supérieure),
+        puis caches partagés et mesures des phases lorsqu'ils sont configurés (dry-run / live)
+        """
+        self.informative_cache = InformativeCache(self)
+        # En dernier : les mesures enveloppent aussi le cache informatif
+        attach_shared(self)
+
+    def populate_informative(self, informative: DataFrame, pair: str, timeframe: str) -> DataFrame:
+        """
+        Calcule les indicateurs d'un timeframe supérieur (avant fusion avec le dataframe principal)
+        """
+        inf_ind = shared_indicators.bind(informative, pair, timeframe)
+
+        # RSI sur timeframe supérieur
+        informative[f'rsi_{timeframe}'] = inf_ind.talib('RSI', timeperiod=14)
+        
+        # EMA sur timeframe supérieur
+        informative[f'ema_fast_{timeframe}'] = inf_ind.talib('EMA', timeperiod=8)
+        informative[f'ema_slow_{timeframe}'] = inf_ind.talib('EMA', timeperiod=21)
+        
+        # Tendance sur timeframe supérieur
+        informative[f'trend_{timeframe}'] = np.where(
+            informative[f'ema_fast_{timeframe}'] > informative[f'ema_slow_{timeframe}'], 1, -1
+        )
+        
+        # Volume sur timeframe supérieur
+        informative[f'volume_{timeframe}'] = informative['volume']
+        informative[f'volume_ma_{timeframe}'] = inf_ind.rolling_mean('volume', 20)
+
+        return informative
+
+    def select_parameters(self, dataframe: DataFrame) -> None:
+        """
+        Sélectionne les variantes pré-calculées correspondant aux paramètres courants
+        """
+        select_variants(dataframe, {
+            'rsi': self.buy_rsi_period.value,
+            'ema_fast': self.buy_ema_fast.value,
+            'ema_slow': self.buy_ema_slow.value,
+        })
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         """
         Calcule les indicateurs techniques
         """
-        # RSI
-        dataframe['rsi'] = ta.RSI(dataframe, timeperiod=self.buy_rsi_period.value)
-        
-        # Moyennes mobiles exponentielles
-        dataframe['ema_fast'] = ta.EMA(dataframe, timeperiod=self.buy_ema_fast.value)
-        dataframe['ema_slow'] = ta.EMA(dataframe, timeperiod=self.buy_ema_slow.value)
+        # RSI et moyennes mobiles exponentielles : toutes les périodes de l'espace d'hyperopt
+        # sont calculées une seule fois, l'époque choisit sa variante (select_parameters)
+        dataframe = precompute_variants(dataframe, metadata['pair'], self.timeframe, {
+            'rsi': ('RSI', self.buy_rsi_period.range),
+            'ema_fast': ('EMA', self.buy_ema_fast.range),
+            'ema_slow': ('EMA', self.buy_ema_slow.range),
+        })
+
+        # Indicateurs partagés avec les autres stratégies du processus
+        ind = shared_indicators.bind(dataframe, metadata['pair'], self.timeframe)
         
         # Volume
-        dataframe['volume_ma'] = dataframe['volume'].rolling(window=20).mean()
+        dataframe['volume_ma'] = ind.rolling_mean('volume', 20)
         
         # MACD
-        macd = ta.MACD(dataframe)
-        dataframe['macd'] = macd['macd']
-        dataframe['macdsignal'] = macd['macdsignal']
-        dataframe['macdhist'] = macd['macdhist']
+        dataframe['macd'], dataframe['macdsignal'], dataframe['macdhist'] = ind.talib('MACD')
         
-        # Données informatives (timeframes supérieurs)
+        # Données informatives (timeframes supérieurs), recalculées à la clôture d'une bougie supérieure
         for timeframe in self.informative_timeframes:
-            informative = self.dp.get_pair_dataframe(pair=metadata['pair'], timeframe=timeframe)
-            
-            if informative.empty:
-                print(f"Warning: No data for {metadata['pair']} on {timeframe}")
-                continue
-                
-            # RSI sur timeframe supérieur
-            informative[f'rsi_{timeframe}'] = ta.RSI(informative, timeperiod=14)
-            
-            # EMA sur timeframe supérieur
-            informative[f'ema_fast_{timeframe}'] = ta.EMA(informative, timeperiod=8)
-            informative[f'ema_slow_{timeframe}'] = ta.EMA(informative, timeperiod=21)
-            
-            # Tendance sur timeframe supérieur
-            informative[f'trend_{timeframe}'] = np.where(
-                informative[f'ema_fast_{timeframe}'] > informative[f'ema_slow_{timeframe}'], 1, -1
-            )
-            
-            # Volume sur timeframe supérieur
-            informative[f'volume_{timeframe}'] = informative['volume']
-            informative[f'volume_ma_{timeframe}'] = informative['volume'].rolling(window=20).mean()
-            
-            # Fusion avec le dataframe principal
-            dataframe = merge_informative_pair(dataframe, informative, self.timeframe, timeframe, ffill=True)
+            dataframe = self.informative_cache.merge(dataframe, metadata['pair'], timeframe, self.populate_informative)
 
         return dataframe
 
@@ -133,43 +207,9 @@ class HyperoptSimple(IStrategy):
         """
         Conditions d'entrée optimisées
         """
-        # Vérifier que les colonnes nécessaires existent
-        required_columns = ['rsi', 'ema_fast', 'ema_slow', 'volume_ma']
-        for tf in self.informative_timeframes:
-            required_columns.extend([f'rsi_{tf}', f'ema_fast_{tf}', f'ema_slow_{tf}', f'trend_{tf}', f'volume_{tf}', f'volume_ma_{tf}'])
-        
-        missing_columns = [col for col in required_columns if col not in dataframe.columns]
-        if missing_columns:
-            print(f"Warning: Missing columns {missing_columns} for {metadata['pair']}")
-            for col in missing_columns:
-                dataframe[col] = 0
-
-        dataframe.loc[
-            (
-                # Conditions de base
-                (dataframe['rsi'] < self.buy_rsi_high.value) &
-                (dataframe['rsi'] > self.buy_rsi_low.value) &
-                
-                # Croisement des moyennes mobiles
-                (dataframe['ema_fast'] > dataframe['ema_slow']) &
-                (dataframe['ema_fast'].shift(1) <= dataframe['ema_slow'].shift(1)) &
-                
-                # Volume
-                (dataframe['volume'] > dataframe['volume_ma'] * self.buy_volume_factor.value) &
-                
-                # Conditions sur timeframes supérieurs
-                (dataframe['trend_1h'] > 0) &
-                (dataframe['rsi_1h'] < 70) &
-                (dataframe['volume_1h'] > dataframe['volume_ma_1h'] * 1.1) &
-                
-                # Conditions de prix
-                (dataframe['close'] > dataframe['open']) &
-                (dataframe['close'] > dataframe['close'].shift(1)) &
-                
-                # Volume minimum
-                (dataframe['volume'] > 0)
-            ),
-            'enter_long'] = 1
+        self.select_parameters(dataframe)
+
+        dataframe.loc[self.entry_rules.evaluate(dataframe, self), 'enter_long'] = 1
 
         return dataframe
 
@@ -177,35 +217,9 @@ class HyperoptSimple(IStrategy):
         """
         Conditions de sortie optimisées
         """
-        # Vérifier que les colonnes nécessaires existent
-        required_columns = ['rsi', 'ema_fast', 'ema_slow']
-        for tf in self.informative_timeframes:
-            required_columns.extend([f'rsi_{tf}', f'ema_fast_{tf}', f'ema_slow_{tf}', f'trend_{tf}'])
-        
-        missing_columns = [col for col in required_columns if col not in dataframe.columns]
-        if missing_columns:
-            print(f"Warning: Missing columns {missing_columns} for {metadata['pair']}")
-            for col in missing_columns:
-                dataframe[col] = 0
-
-        dataframe.loc[
-            (
-                # RSI élevé
-                (dataframe['rsi'] > self.sell_rsi_high.value) |
-                
-                # Croisement des moyennes mobiles (si activé)
-                (self.sell_ema_cross.value & (dataframe['ema_fast'] < dataframe['ema_slow']) & 
-                 (dataframe['ema_fast'].shift(1) >= dataframe['ema_slow'].shift(1))) |
-                
-                # Tendance négative sur timeframes supérieurs
-                (dataframe['trend_1h'] < 0) |
-                (dataframe['rsi_1h'] > 80) |
-                
-                # Divergence négative
-                (dataframe['close'] < dataframe['close'].shift(1)) &
-                (dataframe['rsi'] > dataframe['rsi'].shift(1))
-            ),
-            'exit_long'] = 1
+        self.select_parameters(dataframe)
+
+        dataframe.loc[self.exit_rules.evaluate(dataframe, self), 'exit_long'] = 1
 
         return dataframe
 
@@ -8,6 +8,10 @@ from freqtrade.strategy import IStrategy
 from freqtrade.strategy.parameters import IntParameter, DecimalParameter, CategoricalParameter
 from freqtrade.persistence import Trade
 import talib.abstract as ta
+from indicator_cache import shared_indicators
+from hyperopt_precompute import precompute_variants, select_variants
+from signal_rules import AllOf, AnyOf, Param, Rule, Rules, When
+from shared_feeds import attach_shared
 
 class HyperoptWorking(IStrategy):
     """
@@ -66,25 +70,86 @@ class HyperoptWorking(IStrategy):
     # Paramètres de protection
     use_stop_loss = CategoricalParameter([True, False], default=True, space="protection")
 
+    # Conditions d'entrée / sortie (compilées une fois, voir signal_rules)
+    entry_rules = Rules(AllOf(
+        # RSI dans la zone d'achat
+        Rule('rsi', '<', Param('buy_rsi_high')),
+        Rule('rsi', '>', Param('buy_rsi_low')),
+
+        # Croisement des moyennes mobiles
+        Rule('ema_fast', '>', 'ema_slow'),
+        Rule('ema_fast', '<=', 'ema_slow', shift=1, other_shift=1),
+
+        # Volume suffisant
+        Rule('volume', '>', 'volume_ma', factor=Param('buy_volume_factor')),
+
+        # MACD positif
+        Rule('macd', '>', 'macdsignal'),
+
+        # Conditions de prix
+        Rule('close', '>', 'open'),
+        Rule('close', '>', 'close', other_shift=1),
+
+        # Volume minimum
+        Rule('volume', '>', 0),
+    ))
+
+    exit_rules = Rules(AnyOf(
+        # RSI élevé
+        Rule('rsi', '>', Param('sell_rsi_high')),
+
+        # Croisement des moyennes mobiles (si activé)
+        When('sell_ema_cross', AllOf(
+            Rule('ema_fast', '<', 'ema_slow'),
+            Rule('ema_fast', '>=', 'ema_slow', shift=1, other_shift=1),
+        )),
+
+        # MACD négatif
+        Rule('macd', '<', 'macdsignal'),
+
+        # Divergence négative
+        AllOf(
+            Rule('close', '<', 'close', other_shift=1),
+            Rule('rsi', '>', 'rsi', other_shift=1),
+        ),
+    ))
+
+    def bot_start(self, **kwargs) -> None:
+        """
+        Bougies servies par le magasin partagé ou le flux poussé lorsqu'ils sont configurés (dry-run / live)
+        """
+        attach_shared(self)
+
+    def select_parameters(self, dataframe: DataFrame) -> None:
+        """
+        Sélectionne les variantes pré-calculées correspondant aux paramètres courants
+        """
+        select_variants(dataframe, {
+            'rsi': self.buy_rsi_period.value,
+            'ema_fast': self.buy_ema_fast.value,
+            'ema_slow': self.buy_ema_slow.value,
+        })
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         """
         Calcule les indicateurs techniques
         """
-        # RSI
-        dataframe['rsi'] = ta.RSI(dataframe, timeperiod=self.buy_rsi_period.value)
-        
-        # Moyennes mobiles exponentielles
-        dataframe['ema_fast'] = ta.EMA(dataframe, timeperiod=self.buy_ema_fast.value)
-        dataframe['ema_slow'] = ta.EMA(dataframe, timeperiod=self.buy_ema_slow.value)
+        # RSI et moyennes mobiles exponentielles : toutes les périodes de l'espace d'hyperopt
+        # sont calculées une seule fois, l'époque choisit sa variante (select_parameters)
+        dataframe = precompute_variants(dataframe, metadata['pair'], self.timeframe, {
+            'rsi': ('RSI', self.buy_rsi_period.range),
+            'ema_fast': ('EMA', self.buy_ema_fast.range),
+            'ema_slow': ('EMA', self.buy_ema_slow.range),
+        })
+
+        # Indicateurs partagés avec les autres stratégies du processus
+        ind = shared_indicators.bind(dataframe, metadata['pair'], self.timeframe)
         
         # Volume
-        dataframe['volume_ma'] = dataframe['volume'].rolling(window=20).mean()
+        dataframe['volume_ma'] = ind.rolling_mean('volume', 20)
         
         # MACD
-        macd = ta.MACD(dataframe)
-        dataframe['macd'] = macd['macd']
-        dataframe['macdsignal'] = macd['macdsignal']
-        dataframe['macdhist'] = macd['macdhist']
+        dataframe['macd'], dataframe['macdsignal'], dataframe['macdhist'] = ind.talib('MACD')
 
         return dataframe
 
@@ -92,30 +157,9 @@ class HyperoptWorking(IStrategy):
         """
         Conditions d'entrée optimisées
         """
-        dataframe.loc[
-            (
-                # RSI dans la zone d'achat
-                (dataframe['rsi'] < self.buy_rsi_high.value) &
-                (dataframe['rsi'] > self.buy_rsi_low.value) &
-                
-                # Croisement des moyennes mobiles
-                (dataframe['ema_fast'] > dataframe['ema_slow']) &
-                (dataframe['ema_fast'].shift(1) <= dataframe['ema_slow'].shift(1)) &
-                
-                # Volume suffisant
-                (dataframe['volume'] > dataframe['volume_ma'] * self.buy_volume_factor.value) &
-                
-                # MACD positif
-                (dataframe['macd'] > dataframe['macdsignal']) &
-                
-                # Conditions de prix
-                (dataframe['close'] > dataframe['open']) &
-                (dataframe['close'] > dataframe['close'].shift(1)) &
-                
-                # Volume minimum
-                (dataframe['volume'] > 0)
-            ),
-            'enter_long'] = 1
+        self.select_parameters(dataframe)
+
+        dataframe.loc[self.entry_rules.evaluate(dataframe, self), 'enter_long'] = 1
 
         return dataframe
 
@@ -123,23 +167,9 @@ class HyperoptWorking(IStrategy):
         """
         Conditions de sortie optimisées
         """
-        dataframe.loc[
-            (
-                # RSI élevé
-                (dataframe['rsi'] > self.sell_rsi_high.value) |
-                
-                # Croisement des moyennes mobiles (si activé)
-                (self.sell_ema_cross.value & (dataframe['ema_fast'] < dataframe['ema_slow']) & 
-                 (dataframe['ema_fast'].shift(1) >= dataframe['ema_slow'].shift(1))) |
-                
-                # MACD négatif
-                (dataframe['macd'] < dataframe['macdsignal']) |
-                
-                # Divergence négative
-                (dataframe['close'] < dataframe['close'].shift(1)) &
-                (dataframe['rsi'] > dataframe['rsi'].shift(1))
-            ),
-            'exit_long'] = 1
+        self.select_parameters(dataframe)
+
+        dataframe.loc[self.exit_rules.evaluate(dataframe, self), 'exit_long'] = 1
 
         return dataframe
 
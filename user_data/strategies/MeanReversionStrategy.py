@@ -8,6 +8,8 @@ from pandas import DataFrame
 from datetime import datetime
 from typing import Optional, Union
 
+from freqtrade.enums import RunMode
+
 from freqtrade.strategy import (BooleanParameter, CategoricalParameter, DecimalParameter,
                                 IntParameter, IStrategy, merge_informative_pair)
 
@@ -15,6 +17,12 @@ from freqtrade.strategy import (BooleanParameter, CategoricalParameter, DecimalP
 # Add your lib to import here
 import talib.abstract as ta
 import freqtrade.vendor.qtpylib.indicators as qtpylib
+from indicator_cache import shared_indicators
+from signal_rules import AllOf, AnyOf, FlagSet, Param, Rule, Rules
+from compact_frame import FrameLayout
+from shared_feeds import attach_shared
+from incremental_indicators import (Bollinger, Ema, IncrementalEngine, Rsi, Sma, Stoch,
+                                    WilliamsR, ZScore, shared_engine)
 
 
 class MeanReversionStrategy(IStrategy):
@@ -93,6 +101,12 @@ class MeanReversionStrategy(IStrategy):
     # Run "populate_indicators" only for new candle
     process_only_new_candles = False
 
+    # Moteur incrémental (live / dry-run uniquement, voir bot_start)
+    stream_engine: Optional[IncrementalEngine] = None
+
+    # Format compact du dataframe (surchargeable par "compact_frame" dans la configuration)
+    compact_frame: bool = False
+
     # These values can be overridden in the config
     use_exit_signal = True
     exit_profit_only = False
@@ -142,6 +156,106 @@ class MeanReversionStrategy(IStrategy):
         }
     }
 
+    # === RÈGLES DE SIGNAL (compilées une fois, voir signal_rules) ===
+
+    signal_rules = {
+        # Signal de survente : Prix sous Bollinger inférieure + RSI < seuil + Z-Score < seuil
+        'oversold': Rules(AllOf(
+            Rule('close', '<', 'bb_lowerband'),
+            Rule('rsi', '<', Param('rsi_oversold')),
+            Rule('zscore', '<', Param('zscore_oversold')),
+            Rule('bb_percent', '<', Param('bb_oversold_threshold')),   # Prix dans la zone inférieure des BB
+            Rule('williams_r', '<', Param('williams_oversold')),       # Williams %R en survente
+            Rule('volume_ratio', '>', Param('volume_factor')),         # Volume élevé
+        )),
+        # Signal de surachat : Prix au-dessus Bollinger supérieure + RSI > seuil + Z-Score > seuil
+        'overbought': Rules(AllOf(
+            Rule('close', '>', 'bb_upperband'),
+            Rule('rsi', '>', Param('rsi_overbought')),
+            Rule('zscore', '>', Param('zscore_overbought')),
+            Rule('bb_percent', '>', Param('bb_overbought_threshold')), # Prix dans la zone supérieure des BB
+            Rule('williams_r', '>', Param('williams_overbought')),     # Williams %R en surachat
+        )),
+        # Confirmation de retour à la moyenne
+        'reversion_signal': Rules(AllOf(
+            Rule('close', '>', 'bb_lowerband', other_shift=1),         # Prix remonte
+            Rule('rsi', '>', 'rsi', other_shift=1),                    # RSI remonte
+            Rule('zscore', '>', 'zscore', other_shift=1),              # Z-Score remonte
+        )),
+        # Tendance générale (pour éviter les trades contre-tendance)
+        'uptrend': Rules(AllOf(
+            Rule('sma_short', '>', 'sma_long'),
+            Rule('close', '>', 'sma_short'),
+        )),
+        'downtrend': Rules(AllOf(
+            Rule('sma_short', '<', 'sma_long'),
+            Rule('close', '<', 'sma_short'),
+        )),
+        # Volatilité (éviter les périodes de faible volatilité)
+        'high_volatility': Rules(Rule('bb_width', '>', Param('min_volatility'))),
+    }
+
+    # === CONDITIONS D'ACHAT (MEAN REVERSION) - SIMPLIFIÉES ===
+    # Achat en survente avec conditions simplifiées
+    entry_rules = Rules(AllOf(
+        Rule('oversold'),                    # Signal de survente (RSI < 40, Williams %R < -70, etc.)
+        Rule('high_volatility'),             # Volatilité suffisante
+        Rule('volume_ratio', '>', 1.0),      # Volume normal (assoupli)
+    ))
+
+    # === CONDITIONS DE VENTE (MEAN REVERSION) ===
+    # Vente en surachat ou retour vers la moyenne
+    exit_rules = Rules(AnyOf(
+        Rule('overbought'),                  # Signal de surachat
+        Rule('bb_percent', '>', 0.8),        # Prix proche de la bande supérieure
+        Rule('rsi', '>', 75),                # RSI en surachat
+        Rule('zscore', '>', 1.5),            # Z-Score élevé
+        Rule('close', '<', 'bb_middleband'), # Prix sous la moyenne
+    ))
+
+    # Seuils de plot, oscillateurs en float32 et drapeaux regroupés en format compact (voir compact_frame)
+    frame_layout = FrameLayout(
+        thresholds={
+        'rsi_oversold': Param('rsi_oversold'),
+        'rsi_overbought': Param('rsi_overbought'),
+        'zscore_oversold': Param('zscore_oversold'),
+        'zscore_overbought': Param('zscore_overbought'),
+        },
+        float32=('williams_r', 'stoch_k', 'stoch_d', 'bb_width'),
+        flags=FlagSet('mean_reversion_flags', signal_rules),
+        # Lues après l'écriture du dataframe : ces colonnes restent en float64
+        rules=(entry_rules, exit_rules),
+    )
+
+    def bot_start(self, **kwargs) -> None:
+        """
+        En live / dry-run, populate_indicators est appelé à chaque itération :
+        les indicateurs sont alors mis à jour bougie par bougie au lieu d'être recalculés,
+        par le moteur commun aux stratégies du processus.
+        """
+        if self.dp.runmode in (RunMode.LIVE, RunMode.DRY_RUN):
+            self.stream_engine = shared_engine
+        # Le tracé (plot-dataframe) a besoin des seuils et des signaux en colonnes
+        self.compact_frame = (self.config.get('compact_frame', self.compact_frame)
+                              and self.dp.runmode != RunMode.PLOT)
+        # Caches partagés et mesures des phases lorsqu'ils sont configurés
+        attach_shared(self)
+
+    def stream_spec(self) -> dict:
+        """Indicateurs calculés par le moteur incrémental (mêmes paramètres que le calcul complet)"""
+        return {
+            ('bb_upperband', 'bb_middleband', 'bb_lowerband'): Bollinger(self.bb_period.value, self.bb_std.value,
+                                                                            min_periods=None),
+            'sma_short': Sma(self.sma_short_period.value),
+            'sma_long': Sma(self.sma_long_period.value),
+            'ema_20': Ema(20),
+            'rsi': Rsi(self.rsi_period.value),
+            'zscore': ZScore(self.zscore_period.value),
+            'williams_r': WilliamsR(self.williams_period.value),
+            ('stoch_k', 'stoch_d'): Stoch(),
+            'volume_sma': Sma(20, source='volume'),
+        }
+
     def informative_pairs(self):
         """
         Define additional, informative pair/interval combinations to be cached from the exchange.
@@ -162,87 +276,61 @@ class MeanReversionStrategy(IStrategy):
         """
 
         # === MEAN REVERSION INDICATORS ===
-        
-        # Bollinger Bands - indicateur principal pour mean reversion (avec paramètres optimisables)
-        bollinger = qtpylib.bollinger_bands(dataframe['close'], window=self.bb_period.value, stds=self.bb_std.value)
-        dataframe['bb_upperband'] = bollinger['upper']
-        dataframe['bb_middleband'] = bollinger['mid']
-        dataframe['bb_lowerband'] = bollinger['lower']
-        dataframe['bb_percent'] = (dataframe['close'] - dataframe['bb_lowerband']) / (dataframe['bb_upperband'] - dataframe['bb_lowerband'])
-        dataframe['bb_width'] = (dataframe['bb_upperband'] - dataframe['bb_lowerband']) / dataframe['bb_middleband']
-        
-        # Moyennes mobiles pour la tendance générale (avec paramètres optimisables)
-        dataframe['sma_short'] = ta.SMA(dataframe, timeperiod=self.sma_short_period.value)
-        dataframe['sma_long'] = ta.SMA(dataframe, timeperiod=self.sma_long_period.value)
-        dataframe['ema_20'] = ta.EMA(dataframe, timeperiod=20)
-        
-        # RSI pour confirmer les signaux (avec paramètres optimisables)
-        dataframe['rsi'] = ta.RSI(dataframe, timeperiod=self.rsi_period.value)
-        dataframe['rsi_oversold'] = self.rsi_oversold.value
-        dataframe['rsi_overbought'] = self.rsi_overbought.value
-        
-        # Z-Score pour mesurer l'écart par rapport à la moyenne (avec paramètres optimisables)
-        rolling_mean = dataframe['close'].rolling(window=self.zscore_period.value).mean()
-        rolling_std = dataframe['close'].rolling(window=self.zscore_period.value).std()
-        dataframe['zscore'] = (dataframe['close'] - rolling_mean) / rolling_std
-        dataframe['zscore_oversold'] = self.zscore_oversold.value
-        dataframe['zscore_overbought'] = self.zscore_overbought.value
-        
-        # Williams %R pour une autre mesure de survente/surachat (avec paramètres optimisables)
-        dataframe['williams_r'] = ta.WILLR(dataframe, timeperiod=self.williams_period.value)
-        
-        # Stochastic pour confirmer les signaux
-        stoch = ta.STOCH(dataframe)
-        dataframe['stoch_k'] = stoch['slowk']
-        dataframe['stoch_d'] = stoch['slowd']
-        
-        # Volume indicators (avec paramètres optimisables)
-        dataframe['volume_sma'] = dataframe['volume'].rolling(window=20).mean()
+
+        if self.stream_engine is not None:
+            # Live / dry-run : seules les nouvelles bougies sont calculées
+            stream = self.stream_engine.update(metadata['pair'], dataframe, self.stream_spec(),
+                                               self.timeframe)
+            for column, values in stream.items():
+                dataframe[column] = values
+            dataframe['bb_percent'] = (dataframe['close'] - dataframe['bb_lowerband']) / (dataframe['bb_upperband'] - dataframe['bb_lowerband'])
+            dataframe['bb_width'] = (dataframe['bb_upperband'] - dataframe['bb_lowerband']) / dataframe['bb_middleband']
+        else:
+            # Indicateurs partagés avec les autres stratégies du processus
+            ind = shared_indicators.bind(dataframe, metadata['pair'], self.timeframe)
+
+            # Bollinger Bands - indicateur principal pour mean reversion (avec paramètres optimisables)
+            # Bandes, %B, largeur, z-score et Williams %R sont calculés en un seul parcours,
+            # sur fenêtres complètes comme le z-score d'origine et le moteur incrémental
+            stats = ind.rolling_stats(window=self.bb_period.value, stds=self.bb_std.value,
+                                      extrema_window=self.williams_period.value)
+            dataframe['bb_upperband'] = stats.upper
+            dataframe['bb_middleband'] = stats.mean
+            dataframe['bb_lowerband'] = stats.lower
+            dataframe['bb_percent'] = stats.percent_b
+            dataframe['bb_width'] = stats.width
+
+            # Moyennes mobiles pour la tendance générale (avec paramètres optimisables)
+            dataframe['sma_short'] = ind.talib('SMA', timeperiod=self.sma_short_period.value)
+            dataframe['sma_long'] = ind.talib('SMA', timeperiod=self.sma_long_period.value)
+            dataframe['ema_20'] = ind.talib('EMA', timeperiod=20)
+
+            # RSI pour confirmer les signaux (avec paramètres optimisables)
+            dataframe['rsi'] = ind.talib('RSI', timeperiod=self.rsi_period.value)
+
+            # Z-Score pour mesurer l'écart par rapport à la moyenne (avec paramètres optimisables)
+            if self.zscore_period.value != self.bb_period.value:
+                stats = ind.rolling_stats(window=self.zscore_period.value, stds=self.bb_std.value,
+                                          extrema_window=self.williams_period.value)
+            dataframe['zscore'] = stats.zscore
+
+            # Williams %R pour une autre mesure de survente/surachat (avec paramètres optimisables)
+            dataframe['williams_r'] = stats.williams_r
+
+            # Stochastic pour confirmer les signaux
+            dataframe['stoch_k'], dataframe['stoch_d'] = ind.talib('STOCH')
+
+            # Volume indicators (avec paramètres optimisables)
+            dataframe['volume_sma'] = ind.rolling_mean('volume', 20)
+
         dataframe['volume_ratio'] = dataframe['volume'] / dataframe['volume_sma']
         
         # === MEAN REVERSION SIGNALS ===
-        
-        # Signal de survente : Prix sous Bollinger inférieure + RSI < seuil + Z-Score < seuil
-        dataframe['oversold'] = (
-            (dataframe['close'] < dataframe['bb_lowerband']) &
-            (dataframe['rsi'] < self.rsi_oversold.value) &
-            (dataframe['zscore'] < self.zscore_oversold.value) &
-            (dataframe['bb_percent'] < self.bb_oversold_threshold.value) &  # Prix dans la zone inférieure des BB
-            (dataframe['williams_r'] < self.williams_oversold.value) &      # Williams %R en survente
-            (dataframe['volume_ratio'] > self.volume_factor.value)          # Volume élevé
-        )
-        
-        # Signal de surachat : Prix au-dessus Bollinger supérieure + RSI > seuil + Z-Score > seuil
-        dataframe['overbought'] = (
-            (dataframe['close'] > dataframe['bb_upperband']) &
-            (dataframe['rsi'] > self.rsi_overbought.value) &
-            (dataframe['zscore'] > self.zscore_overbought.value) &
-            (dataframe['bb_percent'] > self.bb_overbought_threshold.value) &  # Prix dans la zone supérieure des BB
-            (dataframe['williams_r'] > self.williams_overbought.value)        # Williams %R en surachat
-        )
-        
-        # Confirmation de retour à la moyenne
-        dataframe['reversion_signal'] = (
-            (dataframe['close'] > dataframe['bb_lowerband'].shift(1)) &  # Prix remonte
-            (dataframe['rsi'] > dataframe['rsi'].shift(1)) &              # RSI remonte
-            (dataframe['zscore'] > dataframe['zscore'].shift(1))          # Z-Score remonte
-        )
-        
-        # Tendance générale (pour éviter les trades contre-tendance)
-        dataframe['uptrend'] = (
-            (dataframe['sma_short'] > dataframe['sma_long']) &
-            (dataframe['close'] > dataframe['sma_short'])
-        )
-        
-        dataframe['downtrend'] = (
-            (dataframe['sma_short'] < dataframe['sma_long']) &
-            (dataframe['close'] < dataframe['sma_short'])
-        )
-        
-        # Volatilité (éviter les périodes de faible volatilité)
-        dataframe['high_volatility'] = dataframe['bb_width'] > self.min_volatility.value
-        
-        return dataframe
+        # Colonnes de signal (survente, surachat, retour à la moyenne, tendance, volatilité)
+        signals = {column: rules.evaluate(dataframe, self) for column, rules in self.signal_rules.items()}
+
+        # Seuils de plot et signaux : colonnes complètes, ou format compact
+        return self.frame_layout.write(dataframe, metadata['pair'], signals, self, compact=self.compact_frame)
 
     def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         """
@@ -251,17 +339,7 @@ class MeanReversionStrategy(IStrategy):
         :param metadata: Additional information, like the currently traded pair
         :return: DataFrame with entry columns populated
         """
-        
-        # === CONDITIONS D'ACHAT (MEAN REVERSION) - SIMPLIFIÉES ===
-        
-        # Achat en survente avec conditions simplifiées
-        dataframe.loc[
-            (
-                dataframe['oversold'] &                 # Signal de survente (RSI < 40, Williams %R < -70, etc.)
-                dataframe['high_volatility'] &          # Volatilité suffisante
-                (dataframe['volume_ratio'] > 1.0)       # Volume normal (assoupli)
-            ),
-            'enter_long'] = 1
+        dataframe.loc[self.entry_rules.evaluate(dataframe, self), 'enter_long'] = 1
 
         return dataframe
 
@@ -272,19 +350,7 @@ class MeanReversionStrategy(IStrategy):
         :param metadata: Additional information, like the currently traded pair
         :return: DataFrame with exit columns populated
         """
-        
-        # === CONDITIONS DE VENTE (MEAN REVERSION) ===
-        
-        # Vente en surachat ou retour vers la moyenne
-        dataframe.loc[
-            (
-                dataframe['overbought'] |               # Signal de surachat
-                (dataframe['bb_percent'] > 0.8) |      # Prix proche de la bande supérieure
-                (dataframe['rsi'] > 75) |              # RSI en surachat
-                (dataframe['zscore'] > 1.5) |          # Z-Score élevé
-                (dataframe['close'] < dataframe['bb_middleband'])  # Prix sous la moyenne
-            ),
-            'exit_long'] = 1
+        dataframe.loc[self.exit_rules.evaluate(dataframe, self), 'exit_long'] = 1
 
         return dataframe
 
@@ -2,10 +2,15 @@ import numpy as np
 import pandas as pd
 from pandas import DataFrame
 from datetime import datetime
-from typing import Optional, Union
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional, Union
 
 from freqtrade.strategy import IStrategy
 import talib.abstract as ta
+from indicator_cache import shared_indicators
+from signal_rules import AllOf, AnyOf, Param, Rule, Rules
+from indicator_graph import Indicator, IndicatorGraph, needed_columns
+from shared_feeds import attach_shared
 
 class MultiExchangeStrategy(IStrategy):
     """
@@ -48,10 +53,14 @@ class MultiExchangeStrategy(IStrategy):
     # Trailing stop désactivé
     trailing_stop = False
 
-    # Configuration par exchange
+    # Configuration par exchange (profils surchargeables par "exchange_profiles" dans la configuration)
+    # - quote_currencies : devises de cotation rattachées au profil
+    # - pairs : paires rattachées explicitement (prioritaires sur la devise de cotation)
+    # - indicators : indicateurs calculés en plus de ceux lus par les règles du profil (voir indicator_graph)
     exchange_configs = {
         'binance': {
             'stake_currency': 'USDT',
+            'quote_currencies': ['USDT', 'FDUSD', 'BUSD'],
             'pairs': ['BTC/USDT', 'ETH/USDT', 'BNB/USDT', 'ADA/USDT', 'SOL/USDT', 'DOT/USDT', 'LINK/USDT', 'MATIC/USDT'],
             'max_trades': 3,
             'rsi_period': 14,
@@ -61,10 +70,12 @@ class MultiExchangeStrategy(IStrategy):
             'ema_slow': 26,
             'volume_factor': 1.5,
             'stoploss': -0.04,
-            'risk_level': 'conservative'
+            'risk_level': 'conservative',
+            'indicators': []
         },
         'hyperliquid': {
             'stake_currency': 'USDC',
+            'quote_currencies': ['USDC'],
             'pairs': ['COPE/USDC', 'PURR/USDC', 'BONK/USDC', 'WIF/USDC', 'PEPE/USDC', 'FLOKI/USDC', 'DOGE/USDC', 'SHIB/USDC'],
             'max_trades': 2,
             'rsi_period': 10,
@@ -74,53 +85,248 @@ class MultiExchangeStrategy(IStrategy):
             'ema_slow': 21,
             'volume_factor': 2.0,
             'stoploss': -0.03,
-            'risk_level': 'aggressive'
-        }
+            'risk_level': 'aggressive',
+            'indicators': []
+        },
+        'kraken': {
+            'stake_currency': 'USD',
+            'quote_currencies': ['USD', 'EUR'],
+            'pairs': [],
+            'max_trades': 3,
+            'rsi_period': 14,
+            'rsi_low': 30,
+            'rsi_high': 70,
+            'ema_fast': 12,
+            'ema_slow': 26,
+            'volume_factor': 1.5,
+            'stoploss': -0.04,
+            'risk_level': 'conservative',
+            'indicators': []
+        },
     }
 
-    def get_exchange_config(self, pair: str) -> dict:
-        """Détermine la configuration selon la paire de trading"""
-        if '/USDT' in pair:
-            return self.exchange_configs['binance']
-        elif '/USDC' in pair:
-            return self.exchange_configs['hyperliquid']
-        else:
-            # Configuration par défaut pour Binance
-            return self.exchange_configs['binance']
+    # Profil des paires dont ni la paire ni la devise de cotation ne sont déclarées
+    default_exchange = 'binance'
 
-    def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        """
-        Calcule les indicateurs techniques avec configuration adaptée à l'exchange
-        """
-        pair = metadata['pair']
-        config = self.get_exchange_config(pair)
-        
+    # Index paire -> profil (figé, reconstruit au démarrage et quand la whitelist change)
+    pair_profiles: Mapping[str, Mapping] = MappingProxyType({})
+
+    # Conditions d'entrée / sortie par niveau de risque (compilées une fois, voir signal_rules).
+    # Les Param sont lus dans la configuration de l'exchange de la paire.
+    entry_rules = {
+        # Binance (conservateur)
+        'conservative': Rules(AllOf(
+            # Croisement EMA
+            Rule('ema_fast', '>', 'ema_slow'),
+            Rule('ema_fast', '<=', 'ema_slow', shift=1, other_shift=1),
+
+            # RSI dans la zone d'achat
+            Rule('rsi', '<', Param('rsi_high')),
+            Rule('rsi', '>', Param('rsi_low')),
+
+            # Volume suffisant
+            Rule('volume', '>', 'volume_threshold'),
+
+            # MACD positif
+            Rule('macd', '>', 'macdsignal'),
+
+            # Prix au-dessus de la moyenne mobile
+            Rule('close', '>', 'bb_middle'),
+
+            # Williams %R en zone de survente
+            Rule('williams_r', '<', -20),
+            Rule('williams_r', '>', -80),
+
+            # Bougie haussière
+            Rule('close', '>', 'open'),
+            Rule('close', '>', 'close', other_shift=1),
+
+            # Volume positif
+            Rule('volume', '>', 0),
+        )),
+        # Hyperliquid (agressif)
+        'aggressive': Rules(AllOf(
+            # Croisement EMA plus sensible
+            Rule('ema_fast', '>', 'ema_slow'),
+
+            # RSI dans la zone d'achat (plus large)
+            Rule('rsi', '<', Param('rsi_high')),
+            Rule('rsi', '>', Param('rsi_low')),
+
+            # Volume élevé (marchés volatils)
+            Rule('volume', '>', 'volume_threshold'),
+
+            # MACD positif
+            Rule('macd', '>', 'macdsignal'),
+
+            # Stoch en zone de survente
+            Rule('stoch_k', '<', 80),
+            Rule('stoch_k', '>', 20),
+
+            # Williams %R en zone de survente
+            Rule('williams_r', '<', -10),
+            Rule('williams_r', '>', -90),
+
+            # Bougie haussière
+            Rule('close', '>', 'open'),
+
+            # Volume positif
+            Rule('volume', '>', 0),
+        )),
+    }
+
+    exit_rules = {
+        # Binance (conservateur)
+        'conservative': Rules(AnyOf(
+            # RSI en zone de surachat
+            Rule('rsi', '>', Param('rsi_high')),
+
+            # Croisement EMA inverse
+            AllOf(
+                Rule('ema_fast', '<', 'ema_slow'),
+                Rule('ema_fast', '>=', 'ema_slow', shift=1, other_shift=1),
+            ),
+
+            # MACD négatif
+            Rule('macd', '<', 'macdsignal'),
+
+            # Prix en dessous de la moyenne mobile
+            Rule('close', '<', 'bb_middle'),
+
+            # Williams %R en zone de surachat
+            Rule('williams_r', '>', -20),
+        )),
+        # Hyperliquid (agressif)
+        'aggressive': Rules(AnyOf(
+            # RSI en zone de surachat
+            Rule('rsi', '>', Param('rsi_high')),
+
+            # Croisement EMA inverse
+            AllOf(
+                Rule('ema_fast', '<', 'ema_slow'),
+                Rule('ema_fast', '>=', 'ema_slow', shift=1, other_shift=1),
+            ),
+
+            # MACD négatif
+            Rule('macd', '<', 'macdsignal'),
+
+            # Stoch en zone de surachat
+            Rule('stoch_k', '>', 80),
+
+            # Williams %R en zone de surachat
+            Rule('williams_r', '>', -10),
+        )),
+    }
+
+    # Indicateurs déclarés avec leurs dépendances, paramétrés par le profil de la paire :
+    # seuls ceux lus par les règles du niveau de risque sont calculés (voir indicator_graph)
+    indicator_graph = IndicatorGraph(
         # RSI avec période adaptée à l'exchange
-        dataframe['rsi'] = ta.RSI(dataframe, timeperiod=config['rsi_period'])
-        
+        Indicator('rsi', ['rsi'], lambda df, ind, config: ind.talib('RSI', timeperiod=config['rsi_period']), cost=10),
         # EMA avec périodes adaptées
-        dataframe['ema_fast'] = ta.EMA(dataframe, timeperiod=config['ema_fast'])
-        dataframe['ema_slow'] = ta.EMA(dataframe, timeperiod=config['ema_slow'])
-        
+        Indicator('ema', ['ema_fast', 'ema_slow'],
+                  lambda df, ind, config: (ind.talib('EMA', timeperiod=config['ema_fast']),
+                                           ind.talib('EMA', timeperiod=config['ema_slow'])), cost=14),
         # Volume avec facteur adapté
-        dataframe['volume_ma'] = ta.SMA(dataframe['volume'], timeperiod=20)
-        dataframe['volume_threshold'] = dataframe['volume_ma'] * config['volume_factor']
-        
+        Indicator('volume', ['volume_ma'], lambda df, ind, config: ind.talib('SMA', price='volume', timeperiod=20),
+                  inputs=['volume'], cost=6),
+        Indicator('volume_threshold', ['volume_threshold'],
+                  lambda df, ind, config: df['volume_ma'] * config['volume_factor'], inputs=['volume_ma'], cost=2),
         # MACD
-        dataframe['macd'], dataframe['macdsignal'], dataframe['macdhist'] = ta.MACD(dataframe['close'])
-        
+        Indicator('macd', ['macd', 'macdsignal', 'macdhist'], lambda df, ind, config: ind.talib('MACD'), cost=40),
         # Bollinger Bands
-        dataframe['bb_upper'], dataframe['bb_middle'], dataframe['bb_lower'] = ta.BBANDS(dataframe['close'])
-        
+        Indicator('bollinger', ['bb_upper', 'bb_middle', 'bb_lower'], lambda df, ind, config: ind.talib('BBANDS'), cost=42),
         # Stoch
-        dataframe['stoch_k'], dataframe['stoch_d'] = ta.STOCH(dataframe['high'], dataframe['low'], dataframe['close'])
-        
+        Indicator('stoch', ['stoch_k', 'stoch_d'], lambda df, ind, config: ind.talib('STOCH'),
+                  inputs=['high', 'low', 'close'], cost=31),
         # ATR pour la volatilité
-        dataframe['atr'] = ta.ATR(dataframe['high'], dataframe['low'], dataframe['close'], timeperiod=14)
-        
+        Indicator('atr', ['atr'], lambda df, ind, config: ind.talib('ATR', timeperiod=14),
+                  inputs=['high', 'low', 'close'], cost=9),
         # Williams %R
-        dataframe['williams_r'] = ta.WILLR(dataframe['high'], dataframe['low'], dataframe['close'], timeperiod=14)
+        Indicator('williams_r', ['williams_r'], lambda df, ind, config: ind.talib('WILLR', timeperiod=14),
+                  inputs=['high', 'low', 'close'], cost=14),
+    )
+
+    def bot_start(self, **kwargs) -> None:
+        """
+        Fige les profils d'exchange et indexe les paires de la whitelist
+        """
+        overrides = self.config.get('exchange_profiles', {})
+        profiles = {}
+        for name in dict.fromkeys([*self.exchange_configs, *overrides]):
+            profile = {**self.exchange_configs.get(name, {}), **overrides.get(name, {})}
+            profile['indicators'] = frozenset(profile.get('indicators', ()))
+            profiles[name] = MappingProxyType(profile)
+        self.profiles = MappingProxyType(profiles)
+
+        # Devise de cotation -> profil : à devise partagée, le profil de l'exchange du bot l'emporte,
+        # puis le premier profil déclaré
+        exchange = self.config.get('exchange', {}).get('name', '')
+        by_quote = {}
+        for name in sorted(reversed(list(profiles)), key=lambda name: name == exchange):
+            for quote in profiles[name].get('quote_currencies', ()):
+                by_quote[quote] = name
+        self.quote_profiles = MappingProxyType(by_quote)
+        self.listed_profiles = MappingProxyType({pair: name for name in reversed(list(profiles))
+                                                 for pair in profiles[name].get('pairs', ())})
+
+        self._whitelist: tuple = ()
+        self.index_pairs(self.dp.current_whitelist() if self.dp else [])
+        attach_shared(self)
+
+    def bot_loop_start(self, current_time: datetime, **kwargs) -> None:
+        """
+        Réindexe les paires quand la whitelist change (pairlists dynamiques)
+        """
+        whitelist = tuple(self.dp.current_whitelist())
+        if whitelist != self._whitelist:
+            self.index_pairs(whitelist)
+
+    def resolve_exchange(self, pair: str) -> str:
+        """Profil d'une paire : paire déclarée, puis devise de cotation, puis profil par défaut"""
+        name = self.listed_profiles.get(pair)
+        if name is None:
+            # 'BTC/USDT' et 'BTC/USDT:USDT' (futures) sont cotées en USDT
+            quote = pair.split('/')[-1].split(':')[0]
+            name = self.quote_profiles.get(quote, self.default_exchange)
+        return name
+
+    def index_pairs(self, pairs: Iterable[str]) -> None:
+        """
+        Construit l'index figé paire -> profil.
+        Les paires sorties de la whitelist restent indexées (trades encore ouverts).
+        """
+        pairs = tuple(pairs)
+        self._whitelist = pairs
+        self.pair_profiles = MappingProxyType({
+            pair: self.profiles[self.resolve_exchange(pair)] for pair in dict.fromkeys([*self.pair_profiles, *pairs])
+        })
+
+    def get_exchange_config(self, pair: str) -> Mapping:
+        """Configuration de l'exchange de la paire (lecture dans l'index figé)"""
+        config = self.pair_profiles.get(pair)
+        if config is None:
+            # Paire hors whitelist (backtest, appel manuel) : ajoutée à l'index
+            self.index_pairs([*self._whitelist, pair])
+            config = self.pair_profiles[pair]
+        return config
+
+    def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        """
+        Calcule les indicateurs techniques avec configuration adaptée à l'exchange
+        """
+        pair = metadata['pair']
+        config = self.get_exchange_config(pair)
         
+        # Indicateurs partagés avec les autres stratégies du processus
+        ind = shared_indicators.bind(dataframe, pair, self.timeframe)
+
+        # Colonnes lues par les règles du niveau de risque, plus les indicateurs imposés par le profil
+        columns = needed_columns(self, *(rules[config['risk_level']] for rules in (self.entry_rules, self.exit_rules)
+                                         if config['risk_level'] in rules))
+        columns |= self.indicator_graph.columns_of(config['indicators'])
+        dataframe = self.indicator_graph.populate(dataframe, ind, config, columns)
+
         return dataframe
 
     def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
@@ -129,73 +335,10 @@ class MultiExchangeStrategy(IStrategy):
         """
         pair = metadata['pair']
         config = self.get_exchange_config(pair)
-        
-        # Conditions d'entrée pour Binance (conservateur)
-        if config['risk_level'] == 'conservative':
-            dataframe.loc[
-                (
-                    # Croisement EMA
-                    (dataframe['ema_fast'] > dataframe['ema_slow']) &
-                    (dataframe['ema_fast'].shift(1) <= dataframe['ema_slow'].shift(1)) &
-                    
-                    # RSI dans la zone d'achat
-                    (dataframe['rsi'] < config['rsi_high']) &
-                    (dataframe['rsi'] > config['rsi_low']) &
-                    
-                    # Volume suffisant
-                    (dataframe['volume'] > dataframe['volume_threshold']) &
-                    
-                    # MACD positif
-                    (dataframe['macd'] > dataframe['macdsignal']) &
-                    
-                    # Prix au-dessus de la moyenne mobile
-                    (dataframe['close'] > dataframe['bb_middle']) &
-                    
-                    # Williams %R en zone de survente
-                    (dataframe['williams_r'] < -20) &
-                    (dataframe['williams_r'] > -80) &
-                    
-                    # Bougie haussière
-                    (dataframe['close'] > dataframe['open']) &
-                    (dataframe['close'] > dataframe['close'].shift(1)) &
-                    
-                    # Volume positif
-                    (dataframe['volume'] > 0)
-                ),
-                'enter_long'] = 1
-        
-        # Conditions d'entrée pour Hyperliquid (agressif)
-        elif config['risk_level'] == 'aggressive':
-            dataframe.loc[
-                (
-                    # Croisement EMA plus sensible
-                    (dataframe['ema_fast'] > dataframe['ema_slow']) &
-                    
-                    # RSI dans la zone d'achat (plus large)
-                    (dataframe['rsi'] < config['rsi_high']) &
-                    (dataframe['rsi'] > config['rsi_low']) &
-                    
-                    # Volume élevé (marchés volatils)
-                    (dataframe['volume'] > dataframe['volume_threshold']) &
-                    
-                    # MACD positif
-                    (dataframe['macd'] > dataframe['macdsignal']) &
-                    
-                    # Stoch en zone de survente
-                    (dataframe['stoch_k'] < 80) &
-                    (dataframe['stoch_k'] > 20) &
-                    
-                    # Williams %R en zone de survente
-                    (dataframe['williams_r'] < -10) &
-                    (dataframe['williams_r'] > -90) &
-                    
-                    # Bougie haussière
-                    (dataframe['close'] > dataframe['open']) &
-                    
-                    # Volume positif
-                    (dataframe['volume'] > 0)
-                ),
-                'enter_long'] = 1
+
+        rules = self.entry_rules.get(config['risk_level'])
+        if rules is not None:
+            dataframe.loc[rules.evaluate(dataframe, config), 'enter_long'] = 1
 
         return dataframe
 
@@ -205,50 +348,10 @@ class MultiExchangeStrategy(IStrategy):
         """
         pair = metadata['pair']
         config = self.get_exchange_config(pair)
-        
-        # Conditions de sortie pour Binance (conservateur)
-        if config['risk_level'] == 'conservative':
-            dataframe.loc[
-                (
-                    # RSI en zone de surachat
-                    (dataframe['rsi'] > config['rsi_high']) |
-                    
-                    # Croisement EMA inverse
-                    (dataframe['ema_fast'] < dataframe['ema_slow']) &
-                    (dataframe['ema_fast'].shift(1) >= dataframe['ema_slow'].shift(1)) |
-                    
-                    # MACD négatif
-                    (dataframe['macd'] < dataframe['macdsignal']) |
-                    
-                    # Prix en dessous de la moyenne mobile
-                    (dataframe['close'] < dataframe['bb_middle']) |
-                    
-                    # Williams %R en zone de surachat
-                    (dataframe['williams_r'] > -20)
-                ),
-                'exit_long'] = 1
-        
-        # Conditions de sortie pour Hyperliquid (agressif)
-        elif config['risk_level'] == 'aggressive':
-            dataframe.loc[
-                (
-                    # RSI en zone de surachat
-                    (dataframe['rsi'] > config['rsi_high']) |
-                    
-                    # Croisement EMA inverse
-                    (dataframe['ema_fast'] < dataframe['ema_slow']) &
-                    (dataframe['ema_fast'].shift(1) >= dataframe['ema_slow'].shift(1)) |
-                    
-                    # MACD négatif
-                    (dataframe['macd'] < dataframe['macdsignal']) |
-                    
-                    # Stoch en zone de surachat
-                    (dataframe['stoch_k'] > 80) |
-                    
-                    # Williams %R en zone de surachat
-                    (dataframe['williams_r'] > -10)
-                ),
-                'exit_long'] = 1
+
+        rules = self.exit_rules.get(config['risk_level'])
+        if rules is not None:
+            dataframe.loc[rules.evaluate(dataframe, config), 'exit_long'] = 1
 
         return dataframe
 
@@ -2,14 +2,24 @@
 # flake8: noqa: F401
 # isort: skip_file
 # --- Do not remove these libs ---
+import logging
 import numpy as np
 import pandas as pd
 from pandas import DataFrame
-from freqtrade.strategy import IStrategy, merge_informative_pair
+from freqtrade.strategy import IStrategy
 import talib.abstract as ta
 from freqtrade.strategy import (BooleanParameter, CategoricalParameter, DecimalParameter,
                                 IntParameter, RealParameter, timeframe_to_minutes)
 import freqtrade.vendor.qtpylib.indicators as qtpylib
+from indicator_cache import shared_indicators
+from informative_cache import InformativeCache
+from batch_indicators import BatchRequest, shared_batch
+from signal_rules import AllOf, AnyOf, Param, Rule, Rules
+from indicator_graph import Indicator, IndicatorGraph, needed_columns, needed_timeframes
+from shared_feeds import attach_shared
+
+
+logger = logging.getLogger(__name__)
 
 
 class PowerTowerStrategy(IStrategy):
@@ -23,7 +33,7 @@ class PowerTowerStrategy(IStrategy):
     can_short: bool = False
     timeframe = '5m'
     informative_timeframes = ['1h', '4h', '1d']
-    
+
     # Paramètres optimisables
     buy_rsi = IntParameter(20, 40, default=30, space="buy")
     sell_rsi = IntParameter(60, 80, default=70, space="sell")
@@ -62,14 +72,96 @@ class PowerTowerStrategy(IStrategy):
     # Nombre de bougies nécessaires au démarrage
     startup_candle_count: int = 30
 
+    # Conditions d'entrée / sortie (compilées une fois, voir signal_rules)
+    # Sans les colonnes nécessaires, aucun signal n'est émis
+    entry_rules = Rules(AllOf(
+        # RSI bas (survente)
+        Rule('rsi', '<', Param('buy_rsi')),
+        # Prix sous la bande inférieure de Bollinger
+        Rule('bb_percent', '<', Param('buy_bb_percent')),
+        # MACD positif
+        Rule('macd', '>', 'macdsignal'),
+        # Volume suffisant
+        Rule('volume', '>', 0),
+    ), missing='skip')
+
+    exit_rules = Rules(AnyOf(
+        # RSI haut (surachat)
+        Rule('rsi', '>', Param('sell_rsi')),
+        # Prix au-dessus de la bande supérieure de Bollinger
+        Rule('bb_percent', '>', Param('sell_bb_percent')),
+        # MACD négatif
+        Rule('macd', '<', 'macdsignal'),
+    ), missing='skip')
+
+    # Indicateurs déclarés avec leurs dépendances : seuls ceux lus par les règles sont calculés
+    # (voir indicator_graph), les requêtes `batch` sont calculées en une passe pour toute la whitelist
+    indicator_graph = IndicatorGraph(
+        # RSI
+        Indicator('rsi', ['rsi'], lambda df, ind, p: ind.talib('RSI', timeperiod=14), cost=10,
+                  batch=[BatchRequest.talib('RSI', timeperiod=14)]),
+        # Bollinger Bands
+        Indicator('bollinger', ['bb_upperband', 'bb_middleband', 'bb_lowerband'],
+                  lambda df, ind, p: ind.bollinger(window=20, stds=2), cost=45,
+                  batch=[BatchRequest.bollinger(20, 2)]),
+        Indicator('bb_percent', ['bb_percent'],
+                  lambda df, ind, p: (df['close'] - df['bb_lowerband']) / (df['bb_upperband'] - df['bb_lowerband']),
+                  inputs=['close', 'bb_lowerband', 'bb_upperband'], cost=5),
+        Indicator('bb_width', ['bb_width'],
+                  lambda df, ind, p: (df['bb_upperband'] - df['bb_lowerband']) / df['bb_middleband'],
+                  inputs=['bb_upperband', 'bb_middleband', 'bb_lowerband'], cost=5),
+        # MACD
+        Indicator('macd', ['macd', 'macdsignal', 'macdhist'], lambda df, ind, p: ind.talib('MACD'), cost=40,
+                  batch=[BatchRequest.talib('MACD')]),
+        # EMA
+        Indicator('ema_12', ['ema_12'], lambda df, ind, p: ind.talib('EMA', timeperiod=12), cost=7,
+                  batch=[BatchRequest.talib('EMA', timeperiod=12)]),
+        Indicator('ema_26', ['ema_26'], lambda df, ind, p: ind.talib('EMA', timeperiod=26), cost=7,
+                  batch=[BatchRequest.talib('EMA', timeperiod=26)]),
+        # ADX
+        Indicator('adx', ['adx'], lambda df, ind, p: ind.talib('ADX', timeperiod=14), inputs=['high', 'low', 'close'], cost=25),
+        # CCI
+        Indicator('cci', ['cci'], lambda df, ind, p: ind.talib('CCI', timeperiod=20), inputs=['high', 'low', 'close'], cost=40),
+        # ROC
+        Indicator('roc', ['roc'], lambda df, ind, p: ind.talib('ROC', timeperiod=10), cost=6),
+    )
+
     def informative_pairs(self):
         """
         Définit les paires informatives supplémentaires
         """
         pairs = self.dp.current_whitelist()
-        informative_pairs = [(pair, inf_timeframe) for pair in pairs for inf_timeframe in self.informative_timeframes]
+        # Uniquement les timeframes dont une colonne est lue par les règles
+        timeframes = needed_timeframes(needed_columns(self, self.entry_rules, self.exit_rules),
+                                       self.informative_timeframes)
+        informative_pairs = [(pair, inf_timeframe) for pair in pairs for inf_timeframe in timeframes]
         return informative_pairs
 
+    def bot_start(self, **kwargs) -> None:
+        """
+        Cache des timeframes informatifs (invalidé à la clôture d'une bougie supérieure)
+        et bougies servies par le magasin partagé ou le flux poussé lorsqu'ils sont configurés
+        """
+        self.informative_cache = InformativeCache(self)
+        attach_shared(self)
+
+    def populate_informative(self, informative: DataFrame, pair: str, timeframe: str) -> DataFrame:
+        """
+        Calcule les indicateurs d'un timeframe supérieur (avant fusion avec le dataframe principal)
+        """
+        # Vérifier que les colonnes nécessaires existent
+        required_columns = ['open', 'high', 'low', 'close', 'volume']
+        if not all(col in informative.columns for col in required_columns):
+            raise ValueError(f"Colonnes OHLCV manquantes pour {pair} {timeframe}")
+
+        inf_ind = shared_indicators.bind(informative, pair, timeframe)
+        informative[f'momentum_{timeframe}'] = inf_ind.talib('MOM', timeperiod=10)
+        informative[f'rsi_{timeframe}'] = inf_ind.talib('RSI', timeperiod=14)
+        informative[f'trend_{timeframe}'] = np.where(
+            informative['close'] > inf_ind.rolling_mean('close', 20), 1, -1
+        )
+        return informative
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         """
         Ajoute les indicateurs techniques au DataFrame
@@ -84,52 +176,27 @@ class PowerTowerStrategy(IStrategy):
             if col not in dataframe.columns:
                 return dataframe
 
-        # RSI
-        dataframe['rsi'] = ta.RSI(dataframe, timeperiod=14)
+        # Colonnes lues par les règles d'entrée / sortie (et par plot_config en mode plot)
+        columns = needed_columns(self, self.entry_rules, self.exit_rules)
 
-        # Bollinger Bands
-        bollinger = qtpylib.bollinger_bands(dataframe['close'], window=20, stds=2)
-        dataframe['bb_lowerband'] = bollinger['lower']
-        dataframe['bb_middleband'] = bollinger['mid']
-        dataframe['bb_upperband'] = bollinger['upper']
-        dataframe['bb_percent'] = (dataframe['close'] - dataframe['bb_lowerband']) / (dataframe['bb_upperband'] - dataframe['bb_lowerband'])
-        dataframe['bb_width'] = (dataframe['bb_upperband'] - dataframe['bb_lowerband']) / dataframe['bb_middleband']
+        # Calcul groupé sur la whitelist à la première paire analysée, puis lecture dans le cache partagé
+        shared_batch.ensure(self.dp, metadata['pair'], self.timeframe, dataframe,
+                            self.indicator_graph.batch_spec(columns))
 
-        # MACD
-        macd = ta.MACD(dataframe)
-        dataframe['macd'] = macd['macd']
-        dataframe['macdsignal'] = macd['macdsignal']
-        dataframe['macdhist'] = macd['macdhist']
+        # Indicateurs partagés avec les autres stratégies du processus
+        ind = shared_indicators.bind(dataframe, metadata['pair'], self.timeframe)
 
-        # EMA
-        dataframe['ema_12'] = ta.EMA(dataframe, timeperiod=12)
-        dataframe['ema_26'] = ta.EMA(dataframe, timeperiod=26)
-
-        # ADX
-        dataframe['adx'] = ta.ADX(dataframe, timeperiod=14)
-
-        # CCI
-        dataframe['cci'] = ta.CCI(dataframe, timeperiod=20)
-
-        # ROC
-        dataframe['roc'] = ta.ROC(dataframe, timeperiod=10)
+        # RSI, Bollinger, MACD, EMA, ADX, CCI, ROC : uniquement ceux dont les règles ont besoin
+        dataframe = self.indicator_graph.populate(dataframe, ind, self, columns)
 
-        # Ajout des données informatives avec gestion d'erreur
-        for timeframe in self.informative_timeframes:
+        # Ajout des données informatives lues par les règles (recalculées uniquement à la clôture d'une bougie
+        # du timeframe supérieur). Sans données informatives, le cache rend le dataframe inchangé ;
+        # colonnes OHLCV manquantes : on continue sans
+        for timeframe in needed_timeframes(columns, self.informative_timeframes):
             try:
-                informative = self.dp.get_pair_dataframe(pair=metadata['pair'], timeframe=timeframe)
-                if not informative.empty and len(informative) > 0:
-                    # Vérifier que les colonnes nécessaires existent
-                    if all(col in informative.columns for col in required_columns):
-                        informative[f'momentum_{timeframe}'] = ta.MOM(informative, timeperiod=10)
-                        informative[f'rsi_{timeframe}'] = ta.RSI(informative, timeperiod=14)
-                        informative[f'trend_{timeframe}'] = np.where(
-                            informative['close'] > informative['close'].rolling(20).mean(), 1, -1
-                        )
-                        dataframe = merge_informative_pair(dataframe, informative, self.timeframe, timeframe, ffill=True)
-            except Exception as e:
-                # En cas d'erreur, continuer sans les données informatives
-                continue
+                dataframe = self.informative_cache.merge(dataframe, metadata['pair'], timeframe, self.populate_informative)
+            except ValueError as e:
+                logger.warning(f"Données informatives ignorées pour {metadata['pair']} en {timeframe} : {e}")
 
         # S'assurer que le DataFrame a un index valide
         if dataframe.index.empty:
@@ -141,29 +208,7 @@ class PowerTowerStrategy(IStrategy):
         """
         Définit les conditions d'entrée
         """
-        # Vérifier que le DataFrame n'est pas vide
-        if dataframe.empty:
-            return dataframe
-
-        # S'assurer que les colonnes nécessaires existent
-        required_columns = ['rsi', 'bb_percent', 'macd', 'macdsignal']
-        for col in required_columns:
-            if col not in dataframe.columns:
-                return dataframe
-
-        # Conditions d'entrée avec valeurs par défaut
-        dataframe.loc[
-            (
-                # RSI bas (survente)
-                (dataframe['rsi'] < self.buy_rsi.value) &
-                # Prix sous la bande inférieure de Bollinger
-                (dataframe['bb_percent'] < self.buy_bb_percent.value) &
-                # MACD positif
-                (dataframe['macd'] > dataframe['macdsignal']) &
-                # Volume suffisant
-                (dataframe['volume'] > 0)
-            ),
-            'enter_long'] = 1
+        dataframe.loc[self.entry_rules.evaluate(dataframe, self), 'enter_long'] = 1
 
         return dataframe
 
@@ -171,26 +216,6 @@ class PowerTowerStrategy(IStrategy):
         """
         Définit les conditions de sortie
         """
-        # Vérifier que le DataFrame n'est pas vide
-        if dataframe.empty:
-            return dataframe
-
-        # S'assurer que les colonnes nécessaires existent
-        required_columns = ['rsi', 'bb_percent', 'macd', 'macdsignal']
-        for col in required_columns:
-            if col not in dataframe.columns:
-                return dataframe
-
-        # Conditions de sortie avec valeurs par défaut
-        dataframe.loc[
-            (
-                # RSI haut (surachat)
-                (dataframe['rsi'] > self.sell_rsi.value) |
-                # Prix au-dessus de la bande supérieure de Bollinger
-                (dataframe['bb_percent'] > self.sell_bb_percent.value) |
-                # MACD négatif
-                (dataframe['macd'] < dataframe['macdsignal'])
-            ),
-            'exit_long'] = 1
+        dataframe.loc[self.exit_rules.evaluate(dataframe, self), 'exit_long'] = 1
 
         return dataframe
@@ -8,6 +8,8 @@ from pandas import DataFrame
 from datetime import datetime
 from typing import Optional, Union
 
+from freqtrade.enums import RunMode
+
 from freqtrade.strategy import (BooleanParameter, CategoricalParameter, DecimalParameter,
                                 IntParameter, IStrategy, merge_informative_pair)
 
@@ -15,6 +17,12 @@ from freqtrade.strategy import (BooleanParameter, CategoricalParameter, DecimalP
 # Add your lib to import here
 import talib.abstract as ta
 import freqtrade.vendor.qtpylib.indicators as qtpylib
+from indicator_cache import shared_indicators
+from incremental_indicators import Bollinger, Ema, IncrementalEngine, Macd, Rsi, Sma, shared_engine
+from batch_indicators import BatchRequest, shared_batch
+from signal_rules import AllOf, AnyOf, FlagSet, Param, Rule, Rules
+from compact_frame import FrameLayout
+from shared_feeds import attach_shared
 
 
 class TrendFollowingStrategy(IStrategy):
@@ -59,6 +67,23 @@ class TrendFollowingStrategy(IStrategy):
     # Run "populate_indicators" only for new candle
     process_only_new_candles = False
 
+    # Moteur incrémental (live / dry-run uniquement, voir bot_start)
+    stream_engine: Optional[IncrementalEngine] = None
+
+    # Format compact du dataframe (surchargeable par "compact_frame" dans la configuration)
+    compact_frame: bool = False
+
+    # Indicateurs calculés en une passe pour toute la whitelist (voir batch_indicators)
+    batch_spec = (
+        BatchRequest.talib('EMA', timeperiod=12),
+        BatchRequest.talib('EMA', timeperiod=26),
+        BatchRequest.talib('EMA', timeperiod=50),
+        BatchRequest.talib('MACD'),
+        BatchRequest.talib('RSI', timeperiod=14),
+        BatchRequest.bollinger(20, 2),
+        BatchRequest.rolling_mean('volume', 20),
+    )
+
     # These values can be overridden in the config
     use_exit_signal = True
     exit_profit_only = False
@@ -101,6 +126,92 @@ class TrendFollowingStrategy(IStrategy):
         }
     }
 
+    # === RÈGLES DE SIGNAL (compilées une fois, voir signal_rules) ===
+
+    signal_rules = {
+        # Signal de tendance haussière : EMA courte > EMA longue > EMA tendance
+        'trend_bullish': Rules(AllOf(
+            Rule('ema_short', '>', 'ema_long'),
+            Rule('ema_long', '>', 'ema_trend'),
+        )),
+        # Signal de tendance baissière : EMA courte < EMA longue < EMA tendance
+        'trend_bearish': Rules(AllOf(
+            Rule('ema_short', '<', 'ema_long'),
+            Rule('ema_long', '<', 'ema_trend'),
+        )),
+        # MACD bullish : MACD > Signal et MACD croissant
+        'macd_bullish': Rules(AllOf(
+            Rule('macd', '>', 'macdsignal'),
+            Rule('macd', '>', 'macd', other_shift=1),
+        )),
+        # MACD bearish : MACD < Signal et MACD décroissant
+        'macd_bearish': Rules(AllOf(
+            Rule('macd', '<', 'macdsignal'),
+            Rule('macd', '<', 'macd', other_shift=1),
+        )),
+        # Volume confirmation
+        'volume_high': Rules(Rule('volume', '>', 'volume_sma', factor=1.2)),
+    }
+
+    # === CONDITIONS D'ACHAT (TREND FOLLOWING) ===
+    # Condition principale : Tendance haussière + MACD bullish + Volume élevé
+    entry_rules = Rules(AllOf(
+        Rule('trend_bullish'),               # Tendance haussière
+        Rule('macd_bullish'),                # MACD bullish
+        Rule('volume_high'),                 # Volume élevé
+        Rule('rsi', '>', 40),                # RSI pas en survente
+        Rule('rsi', '<', 80),                # RSI pas en surachat
+        Rule('close', '>', 'bb_middleband'), # Prix au-dessus de la moyenne
+        Rule('bb_width', '>', 0.02),         # Volatilité suffisante
+    ))
+
+    # === CONDITIONS DE VENTE (TREND FOLLOWING) ===
+    # Vente quand la tendance se retourne ou MACD devient bearish
+    exit_rules = Rules(AnyOf(
+        Rule('trend_bearish'),               # Tendance baissière
+        Rule('macd_bearish'),                # MACD bearish
+        Rule('rsi', '>', 85),                # RSI en surachat extrême
+        Rule('close', '<', 'bb_lowerband'),  # Prix sous Bollinger inférieure
+    ))
+
+    # Seuils de plot, oscillateurs en float32 et drapeaux regroupés en format compact (voir compact_frame)
+    frame_layout = FrameLayout(
+        thresholds={
+        'rsi_oversold': 30,
+        'rsi_overbought': 70,
+        },
+        float32=('macd', 'macdsignal', 'macdhist', 'bb_percent'),
+        flags=FlagSet('trend_following_flags', signal_rules),
+        # Lues après l'écriture du dataframe : ces colonnes restent en float64
+        rules=(entry_rules, exit_rules),
+    )
+
+    def bot_start(self, **kwargs) -> None:
+        """
+        En live / dry-run, populate_indicators est appelé à chaque itération :
+        les indicateurs sont alors mis à jour bougie par bougie au lieu d'être recalculés,
+        par le moteur commun aux stratégies du processus.
+        """
+        if self.dp.runmode in (RunMode.LIVE, RunMode.DRY_RUN):
+            self.stream_engine = shared_engine
+        # Le tracé (plot-dataframe) a besoin des seuils et des signaux en colonnes
+        self.compact_frame = (self.config.get('compact_frame', self.compact_frame)
+                              and self.dp.runmode != RunMode.PLOT)
+        # Caches partagés et mesures des phases lorsqu'ils sont configurés
+        attach_shared(self)
+
+    def stream_spec(self) -> dict:
+        """Indicateurs calculés par le moteur incrémental"""
+        return {
+            'ema_short': Ema(12),
+            'ema_long': Ema(26),
+            'ema_trend': Ema(50),
+            ('macd', 'macdsignal', 'macdhist'): Macd(12, 26, 9),
+            'rsi': Rsi(14),
+            ('bb_upperband', 'bb_middleband', 'bb_lowerband'): Bollinger(20, 2),
+            'volume_sma': Sma(20, source='volume'),
+        }
+
     def informative_pairs(self):
         """
         Define additional, informative pair/interval combinations to be cached from the exchange.
@@ -121,64 +232,49 @@ class TrendFollowingStrategy(IStrategy):
         """
 
         # === TREND FOLLOWING INDICATORS ===
-        
-        # EMA pour identifier la tendance
-        dataframe['ema_short'] = ta.EMA(dataframe, timeperiod=12)
-        dataframe['ema_long'] = ta.EMA(dataframe, timeperiod=26)
-        dataframe['ema_trend'] = ta.EMA(dataframe, timeperiod=50)
-        
-        # MACD pour confirmer les signaux de tendance
-        macd = ta.MACD(dataframe)
-        dataframe['macd'] = macd['macd']
-        dataframe['macdsignal'] = macd['macdsignal']
-        dataframe['macdhist'] = macd['macdhist']
-        
-        # RSI pour éviter les zones extrêmes
-        dataframe['rsi'] = ta.RSI(dataframe, timeperiod=14)
-        dataframe['rsi_oversold'] = 30
-        dataframe['rsi_overbought'] = 70
-        
-        # Bollinger Bands pour la volatilité
-        bollinger = qtpylib.bollinger_bands(dataframe['close'], window=20, stds=2)
-        dataframe['bb_lowerband'] = bollinger['lower']
-        dataframe['bb_middleband'] = bollinger['mid']
-        dataframe['bb_upperband'] = bollinger['upper']
+
+        if self.stream_engine is not None:
+            # Live / dry-run : seules les nouvelles bougies sont calculées
+            stream = self.stream_engine.update(metadata['pair'], dataframe, self.stream_spec(),
+                                               self.timeframe)
+            for column, values in stream.items():
+                dataframe[column] = values
+        else:
+            # Calcul groupé sur la whitelist à la première paire analysée, puis lecture dans le cache partagé
+            shared_batch.ensure(self.dp, metadata['pair'], self.timeframe, dataframe, self.batch_spec)
+
+            # Indicateurs partagés avec les autres stratégies du processus
+            ind = shared_indicators.bind(dataframe, metadata['pair'], self.timeframe)
+
+            # EMA pour identifier la tendance
+            dataframe['ema_short'] = ind.talib('EMA', timeperiod=12)
+            dataframe['ema_long'] = ind.talib('EMA', timeperiod=26)
+            dataframe['ema_trend'] = ind.talib('EMA', timeperiod=50)
+
+            # MACD pour confirmer les signaux de tendance
+            dataframe['macd'], dataframe['macdsignal'], dataframe['macdhist'] = ind.talib('MACD')
+
+            # RSI pour éviter les zones extrêmes
+            dataframe['rsi'] = ind.talib('RSI', timeperiod=14)
+
+            # Bollinger Bands pour la volatilité
+            bb_upper, bb_mid, bb_lower = ind.bollinger(window=20, stds=2)
+            dataframe['bb_lowerband'] = bb_lower
+            dataframe['bb_middleband'] = bb_mid
+            dataframe['bb_upperband'] = bb_upper
+
+            # Volume indicators
+            dataframe['volume_sma'] = ind.rolling_mean('volume', 20)
+
         dataframe['bb_percent'] = (dataframe['close'] - dataframe['bb_lowerband']) / (dataframe['bb_upperband'] - dataframe['bb_lowerband'])
         dataframe['bb_width'] = (dataframe['bb_upperband'] - dataframe['bb_lowerband']) / dataframe['bb_middleband']
         
-        # Volume indicators
-        dataframe['volume_sma'] = dataframe['volume'].rolling(window=20).mean()
-        
         # === TREND FOLLOWING SIGNALS ===
-        
-        # Signal de tendance haussière : EMA courte > EMA longue > EMA tendance
-        dataframe['trend_bullish'] = (
-            (dataframe['ema_short'] > dataframe['ema_long']) &
-            (dataframe['ema_long'] > dataframe['ema_trend'])
-        )
-        
-        # Signal de tendance baissière : EMA courte < EMA longue < EMA tendance
-        dataframe['trend_bearish'] = (
-            (dataframe['ema_short'] < dataframe['ema_long']) &
-            (dataframe['ema_long'] < dataframe['ema_trend'])
-        )
-        
-        # MACD bullish : MACD > Signal et MACD croissant
-        dataframe['macd_bullish'] = (
-            (dataframe['macd'] > dataframe['macdsignal']) &
-            (dataframe['macd'] > dataframe['macd'].shift(1))
-        )
-        
-        # MACD bearish : MACD < Signal et MACD décroissant
-        dataframe['macd_bearish'] = (
-            (dataframe['macd'] < dataframe['macdsignal']) &
-            (dataframe['macd'] < dataframe['macd'].shift(1))
-        )
-        
-        # Volume confirmation
-        dataframe['volume_high'] = dataframe['volume'] > dataframe['volume_sma'] * 1.2
-        
-        return dataframe
+        # Colonnes de signal (tendance, MACD, volume)
+        signals = {column: rules.evaluate(dataframe, self) for column, rules in self.signal_rules.items()}
+
+        # Seuils de plot et signaux : colonnes complètes, ou format compact
+        return self.frame_layout.write(dataframe, metadata['pair'], signals, self, compact=self.compact_frame)
 
     def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         """
@@ -187,21 +283,7 @@ class TrendFollowingStrategy(IStrategy):
         :param metadata: Additional information, like the currently traded pair
         :return: DataFrame with entry columns populated
         """
-        
-        # === CONDITIONS D'ACHAT (TREND FOLLOWING) ===
-        
-        # Condition principale : Tendance haussière + MACD bullish + Volume élevé
-        dataframe.loc[
-            (
-                dataframe['trend_bullish'] &           # Tendance haussière
-                dataframe['macd_bullish'] &            # MACD bullish
-                dataframe['volume_high'] &             # Volume élevé
-                (dataframe['rsi'] > 40) &              # RSI pas en survente
-                (dataframe['rsi'] < 80) &              # RSI pas en surachat
-                (dataframe['close'] > dataframe['bb_middleband']) &  # Prix au-dessus de la moyenne
-                (dataframe['bb_width'] > 0.02)         # Volatilité suffisante
-            ),
-            'enter_long'] = 1
+        dataframe.loc[self.entry_rules.evaluate(dataframe, self), 'enter_long'] = 1
 
         return dataframe
 
@@ -212,18 +294,7 @@ class TrendFollowingStrategy(IStrategy):
         :param metadata: Additional information, like the currently traded pair
         :return: DataFrame with exit columns populated
         """
-        
-        # === CONDITIONS DE VENTE (TREND FOLLOWING) ===
-        
-        # Vente quand la tendance se retourne ou MACD devient bearish
-        dataframe.loc[
-            (
-                dataframe['trend_bearish'] |           # Tendance baissière
-                dataframe['macd_bearish'] |            # MACD bearish
-                (dataframe['rsi'] > 85) |              # RSI en surachat extrême
-                (dataframe['close'] < dataframe['bb_lowerband'])  # Prix sous Bollinger inférieure
-            ),
-            'exit_long'] = 1
+        dataframe.loc[self.exit_rules.evaluate(dataframe, self), 'exit_long'] = 1
 
         return dataframe
 
@@ -0,0 +1,382 @@
+"""
+Calcul groupé des indicateurs sur toute la whitelist
+
+freqtrade appelle populate_indicators paire par paire : avec 9 paires (et
+bientôt des centaines avec une pairlist par volume), chaque indicateur paye 9
+fois le coût Python/pandas/TA-Lib. Ce module empile l'OHLCV des paires dans
+des matrices (paires × bougies) contiguës et calcule EMA, SMA, RSI, MACD, ATR,
+Bollinger (qtpylib) et moyennes mobiles de volume pour toutes les paires en une
+seule passe vectorisée :
+
+- les indicateurs récursifs (EMA, lissage de Wilder du RSI et de l'ATR) sont
+  des filtres IIR du premier ordre calculés par scipy.signal.lfilter sur l'axe
+  du temps, toutes les paires à la fois ;
+- les moyennes glissantes sont des filtres RIF (lfilter également), les
+  écarts-types glissants passent par des fenêtres glissantes
+  (sliding_window_view), traitées par blocs de bougies pour borner la mémoire.
+
+Les séries de longueurs différentes sont alignées à droite (dernière bougie en
+dernière colonne), le début est complété par des NaN et chaque paire garde son
+propre point de départ : les amorçages sont ceux de TA-Lib (EMA initialisée par
+une SMA, RSI/ATR par une moyenne des premières variations, MACD aligné comme
+TA_MACD) et de qtpylib (min_periods=1, écart-type ddof=1).
+
+Les résultats sont rangés dans le cache partagé sous les clés qu'utiliserait
+CachedIndicators : le code des stratégies ne change pas, les appels
+ind.talib('RSI', timeperiod=14) trouvent simplement la valeur déjà calculée.
+
+    batch_spec = (BatchRequest.talib('RSI', timeperiod=14), BatchRequest.bollinger(20, 2))
+
+    # en tête de populate_indicators
+    shared_batch.ensure(self.dp, metadata['pair'], self.timeframe, dataframe, self.batch_spec)
+"""
+import logging
+import time
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from pandas import DataFrame
+from scipy.signal import lfilter
+
+from indicator_cache import (CachedValue, IndicatorCache, candles_key, indicator_key,
+                             shared_indicators, talib_params)
+
+
+logger = logging.getLogger(__name__)
+
+OHLCV = ('open', 'high', 'low', 'close', 'volume')
+
+# Fonctions TA-Lib disponibles en calcul groupé et leurs paramètres par défaut
+TALIB_DEFAULTS: Dict[str, Dict[str, int]] = {
+    'EMA': {'timeperiod': 30},
+    'SMA': {'timeperiod': 30},
+    'RSI': {'timeperiod': 14},
+    'ATR': {'timeperiod': 14},
+    'MACD': {'fastperiod': 12, 'slowperiod': 26, 'signalperiod': 9},
+}
+
+# Taille maximale (en éléments float64) des tableaux temporaires des fenêtres glissantes
+SLIDING_BLOCK_ELEMENTS = 1 << 23
+
+
+class BatchRequest(NamedTuple):
+    """Un indicateur à calculer pour toutes les paires, décrit comme l'appel CachedIndicators correspondant"""
+    kind: str
+    name: str
+    price: Optional[str]
+    params: Tuple[Tuple[str, object], ...]
+
+    @classmethod
+    def talib(cls, name: str, price: Optional[str] = None, **params) -> 'BatchRequest':
+        """Equivalent de ind.talib(name, price, **params)"""
+        if name not in TALIB_DEFAULTS:
+            raise ValueError(f"Indicateur {name} non disponible en calcul groupé "
+                             f"(disponibles : {', '.join(TALIB_DEFAULTS)})")
+        unknown = set(params) - set(TALIB_DEFAULTS[name])
+        if unknown:
+            raise ValueError(f"Paramètres inconnus pour {name} : {', '.join(sorted(unknown))}")
+        return cls('talib', name, price, tuple(sorted(params.items())))
+
+    @classmethod
+    def rolling_mean(cls, column: str, window: int, min_periods: Optional[int] = None) -> 'BatchRequest':
+        """Equivalent de ind.rolling_mean(column, window, min_periods)"""
+        return cls('rolling_mean', column, None, (window, min_periods))
+
+    @classmethod
+    def bollinger(cls, window: int = 20, stds: float = 2) -> 'BatchRequest':
+        """Equivalent de ind.bollinger(window, stds)"""
+        return cls('bollinger', 'close', None, (window, stds))
+
+    def cache_suffix(self) -> Tuple[str, tuple]:
+        """(nom, paramètres) de la clé utilisée par CachedIndicators pour le même appel"""
+        if self.kind == 'talib':
+            return self.name, talib_params(self.price, dict(self.params))
+        if self.kind == 'rolling_mean':
+            return 'rolling_mean', (self.name,) + self.params
+        return 'bollinger', self.params
+
+
+class PairMatrix:
+    """OHLCV de plusieurs paires alignées à droite dans des matrices (paires × bougies)"""
+
+    def __init__(self, frames: Mapping[str, DataFrame]):
+        self.pairs: List[str] = list(frames)
+        self.lengths = np.array([len(frames[pair]) for pair in self.pairs], dtype=np.int64)
+        width = int(self.lengths.max()) if len(self.pairs) else 0
+        self.starts = width - self.lengths
+        self.columns: Dict[str, np.ndarray] = {}
+        for col in OHLCV:
+            matrix = np.full((len(self.pairs), width), np.nan, dtype=np.float64)
+            for row, pair in enumerate(self.pairs):
+                matrix[row, self.starts[row]:] = frames[pair][col].to_numpy(dtype=np.float64)
+            self.columns[col] = matrix
+
+    @property
+    def width(self) -> int:
+        return self.columns['close'].shape[1]
+
+    def row(self, matrix: np.ndarray, row: int) -> np.ndarray:
+        """Vue de la paire `row` sans le remplissage de début"""
+        return matrix[row, self.starts[row]:]
+
+
+def _window_start_mean(values: np.ndarray, first: np.ndarray, period: int) -> np.ndarray:
+    """Moyenne de values[i, first[i]:first[i] + period] pour chaque ligne (NaN si hors limites)"""
+    rows = np.arange(values.shape[0])
+    positions = first[:, None] + np.arange(period)
+    inside = positions[:, -1] < values.shape[1]
+    window = values[rows[:, None], np.minimum(positions, values.shape[1] - 1)]
+    means = window.mean(axis=1)
+    means[~inside] = np.nan
+    return means
+
+
+def _smooth(values: np.ndarray, seed_index: np.ndarray, seed: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Filtre récursif y[k] = seed, y[t] = alpha * x[t] + (1 - alpha) * y[t - 1] (t > k), NaN avant k,
+    avec un indice d'amorçage k propre à chaque ligne.
+
+    lfilter part d'un état nul : l'entrée vaut 0 avant k et seed / alpha en k, ce qui
+    donne exactement seed en k puis la récurrence habituelle.
+    """
+    width = values.shape[1]
+    cols = np.arange(width)
+    rows = np.flatnonzero(seed_index < width)
+    inputs = np.where(cols > seed_index[:, None], values, 0.0)
+    inputs[rows, seed_index[rows]] = seed[rows] / alpha
+    smoothed = lfilter([alpha], [1.0, alpha - 1.0], inputs, axis=1)
+    smoothed[cols < seed_index[:, None]] = np.nan
+    return smoothed
+
+
+def ema(values: np.ndarray, starts: np.ndarray, period: int) -> np.ndarray:
+    """TA-Lib EMA : amorcée par la SMA des `period` premières valeurs"""
+    return _smooth(values, starts + period - 1, _window_start_mean(values, starts, period), 2.0 / (period + 1))
+
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """Moyenne glissante complète (TA-Lib SMA, pandas rolling(window).mean()), filtre RIF de lfilter"""
+    out = lfilter(np.full(window, 1.0 / window), [1.0], values, axis=1)
+    out[:, :window - 1] = np.nan
+    return out
+
+
+def rsi(close: np.ndarray, starts: np.ndarray, period: int) -> np.ndarray:
+    """TA-Lib RSI : moyennes de Wilder des hausses et baisses, amorcées par leur moyenne simple"""
+    delta = np.full_like(close, np.nan)
+    delta[:, 1:] = np.diff(close, axis=1)
+    gains = np.clip(delta, 0.0, None)
+    losses = np.clip(-delta, 0.0, None)
+    first, seed_index = starts + 1, starts + period
+    avg_gain = _smooth(gains, seed_index, _window_start_mean(gains, first, period), 1.0 / period)
+    avg_loss = _smooth(losses, seed_index, _window_start_mean(losses, first, period), 1.0 / period)
+    total = avg_gain + avg_loss
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # TA-Lib renvoie 0 quand la somme est nulle (TA_IS_ZERO : |x| < 1e-8)
+        values = np.where(np.abs(total) < 1e-8, 0.0, 100.0 * avg_gain / total)
+    values[np.isnan(total)] = np.nan
+    return values
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, starts: np.ndarray, period: int) -> np.ndarray:
+    """TA-Lib ATR : moyenne de Wilder du true range, amorcée par la moyenne des `period` premiers"""
+    previous = np.full_like(close, np.nan)
+    previous[:, 1:] = close[:, :-1]
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+    true_range[np.isnan(previous)] = np.nan
+    first, seed_index = starts + 1, starts + period
+    return _smooth(true_range, seed_index, _window_start_mean(true_range, first, period), 1.0 / period)
+
+
+def macd(close: np.ndarray, starts: np.ndarray, fast: int = 12, slow: int = 26,
+         signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    TA-Lib MACD : les deux EMA sont alignées sur la première bougie de l'EMA lente
+    (l'EMA rapide est amorcée sur les `fast` dernières valeurs de cette fenêtre),
+    la ligne de signal est une EMA de la ligne MACD.
+    """
+    if slow < fast:
+        fast, slow = slow, fast
+    seed_index = starts + slow - 1
+    fast_ema = _smooth(close, seed_index, _window_start_mean(close, starts + slow - fast, fast), 2.0 / (fast + 1))
+    slow_ema = _smooth(close, seed_index, _window_start_mean(close, starts, slow), 2.0 / (slow + 1))
+    line = fast_ema - slow_ema
+    signal_line = _smooth(line, seed_index + signal - 1, _window_start_mean(line, seed_index, signal),
+                          2.0 / (signal + 1))
+    line[np.isnan(signal_line)] = np.nan
+    return line, signal_line, line - signal_line
+
+
+def rolling_std(values: np.ndarray, mean: np.ndarray, window: int) -> np.ndarray:
+    """
+    Ecart-type glissant (ddof=1) sur les fenêtres complètes, `mean` étant la moyenne glissante.
+    Les fenêtres sont traitées par blocs de bougies pour borner la mémoire des tableaux temporaires.
+    """
+    rows, width = values.shape
+    out = np.full_like(values, np.nan)
+    if width < window:
+        return out
+    windows = sliding_window_view(values, window, axis=1)
+    step = max(1, SLIDING_BLOCK_ELEMENTS // max(1, rows * window))
+    for begin in range(0, windows.shape[1], step):
+        block = windows[:, begin:begin + step]
+        end = begin + window - 1 + block.shape[1]
+        deviation = block - mean[:, begin + window - 1:end, None]
+        out[:, begin + window - 1:end] = np.einsum('ijk,ijk->ij', deviation, deviation) / (window - 1)
+    return np.sqrt(out)
+
+
+def bollinger(close: np.ndarray, starts: np.ndarray, window: int = 20,
+              stds: float = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Bandes de qtpylib.bollinger_bands (rolling min_periods=1, écart-type ddof=1) : (upper, mid, lower).
+    Les `window - 1` premières bougies de chaque paire utilisent une fenêtre croissante.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mid = sma(close, window)
+        std = rolling_std(close, mid, window)
+
+        rows = np.arange(close.shape[0])
+        for count in range(1, window):
+            position = starts + count - 1
+            inside = np.flatnonzero(position < close.shape[1])
+            head = close[rows[inside, None], starts[inside, None] + np.arange(count)]
+            mid[inside, position[inside]] = head.mean(axis=1)
+            std[inside, position[inside]] = head.std(axis=1, ddof=1) if count > 1 else np.nan
+    return mid + std * stds, mid, mid - std * stds
+
+
+def compute_request(matrix: PairMatrix, request: BatchRequest):
+    """Calcule une requête pour toutes les paires : matrice ou tuple de matrices (paires × bougies)"""
+    starts = matrix.starts
+    if request.kind == 'rolling_mean':
+        window, min_periods = request.params
+        if min_periods not in (None, window):
+            raise ValueError("rolling_mean groupé : seul min_periods=None est supporté")
+        return sma(matrix.columns[request.name], window)
+    if request.kind == 'bollinger':
+        window, stds = request.params
+        return bollinger(matrix.columns['close'], starts, window, stds)
+
+    params = dict(TALIB_DEFAULTS[request.name], **dict(request.params))
+    price = matrix.columns[request.price or 'close']
+    if request.name == 'EMA':
+        return ema(price, starts, params['timeperiod'])
+    if request.name == 'SMA':
+        return sma(price, params['timeperiod'])
+    if request.name == 'RSI':
+        return rsi(price, starts, params['timeperiod'])
+    if request.name == 'ATR':
+        columns = matrix.columns
+        return atr(columns['high'], columns['low'], columns['close'], starts, params['timeperiod'])
+    return macd(price, starts, params['fastperiod'], params['slowperiod'], params['signalperiod'])
+
+
+def compute_batch(frames: Mapping[str, DataFrame],
+                  spec: Iterable[BatchRequest]) -> Dict[str, Dict[BatchRequest, CachedValue]]:
+    """
+    Calcule toutes les requêtes pour toutes les paires en une passe.
+    Retourne {paire: {requête: tableau ou tuple de tableaux}}, chaque tableau ayant la longueur du dataframe.
+    """
+    matrix = PairMatrix(frames)
+    results: Dict[str, Dict[BatchRequest, CachedValue]] = {pair: {} for pair in matrix.pairs}
+    for request in spec:
+        value = compute_request(matrix, request)
+        for row, pair in enumerate(matrix.pairs):
+            if isinstance(value, tuple):
+                results[pair][request] = tuple(np.ascontiguousarray(matrix.row(out, row)) for out in value)
+            else:
+                results[pair][request] = np.ascontiguousarray(matrix.row(value, row))
+    return results
+
+
+class BatchIndicators:
+    """
+    Remplit le cache partagé pour un groupe de paires dès que la première d'entre elles est analysée
+    """
+
+    def __init__(self, cache: IndicatorCache = shared_indicators, chunk_size: int = 64):
+        self.cache = cache
+        # Nombre maximal de paires par matrice (borne la mémoire et la taille du cache)
+        self.chunk_size = chunk_size
+        self._warmed: Dict[Tuple[str, str, Tuple[BatchRequest, ...]], tuple] = {}
+        self.batches = 0
+        self.pairs_computed = 0
+        self.seconds = 0.0
+
+    def warm(self, frames: Mapping[str, DataFrame], timeframe: str, spec: Sequence[BatchRequest]) -> None:
+        """Calcule `spec` pour toutes les paires de `frames` et range les résultats dans le cache"""
+        frames = {pair: frame for pair, frame in frames.items() if not frame.empty}
+        if not frames:
+            return
+        spec = tuple(spec)
+        started = time.perf_counter()
+        for pair, values in compute_batch(frames, spec).items():
+            candles = candles_key(frames[pair])
+            for request, value in values.items():
+                self.cache.put(indicator_key(pair, timeframe, candles, *request.cache_suffix()), value)
+            self._warmed[(pair, timeframe, spec)] = candles
+        elapsed = time.perf_counter() - started
+        self.batches += 1
+        self.pairs_computed += len(frames)
+        self.seconds += elapsed
+        logger.debug(f"Calcul groupé {timeframe} : {len(frames)} paires, {len(spec)} indicateurs en {elapsed:.3f}s")
+
+    def ensure(self, dp, pair: str, timeframe: str, dataframe: DataFrame, spec: Sequence[BatchRequest]) -> None:
+        """
+        A appeler en tête de populate_indicators : si `dataframe` n'a pas encore été calculé,
+        calcule d'un coup cette paire et les suivantes de la whitelist (au plus chunk_size).
+        """
+        spec = tuple(spec)
+        if dataframe.empty or self._warmed.get((pair, timeframe, spec)) == candles_key(dataframe):
+            return
+
+        frames = {pair: dataframe}
+        if dp is not None:
+            whitelist = list(dp.current_whitelist())
+            following = whitelist[whitelist.index(pair) + 1:] if pair in whitelist else whitelist
+            for other in following:
+                if len(frames) >= self.chunk_size:
+                    break
+                if other == pair:
+                    continue
+                frame = dp.get_pair_dataframe(pair=other, timeframe=timeframe)
+                if not frame.empty and self._warmed.get((other, timeframe, spec)) != candles_key(frame):
+                    frames[other] = frame
+        self.warm(frames, timeframe, spec)
+
+    def stats(self) -> Dict[str, float]:
+        return {'batches': self.batches, 'pairs': self.pairs_computed, 'seconds': self.seconds}
+
+
+def max_deviation(frames: Mapping[str, DataFrame], spec: Iterable[BatchRequest]) -> Dict[BatchRequest, float]:
+    """
+    Contrôle de parité : écart absolu maximal entre le calcul groupé et le calcul paire par paire
+    (TA-Lib / qtpylib via CachedIndicators). Une différence de NaN compte comme un écart infini.
+    """
+    spec = tuple(spec)
+    batch = compute_batch(frames, spec)
+    deviations = {request: 0.0 for request in spec}
+    for pair, frame in frames.items():
+        reference = IndicatorCache().bind(frame, pair, '')
+        for request in spec:
+            if request.kind == 'talib':
+                expected = reference.talib(request.name, request.price, **dict(request.params))
+            elif request.kind == 'rolling_mean':
+                expected = reference.rolling_mean(request.name, *request.params)
+            else:
+                expected = reference.bollinger(*request.params)
+            got = batch[pair][request]
+            for want, have in zip(*((expected, got) if isinstance(got, tuple) else ((expected,), (got,)))):
+                if not np.array_equal(np.isnan(want), np.isnan(have)):
+                    deviations[request] = float('inf')
+                    continue
+                mask = ~np.isnan(want)
+                if mask.any():
+                    deviations[request] = max(deviations[request], float(np.abs(want[mask] - have[mask]).max()))
+    return deviations
+
+
+# Instance partagée par toutes les stratégies chargées dans le processus
+shared_batch = BatchIndicators()
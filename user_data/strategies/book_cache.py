@@ -0,0 +1,397 @@
+"""
+Cache partagé des carnets d'ordres, avec durée de validité (TTL)
+
+entry_pricing et exit_pricing utilisent le carnet (use_order_book,
+order_book_top = 1) : chaque prix d'entrée ou de sortie, et chaque trade
+ouvert à chaque itération, coûte une requête de carnet, séparément dans chaque
+bot. Une rafale de signaux sur la whitelist devient une rafale de requêtes,
+multipliée par le nombre de bots.
+
+Ici, le dernier carnet de chaque paire est gardé dans un fichier mappé en
+mémoire (un fichier par paire, `depth` niveaux de chaque côté), lu par tous
+les bots de la machine :
+- un carnet plus récent que `ttl_seconds` est servi sans requête ;
+- sinon le bot récupère en un seul lot (requêtes concurrentes) le carnet
+  demandé et ceux, périmés, des paires qui vont en avoir besoin : trades
+  ouverts et paires avec un signal d'entrée sur la dernière bougie analysée ;
+- le lot passe par les reprises et la traduction d'erreurs de freqtrade
+  (retrier_async, TemporaryError / DDosProtection / OperationalException) ;
+- un bot qui trouve un carnet en cours de récupération par un autre processus
+  (verrou du fichier) attend ce carnet au lieu de le redemander ;
+- lecture sans verrou : compteur de séquence pair / impair autour de chaque
+  écriture, le lecteur recommence s'il a croisé une écriture. Une séquence
+  restée impaire sans écrivain (processus tué pendant une écriture) invalide
+  le carnet, qui est récupéré à nouveau.
+
+Activation dans la configuration du bot (dry-run / live) :
+
+    "book_cache": {"path": "user_data/book_cache", "ttl_seconds": 2, "depth": 20}
+
+puis dans bot_start (voir shared_feeds) :
+
+    attach_shared(self)
+
+Taux de réussite, âge des carnets servis et requêtes évitées sont journalisés
+toutes les `report_seconds` (300 par défaut) et disponibles via
+shared_books.report().
+"""
+import asyncio
+import fcntl
+import logging
+import mmap
+import struct
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import ccxt
+
+from freqtrade.enums import RunMode
+from freqtrade.exceptions import DDosProtection, OperationalException, TemporaryError
+from freqtrade.exchange import timeframe_to_prev_date
+from freqtrade.exchange.common import retrier_async
+from freqtrade.misc import pair_to_filename
+
+from exchange_hooks import compatible, install
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'CYPBOOK1'
+VERSION = 1
+# magic, version, profondeur, séquence, horodatage (ms), niveaux bid, niveaux ask
+HEADER = struct.Struct('<8sIIqqqq')
+HEADER_SIZE = 64
+SEQUENCE_OFFSET = 16
+
+# Durée maximale d'une écriture (quelques microsecondes) avant de soupçonner un écrivain mort
+WRITE_TIMEOUT = 0.01
+
+DEFAULT_TTL = 2.0
+DEFAULT_DEPTH = 20
+REPORT_SECONDS = 300
+
+
+class BookSnapshot:
+    """Carnet lu dans le cache : niveaux (prix, quantité) et horodatage (ms)"""
+
+    __slots__ = ('timestamp', 'bids', 'asks')
+
+    def __init__(self, timestamp: int, bids: np.ndarray, asks: np.ndarray):
+        self.timestamp = timestamp
+        self.bids = bids
+        self.asks = asks
+
+    def age(self) -> float:
+        return time.time() - self.timestamp / 1000
+
+    def order_book(self, pair: str, limit: int) -> dict:
+        return {'symbol': pair, 'bids': self.bids[:limit].tolist(), 'asks': self.asks[:limit].tolist(),
+                'timestamp': self.timestamp, 'datetime': None, 'nonce': None}
+
+
+class BookFile:
+    """Carnet d'une paire, mappé en mémoire et partagé entre processus"""
+
+    def __init__(self, path: Path, depth: int):
+        self.path = Path(path)
+        self.depth = depth
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = HEADER_SIZE + 2 * depth * 2 * 8
+        self._file = open(self.path, 'a+b')
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        try:
+            if self._file.seek(0, 2) < size:
+                self._file.truncate(0)
+                self._file.write(HEADER.pack(MAGIC, VERSION, depth, 0, 0, 0, 0))
+                self._file.truncate(size)
+                self._file.flush()
+        finally:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        magic, version, file_depth, *_ = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION or file_depth != depth:
+            raise ValueError(f"{self.path} : format de cache de carnets inattendu (profondeur {file_depth})")
+        self._levels = np.frombuffer(self._map, dtype=np.float64, count=2 * depth * 2,
+                                     offset=HEADER_SIZE).reshape(2, depth, 2)
+        if self._sequence() % 2:
+            self._repair()
+
+    def _sequence(self) -> int:
+        return struct.unpack_from('<q', self._map, SEQUENCE_OFFSET)[0]
+
+    def _repair(self) -> bool:
+        """Séquence impaire sans écrivain (processus mort pendant une écriture) : carnet invalidé"""
+        # Descripteur distinct : son verrou exclut aussi un écrivain de ce processus
+        with open(self.path, 'rb') as probe:
+            try:
+                fcntl.flock(probe, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            sequence = self._sequence()
+            if sequence % 2:
+                struct.pack_into('<qq', self._map, SEQUENCE_OFFSET + 8, 0, 0)
+                struct.pack_into('<q', self._map, SEQUENCE_OFFSET, sequence + 1)
+                logger.warning(f"{self.path} : écriture interrompue, carnet invalidé")
+        return True
+
+    def read(self) -> Optional[BookSnapshot]:
+        """Dernier carnet écrit (copie cohérente), None si aucun ou si une écriture ne se termine pas"""
+        deadline = None
+        while True:
+            sequence = self._sequence()
+            if sequence % 2 == 0:
+                _, _, _, _, timestamp, bids, asks = HEADER.unpack_from(self._map)
+                levels = self._levels.copy()
+                if self._sequence() == sequence:
+                    break
+                continue
+            now = time.monotonic()
+            if deadline is None:
+                deadline = now + WRITE_TIMEOUT
+            elif now > deadline:
+                # Écrivain mort (séquence réparée) ou anormalement lent : carnet à récupérer
+                self._repair()
+                return None
+            time.sleep(0)
+        if not timestamp:
+            return None
+        return BookSnapshot(timestamp, levels[0, :bids], levels[1, :asks])
+
+    def try_lock(self) -> bool:
+        """Verrou de récupération, sans attendre ; False s'il est tenu par un autre processus"""
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def wait(self) -> None:
+        """Attend la fin de la récupération en cours dans un autre processus"""
+        fcntl.flock(self._file, fcntl.LOCK_SH)
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def unlock(self) -> None:
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def write(self, order_book: dict) -> None:
+        """Écrit un carnet ccxt (verrou de récupération tenu)"""
+        bids = np.asarray(order_book['bids'][:self.depth], dtype=np.float64).reshape(-1, 2)
+        asks = np.asarray(order_book['asks'][:self.depth], dtype=np.float64).reshape(-1, 2)
+        sequence = struct.unpack_from('<q', self._map, SEQUENCE_OFFSET)[0]
+        struct.pack_into('<q', self._map, SEQUENCE_OFFSET, sequence + 1)
+        self._levels[0, :len(bids)] = bids
+        self._levels[1, :len(asks)] = asks
+        timestamp = int(time.time() * 1000)
+        struct.pack_into('<qqq', self._map, SEQUENCE_OFFSET + 8, timestamp, len(bids), len(asks))
+        struct.pack_into('<q', self._map, SEQUENCE_OFFSET, sequence + 2)
+
+
+class BookCache:
+    """Fichiers de carnets d'un dossier, par paire"""
+
+    def __init__(self, directory: Path, exchange: str, depth: int = DEFAULT_DEPTH):
+        self.directory = Path(directory) / exchange.lower()
+        self.depth = depth
+        self._files: Dict[str, BookFile] = {}
+        self._lock = Lock()
+
+    def file(self, pair: str) -> BookFile:
+        with self._lock:
+            if pair not in self._files:
+                self._files[pair] = BookFile(self.directory / f'{pair_to_filename(pair)}-{self.depth}.book',
+                                             self.depth)
+            return self._files[pair]
+
+    def fresh(self, pair: str, ttl: float) -> Optional[BookSnapshot]:
+        snapshot = self.file(pair).read()
+        return snapshot if snapshot is not None and snapshot.age() < ttl else None
+
+
+@retrier_async
+async def _fetch_l2_order_book(exchange, pair: str, limit: int) -> dict:
+    """Exchange.fetch_l2_order_book sur le client asynchrone : mêmes reprises, mêmes erreurs"""
+    try:
+        return await exchange._api_async.fetch_l2_order_book(pair, limit)
+    except ccxt.NotSupported as e:
+        raise OperationalException(
+            f"Exchange {exchange._api.name} does not support fetching order book. Message: {e}") from e
+    except ccxt.DDoSProtection as e:
+        raise DDosProtection(e) from e
+    except (ccxt.OperationFailed, ccxt.ExchangeError) as e:
+        raise TemporaryError(f"Could not get order book due to {e.__class__.__name__}. Message: {e}") from e
+    except ccxt.BaseError as e:
+        raise OperationalException(e) from e
+
+
+class SharedBooks:
+    """Branche le cache de carnets sur l'exchange d'un bot (voir le module)"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.fetched = 0
+        self.prefetched = 0
+        self.bypassed = 0
+        self._age_count = 0
+        self._age_sum = 0.0
+        self._age_max = 0.0
+        self._last_report = time.monotonic()
+        self._attached: Dict[int, BookCache] = {}
+        self._strategies: Dict[int, list] = {}
+        # Par exchange : bougie en cours de chaque stratégie, paires avec un signal d'entrée
+        self._upcoming: Dict[int, Tuple[tuple, List[str]]] = {}
+
+    def attach(self, strategy) -> Optional[BookCache]:
+        settings = strategy.config.get('book_cache')
+        dp = getattr(strategy, 'dp', None)
+        if not settings or dp is None or dp.runmode not in (RunMode.LIVE, RunMode.DRY_RUN):
+            return None
+        exchange = dp._exchange
+        self._strategies.setdefault(id(exchange), []).append(strategy)
+        if id(exchange) in self._attached:
+            return self._attached[id(exchange)]
+        if not compatible(exchange, 'book_cache', ('fetch_l2_order_book',)):
+            return None
+        cache = BookCache(settings.get('path', 'user_data/book_cache'), exchange.name,
+                          settings.get('depth', DEFAULT_DEPTH))
+        ttl = settings.get('ttl_seconds', DEFAULT_TTL)
+        report_seconds = settings.get('report_seconds', REPORT_SECONDS)
+        strategies = self._strategies[id(exchange)]
+        fetch_l2_order_book = exchange.fetch_l2_order_book
+        fetch_limit = exchange.get_next_limit_in_list(
+            cache.depth, exchange._ft_has['l2_limit_range'], exchange._ft_has['l2_limit_range_required'],
+            exchange._ft_has['l2_limit_upper'])
+
+        def fetch_book(pair: str, limit: int = 100):
+            if limit > cache.depth:
+                self.bypassed += 1
+                return fetch_l2_order_book(pair, limit)
+            snapshot = cache.fresh(pair, ttl)
+            if snapshot is None:
+                self.misses += 1
+                snapshot = self._refresh(exchange, cache, pair, ttl, fetch_limit,
+                                         self._candidates(id(exchange), strategies, pair))
+            else:
+                self.hits += 1
+            if snapshot is None:
+                # Carnet attendu d'un autre processus toujours absent ou illisible : requête directe
+                self.fetched += 1
+                order_book = fetch_l2_order_book(pair, limit)
+                book_file = cache.file(pair)
+                if book_file.try_lock():
+                    try:
+                        book_file.write(order_book)
+                    finally:
+                        book_file.unlock()
+                return order_book
+            age = snapshot.age()
+            self._age_count += 1
+            self._age_sum += age
+            self._age_max = max(self._age_max, age)
+            if report_seconds and time.monotonic() - self._last_report > report_seconds:
+                self._log_report()
+            return snapshot.order_book(pair, limit)
+
+        install(exchange, fetch_l2_order_book=fetch_book)
+        self._attached[id(exchange)] = cache
+        logger.info(f"Cache de carnets {cache.directory} branché sur {exchange.name} "
+                    f"(TTL {ttl} s, {cache.depth} niveaux)")
+        return cache
+
+    def _candidates(self, exchange_id: int, strategies: list, pair: str) -> List[str]:
+        """pair puis les paires dont le carnet va servir : trades ouverts et signaux d'entrée"""
+        from freqtrade.persistence import Trade
+
+        pairs = set(self._signals(exchange_id, strategies))
+        try:
+            pairs.update(trade.pair for trade in Trade.get_open_trades())
+        except Exception:
+            pass
+        pairs.discard(pair)
+        return [pair, *sorted(pairs)]
+
+    def _signals(self, exchange_id: int, strategies: list) -> List[str]:
+        """Paires avec un signal d'entrée sur la dernière bougie analysée, parcourues une fois par bougie"""
+        candle = tuple(timeframe_to_prev_date(strategy.timeframe) for strategy in strategies)
+        upcoming = self._upcoming.get(exchange_id)
+        if upcoming is not None and upcoming[0] == candle:
+            return upcoming[1]
+        pairs = set()
+        for strategy in strategies:
+            for candidate in strategy.dp.current_whitelist():
+                dataframe, _ = strategy.dp.get_analyzed_dataframe(candidate, strategy.timeframe)
+                if dataframe.empty:
+                    continue
+                last = dataframe.iloc[-1]
+                if last.get('enter_long', 0) == 1 or last.get('enter_short', 0) == 1:
+                    pairs.add(candidate)
+        self._upcoming[exchange_id] = (candle, sorted(pairs))
+        return self._upcoming[exchange_id][1]
+
+    def _refresh(self, exchange, cache: BookCache, pair: str, ttl: float, limit: int,
+                 pairs: Iterable[str]) -> Optional[BookSnapshot]:
+        """Récupère en un lot les carnets périmés de pairs ; retourne celui de pair (ou lève son erreur)"""
+        batch, waiting, error = [], [], None
+        for candidate in pairs:
+            book_file = cache.file(candidate)
+            if candidate != pair and cache.fresh(candidate, ttl) is not None:
+                continue
+            if book_file.try_lock():
+                batch.append(candidate)
+            elif candidate == pair:
+                waiting.append(book_file)
+        try:
+            if batch:
+                async def gather():
+                    return await asyncio.gather(
+                        *(_fetch_l2_order_book(exchange, candidate, limit) for candidate in batch),
+                        return_exceptions=True)
+
+                with exchange._loop_lock:
+                    results = exchange.loop.run_until_complete(gather())
+                for candidate, result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        if candidate == pair:
+                            error = result
+                        else:
+                            logger.debug(f"Carnet {candidate} : {result!r}")
+                        continue
+                    cache.file(candidate).write(result)
+                    self.fetched += 1
+                    if candidate != pair:
+                        self.prefetched += 1
+        finally:
+            for candidate in batch:
+                cache.file(candidate).unlock()
+        if error is not None:
+            raise error
+        for book_file in waiting:
+            # Récupéré par un autre bot pendant l'attente
+            book_file.wait()
+            self.coalesced += 1
+        return cache.fresh(pair, ttl)
+
+    def report(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'coalesced': self.coalesced,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'fetched': self.fetched, 'prefetched': self.prefetched, 'bypassed': self.bypassed,
+                'age_mean_s': round(self._age_sum / self._age_count, 3) if self._age_count else 0.0,
+                'age_max_s': round(self._age_max, 3)}
+
+    def _log_report(self) -> None:
+        report = self.report()
+        logger.info(f"Cache de carnets : {report['hit_rate']:.0%} servis sans requête "
+                    f"({report['hits']}/{report['hits'] + report['misses']}), {report['fetched']} récupérés "
+                    f"dont {report['prefetched']} par anticipation, âge moyen {report['age_mean_s']} s "
+                    f"(max {report['age_max_s']} s)")
+        self._last_report = time.monotonic()
+
+
+# Instance partagée par les stratégies du processus
+shared_books = SharedBooks()
@@ -0,0 +1,306 @@
+"""
+Magasin de bougies partagé entre processus, en fichiers mappés en mémoire
+
+start-multiple-strategies.sh et start-multi-config.sh lancent un
+`freqtrade trade` par stratégie : chaque processus interrogeait l'exchange et
+gardait sa propre copie des mêmes bougies pour la même whitelist.
+
+Un seul écrivain (`python -m cyptrade.candle_feed`) tient à jour un fichier par
+paire et timeframe ; chaque bot le mappe en lecture (mmap) :
+- format colonne, en ajout seul : en-tête, dates d'ouverture (int64, ms UTC)
+  puis un bloc float64 (5, capacité) open / high / low / close / volume ;
+  seules les bougies clôturées y sont écrites ;
+- l'écrivain écrit les lignes avant d'incrémenter le compteur de l'en-tête :
+  un lecteur voit toujours un préfixe complet ; quand la capacité est
+  atteinte, le fichier est recopié puis remplacé atomiquement, les lecteurs
+  remappent au changement d'inode. La recopie ne garde que les `retention`
+  dernières bougies (RETENTION par défaut, largement au-dessus de ce que
+  freqtrade demande) : la capacité double jusqu'à dépasser la rétention,
+  puis le fichier garde une taille fixe ;
+- côté bot, le bloc OHLCV du dataframe est une vue sur le mapping (pages
+  partagées par tous les processus), seule la colonne date est recopiée.
+
+Activation dans la configuration du bot (dry-run / live) :
+
+    "candle_store": {"path": "user_data/candle_store", "stale_seconds": 30}
+
+puis dans bot_start (voir shared_feeds) :
+
+    attach_shared(self)
+
+Les rafraîchissements de bougies de freqtrade (whitelist et informatifs)
+sont servis par le magasin lorsqu'il contient la dernière bougie clôturée ;
+sinon (écrivain arrêté, paire absente, API de l'exchange inattendue, voir
+exchange_hooks) l'exchange est interrogé comme avant.
+Juste après la clôture, une bougie manquante est attendue `stale_seconds`
+avant de revenir à l'exchange : freqtrade n'analyse pas deux fois la même
+bougie, l'analyse a lieu à l'itération suivante.
+"""
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from freqtrade.enums import CandleType, RunMode
+from freqtrade.exchange import timeframe_to_msecs, timeframe_to_prev_date
+from freqtrade.misc import pair_to_filename
+from freqtrade.util import dt_now, dt_ts
+
+from exchange_hooks import cache_klines, compatible, install
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'CYPCNDL1'
+VERSION = 1
+# magic, version, colonnes, timeframe (ms), capacité, nombre de bougies
+HEADER = struct.Struct('<8sIIqqq')
+HEADER_SIZE = 64
+COUNT_OFFSET = HEADER.size - 8
+COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+INITIAL_CAPACITY = 4096
+# Bougies conservées par fichier à la recopie (35 jours en 5m)
+RETENTION = 10000
+
+# Attente d'une bougie tout juste clôturée avant de revenir à l'exchange
+STALE_SECONDS = 30
+
+
+def candle_path(directory: Path, exchange: str, pair: str, timeframe: str,
+                candle_type: CandleType = CandleType.SPOT) -> Path:
+    suffix = '' if candle_type == CandleType.SPOT else f'-{candle_type.value}'
+    return Path(directory) / exchange.lower() / f"{pair_to_filename(pair)}-{timeframe}{suffix}.candles"
+
+
+class CandleFile:
+    """Fichier de bougies d'une paire et d'un timeframe (lecture, ou écriture par le seul écrivain)"""
+
+    def __init__(self, path: Path, timeframe: str, writable: bool = False, retention: int = RETENTION):
+        self.path = Path(path)
+        self.timeframe_ms = timeframe_to_msecs(timeframe)
+        self.writable = writable
+        self.retention = retention
+        self._inode: Optional[int] = None
+        self._map: Optional[mmap.mmap] = None
+        self.capacity = 0
+        self.dates = np.empty(0, dtype=np.int64)
+        self.values = np.empty((len(COLUMNS), 0))
+        if writable and not self.path.exists():
+            self._create(self.path, INITIAL_CAPACITY)
+
+    # -- mapping ------------------------------------------------------------
+
+    def _create(self, path: Path, capacity: int, source: Optional['CandleFile'] = None, keep: int = 0) -> None:
+        """Crée un fichier vide, ou contenant les `keep` dernières bougies de `source`"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        size = HEADER_SIZE + capacity * 8 * (1 + len(COLUMNS))
+        count = keep if source is not None else 0
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, len(COLUMNS), self.timeframe_ms, capacity, count))
+            file.truncate(size)
+        if source is not None:
+            with open(path, 'r+b') as file:
+                target = mmap.mmap(file.fileno(), size)
+            dates, values = self._views(target, capacity)
+            first = source.count - count
+            dates[:count] = source.dates[first:first + count]
+            values[:, :count] = source.values[:, first:first + count]
+            target.flush()
+            del dates, values
+            target.close()
+
+    @staticmethod
+    def _views(buffer, capacity: int) -> Tuple[np.ndarray, np.ndarray]:
+        dates = np.frombuffer(buffer, dtype=np.int64, count=capacity, offset=HEADER_SIZE)
+        values = np.frombuffer(buffer, dtype=np.float64, count=capacity * len(COLUMNS),
+                               offset=HEADER_SIZE + capacity * 8).reshape(len(COLUMNS), capacity)
+        return dates, values
+
+    def _remap(self) -> bool:
+        """Mappe (à nouveau) le fichier s'il a été remplacé ; False s'il n'existe pas"""
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return False
+        if inode == self._inode:
+            return True
+        with open(self.path, 'r+b' if self.writable else 'rb') as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ)
+        magic, version, columns, timeframe_ms, capacity, _ = HEADER.unpack_from(mapped)
+        if magic != MAGIC or version != VERSION or columns != len(COLUMNS) or timeframe_ms != self.timeframe_ms:
+            mapped.close()
+            raise ValueError(f"{self.path} : format de magasin de bougies inattendu")
+        # L'ancien mapping reste valide tant que des dataframes en ont une vue
+        self._map, self._inode, self.capacity = mapped, inode, capacity
+        self.dates, self.values = self._views(mapped, capacity)
+        return True
+
+    @property
+    def count(self) -> int:
+        return struct.unpack_from('<q', self._map, COUNT_OFFSET)[0] if self._map is not None else 0
+
+    # -- lecture ------------------------------------------------------------
+
+    def last_date(self) -> Optional[int]:
+        """Date d'ouverture (ms) de la dernière bougie stockée"""
+        if not self._remap():
+            return None
+        count = self.count
+        return int(self.dates[count - 1]) if count else None
+
+    def frame(self, limit: Optional[int] = None) -> DataFrame:
+        """Dernières bougies au format freqtrade ; le bloc OHLCV est une vue sur le mapping"""
+        if not self._remap():
+            return DataFrame()
+        count = self.count
+        start = max(0, count - limit) if limit else 0
+        dataframe = DataFrame(self.values[:, start:count].T, columns=list(COLUMNS), copy=False)
+        dates = pd.DatetimeIndex(self.dates[start:count].view('datetime64[ms]')).tz_localize('UTC')
+        dataframe.insert(0, 'date', dates)
+        return dataframe
+
+    # -- écriture -----------------------------------------------------------
+
+    def append(self, dataframe: DataFrame) -> int:
+        """Ajoute les bougies plus récentes que la dernière stockée ; retourne le nombre ajouté"""
+        self._remap()
+        count = self.count
+        dates = pd.DatetimeIndex(dataframe['date']).as_unit('ms').asi8
+        if count:
+            dates_new = dates > self.dates[count - 1]
+            dataframe, dates = dataframe[dates_new], dates[dates_new]
+        if self.retention and len(dates) > self.retention:
+            dataframe, dates = dataframe.iloc[-self.retention:], dates[-self.retention:]
+        added = len(dates)
+        if not added:
+            return 0
+        if count + added > self.capacity:
+            # Recopie des dernières bougies dans un fichier plus grand tant que la rétention n'est pas atteinte
+            keep = min(count, self.retention - added) if self.retention else count
+            capacity = self.capacity
+            while capacity < keep + added:
+                capacity *= 2
+            temporary = self.path.with_suffix('.tmp')
+            self._create(temporary, capacity, source=self, keep=keep)
+            os.replace(temporary, self.path)
+            self._remap()
+            count = keep
+        self.dates[count:count + added] = dates
+        for row, column in enumerate(COLUMNS):
+            self.values[row, count:count + added] = dataframe[column].to_numpy(dtype=np.float64)
+        # Les lignes sont en place avant que le compteur ne les rende visibles
+        self._map.flush()
+        struct.pack_into('<q', self._map, COUNT_OFFSET, count + added)
+        return added
+
+
+class CandleStore:
+    """Fichiers de bougies d'un dossier, par (paire, timeframe, type de bougie)"""
+
+    def __init__(self, directory: Path, exchange: str, writable: bool = False, retention: int = RETENTION):
+        self.directory = Path(directory)
+        self.exchange = exchange
+        self.writable = writable
+        self.retention = retention
+        self._files: Dict[Tuple[str, str, CandleType], CandleFile] = {}
+        self._lock = Lock()
+
+    def file(self, pair: str, timeframe: str, candle_type: CandleType = CandleType.SPOT) -> CandleFile:
+        key = (pair, timeframe, CandleType.from_string(candle_type))
+        with self._lock:
+            if key not in self._files:
+                self._files[key] = CandleFile(candle_path(self.directory, self.exchange, *key), timeframe,
+                                              writable=self.writable, retention=self.retention)
+            return self._files[key]
+
+    def append(self, pair: str, timeframe: str, candle_type: CandleType, dataframe: DataFrame) -> int:
+        return self.file(pair, timeframe, candle_type).append(dataframe)
+
+    def fresh_frame(self, pair: str, timeframe: str, candle_type: CandleType,
+                    limit: Optional[int] = None) -> Tuple[Optional[DataFrame], bool]:
+        """
+        (dataframe, attendre) : le dataframe si la dernière bougie clôturée est stockée,
+        sinon None, et s'il vaut mieux attendre l'écrivain (bougie clôturée depuis peu)
+        """
+        candle_file = self.file(pair, timeframe, candle_type)
+        last = candle_file.last_date()
+        if last is None:
+            return None, False
+        now = dt_now()
+        expected = dt_ts(timeframe_to_prev_date(timeframe, now)) - candle_file.timeframe_ms
+        if last >= expected:
+            return candle_file.frame(limit), False
+        if last >= expected - candle_file.timeframe_ms:
+            return candle_file.frame(limit), True
+        return None, False
+
+
+class SharedCandles:
+    """Branche le magasin de bougies sur l'exchange d'un bot (voir le module)"""
+
+    def __init__(self):
+        self.served = 0
+        self.waited = 0
+        self.fetched = 0
+        self._attached: Dict[int, CandleStore] = {}
+
+    def attach(self, strategy) -> Optional[CandleStore]:
+        settings = strategy.config.get('candle_store')
+        dp = getattr(strategy, 'dp', None)
+        if not settings or dp is None or dp.runmode not in (RunMode.LIVE, RunMode.DRY_RUN):
+            return None
+        exchange = dp._exchange
+        if id(exchange) in self._attached:
+            return self._attached[id(exchange)]
+        if not compatible(exchange, 'candle_store', ('refresh_latest_ohlcv',), klines=True):
+            return None
+        store = CandleStore(settings.get('path', 'user_data/candle_store'), exchange.name)
+        stale_seconds = settings.get('stale_seconds', STALE_SECONDS)
+        limit = exchange.ohlcv_candle_limit(strategy.timeframe, strategy.config['candle_type_def'])
+        limit += strategy.startup_candle_count
+        refresh = exchange.refresh_latest_ohlcv
+
+        def refresh_latest_ohlcv(pair_list, *, since_ms=None, cache=True, drop_incomplete=None):
+            if since_ms is not None:
+                return refresh(pair_list, since_ms=since_ms, cache=cache, drop_incomplete=drop_incomplete)
+            served, remaining = {}, []
+            for key in pair_list:
+                frame, wait = store.fresh_frame(*key, limit=limit)
+                if frame is not None and (not wait or self._within_grace(key[1], stale_seconds)):
+                    served[key] = frame
+                    if wait:
+                        self.waited += 1
+                else:
+                    remaining.append(key)
+            if cache:
+                cache_klines(exchange, served)
+            self.served += len(served)
+            self.fetched += len(remaining)
+            result = refresh(remaining, cache=cache, drop_incomplete=drop_incomplete) if remaining else {}
+            result.update(served)
+            return result
+
+        install(exchange, refresh_latest_ohlcv=refresh_latest_ohlcv)
+        self._attached[id(exchange)] = store
+        logger.info(f"Magasin de bougies {store.directory / store.exchange} branché sur {exchange.name}")
+        return store
+
+    @staticmethod
+    def _within_grace(timeframe: str, stale_seconds: float) -> bool:
+        """Bougie clôturée depuis moins de stale_seconds"""
+        now = dt_now()
+        return (now - timeframe_to_prev_date(timeframe, now)).total_seconds() < stale_seconds
+
+    def report(self) -> Dict[str, int]:
+        return {'served': self.served, 'waited': self.waited, 'fetched': self.fetched}
+
+
+# Instance partagée par les stratégies du processus
+shared_candles = SharedCandles()
@@ -0,0 +1,129 @@
+"""
+Format compact du dataframe : seuils en métadonnées, float32, drapeaux regroupés
+
+MeanReversionStrategy et TrendFollowingStrategy écrivaient leurs seuils
+(rsi_oversold, zscore_overbought...) comme des colonnes constantes, uniquement
+pour plot_config, gardaient tous les indicateurs en float64 et chaque signal
+(oversold, uptrend, trend_bullish...) dans une colonne booléenne complète. Avec
+des milliers de bougies par paire, de nombreuses paires et plusieurs bots, ces
+colonnes pèsent.
+
+En format compact (`"compact_frame": true` dans la configuration) :
+- les seuils ne sont plus des colonnes : ils sont disponibles via
+  layout.thresholds(strategy) et dans dataframe.attrs['plot_thresholds'] ;
+  en mode plot (freqtrade plot-dataframe), le format complet est conservé pour
+  que les courbes de plot_config existent ;
+- les oscillateurs bornés déclarés (Williams %R, stochastique, MACD...) passent
+  en float32 : ~7 chiffres significatifs, bien au-delà de la précision de leurs
+  seuils. Les niveaux de prix (bandes, moyennes) restent en float64, et les
+  colonnes de signal sont évaluées avant la conversion. Les colonnes lues plus
+  tard par les règles d'entrée / sortie restent aussi en float64 : arrondie en
+  float32, une valeur juste sous un seuil (%B à 0.79999999999) peut le dépasser
+  (0.8000000119 > 0.8) et le signal différerait du format complet. FrameLayout
+  refuse de les convertir (paramètre `rules`) ;
+- les colonnes de signal sont regroupées dans une seule colonne entière
+  (FlagSet de signal_rules), que les règles d'entrée / sortie lisent bit par bit.
+
+Le gain mémoire est journalisé à la première analyse de chaque paire et
+disponible via layout.report().
+
+    frame_layout = FrameLayout(
+        thresholds={'rsi_oversold': Param('rsi_oversold')},
+        float32=('williams_r', 'stoch_k'),
+        flags=FlagSet('mean_reversion_flags', signal_rules),
+        rules=(entry_rules, exit_rules),
+    )
+    dataframe = self.frame_layout.write(dataframe, metadata['pair'], signals, self, compact=self.compact_frame)
+"""
+import logging
+from threading import Lock
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+from pandas import DataFrame
+
+from signal_rules import FlagSet, Param, Rules
+
+
+logger = logging.getLogger(__name__)
+
+# Taille d'un seuil ou d'un indicateur en format complet (int64 / float64)
+FULL_ITEMSIZE = 8
+
+
+class FrameLayout:
+    """
+    Disposition des colonnes dérivées d'une stratégie : seuils de plot, indicateurs
+    convertibles en float32 et drapeaux de signal
+    """
+
+    def __init__(self, thresholds: Optional[Dict[str, Any]] = None, float32: Sequence[str] = (),
+                 flags: Optional[FlagSet] = None, rules: Sequence[Rules] = ()):
+        # Règles évaluées après write (entrée / sortie) : leurs colonnes doivent rester exactes
+        exact = [column for column in float32 if any(column in ruleset.columns for ruleset in rules)]
+        if exact:
+            raise ValueError(f"Colonnes lues par les règles d'entrée / sortie, à garder en float64 : "
+                             f"{', '.join(exact)}")
+        self.threshold_params = dict(thresholds or {})
+        self.float32 = tuple(float32)
+        self.flags = flags
+        self._report: Dict[str, Dict[str, int]] = {}
+        self._lock = Lock()
+
+    def thresholds(self, params: Any) -> Dict[str, float]:
+        """Valeur des seuils de plot (Param résolus sur la stratégie)"""
+        return {name: value.resolve(params) if isinstance(value, Param) else value
+                for name, value in self.threshold_params.items()}
+
+    def write(self, dataframe: DataFrame, pair: str, signals: Dict[str, np.ndarray], params: Any,
+              compact: bool = False) -> DataFrame:
+        """Ecrit seuils et signaux dans le dataframe, au format complet ou compact"""
+        thresholds = self.thresholds(params)
+        if not compact:
+            for name, value in thresholds.items():
+                dataframe[name] = value
+            for column, values in signals.items():
+                dataframe[column] = values
+            return dataframe
+
+        dataframe.attrs['plot_thresholds'] = thresholds
+        size = len(dataframe)
+        before = after = 0
+
+        converted = [column for column in self.float32 if column in dataframe.columns]
+        for column in converted:
+            dataframe[column] = dataframe[column].to_numpy(dtype=np.float32)
+        before += len(converted) * FULL_ITEMSIZE * size
+        after += len(converted) * np.dtype(np.float32).itemsize * size
+
+        if self.flags is not None and signals:
+            dataframe[self.flags.column] = self.flags.pack(signals)
+            after += np.dtype(self.flags.dtype).itemsize * size
+        else:
+            for column, values in signals.items():
+                dataframe[column] = values
+            after += len(signals) * size
+        before += len(signals) * size + len(thresholds) * FULL_ITEMSIZE * size
+
+        self._record(pair, size, before, after, int(dataframe.memory_usage(index=True).sum()))
+        return dataframe
+
+    def _record(self, pair: str, candles: int, before: int, after: int, frame: int) -> None:
+        with self._lock:
+            first = pair not in self._report
+            self._report[pair] = {'candles': candles, 'before': before, 'after': after,
+                                  'saved': before - after, 'frame': frame}
+        if first:
+            logger.info(f"Format compact {pair} : {candles} bougies, colonnes dérivées "
+                        f"{before / 1024:.1f} Ko -> {after / 1024:.1f} Ko "
+                        f"({(before - after) / 1024:.1f} Ko économisés, dataframe {frame / 1024:.1f} Ko)")
+
+    def report(self) -> Dict[str, Dict[str, int]]:
+        """Mémoire par paire (octets) : colonnes dérivées avant / après, gain, taille du dataframe compact"""
+        with self._lock:
+            return {pair: dict(entry) for pair, entry in self._report.items()}
+
+    def saved(self) -> int:
+        """Octets économisés sur l'ensemble des paires"""
+        with self._lock:
+            return sum(entry['saved'] for entry in self._report.values())
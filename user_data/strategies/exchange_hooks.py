@@ -0,0 +1,73 @@
+"""
+Interception des méthodes de l'exchange freqtrade par les caches partagés
+
+candle_store, book_cache et stream_feed servent les bougies et les carnets à la
+place de l'exchange en remplaçant, sur l'instance du bot, les méthodes que
+freqtrade appelle (refresh_latest_ohlcv, fetch_l2_order_book, fetch_ticker), et
+rangent les bougies servies dans exchange._klines comme le fait
+refresh_latest_ohlcv. Ces points d'entrée ne sont pas une API publique de
+freqtrade : ce module en vérifie la forme avant tout remplacement.
+
+    if not compatible(exchange, 'candle_store', ('refresh_latest_ohlcv',), klines=True):
+        return None      # API inattendue : l'exchange est interrogé comme avant
+    ...
+    install(exchange, refresh_latest_ohlcv=refresh_latest_ohlcv)
+
+Si une méthode manque ou n'accepte plus les paramètres attendus, rien n'est
+remplacé et le bot fonctionne sans le cache (avertissement dans les logs).
+"""
+import inspect
+import logging
+from typing import Callable, Dict, Iterable
+
+from pandas import DataFrame
+
+
+logger = logging.getLogger(__name__)
+
+# Paramètres utilisés par les remplaçants, par méthode
+SIGNATURES: Dict[str, tuple] = {
+    'refresh_latest_ohlcv': ('pair_list', 'since_ms', 'cache', 'drop_incomplete'),
+    'fetch_l2_order_book': ('pair', 'limit'),
+    'fetch_ticker': ('pair',),
+}
+
+
+def _mismatch(exchange, name: str) -> str:
+    """Raison pour laquelle la méthode ne peut pas être remplacée ('' si elle correspond)"""
+    method = getattr(exchange, name, None)
+    if not callable(method):
+        return f"{name} absente"
+    try:
+        parameters = inspect.signature(method).parameters
+    except (TypeError, ValueError):
+        return f"signature de {name} illisible"
+    missing = [parameter for parameter in SIGNATURES[name] if parameter not in parameters]
+    if missing:
+        return f"{name} sans {', '.join(missing)}"
+    return ''
+
+
+def compatible(exchange, feature: str, methods: Iterable[str], klines: bool = False) -> bool:
+    """Vérifie que les méthodes (et exchange._klines si `klines`) ont la forme attendue"""
+    reasons = [reason for reason in (_mismatch(exchange, name) for name in methods) if reason]
+    if klines and not isinstance(getattr(exchange, '_klines', None), dict):
+        reasons.append("_klines absent")
+    if reasons:
+        from freqtrade import __version__
+
+        logger.warning(f"{feature} non branché : API de l'exchange inattendue ({'; '.join(reasons)}, "
+                       f"freqtrade {__version__}), l'exchange est interrogé directement")
+        return False
+    return True
+
+
+def install(exchange, **methods: Callable) -> None:
+    """Remplace les méthodes de l'instance (vérifiées par compatible)"""
+    for name, method in methods.items():
+        setattr(exchange, name, method)
+
+
+def cache_klines(exchange, frames: Dict[tuple, DataFrame]) -> None:
+    """Range les bougies servies dans le cache de l'exchange, comme refresh_latest_ohlcv(cache=True)"""
+    exchange._klines.update(frames)
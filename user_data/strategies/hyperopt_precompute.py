@@ -0,0 +1,119 @@
+"""
+Pré-calcul de toutes les variantes d'indicateurs de l'espace d'hyperopt
+
+Les stratégies Hyperopt* lisaient ta.RSI(timeperiod=self.buy_rsi_period.value) dans
+populate_indicators : chaque époque tombant sur une nouvelle période (ou chaque
+époque avec --analyze-per-epoch) recalculait l'indicateur. Ici chaque indicateur
+est calculé une fois par paire pour toutes les valeurs de l'IntParameter
+(`parametre.range` couvre tout l'espace en hyperopt et se réduit à la valeur
+courante dans les autres modes) et rangé dans une matrice (période × bougie).
+
+La matrice est ajoutée au dataframe en colonnes '<nom>_<période>' - pandas les
+conserve dans un seul bloc 2D - pour survivre au découpage des bougies de
+démarrage et à la sérialisation des données vers les workers d'hyperopt. Les
+méthodes populate_entry_trend / populate_exit_trend choisissent ensuite la ligne
+correspondant à la valeur de l'époque avec select_variants, sans aucun calcul
+d'indicateur.
+
+Pour les Bollinger, le facteur (DecimalParameter) n'intervient qu'après coup :
+seules la moyenne et l'écart-type sont pré-calculés, les bandes d'un facteur
+donné en sont déduites par bollinger_for_factor.
+"""
+import logging
+from typing import Dict, Iterable, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+import talib.abstract as ta
+
+from indicator_cache import IndicatorCache, candles_key, shared_indicators
+
+
+logger = logging.getLogger(__name__)
+
+
+class IndicatorGrid:
+    """Valeurs d'un indicateur pour une liste de périodes : matrice (période × bougie)"""
+
+    def __init__(self, name: str, periods: Tuple[int, ...], values: np.ndarray):
+        self.name = name
+        self.periods = periods
+        self.values = values
+        self._rows = {period: row for row, period in enumerate(periods)}
+
+    def row(self, period: int) -> np.ndarray:
+        return self.values[self._rows[int(period)]]
+
+    def columns(self, prefix: str) -> Dict[str, np.ndarray]:
+        return {f'{prefix}_{period}': self.values[row] for row, period in enumerate(self.periods)}
+
+
+def compute_grid(dataframe: DataFrame, pair: str, timeframe: str, function: str,
+                 periods: Iterable[int], cache: IndicatorCache = shared_indicators) -> IndicatorGrid:
+    """
+    Calcule la fonction TA-Lib `function` pour chaque période (une seule fois par
+    paire et fenêtre de bougies grâce au cache partagé).
+    """
+    periods = tuple(int(period) for period in periods)
+
+    def compute() -> np.ndarray:
+        inputs = {col: dataframe[col].to_numpy(dtype=np.float64)
+                  for col in ('open', 'high', 'low', 'close', 'volume')}
+        grid = np.empty((len(periods), len(dataframe)), dtype=np.float64)
+        indicator = ta.Function(function)
+        for row, period in enumerate(periods):
+            grid[row] = indicator(inputs, timeperiod=period)
+        return grid
+
+    key = (pair, timeframe, candles_key(dataframe), f'grid:{function}', periods)
+    return IndicatorGrid(function, periods, cache.get_or_compute(key, compute))
+
+
+def precompute_variants(dataframe: DataFrame, pair: str, timeframe: str,
+                        variants: Mapping[str, Tuple[str, Iterable[int]]]) -> DataFrame:
+    """
+    Ajoute les colonnes '<nom>_<période>' de chaque variante.
+
+        dataframe = precompute_variants(dataframe, metadata['pair'], self.timeframe, {
+            'rsi': ('RSI', self.buy_rsi_period.range),
+            'ema_fast': ('EMA', self.buy_ema_fast.range),
+        })
+    """
+    columns: Dict[str, np.ndarray] = {}
+    for name, (function, periods) in variants.items():
+        columns.update(compute_grid(dataframe, pair, timeframe, function, periods).columns(name))
+
+    # Une seule concaténation plutôt qu'une insertion par colonne (fragmentation pandas)
+    existing = [col for col in columns if col in dataframe.columns]
+    if existing:
+        dataframe = dataframe.drop(columns=existing)
+    return pd.concat([dataframe, DataFrame(columns, index=dataframe.index)], axis=1)
+
+
+def select_variants(dataframe: DataFrame, selection: Mapping[str, int]) -> None:
+    """
+    Expose la variante choisie sous le nom générique, ex: {'rsi': 14} -> dataframe['rsi'] = dataframe['rsi_14'].
+    A appeler depuis populate_entry_trend / populate_exit_trend : lire `.value` d'un paramètre
+    optimisé dans populate_indicators le figerait à sa valeur de départ pendant l'hyperopt.
+    """
+    for name, period in selection.items():
+        dataframe[name] = dataframe[f'{name}_{int(period)}']
+
+
+def precompute_bollinger_basis(dataframe: DataFrame, pair: str, timeframe: str, window: int = 20) -> None:
+    """Moyenne et écart-type (population, comme TA-Lib BBANDS) communs à tous les facteurs"""
+    ind = shared_indicators.bind(dataframe, pair, timeframe)
+    dataframe['bb_basis_mid'] = ind.talib('SMA', timeperiod=window)
+    dataframe['bb_basis_std'] = ind.talib('STDDEV', timeperiod=window, nbdev=1.0)
+
+
+def bollinger_for_factor(dataframe: DataFrame, factor: float) -> None:
+    """Bandes de Bollinger (équivalentes à ta.BBANDS(nbdevup=nbdevdn=factor)) déduites de la base"""
+    mid = dataframe['bb_basis_mid']
+    width = dataframe['bb_basis_std'] * float(factor)
+    dataframe['bb_middleband'] = mid
+    dataframe['bb_upperband'] = mid + width
+    dataframe['bb_lowerband'] = mid - width
+    dataframe['bb_percent'] = (dataframe['close'] - dataframe['bb_lowerband']) / (dataframe['bb_upperband'] - dataframe['bb_lowerband'])
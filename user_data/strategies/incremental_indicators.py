@@ -0,0 +1,563 @@
+"""
+Moteur d'indicateurs incrémental pour le mode live / dry-run
+
+Avec process_only_new_candles = False, populate_indicators est appelé à chaque
+itération du bot et recalculait tous les indicateurs sur tout l'historique alors
+que seule la dernière bougie a changé. Ici chaque indicateur garde un état O(1)
+par bougie (récurrences EMA, RSI de Wilder, sommes glissantes / variance de
+Welford, deques de min/max glissants) et seules les nouvelles lignes sont
+traitées.
+
+Les valeurs reproduisent TA-Lib / pandas (amorçage compris) : l'écart avec un
+recalcul complet est nul à l'arrondi près tant que l'historique n'a pas glissé.
+Quand freqtrade fait glisser sa fenêtre de bougies, le recalcul complet
+ré-amorce les EMA/RSI sur la nouvelle première bougie alors que le flux garde
+son état : l'écart décroît en (1 - alpha)^n et devient négligeable après
+quelques centaines de bougies (voir max_deviation).
+
+Utilisation :
+
+    spec = {
+        'ema_short': Ema(12),
+        ('macd', 'macdsignal', 'macdhist'): Macd(12, 26, 9),
+    }
+    for column, values in shared_engine.update(metadata['pair'], dataframe, spec, self.timeframe).items():
+        dataframe[column] = values
+
+shared_engine est commun aux stratégies du processus (hôte multi-stratégies) :
+un indicateur déclaré par plusieurs stratégies avec les mêmes paramètres n'est
+calculé qu'une fois par paire et par timeframe.
+"""
+import logging
+import math
+from collections import deque
+from threading import Lock
+from typing import Dict, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+from pandas import DataFrame
+
+
+logger = logging.getLogger(__name__)
+
+# Index des colonnes OHLCV dans une bougie (open, high, low, close, volume)
+SOURCES = {'open': 0, 'high': 1, 'low': 2, 'close': 3, 'volume': 4}
+
+NAN = float('nan')
+
+
+# === ÉTATS ÉLÉMENTAIRES ===
+
+class EmaState:
+    """EMA TA-Lib : amorcée par la moyenne simple des `period` premières valeurs"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        self.count += 1
+        if self.count < self.period:
+            self.seed_sum += x
+            return NAN
+        if self.count == self.period:
+            self.value = (self.seed_sum + x) / self.period
+        else:
+            self.value = (x - self.value) * self.k + self.value
+        return self.value
+
+
+class WilderRsiState:
+    """RSI TA-Lib (moyennes de Wilder amorcées sur les `period` premières variations)"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count = 0
+        self.prev: Optional[float] = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def update(self, x: float) -> float:
+        prev, self.prev = self.prev, x
+        if prev is None:
+            return NAN
+        change = x - prev
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        self.count += 1
+        if self.count < self.period:
+            self.avg_gain += gain
+            self.avg_loss += loss
+            return NAN
+        if self.count == self.period:
+            self.avg_gain = (self.avg_gain + gain) / self.period
+            self.avg_loss = (self.avg_loss + loss) / self.period
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        total = self.avg_gain + self.avg_loss
+        return 100.0 * self.avg_gain / total if total != 0 else 0.0
+
+
+class RollingWindowState:
+    """
+    Moyenne et variance glissantes (Welford avec retrait), mêmes conventions que
+    pandas rolling(window, min_periods) : ddof=1, NaN sous min_periods.
+    L'état est recalculé depuis la fenêtre à intervalles réguliers pour borner la dérive.
+    """
+
+    RESYNC_EVERY = 1000
+
+    def __init__(self, window: int, min_periods: Optional[int] = None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values: deque = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.updates = 0
+
+    def update(self, x: float) -> None:
+        values = self.values
+        values.append(x)
+        n = len(values)
+        delta = x - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (x - self.mean)
+        if n > self.window:
+            old = values.popleft()
+            n -= 1
+            delta = old - self.mean
+            self.mean -= delta / n
+            self.m2 -= delta * (old - self.mean)
+        self.updates += 1
+        if self.updates % self.RESYNC_EVERY == 0:
+            self._resync()
+
+    def _resync(self) -> None:
+        window = np.fromiter(self.values, dtype=np.float64)
+        self.mean = float(window.mean())
+        self.m2 = float(((window - self.mean) ** 2).sum())
+
+    def current_mean(self) -> float:
+        return self.mean if len(self.values) >= self.min_periods else NAN
+
+    def current_std(self) -> float:
+        n = len(self.values)
+        if n < self.min_periods or n < 2:
+            return NAN
+        return math.sqrt(max(self.m2, 0.0) / (n - 1))
+
+
+class RollingExtremaState:
+    """Max et min glissants en O(1) amorti (deques monotones)"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.index = -1
+        self.maxima: deque = deque()
+        self.minima: deque = deque()
+
+    def update(self, high: float, low: float) -> Tuple[float, float]:
+        self.index += 1
+        i = self.index
+        while self.maxima and self.maxima[-1][1] <= high:
+            self.maxima.pop()
+        self.maxima.append((i, high))
+        while self.minima and self.minima[-1][1] >= low:
+            self.minima.pop()
+        self.minima.append((i, low))
+        start = i - self.window + 1
+        if self.maxima[0][0] < start:
+            self.maxima.popleft()
+        if self.minima[0][0] < start:
+            self.minima.popleft()
+        if i < self.window - 1:
+            return NAN, NAN
+        return self.maxima[0][1], self.minima[0][1]
+
+
+# === INDICATEURS (une ou plusieurs colonnes de sortie) ===
+
+class Indicator:
+    """
+    Un indicateur produit `outputs` valeurs par bougie. L'instance déclarée dans la spec
+    ne sert que de modèle : le moteur en crée une copie neuve par paire via `fresh()`.
+    """
+
+    outputs = 1
+    params: Tuple[str, ...] = ()
+
+    def key(self) -> tuple:
+        return (type(self).__name__,) + tuple(getattr(self, name) for name in self.params)
+
+    def fresh(self) -> 'Indicator':
+        indicator = type(self)(*(getattr(self, name) for name in self.params))
+        indicator.reset()
+        return indicator
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+    def update(self, bar: Tuple[float, ...]) -> Tuple[float, ...]:
+        raise NotImplementedError
+
+
+class Ema(Indicator):
+    params = ('period', 'source')
+
+    def __init__(self, period: int, source: str = 'close'):
+        self.period = int(period)
+        self.source = source
+
+    def reset(self) -> None:
+        self._ema = EmaState(self.period)
+        self._src = SOURCES[self.source]
+
+    def update(self, bar):
+        return (self._ema.update(bar[self._src]),)
+
+
+class Sma(Indicator):
+    """Moyenne glissante (TA-Lib SMA, ou pandas rolling().mean() avec min_periods)"""
+
+    params = ('period', 'source', 'min_periods')
+
+    def __init__(self, period: int, source: str = 'close', min_periods: Optional[int] = None):
+        self.period = int(period)
+        self.source = source
+        self.min_periods = min_periods
+
+    def reset(self) -> None:
+        self._window = RollingWindowState(self.period, self.min_periods)
+        self._src = SOURCES[self.source]
+
+    def update(self, bar):
+        self._window.update(bar[self._src])
+        return (self._window.current_mean(),)
+
+
+class Rsi(Indicator):
+    params = ('period', 'source')
+
+    def __init__(self, period: int = 14, source: str = 'close'):
+        self.period = int(period)
+        self.source = source
+
+    def reset(self) -> None:
+        self._rsi = WilderRsiState(self.period)
+        self._src = SOURCES[self.source]
+
+    def update(self, bar):
+        return (self._rsi.update(bar[self._src]),)
+
+
+class Bollinger(Indicator):
+    """
+    Bandes de Bollinger façon qtpylib (min_periods=1, ddof=1) -> (upper, mid, lower).
+    min_periods=None : fenêtres complètes, comme rolling(window) et ind.rolling_stats.
+    """
+
+    outputs = 3
+    params = ('window', 'stds', 'min_periods')
+
+    def __init__(self, window: int = 20, stds: float = 2, min_periods: Optional[int] = 1):
+        self.window = int(window)
+        self.stds = float(stds)
+        self.min_periods = min_periods
+
+    def reset(self) -> None:
+        self._window = RollingWindowState(self.window, self.min_periods)
+
+    def update(self, bar):
+        self._window.update(bar[3])
+        mid, std = self._window.current_mean(), self._window.current_std()
+        return (mid + std * self.stds, mid, mid - std * self.stds)
+
+
+class ZScore(Indicator):
+    """(close - moyenne glissante) / écart-type glissant (ddof=1)"""
+
+    params = ('period',)
+
+    def __init__(self, period: int):
+        self.period = int(period)
+
+    def reset(self) -> None:
+        self._window = RollingWindowState(self.period)
+
+    def update(self, bar):
+        self._window.update(bar[3])
+        std = self._window.current_std()
+        if std != std:
+            return (NAN,)
+        deviation = bar[3] - self._window.current_mean()
+        if std == 0:
+            # Même convention que pandas : x / 0 -> +/-inf, 0 / 0 -> NaN
+            return (math.copysign(math.inf, deviation) if deviation else NAN,)
+        return (deviation / std,)
+
+
+class Macd(Indicator):
+    """
+    MACD TA-Lib -> (macd, macdsignal, macdhist). Comme TA-Lib, l'EMA rapide est amorcée
+    sur les `fast` dernières valeurs de la fenêtre d'amorçage de l'EMA lente.
+    """
+
+    outputs = 3
+    params = ('fast', 'slow', 'signal')
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = int(fast)
+        self.slow = int(slow)
+        self.signal = int(signal)
+
+    def reset(self) -> None:
+        self._fast, self._slow = min(self.fast, self.slow), max(self.fast, self.slow)
+        self._k_fast, self._k_slow = 2.0 / (self._fast + 1), 2.0 / (self._slow + 1)
+        self._seed: List[float] = []
+        self._ema_fast = self._ema_slow = NAN
+        self._signal = EmaState(self.signal)
+
+    def update(self, bar):
+        x = bar[3]
+        if len(self._seed) < self._slow:
+            self._seed.append(x)
+            if len(self._seed) < self._slow:
+                return (NAN, NAN, NAN)
+            self._ema_slow = sum(self._seed) / self._slow
+            self._ema_fast = sum(self._seed[-self._fast:]) / self._fast
+        else:
+            self._ema_fast = (x - self._ema_fast) * self._k_fast + self._ema_fast
+            self._ema_slow = (x - self._ema_slow) * self._k_slow + self._ema_slow
+        macd = self._ema_fast - self._ema_slow
+        signal = self._signal.update(macd)
+        if signal != signal:
+            return (NAN, NAN, NAN)
+        return (macd, signal, macd - signal)
+
+
+class WilliamsR(Indicator):
+    """Williams %R TA-Lib"""
+
+    params = ('period',)
+
+    def __init__(self, period: int = 14):
+        self.period = int(period)
+
+    def reset(self) -> None:
+        self._extrema = RollingExtremaState(self.period)
+
+    def update(self, bar):
+        highest, lowest = self._extrema.update(bar[1], bar[2])
+        if highest != highest:
+            return (NAN,)
+        diff = (highest - lowest) / -100.0
+        return ((highest - bar[3]) / diff if diff != 0 else 0.0,)
+
+
+class Stoch(Indicator):
+    """Stochastique lent TA-Lib (moyennes simples) -> (slowk, slowd)"""
+
+    outputs = 2
+    params = ('fastk', 'slowk', 'slowd')
+
+    def __init__(self, fastk: int = 5, slowk: int = 3, slowd: int = 3):
+        self.fastk = int(fastk)
+        self.slowk = int(slowk)
+        self.slowd = int(slowd)
+
+    def reset(self) -> None:
+        self._extrema = RollingExtremaState(self.fastk)
+        self._slowk = RollingWindowState(self.slowk)
+        self._slowd = RollingWindowState(self.slowd)
+
+    def update(self, bar):
+        highest, lowest = self._extrema.update(bar[1], bar[2])
+        if highest != highest:
+            return (NAN, NAN)
+        diff = (highest - lowest) / 100.0
+        self._slowk.update((bar[3] - lowest) / diff if diff != 0 else 0.0)
+        k = self._slowk.current_mean()
+        if k != k:
+            return (NAN, NAN)
+        self._slowd.update(k)
+        d = self._slowd.current_mean()
+        if d != d:
+            return (NAN, NAN)
+        return (k, d)
+
+
+# === MOTEUR ===
+
+Spec = Mapping[Union[str, Tuple[str, ...]], Indicator]
+
+
+def _dates_ns(dataframe: DataFrame) -> np.ndarray:
+    return dataframe['date'].values.astype('datetime64[ns]').view('int64')
+
+
+class _IndicatorStream:
+    """Etat d'un indicateur sur une paire / un timeframe + historique des bougies et des sorties"""
+
+    def __init__(self, indicator: Indicator, capacity: int):
+        self.state = indicator.fresh()
+        self.outputs = indicator.outputs
+        self.capacity = capacity
+        self.count = 0
+        # Plus longue fenêtre demandée : une stratégie à l'historique plus court ne la tronque pas
+        self.keep = 0
+        self.processed = 0
+        self.dates = np.empty(capacity, dtype=np.int64)
+        # Bougies traitées (OHLCV) : une bougie corrigée sous la même date invalide l'état
+        self.bars = np.empty((len(SOURCES), capacity), dtype=np.float64)
+        self.values = np.empty((self.outputs, capacity), dtype=np.float64)
+
+    def _reserve(self, rows: int) -> None:
+        if self.count + rows <= self.capacity:
+            return
+        # Ne garder que les `keep` dernières lignes (la fenêtre courante du dataframe)
+        drop = max(self.count - self.keep, 0)
+        if drop:
+            self.dates[:self.count - drop] = self.dates[drop:self.count]
+            self.bars[:, :self.count - drop] = self.bars[:, drop:self.count]
+            self.values[:, :self.count - drop] = self.values[:, drop:self.count]
+            self.count -= drop
+        if self.count + rows > self.capacity:
+            self.capacity = max(2 * self.capacity, self.count + rows)
+            dates = np.empty(self.capacity, dtype=np.int64)
+            bars = np.empty((len(SOURCES), self.capacity), dtype=np.float64)
+            values = np.empty((self.outputs, self.capacity), dtype=np.float64)
+            dates[:self.count] = self.dates[:self.count]
+            bars[:, :self.count] = self.bars[:, :self.count]
+            values[:, :self.count] = self.values[:, :self.count]
+            self.dates, self.bars, self.values = dates, bars, values
+
+    def feed(self, dates: np.ndarray, bars: np.ndarray) -> None:
+        """Traite les bougies `bars` (OHLCV, une colonne par bougie) datées `dates`"""
+        self._reserve(len(dates))
+        values = self.values
+        update = self.state.update
+        row = self.count
+        self.bars[:, row:row + len(dates)] = bars
+        for bar in zip(*bars.tolist()):
+            values[:, row] = update(bar)
+            row += 1
+        self.dates[self.count:row] = dates
+        self.count = row
+        self.processed += len(dates)
+
+    def last_date(self) -> Optional[int]:
+        return int(self.dates[self.count - 1]) if self.count else None
+
+
+def _bars(dataframe: DataFrame) -> np.ndarray:
+    """OHLCV du dataframe, une ligne par source (ordre de SOURCES)"""
+    return np.array([dataframe[col].to_numpy(dtype=np.float64) for col in SOURCES])
+
+
+class IncrementalEngine:
+    """
+    Calcule les indicateurs d'une spec en ne traitant que les nouvelles bougies.
+    Chaque entrée de la spec a son flux, sous la clé (paire, timeframe, indicateur et
+    paramètres) : les stratégies d'un même processus qui déclarent le même indicateur
+    (shared_engine) lisent la même série au lieu de la recalculer, quels que soient les
+    noms de colonnes. Un flux est réinitialisé si le dataframe ne prolonge pas l'historique
+    déjà traité (rechargement, trou de données, bougie déjà traitée dont l'OHLCV a changé
+    sous la même date).
+    """
+
+    def __init__(self):
+        self._streams: Dict[tuple, _IndicatorStream] = {}
+        self._lock = Lock()
+        # Flux déjà à jour (aucune bougie à traiter) / flux prolongés ou recalculés
+        self.hits = 0
+        self.misses = 0
+
+    def update(self, pair: str, dataframe: DataFrame, spec: Spec,
+               timeframe: Optional[str] = None) -> Dict[str, np.ndarray]:
+        dates = _dates_ns(dataframe)
+        bars = _bars(dataframe)
+        result = {}
+        with self._lock:
+            for columns, indicator in spec.items():
+                names = (columns,) if isinstance(columns, str) else tuple(columns)
+                if len(names) != indicator.outputs:
+                    raise ValueError(f"{type(indicator).__name__} produit {indicator.outputs} colonne(s), "
+                                     f"{len(names)} nommée(s)")
+                values = self._update(pair, timeframe, indicator, dates, bars)
+                result.update(zip(names, values))
+        return result
+
+    def _update(self, pair: str, timeframe: Optional[str], indicator: Indicator, dates: np.ndarray,
+                bars: np.ndarray) -> np.ndarray:
+        length = len(dates)
+        key = (pair, timeframe, indicator.key())
+        stream = self._streams.get(key)
+
+        start = 0
+        if stream is not None and length:
+            start = self._resume_position(stream, dates, bars)
+        if start == 0 or stream is None:
+            logger.debug(f"{pair} {indicator.key()} : état incrémental réinitialisé ({length} bougies)")
+            stream = _IndicatorStream(indicator, capacity=max(2 * length, 1024))
+            self._streams[key] = stream
+
+        stream.keep = max(stream.keep, length)
+        if start < length:
+            self.misses += 1
+            stream.feed(dates[start:], bars[:, start:])
+        else:
+            self.hits += 1
+
+        first = stream.count - length
+        return stream.values[:, first:stream.count].copy()
+
+    @staticmethod
+    def _resume_position(stream: _IndicatorStream, dates: np.ndarray, bars: np.ndarray) -> int:
+        """Première ligne du dataframe à traiter, ou 0 s'il faut repartir de zéro"""
+        history = stream.dates[:stream.count]
+        first = np.searchsorted(history, dates[0])
+        if first >= stream.count or history[first] != dates[0]:
+            return 0
+        overlap = stream.count - first
+        if overlap > len(dates) or not np.array_equal(history[first:], dates[:overlap]):
+            return 0
+        # Bougie en cours rafraîchie ou corrigée par l'exchange : les états ne se rembobinent pas
+        if not np.array_equal(stream.bars[:, first:stream.count], bars[:, :overlap], equal_nan=True):
+            return 0
+        return overlap
+
+    def reset(self, pair: Optional[str] = None) -> None:
+        with self._lock:
+            if pair is None:
+                self._streams.clear()
+            else:
+                for key in [key for key in self._streams if key[0] == pair]:
+                    del self._streams[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Compteurs du moteur (pour les logs ou l'API)"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'streams': len(self._streams)}
+
+
+# Instance partagée par toutes les stratégies chargées dans le processus
+shared_engine = IncrementalEngine()
+
+
+def max_deviation(streamed: Mapping[str, np.ndarray], dataframe: DataFrame, skip: int = 0) -> Dict[str, float]:
+    """
+    Écart absolu maximal entre les colonnes calculées en flux et celles du dataframe
+    recalculé en entier (NaN alignés ignorés), en sautant les `skip` premières bougies.
+    """
+    deviations = {}
+    for column, values in streamed.items():
+        expected = dataframe[column].to_numpy(dtype=np.float64)[skip:]
+        diff = np.abs(values[skip:] - expected)
+        both_nan = np.isnan(values[skip:]) & np.isnan(expected)
+        diff = np.where(both_nan, 0.0, np.where(np.isnan(diff), np.inf, diff))
+        deviations[column] = float(diff.max(initial=0.0))
+    return deviations
@@ -0,0 +1,246 @@
+"""
+Cache d'indicateurs partagé entre stratégies
+
+Plusieurs stratégies tournant dans le même processus (backtesting avec
+--strategy-list, hyperopt, hôte multi-stratégies) recalculent les mêmes
+RSI(14), EMA(12/26), MACD, BBANDS(20, 2) et SMA de volume sur les mêmes paires.
+Ce module mémorise chaque résultat sous la clé
+(paire, timeframe, indicateur, paramètres, bougies) et le restitue tel quel.
+
+La "bougie" de la clé est la date de la dernière bougie, complétée par la date
+de la première et le nombre de lignes : les indicateurs récursifs (EMA, RSI)
+dépendent du point de départ de l'historique, deux fenêtres finissant sur la
+même bougie ne sont donc pas interchangeables. Une empreinte du contenu (CRC32
+des 64 dernières clôtures) distingue en plus deux fenêtres de mêmes dates dont
+les prix diffèrent (bougie corrigée par l'exchange, données rechargées).
+
+Utilisation dans populate_indicators :
+
+    ind = shared_indicators.bind(dataframe, metadata['pair'], self.timeframe)
+    dataframe['rsi'] = ind.talib('RSI', timeperiod=14)
+    macd, macdsignal, macdhist = ind.talib('MACD')
+    upper, mid, lower = ind.bollinger(window=20, stds=2)
+    stats = ind.rolling_stats(window=20, stds=2, extrema_window=14)
+"""
+import logging
+import zlib
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+from pandas import DataFrame
+
+import talib.abstract as ta
+
+from rolling_stats import RollingStats, rolling_stats
+
+
+logger = logging.getLogger(__name__)
+
+CachedValue = Union[np.ndarray, Tuple[np.ndarray, ...]]
+
+# Nombre de clôtures prises dans l'empreinte des bougies
+FINGERPRINT_ROWS = 64
+
+
+def _freeze(value: CachedValue) -> CachedValue:
+    """Rend les tableaux en lecture seule : ils sont partagés entre stratégies"""
+    arrays = value if isinstance(value, tuple) else (value,)
+    for array in arrays:
+        array.flags.writeable = False
+    return value
+
+
+def _nbytes(value: CachedValue) -> int:
+    if isinstance(value, tuple):
+        return sum(array.nbytes for array in value)
+    return value.nbytes
+
+
+def indicator_key(pair: str, timeframe: str, candles: tuple, name: str, params: tuple) -> tuple:
+    """Clé d'un indicateur dans le cache (partagée avec le calcul groupé de batch_indicators)"""
+    return (pair, timeframe, candles, name, params)
+
+
+def talib_params(price: Optional[str], params: Dict[str, object]) -> tuple:
+    """Paramètres d'un appel TA-Lib tels qu'ils apparaissent dans la clé"""
+    return (price, tuple(sorted(params.items())))
+
+
+def candles_fingerprint(dataframe: DataFrame) -> int:
+    """Empreinte du contenu : CRC32 des FINGERPRINT_ROWS dernières clôtures"""
+    if 'close' not in dataframe.columns:
+        return 0
+    tail = np.ascontiguousarray(dataframe['close'].to_numpy()[-FINGERPRINT_ROWS:], dtype=np.float64)
+    return zlib.crc32(tail.tobytes())
+
+
+def candles_key(dataframe: DataFrame) -> tuple:
+    """Identifie la fenêtre de bougies : (nombre de lignes, première date, dernière date, empreinte)"""
+    if dataframe.empty:
+        return (0, None, None, 0)
+    dates = dataframe['date'] if 'date' in dataframe.columns else dataframe.index.to_series()
+    return (len(dataframe), dates.iloc[0], dates.iloc[-1], candles_fingerprint(dataframe))
+
+
+class IndicatorCache:
+    """
+    Cache LRU borné en nombre d'entrées et en octets, avec compteurs hit/miss
+    """
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[tuple, CachedValue]' = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key: tuple, compute: Callable[[], CachedValue]) -> CachedValue:
+        """Retourne la valeur en cache ou la calcule, la mémorise et la retourne"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        # Calcul hors verrou : les indicateurs TA-Lib libèrent le GIL
+        value = _freeze(compute())
+        size = _nbytes(value)
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = value
+                self._bytes += size
+                self._evict()
+        return value
+
+    def put(self, key: tuple, value: CachedValue) -> None:
+        """Mémorise une valeur calculée ailleurs (ex: calcul groupé sur toute la whitelist)"""
+        value = _freeze(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= _nbytes(previous)
+            self._entries[key] = value
+            self._bytes += _nbytes(value)
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, value = self._entries.popitem(last=False)
+            self._bytes -= _nbytes(value)
+            self.evictions += 1
+
+    def bind(self, dataframe: DataFrame, pair: str, timeframe: str) -> 'CachedIndicators':
+        """Retourne une vue du cache liée à un dataframe (paire, timeframe, bougies)"""
+        return CachedIndicators(self, dataframe, pair, timeframe)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Compteurs du cache (pour les logs ou l'API)"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+
+class CachedIndicators:
+    """
+    Indicateurs d'un dataframe donné, calculés une seule fois par processus
+    """
+
+    def __init__(self, cache: IndicatorCache, dataframe: DataFrame, pair: str, timeframe: str):
+        self.cache = cache
+        self.dataframe = dataframe
+        self._prefix = (pair, timeframe, candles_key(dataframe))
+
+    def _key(self, name: str, params: tuple) -> tuple:
+        return indicator_key(*self._prefix, name, params)
+
+    def _inputs(self) -> Dict[str, np.ndarray]:
+        return {
+            col: self.dataframe[col].to_numpy(dtype=np.float64)
+            for col in ('open', 'high', 'low', 'close', 'volume')
+        }
+
+    def talib(self, name: str, price: Optional[str] = None, **params) -> CachedValue:
+        """
+        Fonction TA-Lib quelconque (API abstraite), ex: talib('RSI', timeperiod=14).
+        Retourne un tableau, ou un tuple dans l'ordre des sorties TA-Lib
+        (MACD -> macd, macdsignal, macdhist ; STOCH -> slowk, slowd ; BBANDS -> upper, middle, lower).
+        """
+        def compute() -> CachedValue:
+            kwargs = dict(params)
+            if price is not None:
+                kwargs['price'] = price
+            result = ta.Function(name)(self._inputs(), **kwargs)
+            if isinstance(result, list):
+                return tuple(np.asarray(out, dtype=np.float64) for out in result)
+            return np.asarray(result, dtype=np.float64)
+
+        return self.cache.get_or_compute(self._key(name, talib_params(price, params)), compute)
+
+    def rolling_mean(self, column: str, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+        """Equivalent de dataframe[column].rolling(window, min_periods).mean()"""
+        def compute() -> np.ndarray:
+            series = self.dataframe[column].rolling(window=window, min_periods=min_periods).mean()
+            return series.to_numpy(dtype=np.float64)
+
+        return self.cache.get_or_compute(self._key('rolling_mean', (column, window, min_periods)), compute)
+
+    def rolling_std(self, column: str, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+        """Equivalent de dataframe[column].rolling(window, min_periods).std() (ddof=1)"""
+        def compute() -> np.ndarray:
+            series = self.dataframe[column].rolling(window=window, min_periods=min_periods).std()
+            return series.to_numpy(dtype=np.float64)
+
+        return self.cache.get_or_compute(self._key('rolling_std', (column, window, min_periods)), compute)
+
+    def bollinger(self, window: int = 20, stds: float = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Bandes de Bollinger identiques à qtpylib.bollinger_bands (min_periods=1, écart-type ddof=1).
+        Retourne (upper, mid, lower).
+        """
+        def compute() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+            mid = self.rolling_mean('close', window, min_periods=1)
+            std = self.rolling_std('close', window, min_periods=1)
+            return (mid + std * stds, mid, mid - std * stds)
+
+        return self.cache.get_or_compute(self._key('bollinger', (window, stds)), compute)
+
+    def rolling_stats(self, window: int = 20, stds: float = 2, min_periods: Optional[int] = None,
+                      extrema_window: Optional[int] = None) -> RollingStats:
+        """
+        Moyenne, écart-type, bandes, %B, largeur et z-score de la clôture, plus haut / plus bas
+        et Williams %R sur `extrema_window` bougies, en un parcours (voir rolling_stats).
+        Fenêtres complètes par défaut, comme rolling(window) ; min_periods=1 pour les bandes de qtpylib.
+        """
+        def compute() -> np.ndarray:
+            df = self.dataframe
+            return rolling_stats(df['close'].to_numpy(dtype=np.float64), window, stds, min_periods,
+                                 high=df['high'].to_numpy(dtype=np.float64),
+                                 low=df['low'].to_numpy(dtype=np.float64),
+                                 extrema_window=extrema_window).values
+
+        key = self._key('rolling_stats', (window, stds, min_periods, extrema_window))
+        return RollingStats(self.cache.get_or_compute(key, compute))
+
+
+# Instance partagée par toutes les stratégies chargées dans le processus
+shared_indicators = IndicatorCache()
@@ -0,0 +1,192 @@
+"""
+Graphe de dépendances des indicateurs : seules les colonnes lues sont calculées
+
+Plusieurs stratégies calculaient des indicateurs que leurs conditions ne lisent
+jamais (ATR, STOCH et MACD dans HyperoptStrategy, CCI / ROC / ADX / EMA dans
+PowerTowerStrategy, ATR / BBANDS / STOCH pour les deux profils de
+MultiExchangeStrategy).
+
+Chaque indicateur est déclaré avec les colonnes qu'il produit, celles qu'il lit
+et son coût estimé (µs pour 1000 bougies, mesuré sur TA-Lib). Les colonnes
+racines sont celles des règles d'entrée / sortie (signal_rules), plus celles de
+plot_config en mode plot ; seule leur fermeture transitive est calculée, dans
+l'ordre de déclaration. De même, un timeframe informatif n'est fusionné que si
+l'une de ses colonnes ('<colonne>_<tf>') est lue (needed_timeframes).
+
+    indicator_graph = IndicatorGraph(
+        Indicator('rsi', ['rsi'], lambda df, ind, p: ind.talib('RSI', timeperiod=14), cost=10),
+        Indicator('bb_percent', ['bb_percent'], lambda df, ind, p: ..., inputs=['close', 'bb_lowerband', 'bb_upperband']),
+    )
+    columns = needed_columns(self, self.entry_rules, self.exit_rules)
+    dataframe = self.indicator_graph.populate(dataframe, ind, self, columns)
+    for timeframe in needed_timeframes(columns, self.informative_timeframes):
+        dataframe = self.informative_cache.merge(dataframe, metadata['pair'], timeframe, self.populate_informative)
+
+report() donne les indicateurs ignorés et le temps économisé : temps mesuré
+lorsque l'indicateur a déjà été calculé ailleurs (autre profil, autre
+stratégie du même graphe), coût déclaré sinon.
+"""
+import logging
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Sequence, Set, Tuple
+
+from pandas import DataFrame
+
+from freqtrade.enums import RunMode
+
+
+logger = logging.getLogger(__name__)
+
+# Colonnes fournies par l'exchange : toujours présentes
+BASE_COLUMNS = frozenset(('date', 'open', 'high', 'low', 'close', 'volume'))
+
+# Nombre d'ensembles de colonnes racines mémorisés
+MAX_CLOSURES = 32
+
+
+class Indicator:
+    """
+    Indicateur du graphe : `compute(dataframe, ind, params)` retourne la valeur de la
+    colonne produite, ou un tuple de valeurs dans l'ordre de `columns`.
+    `batch` liste les BatchRequest à précalculer sur la whitelist (voir batch_indicators).
+    """
+
+    def __init__(self, name: str, columns: Sequence[str], compute: Callable[[DataFrame, Any, Any], Any],
+                 inputs: Sequence[str] = ('close',), cost: float = 10.0, batch: Sequence = ()):
+        self.name = name
+        self.columns = tuple(columns)
+        self.compute = compute
+        self.inputs = tuple(inputs)
+        self.cost = cost
+        self.batch = tuple(batch)
+
+    def __repr__(self) -> str:
+        return f"Indicator({self.name!r}, {list(self.columns)})"
+
+
+def plot_columns(plot_config: Dict) -> Set[str]:
+    """Colonnes tracées par plot_config (courbe principale et sous-graphes)"""
+    columns = set(plot_config.get('main_plot', {}))
+    for subplot in plot_config.get('subplots', {}).values():
+        columns.update(subplot)
+    return columns
+
+
+def needed_columns(strategy, *rules) -> FrozenSet[str]:
+    """Colonnes lues par les règles, plus celles de plot_config lorsque la stratégie trace (plot-dataframe)"""
+    columns = set()
+    for rule_set in rules:
+        columns.update(rule_set.columns)
+    dp = getattr(strategy, 'dp', None)
+    if dp is not None and dp.runmode == RunMode.PLOT:
+        columns.update(plot_columns(strategy.plot_config))
+    return frozenset(columns)
+
+
+def needed_timeframes(columns: Iterable[str], timeframes: Sequence[str]) -> Tuple[str, ...]:
+    """Timeframes informatifs dont au moins une colonne ('<colonne>_<tf>') est lue"""
+    return tuple(timeframe for timeframe in timeframes
+                 if any(column.endswith(f'_{timeframe}') for column in columns))
+
+
+class IndicatorGraph:
+    """Registre d'indicateurs ; calcule la fermeture des colonnes demandées (voir le module)"""
+
+    def __init__(self, *indicators: Indicator):
+        self.indicators = indicators
+        self.producers: Dict[str, Indicator] = {}
+        for indicator in indicators:
+            for column in indicator.inputs:
+                if column not in BASE_COLUMNS and column not in self.producers:
+                    raise ValueError(f"{indicator.name} lit {column!r}, qui n'est produit par aucun indicateur déclaré avant")
+            for column in indicator.columns:
+                self.producers[column] = indicator
+        self._closures: Dict[FrozenSet[str], Tuple[Indicator, ...]] = {}
+        self._lock = Lock()
+        self._reported: Set[FrozenSet[str]] = set()
+        self.computed: Dict[str, int] = {}
+        self.skipped: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+        self.candles: Dict[str, int] = {}
+        self.skipped_candles: Dict[str, int] = {}
+
+    def closure(self, columns: Iterable[str]) -> Tuple[Indicator, ...]:
+        """Indicateurs nécessaires aux colonnes demandées, dans l'ordre de déclaration"""
+        columns = frozenset(columns)
+        needed = self._closures.get(columns)
+        if needed is None:
+            names: Set[str] = set()
+            pending = [column for column in columns if column in self.producers]
+            while pending:
+                indicator = self.producers[pending.pop()]
+                if indicator.name not in names:
+                    names.add(indicator.name)
+                    pending.extend(column for column in indicator.inputs if column in self.producers)
+            needed = tuple(indicator for indicator in self.indicators if indicator.name in names)
+            if len(self._closures) >= MAX_CLOSURES:
+                self._closures.clear()
+            self._closures[columns] = needed
+        return needed
+
+    def columns_of(self, names: Iterable[str]) -> FrozenSet[str]:
+        """Colonnes produites par les indicateurs nommés"""
+        names = set(names)
+        return frozenset(column for indicator in self.indicators if indicator.name in names
+                         for column in indicator.columns)
+
+    def batch_spec(self, columns: Iterable[str]) -> tuple:
+        """Requêtes de calcul groupé des indicateurs nécessaires"""
+        return tuple(request for indicator in self.closure(columns) for request in indicator.batch)
+
+    def populate(self, dataframe: DataFrame, ind: Any, params: Any, columns: Iterable[str]) -> DataFrame:
+        """Calcule les indicateurs nécessaires aux colonnes demandées"""
+        columns = frozenset(columns)
+        needed = self.closure(columns)
+        size = len(dataframe)
+        timings = {}
+        for indicator in needed:
+            start = time.perf_counter()
+            values = indicator.compute(dataframe, ind, params)
+            if len(indicator.columns) == 1:
+                dataframe[indicator.columns[0]] = values
+            else:
+                for column, value in zip(indicator.columns, values):
+                    dataframe[column] = value
+            timings[indicator.name] = time.perf_counter() - start
+
+        skipped = [indicator.name for indicator in self.indicators if indicator not in needed]
+        with self._lock:
+            for name, seconds in timings.items():
+                self.computed[name] = self.computed.get(name, 0) + 1
+                self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+                self.candles[name] = self.candles.get(name, 0) + size
+            for name in skipped:
+                self.skipped[name] = self.skipped.get(name, 0) + 1
+                self.skipped_candles[name] = self.skipped_candles.get(name, 0) + size
+            first = columns not in self._reported
+            self._reported.add(columns)
+        if first and skipped:
+            logger.info(f"Indicateurs calculés : {', '.join(indicator.name for indicator in needed) or 'aucun'} ; "
+                        f"non lus par les règles, ignorés : {', '.join(skipped)}")
+        return dataframe
+
+    def saved_seconds(self, name: str) -> float:
+        """Temps économisé sur un indicateur ignoré (mesuré si possible, coût déclaré sinon)"""
+        candles = self.skipped_candles.get(name, 0)
+        if self.candles.get(name):
+            return candles * self.seconds[name] / self.candles[name]
+        indicator = next(indicator for indicator in self.indicators if indicator.name == name)
+        return candles / 1000 * indicator.cost * 1e-6
+
+    def report(self) -> Dict[str, Any]:
+        """Indicateurs ignorés (nombre d'appels, temps économisé estimé) et temps des indicateurs calculés"""
+        with self._lock:
+            skipped = {name: {'calls': calls, 'saved_seconds': self.saved_seconds(name)}
+                       for name, calls in self.skipped.items()}
+            computed = {name: {'calls': calls, 'seconds': self.seconds[name]} for name, calls in self.computed.items()}
+        return {
+            'skipped': skipped,
+            'computed': computed,
+            'saved_seconds': sum(entry['saved_seconds'] for entry in skipped.values()),
+        }
@@ -0,0 +1,145 @@
+"""
+Cache des timeframes informatifs, invalidé à la clôture d'une bougie supérieure
+
+Pour chaque paire et chaque bougie 5m, les stratégies multi-timeframe appelaient
+dp.get_pair_dataframe, recalculaient RSI/EMA/MOM/tendance sur le timeframe
+supérieur puis faisaient un merge_informative_pair qui recopie tout le
+dataframe. Or une bougie 1h ne change qu'une fois toutes les 12 bougies 5m.
+
+Ce cache conserve, par (paire, timeframe informatif) :
+- les colonnes informatives calculées et renommées comme merge_informative_pair
+  ('<colonne>_<tf>', date_<tf> comprise) ;
+- l'index d'alignement bougie de base -> bougie informative (dernière bougie
+  informative clôturée, donc sans biais d'anticipation).
+
+Tant qu'aucune nouvelle bougie informative n'a clôturé, ni le DataProvider, ni
+les indicateurs, ni le merge ne sont refaits : seules les colonnes mises en
+cache sont recopiées dans le dataframe via l'index d'alignement.
+"""
+import logging
+from datetime import timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from freqtrade.enums import RunMode
+from freqtrade.exchange import timeframe_to_minutes, timeframe_to_prev_date
+
+from indicator_cache import candles_key
+
+
+logger = logging.getLogger(__name__)
+
+PopulateInformative = Callable[[DataFrame, str, str], DataFrame]
+
+
+def _dates_ns(dates: pd.Series) -> np.ndarray:
+    return dates.values.astype('datetime64[ns]').view('int64')
+
+
+class _InformativeEntry:
+    """Colonnes informatives calculées pour une paire et un timeframe"""
+
+    def __init__(self, candles: tuple, last_date: pd.Timestamp, columns: Dict[str, object],
+                 date_merge: np.ndarray):
+        self.candles = candles
+        self.last_date = last_date
+        self.columns = columns
+        self.date_merge = date_merge
+        self.alignment_key: Optional[tuple] = None
+        self.alignment: Optional[np.ndarray] = None
+
+    def align(self, dataframe: DataFrame) -> np.ndarray:
+        """Position de la dernière bougie informative disponible pour chaque bougie de base (-1 si aucune)"""
+        key = candles_key(dataframe)
+        if key != self.alignment_key:
+            base_dates = _dates_ns(dataframe['date'])
+            self.alignment = np.searchsorted(self.date_merge, base_dates, side='right') - 1
+            self.alignment_key = key
+        return self.alignment
+
+
+class InformativeCache:
+    """
+    Cache des timeframes informatifs d'une stratégie.
+
+        self.informative_cache = InformativeCache(self)   # dans bot_start
+        dataframe = self.informative_cache.merge(dataframe, metadata['pair'], '1h', self.populate_informative)
+    """
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self._entries: Dict[Tuple[str, str], _InformativeEntry] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _expected_last_date(self, dataframe: DataFrame, timeframe: str) -> pd.Timestamp:
+        """Date d'ouverture de la dernière bougie informative clôturée à la fin de la bougie de base"""
+        base_close = dataframe['date'].iloc[-1] + timedelta(minutes=timeframe_to_minutes(self.strategy.timeframe))
+        return timeframe_to_prev_date(timeframe, base_close) - timedelta(minutes=timeframe_to_minutes(timeframe))
+
+    def _is_live(self) -> bool:
+        return self.strategy.dp.runmode in (RunMode.LIVE, RunMode.DRY_RUN)
+
+    def _prepare(self, informative: DataFrame, pair: str, timeframe: str,
+                 populate: PopulateInformative) -> _InformativeEntry:
+        """Calcule les colonnes informatives et leur date de fusion (mêmes règles que merge_informative_pair)"""
+        candles = candles_key(informative)
+        informative = populate(informative, pair, timeframe)
+        minutes_inf = timeframe_to_minutes(timeframe)
+        minutes = timeframe_to_minutes(self.strategy.timeframe)
+        if minutes > minutes_inf:
+            raise ValueError("Tried to merge a faster timeframe to a slower timeframe.")
+        date_merge = informative['date'] + pd.to_timedelta(minutes_inf - minutes, 'm')
+        columns = {f'{col}_{timeframe}': informative[col].array for col in informative.columns}
+        return _InformativeEntry(candles, informative['date'].iloc[-1], columns, _dates_ns(date_merge))
+
+    def merge(self, dataframe: DataFrame, pair: str, timeframe: str,
+              populate: PopulateInformative) -> DataFrame:
+        """
+        Equivalent de merge_informative_pair(dataframe, populate(informative), ..., ffill=True),
+        sans recalcul tant que la bougie informative n'a pas changé.
+        Retourne le dataframe inchangé si aucune donnée informative n'est disponible.
+        """
+        if dataframe.empty:
+            return dataframe
+        key = (pair, timeframe)
+        entry = self._entries.get(key)
+
+        # En live, inutile d'interroger le DataProvider tant qu'aucune bougie supérieure n'a clôturé
+        if entry is None or not self._is_live() or entry.last_date != self._expected_last_date(dataframe, timeframe):
+            informative = self.strategy.dp.get_pair_dataframe(pair=pair, timeframe=timeframe)
+            if informative.empty:
+                logger.warning(f"Pas de données informatives pour {pair} en {timeframe}")
+                return dataframe
+            if entry is None or entry.candles != candles_key(informative):
+                logger.debug(f"{pair} {timeframe} : nouvelle bougie informative, recalcul")
+                entry = self._prepare(informative, pair, timeframe, populate)
+                self._entries[key] = entry
+                self.misses += 1
+            else:
+                self.hits += 1
+        else:
+            self.hits += 1
+
+        return self._apply(dataframe, entry)
+
+    @staticmethod
+    def _apply(dataframe: DataFrame, entry: _InformativeEntry) -> DataFrame:
+        positions = entry.align(dataframe)
+        merged = DataFrame(
+            {col: pd.api.extensions.take(values, positions, allow_fill=True)
+             for col, values in entry.columns.items()},
+            index=dataframe.index,
+        )
+        # merge_informative_pair(ffill=True) propage aussi les trous des colonnes informatives
+        merged = merged.ffill()
+        existing = [col for col in merged.columns if col in dataframe.columns]
+        if existing:
+            dataframe = dataframe.drop(columns=existing)
+        return pd.concat([dataframe, merged], axis=1)
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
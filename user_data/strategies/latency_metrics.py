@@ -0,0 +1,238 @@
+"""
+Mesure des phases de la stratégie, exposée au format Prometheus
+
+diagnose-trading.sh ne voit un bot qu'à travers ses logs ("enter_long",
+"Order created") : aucun temps pour populate_indicators, le calcul des
+signaux, la fusion des informatifs, custom_stoploss ou custom_exit.
+
+Une fois branché, chaque phase est chronométrée par stratégie et par paire :
+- histogramme des durées (`cyptrade_phase_seconds`, nombre d'appels compris) :
+  populate_indicators, populate_entry_trend, populate_exit_trend,
+  populate_informative, informative_merge (informative_cache de la
+  stratégie), custom_stoploss, custom_exit ;
+- taille du dataframe rendu par les phases populate_* (lignes, colonnes,
+  octets hors contenu des colonnes objet) ;
+- compteurs des caches partagés du processus (candle_store, book_cache,
+  stream_feed) lorsqu'ils sont branchés.
+
+Activation dans la configuration du bot (dry-run / live) :
+
+    "metrics": {"enabled": true}
+
+puis à la fin de bot_start (voir shared_feeds) :
+
+    attach_shared(self)
+
+Les mesures sont servies sur http://<listen_ip_address>:<port>/metrics, le port
+valant par défaut celui de l'api_server + 1000 (8080 -> 9080). Désactivé, rien
+n'est enveloppé : aucun coût sur le chemin critique.
+"""
+import functools
+import logging
+import sys
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pandas import DataFrame
+
+from freqtrade.enums import RunMode
+from freqtrade.strategy import IStrategy
+
+
+logger = logging.getLogger(__name__)
+
+# Bornes des histogrammes (secondes)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+PORT_OFFSET = 1000
+DEFAULT_PORT = 9080
+
+DATAFRAME_PHASES = ('populate_indicators', 'populate_entry_trend', 'populate_exit_trend')
+CALLBACK_PHASES = ('custom_stoploss', 'custom_exit')
+# Caches partagés exportés : module, instance
+SHARED_CACHES = (('candle_store', 'shared_candles'), ('book_cache', 'shared_books'),
+                 ('stream_feed', 'shared_stream'))
+
+
+class Histogram:
+    """Histogramme cumulable au format Prometheus"""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class LatencyMetrics:
+    """Mesures du processus (toutes stratégies) et leur serveur HTTP"""
+
+    def __init__(self):
+        # (stratégie, phase, paire) -> histogramme / (lignes, colonnes, octets)
+        self.phases: Dict[Tuple[str, str, str], Histogram] = {}
+        self.frames: Dict[Tuple[str, str, str], Tuple[int, int, int]] = {}
+        self.server: Optional[ThreadingHTTPServer] = None
+        self._attached: List[str] = []
+        # Bots (threads de l'hôte) et serveur HTTP : mesures et rendu sous le même verrou
+        self._lock = threading.Lock()
+
+    # -- mesure ------------------------------------------------------------------
+
+    def observe(self, strategy: str, phase: str, pair: str, seconds: float) -> None:
+        key = (strategy, phase, pair)
+        with self._lock:
+            histogram = self.phases.get(key)
+            if histogram is None:
+                histogram = self.phases[key] = Histogram()
+            histogram.observe(seconds)
+
+    def _timed(self, strategy: str, phase: str, func: Callable, pair_of: Callable,
+               frame: bool = False) -> Callable:
+        perf_counter = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            pair = pair_of(args, kwargs)
+            start = perf_counter()
+            result = func(*args, **kwargs)
+            self.observe(strategy, phase, pair, perf_counter() - start)
+            if frame and isinstance(result, DataFrame):
+                sizes = (len(result), len(result.columns), int(result.memory_usage(index=True, deep=False).sum()))
+                with self._lock:
+                    self.frames[(strategy, phase, pair)] = sizes
+            return result
+
+        return wrapper
+
+    def attach(self, strategy) -> bool:
+        """Enveloppe les phases de la stratégie si "metrics" est activé ; démarre le serveur"""
+        settings = strategy.config.get('metrics') or {}
+        dp = getattr(strategy, 'dp', None)
+        if not settings.get('enabled') or dp is None or dp.runmode not in (RunMode.LIVE, RunMode.DRY_RUN):
+            return False
+        if getattr(strategy, '_phase_metrics', False):
+            return True
+        strategy._phase_metrics = True
+        name = strategy.get_strategy_name()
+
+        def pair_of_metadata(args, kwargs):
+            return (kwargs.get('metadata') or args[1])['pair']
+
+        def pair_argument(args, kwargs):
+            return kwargs['pair'] if 'pair' in kwargs else args[0]
+
+        def pair_of_informative(args, kwargs):
+            return kwargs['pair'] if 'pair' in kwargs else args[1]
+
+        for phase in DATAFRAME_PHASES:
+            setattr(strategy, phase, self._timed(name, phase, getattr(strategy, phase), pair_of_metadata,
+                                                 frame=True))
+        for phase in CALLBACK_PHASES:
+            # Callbacks non redéfinis : freqtrade ne les appelle pas ou ils ne font rien
+            if getattr(type(strategy), phase) is not getattr(IStrategy, phase):
+                setattr(strategy, phase, self._timed(name, phase, getattr(strategy, phase), pair_argument))
+        if hasattr(strategy, 'populate_informative'):
+            strategy.populate_informative = self._timed(name, 'populate_informative',
+                                                        strategy.populate_informative, pair_of_informative)
+        informative_cache = getattr(strategy, 'informative_cache', None)
+        if informative_cache is not None:
+            informative_cache.merge = self._timed(name, 'informative_merge', informative_cache.merge,
+                                                  pair_of_informative)
+        if name not in self._attached:
+            self._attached.append(name)
+        self._serve(strategy.config, settings)
+        logger.info(f"Mesure des phases de {name} activée")
+        return True
+
+    # -- exposition --------------------------------------------------------------
+
+    def _serve(self, config: dict, settings: dict) -> None:
+        if self.server is not None:
+            return
+        api_server = config.get('api_server') or {}
+        host = settings.get('listen_ip_address', api_server.get('listen_ip_address', '127.0.0.1'))
+        port = settings.get('port') or (api_server['listen_port'] + PORT_OFFSET
+                                        if api_server.get('listen_port') else DEFAULT_PORT)
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self.server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as error:
+            logger.warning(f"Mesures non exposées, port {host}:{port} indisponible : {error}")
+            return
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='metrics', daemon=True).start()
+        logger.info(f"Mesures Prometheus sur http://{host}:{port}/metrics")
+
+    def render(self) -> str:
+        # Copie cohérente (compteurs, somme et total d'un même histogramme) prise sous le verrou
+        with self._lock:
+            phases = [(key, list(histogram.counts), histogram.sum, histogram.count)
+                      for key, histogram in self.phases.items()]
+            frames = dict(self.frames)
+        lines = ['# HELP cyptrade_phase_seconds Durée des phases de la stratégie par paire',
+                 '# TYPE cyptrade_phase_seconds histogram']
+        for (strategy, phase, pair), counts, total, count in sorted(phases):
+            labels = f'strategy="{_label(strategy)}",phase="{phase}",pair="{_label(pair)}"'
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, counts):
+                cumulative += bucket
+                lines.append(f'cyptrade_phase_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'cyptrade_phase_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'cyptrade_phase_seconds_sum{{{labels}}} {total:.6f}')
+            lines.append(f'cyptrade_phase_seconds_count{{{labels}}} {count}')
+        for index, (metric, description) in enumerate((('rows', 'Lignes'), ('columns', 'Colonnes'),
+                                                        ('bytes', 'Octets'))):
+            lines += [f'# HELP cyptrade_dataframe_{metric} {description} du dataframe rendu par la phase',
+                      f'# TYPE cyptrade_dataframe_{metric} gauge']
+            for (strategy, phase, pair), sizes in sorted(frames.items()):
+                lines.append(f'cyptrade_dataframe_{metric}{{strategy="{_label(strategy)}",phase="{phase}",'
+                             f'pair="{_label(pair)}"}} {sizes[index]}')
+        for module_name, instance in SHARED_CACHES:
+            module = sys.modules.get(module_name)
+            shared = getattr(module, instance, None) if module is not None else None
+            if shared is None or not shared._attached:
+                continue
+            report = shared.report()
+            for key, value in report.items():
+                if isinstance(value, (int, float)):
+                    lines += [f'# TYPE cyptrade_{module_name}_{key} gauge',
+                              f'cyptrade_{module_name}_{key} {value}']
+        return '\n'.join(lines) + '\n'
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+# Instance partagée par les stratégies du processus
+shared_metrics = LatencyMetrics()
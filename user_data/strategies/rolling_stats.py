@@ -0,0 +1,210 @@
+"""
+Statistiques glissantes fusionnées : moyenne, écart-type, z-score, %B, largeur
+de bande, plus haut / plus bas et Williams %R en un seul parcours
+
+MeanReversionStrategy construisait séparément rolling().mean(), rolling().std()
+pour le z-score, les Bollinger de qtpylib (encore une moyenne et un écart-type),
+%B, la largeur de bande et WILLR : autant de passes sur la série de clôture,
+chacune allouant ses temporaires.
+
+rolling_stats parcourt la série une seule fois, par blocs de bougies restant en
+cache processeur : pour chaque bloc, la somme des décalages de la fenêtre
+(vues sans copie) donne moyenne, écart-type et extrêmes, puis toutes les
+grandeurs dérivées sont écrites directement (ufuncs avec out=) dans un unique
+tableau préalloué (STATS_ROWS × bougies).
+
+Sémantique (vérifiable avec max_deviation) :
+- moyenne / écart-type (ddof=1) / bandes / %B comme pandas rolling(window,
+  min_periods) : fenêtres complètes par défaut, comme le z-score d'origine
+  (close - rolling(window).mean()) / rolling(window).std() et le ZScore du
+  moteur incrémental ; min_periods=1 reproduit qtpylib.bollinger_bands ;
+- z-score uniquement sur fenêtres complètes ;
+- plus haut / plus bas / Williams %R sur `extrema_window` bougies, comme TA-Lib WILLR ;
+- fenêtre parfaitement plate (écart-type nul) : z-score 0 et %B 0.5, là où
+  pandas donne 0 / 0.5 ou NaN selon l'arrondi de sa moyenne glissante.
+
+Précision : l'écart-type est calculé en deux passes sur chaque fenêtre (écart
+relatif ~1e-13 avec le calcul exact). pandas rolling tient des sommes courantes,
+dont l'erreur relative sur l'écart-type croît comme eps·(moyenne / écart-type)² :
+sur de longues séries (200 000 bougies), z-score et %B s'écartent de pandas
+jusqu'à ~1e-5 sur les fenêtres presque plates, l'écart venant de pandas.
+
+    stats = ind.rolling_stats(window=20, stds=2.0, extrema_window=14)
+    dataframe['bb_percent'] = stats.percent_b
+    dataframe['williams_r'] = stats.williams_r
+"""
+from typing import Dict, Optional
+
+import numpy as np
+from pandas import DataFrame
+
+import talib.abstract as ta
+
+
+# Lignes du tableau de sortie
+MEAN, STD, ZSCORE, UPPER, LOWER, PERCENT_B, WIDTH, HIGHEST, LOWEST, WILLIAMS_R = range(10)
+STATS_ROWS = 10
+
+# Nombre de bougies par bloc : quelques tableaux de 128 Ko qui restent en cache L2
+BLOCK_SIZE = 16384
+
+
+class RollingStats:
+    """Vue nommée sur le tableau (STATS_ROWS × bougies) produit par rolling_stats"""
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    mean = property(lambda self: self.values[MEAN])
+    std = property(lambda self: self.values[STD])
+    zscore = property(lambda self: self.values[ZSCORE])
+    upper = property(lambda self: self.values[UPPER])
+    lower = property(lambda self: self.values[LOWER])
+    percent_b = property(lambda self: self.values[PERCENT_B])
+    width = property(lambda self: self.values[WIDTH])
+    highest = property(lambda self: self.values[HIGHEST])
+    lowest = property(lambda self: self.values[LOWEST])
+    williams_r = property(lambda self: self.values[WILLIAMS_R])
+
+
+def _derive(out: np.ndarray, close: np.ndarray, stds: float, positions: slice) -> None:
+    """Bandes, %B et largeur à partir de la moyenne et de l'écart-type, sans temporaire"""
+    mean, std = out[MEAN, positions], out[STD, positions]
+    upper, lower = out[UPPER, positions], out[LOWER, positions]
+    np.multiply(std, stds, out=upper)
+    np.subtract(mean, upper, out=lower)
+    np.add(mean, upper, out=upper)
+    # %B = (close - lower) / (upper - lower), largeur = (upper - lower) / mean
+    np.subtract(upper, lower, out=out[WIDTH, positions])
+    np.subtract(close[positions], lower, out=out[PERCENT_B, positions])
+    np.divide(out[PERCENT_B, positions], out[WIDTH, positions], out=out[PERCENT_B, positions])
+    np.divide(out[WIDTH, positions], mean, out=out[WIDTH, positions])
+
+
+def rolling_stats(close: np.ndarray, window: int = 20, stds: float = 2.0, min_periods: Optional[int] = None,
+                  high: Optional[np.ndarray] = None, low: Optional[np.ndarray] = None,
+                  extrema_window: Optional[int] = None, out: Optional[np.ndarray] = None) -> RollingStats:
+    """
+    Calcule toutes les statistiques glissantes de `close` en un parcours.
+    `high` / `low` (optionnels) alimentent plus haut, plus bas et Williams %R sur `extrema_window`
+    bougies (par défaut `window`). `min_periods` (par défaut `window`) : nombre de bougies à partir
+    duquel moyenne, écart-type et bandes sont produits. `out` permet de réutiliser un tableau
+    (STATS_ROWS × len(close)).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    size = len(close)
+    min_periods = window if min_periods is None else max(1, min_periods)
+    extrema_window = extrema_window or window
+    if out is None:
+        out = np.empty((STATS_ROWS, size), dtype=np.float64)
+    out.fill(np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Début de série : fenêtres croissantes (min_periods <= bougies < window)
+        for position in range(min_periods - 1, min(window - 1, size)):
+            head = close[:position + 1]
+            out[MEAN, position] = head.mean()
+            out[STD, position] = head.std(ddof=1) if position else np.nan
+        if min_periods < window:
+            _derive(out, close, stds, slice(min_periods - 1, min(window - 1, size)))
+
+        high = None if high is None else np.asarray(high, dtype=np.float64)
+        low = None if low is None else np.asarray(low, dtype=np.float64)
+        extrema = high is not None and low is not None
+        scratch = np.empty(min(BLOCK_SIZE, size), dtype=np.float64)
+
+        for begin in range(min(window, extrema_window) - 1, size, BLOCK_SIZE):
+            end = min(begin + BLOCK_SIZE, size)
+
+            # Moyenne et écart-type : somme des `window` décalages du bloc, qui reste en cache
+            start = max(begin, window - 1)
+            if start < end:
+                positions = slice(start, end)
+                shifted = lambda k: close[start - window + 1 + k:end - window + 1 + k]
+                mean, std, tmp = out[MEAN, positions], out[STD, positions], scratch[:end - start]
+                mean[:] = shifted(0)
+                for k in range(1, window):
+                    np.add(mean, shifted(k), out=mean)
+                np.divide(mean, window, out=mean)
+                std[:] = 0.0
+                for k in range(window):
+                    np.subtract(shifted(k), mean, out=tmp)
+                    np.multiply(tmp, tmp, out=tmp)
+                    np.add(std, tmp, out=std)
+                np.divide(std, window - 1, out=std)
+                np.sqrt(std, out=std)
+                zscore = out[ZSCORE, positions]
+                np.subtract(close[positions], mean, out=zscore)
+                np.divide(zscore, std, out=zscore)
+                _derive(out, close, stds, positions)
+
+            # Plus haut / plus bas / Williams %R
+            start = max(begin, extrema_window - 1)
+            if extrema and start < end:
+                positions = slice(start, end)
+                first = start - extrema_window + 1
+                highest, lowest = out[HIGHEST, positions], out[LOWEST, positions]
+                highest[:] = high[first:end - extrema_window + 1]
+                lowest[:] = low[first:end - extrema_window + 1]
+                for k in range(1, extrema_window):
+                    np.maximum(highest, high[first + k:end - extrema_window + 1 + k], out=highest)
+                    np.minimum(lowest, low[first + k:end - extrema_window + 1 + k], out=lowest)
+                # Même arithmétique que TA-Lib WILLR : (hh - close) / ((hh - ll) / -100), 0 si hh == ll
+                williams, tmp = out[WILLIAMS_R, positions], scratch[:end - start]
+                np.subtract(highest, lowest, out=williams)
+                np.divide(williams, -100.0, out=williams)
+                flat = williams == 0.0
+                np.subtract(highest, close[positions], out=tmp)
+                np.divide(tmp, williams, out=williams)
+                williams[flat] = 0.0
+
+        # Fenêtre parfaitement plate (écart-type nul) : le prix est sur la moyenne
+        flat = out[STD] == 0.0
+        out[PERCENT_B, flat] = 0.5
+        flat[:window - 1] = False
+        out[ZSCORE, flat] = 0.0
+
+    return RollingStats(out)
+
+
+def max_deviation(dataframe: DataFrame, window: int = 20, stds: float = 2.0,
+                  extrema_window: int = 14, min_periods: Optional[int] = None) -> Dict[str, float]:
+    """
+    Contrôle de parité avec le calcul existant (pandas rolling, TA-Lib WILLR ; qtpylib.bollinger_bands
+    avec min_periods=1) : écart absolu maximal par statistique, une différence de NaN comptant comme
+    un écart infini, ce qui couvre aussi les bougies d'amorçage.
+    Les écarts sur std, bandes, z-score et %B croissent avec la longueur de la série (voir le module).
+    """
+    stats = rolling_stats(dataframe['close'].to_numpy(), window, stds, min_periods,
+                          high=dataframe['high'].to_numpy(), low=dataframe['low'].to_numpy(),
+                          extrema_window=extrema_window)
+    close = dataframe['close']
+    rolling = close.rolling(window=window, min_periods=min_periods)
+    mean, std = rolling.mean(), rolling.std()
+    upper, lower = mean + std * stds, mean - std * stds
+    expected = {
+        'mean': mean,
+        'std': std,
+        'upper': upper,
+        'lower': lower,
+        'percent_b': (close - lower) / (upper - lower),
+        'width': (upper - lower) / mean,
+        'zscore': (close - close.rolling(window=window).mean()) / close.rolling(window=window).std(),
+        'highest': dataframe['high'].rolling(window=extrema_window).max(),
+        'lowest': dataframe['low'].rolling(window=extrema_window).min(),
+        'williams_r': ta.WILLR(dataframe, timeperiod=extrema_window),
+    }
+    # Fenêtres plates exclues pour les rapports à l'écart-type (résultat pandas dépendant de l'arrondi)
+    flat = stats.std == 0.0
+    deviations = {}
+    for name, reference in expected.items():
+        want = np.asarray(reference, dtype=np.float64)
+        have = getattr(stats, name)
+        if name in ('zscore', 'percent_b'):
+            want, have = want[~flat], have[~flat]
+        if not np.array_equal(np.isnan(want), np.isnan(have)):
+            deviations[name] = float('inf')
+            continue
+        mask = ~np.isnan(want)
+        deviations[name] = float(np.abs(want[mask] - have[mask]).max()) if mask.any() else 0.0
+    return deviations
@@ -0,0 +1,29 @@
+"""
+Branchement des caches partagés du processus sur une stratégie, en un appel
+
+    def bot_start(self, **kwargs) -> None:
+        ...
+        attach_shared(self)      # en dernier
+
+Chaque cache ne se branche que s'il est configuré et en dry-run / live
+(voir chaque module) ; l'ordre compte :
+1. candle_store : bougies du magasin mappé, sinon l'exchange ;
+2. book_cache : carnets partagés entre bots ;
+3. stream_feed : enveloppe les deux précédents (bougies et meilleur prix
+   poussés d'abord, puis magasin / cache de carnets, puis l'exchange) ;
+4. latency_metrics : enveloppe les phases de la stratégie, y compris ce que
+   bot_start vient de créer (informative_cache), d'où l'appel en fin de
+   bot_start.
+"""
+from book_cache import shared_books
+from candle_store import shared_candles
+from latency_metrics import shared_metrics
+from stream_feed import shared_stream
+
+
+def attach_shared(strategy) -> None:
+    """Branche magasin de bougies, cache de carnets, flux poussé et mesures (s'ils sont configurés)"""
+    shared_candles.attach(strategy)
+    shared_books.attach(strategy)
+    shared_stream.attach(strategy)
+    shared_metrics.attach(strategy)
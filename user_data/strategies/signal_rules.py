@@ -0,0 +1,303 @@
+"""
+Règles d'entrée / sortie déclaratives, compilées en une évaluation NumPy
+
+Les populate_entry_trend / populate_exit_trend enchaînaient 10 à 20 Series
+booléennes pandas avec & / | et des .shift(1) répétés : chaque opérande, chaque
+décalage et chaque combinaison allouait une Series complète, et certaines
+stratégies vérifiaient (et complétaient par des zéros) leurs colonnes à chaque
+appel.
+
+Les stratégies déclarent maintenant leurs conditions une fois, au niveau de la
+classe :
+
+    entry_rules = Rules(AllOf(
+        Rule('rsi', '<', Param('buy_rsi_high')),
+        Rule('ema_fast', '>', 'ema_slow'),
+        Rule('ema_fast', '<=', 'ema_slow', shift=1, other_shift=1),    # valeurs de la bougie précédente
+        Rule('volume', '>', 'volume_ma', factor=Param('buy_volume_factor')),
+        When('sell_ema_cross', Rule('ema_fast', '<', 'ema_slow')),     # ignorée si le paramètre est faux
+    ))
+
+    dataframe.loc[self.entry_rules.evaluate(dataframe, self), 'enter_long'] = 1
+
+- `other` est un seuil numérique, un nom de colonne ou un Param (résolu à
+  chaque évaluation : attribut de la stratégie, `.value` des paramètres
+  d'hyperopt, ou clé d'un dictionnaire de configuration) ;
+- les décalages ne créent pas de copie : une règle décalée de k bougies compare
+  des vues des tableaux et écrit dans out[k:], les premières bougies valant
+  False comme une comparaison pandas avec NaN (True pour '!=') ;
+- AllOf / AnyOf combinent les masques en place et s'arrêtent dès que le masque
+  est entièrement faux (AllOf) ou entièrement vrai (AnyOf) ;
+- les colonnes sont validées à la compilation, une fois par ensemble de
+  colonnes du dataframe, et non à chaque appel. Une colonne absente lève une
+  KeyError (missing='raise'), vaut 0 (missing='zero') ou désactive le signal
+  (missing='skip'), avec un seul avertissement dans les deux derniers cas ;
+- une colonne absente mais déclarée dans un FlagSet dont la colonne regroupée
+  est présente est lue bit par bit (format compact, voir compact_frame).
+"""
+import logging
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from pandas import DataFrame
+
+
+logger = logging.getLogger(__name__)
+
+OPERATORS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+    '!=': np.not_equal,
+}
+
+# Nombre de compilations mémorisées par jeu de règles (un par ensemble de colonnes)
+MAX_PLANS = 8
+
+# Types entiers possibles pour une colonne de drapeaux regroupés
+FLAG_DTYPES = (np.uint8, np.uint16, np.uint32, np.uint64)
+
+
+class Param:
+    """Valeur lue à l'évaluation : attribut de la stratégie (`.value` si paramètre d'hyperopt) ou clé de dictionnaire"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def resolve(self, params: Any) -> Any:
+        if isinstance(params, Mapping):
+            return params[self.name]
+        value = getattr(params, self.name)
+        return getattr(value, 'value', value)
+
+    def __repr__(self) -> str:
+        return f"Param({self.name!r})"
+
+
+Operand = Union[int, float, str, Param]
+
+
+class FlagSet:
+    """
+    Drapeaux booléens regroupés dans une seule colonne entière : le bit i vaut le drapeau names[i].
+    Six colonnes booléennes (6 octets par bougie) tiennent ainsi dans un uint8.
+    Chaque FlagSet est enregistré sous le nom de sa colonne pour que les règles le retrouvent.
+    """
+
+    registry: Dict[str, 'FlagSet'] = {}
+
+    def __init__(self, column: str, names):
+        self.column = column
+        self.names = tuple(names)
+        self.dtype = next((dtype for dtype in FLAG_DTYPES if np.dtype(dtype).itemsize * 8 >= len(self.names)), None)
+        if self.dtype is None:
+            raise ValueError(f"Trop de drapeaux pour une colonne ({len(self.names)} > 64)")
+        self.bits = {name: self.dtype(1 << bit) for bit, name in enumerate(self.names)}
+        FlagSet.registry[column] = self
+
+    def pack(self, flags: Dict[str, np.ndarray]) -> np.ndarray:
+        """Regroupe les masques booléens `flags` (nom -> masque) dans un tableau d'entiers"""
+        size = len(next(iter(flags.values()))) if flags else 0
+        packed = np.zeros(size, dtype=self.dtype)
+        for name, values in flags.items():
+            packed[np.asarray(values, dtype=bool)] |= self.bits[name]
+        return packed
+
+    def unpack(self, packed: np.ndarray, name: str) -> np.ndarray:
+        """Masque booléen du drapeau `name`"""
+        return np.bitwise_and(packed, self.bits[name]) != 0
+
+    def __repr__(self) -> str:
+        return f"FlagSet({self.column!r}, {self.names!r})"
+
+
+class Rule:
+    """
+    Comparaison `column[t - shift] <op> other[t - other_shift] * factor`.
+    Sans opérateur, Rule('oversold') teste une colonne booléenne (différente de 0).
+    """
+
+    def __init__(self, column: str, op: str = '!=', other: Operand = 0, shift: int = 0, other_shift: int = 0,
+                 factor: Optional[Union[float, Param]] = None):
+        if op not in OPERATORS:
+            raise ValueError(f"Opérateur inconnu {op!r} (disponibles : {', '.join(OPERATORS)})")
+        if shift < 0 or other_shift < 0:
+            raise ValueError("Les décalages doivent être positifs (pas d'accès aux bougies futures)")
+        self.column = column
+        self.op = op
+        self.other = other
+        self.shift = shift
+        self.other_shift = other_shift
+        self.factor = factor
+
+    def columns(self) -> List[str]:
+        return [self.column] + ([self.other] if isinstance(self.other, str) else [])
+
+    def __repr__(self) -> str:
+        return f"Rule({self.column!r}, {self.op!r}, {self.other!r})"
+
+
+class AllOf:
+    """Toutes les conditions (équivalent de & entre Series)"""
+
+    def __init__(self, *terms):
+        self.terms = terms
+
+
+class AnyOf:
+    """Au moins une condition (équivalent de | entre Series)"""
+
+    def __init__(self, *terms):
+        self.terms = terms
+
+
+class When:
+    """Condition active uniquement si le paramètre est vrai (ex: `self.sell_ema_cross.value & (...)`)"""
+
+    def __init__(self, param: Union[str, Param], term):
+        self.param = param if isinstance(param, Param) else Param(param)
+        self.term = term
+
+
+def _columns(node) -> List[str]:
+    if isinstance(node, Rule):
+        return node.columns()
+    if isinstance(node, When):
+        return _columns(node.term)
+    return [column for term in node.terms for column in _columns(term)]
+
+
+class _Evaluation:
+    """Etat d'une évaluation : tableaux des colonnes (lus une fois) et tampons par profondeur"""
+
+    def __init__(self, dataframe: DataFrame, params: Any, plan: 'Plan'):
+        self.dataframe = dataframe
+        self.params = params
+        self.size = len(dataframe)
+        self.missing, self.flags = plan
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._buffers: List[np.ndarray] = []
+
+    def array(self, column: str) -> Union[np.ndarray, float]:
+        if column in self.missing:
+            return 0.0
+        array = self._arrays.get(column)
+        if array is None:
+            flags = self.flags.get(column)
+            if flags is not None:
+                array = flags.unpack(self.dataframe[flags.column].to_numpy(), column)
+            else:
+                array = self.dataframe[column].to_numpy()
+            self._arrays[column] = array
+        return array
+
+    def buffer(self, depth: int) -> np.ndarray:
+        while len(self._buffers) <= depth:
+            self._buffers.append(np.empty(self.size, dtype=bool))
+        return self._buffers[depth]
+
+    def value(self, operand: Any) -> Any:
+        return operand.resolve(self.params) if isinstance(operand, Param) else operand
+
+
+def _evaluate(node, ctx: _Evaluation, out: np.ndarray, depth: int) -> None:
+    """Ecrit le masque de `node` dans `out`"""
+    if isinstance(node, Rule):
+        _evaluate_rule(node, ctx, out)
+    elif isinstance(node, When):
+        if ctx.value(node.param):
+            _evaluate(node.term, ctx, out, depth)
+        else:
+            out.fill(False)
+    else:
+        conjunction = isinstance(node, AllOf)
+        combine = np.logical_and if conjunction else np.logical_or
+        scratch = ctx.buffer(depth)
+        out.fill(conjunction)
+        for term in node.terms:
+            _evaluate(term, ctx, scratch, depth + 1)
+            combine(out, scratch, out=out)
+            # Court-circuit : masque entièrement faux (AllOf) ou entièrement vrai (AnyOf)
+            if (not out.any()) if conjunction else out.all():
+                break
+
+
+def _evaluate_rule(rule: Rule, ctx: _Evaluation, out: np.ndarray) -> None:
+    size = ctx.size
+    offset = max(rule.shift, rule.other_shift)
+    # Les premières bougies n'ont pas de valeur décalée : NaN côté pandas
+    out[:offset] = rule.op == '!='
+    if offset >= size:
+        return
+
+    left = ctx.array(rule.column)
+    if isinstance(left, np.ndarray):
+        left = left[offset - rule.shift:size - rule.shift]
+    if isinstance(rule.other, str):
+        right = ctx.array(rule.other)
+        if isinstance(right, np.ndarray):
+            right = right[offset - rule.other_shift:size - rule.other_shift]
+    else:
+        right = ctx.value(rule.other)
+    if rule.factor is not None:
+        right = right * ctx.value(rule.factor)
+
+    OPERATORS[rule.op](left, right, out=out[offset:])
+
+
+# Compilation : colonnes absentes, drapeaux lus dans une colonne regroupée
+Plan = Tuple[Tuple[str, ...], Dict[str, FlagSet]]
+
+
+class Rules:
+    """Jeu de règles compilé (voir le module)"""
+
+    def __init__(self, root, missing: str = 'raise'):
+        if missing not in ('raise', 'zero', 'skip'):
+            raise ValueError("missing doit valoir 'raise', 'zero' ou 'skip'")
+        self.root = root
+        self.missing = missing
+        self.columns = tuple(dict.fromkeys(_columns(root)))
+        self._plans: Dict[tuple, Plan] = {}
+
+    def compile(self, columns) -> Plan:
+        """
+        Valide les colonnes d'un dataframe (mémorisé par ensemble de colonnes) :
+        retourne les colonnes absentes et les drapeaux à lire dans une colonne regroupée
+        """
+        signature = tuple(columns)
+        plan = self._plans.get(signature)
+        if plan is None:
+            available = set(signature)
+            packed = [flags for column, flags in FlagSet.registry.items() if column in available]
+            flags, missing = {}, []
+            for column in self.columns:
+                if column in available:
+                    continue
+                owner = next((candidate for candidate in packed if column in candidate.bits), None)
+                if owner is not None:
+                    flags[column] = owner
+                else:
+                    missing.append(column)
+            if missing:
+                if self.missing == 'raise':
+                    raise KeyError(f"Colonnes absentes pour les règles : {', '.join(missing)}")
+                logger.warning(f"Colonnes absentes {missing} : "
+                               f"{'valeur 0' if self.missing == 'zero' else 'signal désactivé'}")
+            plan = (tuple(missing), flags)
+            if len(self._plans) >= MAX_PLANS:
+                self._plans.clear()
+            self._plans[signature] = plan
+        return plan
+
+    def evaluate(self, dataframe: DataFrame, params: Any = None) -> np.ndarray:
+        """Masque booléen des bougies qui satisfont les règles"""
+        plan = self.compile(dataframe.columns)
+        out = np.zeros(len(dataframe), dtype=bool)
+        if len(dataframe) == 0 or (plan[0] and self.missing == 'skip'):
+            return out
+        _evaluate(self.root, _Evaluation(dataframe, params, plan), out, 0)
+        return out
@@ -0,0 +1,537 @@
+"""
+Flux poussé des bougies et du meilleur prix, lu sans requête
+
+À chaque itération, un bot interroge l'exchange en REST : les bougies de la
+whitelist et des informatifs, puis le carnet d'ordres de chaque paire
+(entry_pricing / exit_pricing.use_order_book), sous `rateLimit`. Un signal
+attend donc l'intervalle de polling plus l'aller-retour de la requête.
+
+Ici, un client websocket (thread dédié, flux combinés au format Binance :
+<symbole>@kline_<timeframe> et <symbole>@bookTicker) tient en mémoire :
+- un tampon circulaire des dernières bougies par paire et timeframe
+  (tableaux NumPy de `capacity` bougies), amorcé par le premier
+  rafraîchissement REST puis mis à jour à chaque message ;
+- le meilleur bid / ask de chaque paire.
+
+Les rafraîchissements de bougies de freqtrade, le carnet au premier niveau
+(order_book_top = 1) et le ticker sont servis depuis la mémoire tant que le
+flux de la paire est vivant (message reçu depuis moins de `stale_seconds`) ;
+sinon (connexion coupée, paire pas encore abonnée ou silencieuse, carnet plus
+profond) l'exchange est interrogé comme avant. Les paires demandées par
+freqtrade sont abonnées au fil de l'eau (whitelist dynamique, informatifs).
+
+Une bougie n'est servie clôturée qu'après son message "x": true (ou le
+rafraîchissement REST) : une clôture manquée laisse la main au REST, qui
+remplace ses prix. Après une coupure de connexion ou un saut de plus d'une
+bougie dans le flux, le tampon n'est plus servi jusqu'au rafraîchissement REST
+suivant, qui comble le trou. Les bougies servies passent par le nettoyage de
+freqtrade (bougies manquantes comblées, comme refresh_latest_ohlcv).
+
+Activation dans la configuration du bot (dry-run / live, marché spot) :
+
+    "stream_feed": {"url": "wss://stream.binance.com:9443", "stale_seconds": 10}
+
+puis dans bot_start (voir shared_feeds) :
+
+    attach_shared(self)
+
+Les stratégies peuvent aussi lire directement `shared_stream.top(pair)`
+(meilleur bid / ask) et `shared_stream.candles(pair, timeframe)` (bougie en
+cours comprise). Flux de test local, même protocole, prix du marché simulé :
+`python -m cyptrade.stream_server`.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from freqtrade.data.converter import clean_ohlcv_dataframe
+from freqtrade.enums import CandleType, RunMode, TradingMode
+from freqtrade.exchange import timeframe_to_msecs, timeframe_to_prev_date
+from freqtrade.util import dt_now, dt_ts
+
+from exchange_hooks import cache_klines, compatible, install
+
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+DEFAULT_URL = 'wss://stream.binance.com:9443'
+DEFAULT_CAPACITY = 1500
+
+# Flux d'une paire considéré mort sans message depuis stale_seconds
+STALE_SECONDS = 10
+# Limites Binance : 1024 flux par connexion, 5 messages entrants par seconde
+MAX_STREAMS = 1000
+SUBSCRIBE_BATCH = 200
+SUBSCRIBE_INTERVAL = 0.25
+RECONNECT_DELAY = (1, 30)
+
+
+class Quote(NamedTuple):
+    """Meilleur prix d'une paire (received : time.time() à la réception)"""
+    bid: float
+    bid_size: float
+    ask: float
+    ask_size: float
+    received: float
+
+
+def _fresh(received: float, stale_seconds: float) -> bool:
+    return time.time() - received < stale_seconds
+
+
+class CandleRing:
+    """Tampon circulaire des dernières bougies d'une paire et d'un timeframe"""
+
+    def __init__(self, pair: str, timeframe: str, capacity: int = DEFAULT_CAPACITY):
+        self.pair = pair
+        self.timeframe = timeframe
+        self.timeframe_ms = timeframe_to_msecs(timeframe)
+        self.capacity = capacity
+        self.dates = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((len(COLUMNS), capacity))
+        self.count = 0
+        self.end = 0
+        # Date d'ouverture (ms) de la dernière bougie clôturée
+        self.closed: Optional[int] = None
+        # time.time() du dernier message du flux
+        self.received = 0.0
+        # Trou possible dans le flux (coupure, bougie sautée) : à reprendre en REST
+        self.resync = False
+        self._frame: Optional[DataFrame] = None
+        self._frame_key: Optional[Tuple[int, Optional[int]]] = None
+
+    def last_date(self) -> Optional[int]:
+        return int(self.dates[(self.end - 1) % self.capacity]) if self.count else None
+
+    def last_close(self) -> Optional[float]:
+        return float(self.values[3, (self.end - 1) % self.capacity]) if self.count else None
+
+    def _ordered(self) -> np.ndarray:
+        return (self.end - self.count + np.arange(self.count)) % self.capacity
+
+    def update(self, open_ms: int, values: Tuple[float, ...], closed: bool) -> None:
+        """Bougie poussée : remplace la bougie en cours ou en ouvre une nouvelle"""
+        self.received = time.time()
+        last = self.last_date()
+        if last is None or open_ms > last:
+            # La bougie précédente n'est clôturée que par son "x": true ou par le REST
+            if last is not None and open_ms > last + self.timeframe_ms:
+                self.resync = True
+            index = self.end
+            self.end = (self.end + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+        elif open_ms == last:
+            index = (self.end - 1) % self.capacity
+        else:
+            return
+        self.dates[index] = open_ms
+        self.values[:, index] = values
+        if closed:
+            self.closed = open_ms
+        if self.closed is not None and open_ms <= self.closed:
+            self._frame = None
+
+    def seed(self, dataframe: DataFrame, now_ms: int) -> None:
+        """Historique REST ; les bougies plus récentes déjà poussées sont conservées si elles s'y raccordent"""
+        if dataframe.empty:
+            return
+        dates = pd.DatetimeIndex(dataframe['date']).as_unit('ms').asi8
+        if not self.resync and self.closed is not None and dates[-1] <= self.closed:
+            return
+        values = dataframe[list(COLUMNS)].to_numpy(dtype=np.float64).T
+        ordered = self._ordered()
+        newer = ordered[self.dates[ordered] > dates[-1]]
+        if len(newer) and (np.diff(self.dates[newer], prepend=dates[-1]) > self.timeframe_ms).any():
+            # Trou entre le REST et le flux : la bougie en cours reviendra au prochain message
+            newer = newer[:0]
+        pushed_closed = self.closed if self.closed is not None and self.closed in self.dates[newer] else None
+        dates = np.concatenate([dates, self.dates[newer]])[-self.capacity:]
+        values = np.concatenate([values, self.values[:, newer]], axis=1)[:, -self.capacity:]
+        count = len(dates)
+        self.dates[:count] = dates
+        self.values[:, :count] = values
+        self.count, self.end = count, count % self.capacity
+        closed = dates[dates + self.timeframe_ms <= now_ms]
+        closed = [int(closed[-1])] if len(closed) else []
+        self.closed = max(closed + ([pushed_closed] if pushed_closed is not None else []), default=None)
+        self.resync = False
+        self._frame = None
+
+    def frame(self, limit: Optional[int] = None, partial: bool = False) -> DataFrame:
+        """Dernières bougies au format freqtrade (clôturées seulement, sauf partial)"""
+        key = (self.closed, limit)
+        if not partial and self._frame is not None and self._frame_key == key:
+            return self._frame
+        indexes = self._ordered()
+        if not partial:
+            indexes = indexes[self.dates[indexes] <= (self.closed if self.closed is not None else -1)]
+        if limit:
+            indexes = indexes[-limit:]
+        dataframe = DataFrame(self.values[:, indexes].T, columns=list(COLUMNS))
+        dates = pd.DatetimeIndex(self.dates[indexes].view('datetime64[ms]')).tz_localize('UTC')
+        dataframe.insert(0, 'date', dates)
+        if not partial:
+            # Bougies manquantes comblées comme dans refresh_latest_ohlcv
+            dataframe = clean_ohlcv_dataframe(dataframe, self.timeframe, self.pair,
+                                              fill_missing=True, drop_incomplete=False)
+            if limit:
+                dataframe = dataframe.iloc[-limit:].reset_index(drop=True)
+            self._frame, self._frame_key = dataframe, key
+        return dataframe
+
+
+class StreamBuffer:
+    """Tampons de bougies et meilleurs prix, alimentés par le thread du flux"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.rings: Dict[Tuple[str, str], CandleRing] = {}
+        self.quotes: Dict[str, Quote] = {}
+        self.last_message = 0.0
+        self.messages = 0
+        self.resyncs = 0
+        self._lock = threading.Lock()
+
+    def _ring(self, pair: str, timeframe: str) -> CandleRing:
+        ring = self.rings.get((pair, timeframe))
+        if ring is None:
+            ring = self.rings[(pair, timeframe)] = CandleRing(pair, timeframe, self.capacity)
+        return ring
+
+    def on_kline(self, pair: str, timeframe: str, open_ms: int,
+                 values: Tuple[float, ...], closed: bool) -> None:
+        with self._lock:
+            ring = self._ring(pair, timeframe)
+            resync = ring.resync
+            ring.update(open_ms, values, closed)
+            self.resyncs += ring.resync and not resync
+
+    def on_quote(self, pair: str, quote: Quote) -> None:
+        self.quotes[pair] = quote
+
+    def seed(self, pair: str, timeframe: str, dataframe: DataFrame) -> None:
+        with self._lock:
+            self._ring(pair, timeframe).seed(dataframe, dt_ts())
+
+    def resync(self, pair: str, timeframe: str) -> None:
+        """Flux interrompu : bougies servies à nouveau après le prochain rafraîchissement REST"""
+        with self._lock:
+            ring = self.rings.get((pair, timeframe))
+            if ring is not None and not ring.resync:
+                ring.resync = True
+                self.resyncs += 1
+
+    def quote(self, pair: str, stale_seconds: float) -> Optional[Quote]:
+        """Meilleur prix de la paire s'il a été reçu depuis moins de stale_seconds"""
+        quote = self.quotes.get(pair)
+        return quote if quote is not None and _fresh(quote.received, stale_seconds) else None
+
+    def fresh_frame(self, pair: str, timeframe: str, limit: Optional[int],
+                    stale_seconds: float) -> Optional[DataFrame]:
+        """Bougies clôturées si la dernière l'est dans le tampon et que le flux de la paire est vivant"""
+        with self._lock:
+            ring = self.rings.get((pair, timeframe))
+            if (ring is None or ring.closed is None or ring.resync
+                    or not _fresh(ring.received, stale_seconds)):
+                return None
+            now = dt_now()
+            expected = dt_ts(timeframe_to_prev_date(timeframe, now)) - ring.timeframe_ms
+            if ring.closed >= expected:
+                return ring.frame(limit)
+            # Juste après la clôture, la bougie suivante ouvre le message d'après
+            if (ring.closed >= expected - ring.timeframe_ms
+                    and (now - timeframe_to_prev_date(timeframe, now)).total_seconds() < stale_seconds):
+                return ring.frame(limit)
+        return None
+
+    def candles(self, pair: str, timeframe: str, limit: Optional[int] = None) -> Optional[DataFrame]:
+        with self._lock:
+            ring = self.rings.get((pair, timeframe))
+            return ring.frame(limit, partial=True) if ring is not None and ring.count else None
+
+    def last_price(self, pair: str) -> Optional[float]:
+        """Clôture de la bougie en cours la plus récente, tous timeframes confondus"""
+        with self._lock:
+            rings = [ring for (ring_pair, _), ring in self.rings.items() if ring_pair == pair and ring.count]
+            if not rings:
+                return None
+            return max(rings, key=lambda ring: (ring.last_date() + ring.timeframe_ms, -ring.timeframe_ms)).last_close()
+
+
+def kline_stream(symbol: str, timeframe: str) -> str:
+    return f'{symbol}@kline_{timeframe}'
+
+
+def book_stream(symbol: str) -> str:
+    return f'{symbol}@bookTicker'
+
+
+class _Connection:
+    """Une connexion websocket et ses flux, reconnectée avec un délai croissant"""
+
+    def __init__(self, client: 'StreamClient', number: int):
+        self.client = client
+        self.number = number
+        self.streams: Set[str] = set()
+        self.websocket = None
+        self.task = client.loop.create_task(self.run())
+
+    def add(self, streams: List[str]) -> None:
+        self.streams.update(streams)
+        if self.websocket is not None:
+            self.client.loop.create_task(self.subscribe(streams))
+
+    async def subscribe(self, streams: List[str]) -> None:
+        for start in range(0, len(streams), SUBSCRIBE_BATCH):
+            await self.websocket.send(json.dumps({
+                'method': 'SUBSCRIBE',
+                'params': streams[start:start + SUBSCRIBE_BATCH],
+                'id': next(self.client.ids),
+            }))
+            await asyncio.sleep(SUBSCRIBE_INTERVAL)
+
+    async def run(self) -> None:
+        import websockets
+
+        delay = RECONNECT_DELAY[0]
+        while True:
+            try:
+                async with websockets.connect(self.client.url, max_size=None) as websocket:
+                    self.websocket = websocket
+                    delay = RECONNECT_DELAY[0]
+                    logger.info(f"Flux {self.client.url} connecté (connexion {self.number}, "
+                                f"{len(self.streams)} flux)")
+                    await self.subscribe(sorted(self.streams))
+                    async for raw in websocket:
+                        self.client.handle(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.warning(f"Flux {self.client.url} (connexion {self.number}) : {error!r}, "
+                               f"nouvel essai dans {delay} s")
+            finally:
+                if self.websocket is not None:
+                    # Messages perdus pendant la coupure : historique repris en REST
+                    self.client.resync(self.streams)
+                self.websocket = None
+            self.client.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_DELAY[1])
+
+
+class StreamClient:
+    """Client du flux combiné (format Binance), dans son propre thread et sa boucle asyncio"""
+
+    def __init__(self, url: str, buffer: StreamBuffer, symbols: Dict[str, str]):
+        self.url = url.rstrip('/') + '/stream'
+        self.buffer = buffer
+        # Symbole du flux (minuscules) -> paire freqtrade
+        self.symbols = symbols
+        self.subscribed: Set[str] = set()
+        self.reconnects = 0
+        self.ids = itertools.count(1)
+        self.loop = asyncio.new_event_loop()
+        self._connections: List[_Connection] = []
+        self._thread = threading.Thread(target=self._run, name='stream-feed', daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def subscribe(self, streams: Iterable[str]) -> None:
+        """Abonne les flux pas encore suivis (appelable depuis n'importe quel thread)"""
+        new = [stream for stream in dict.fromkeys(streams) if stream not in self.subscribed]
+        if new:
+            self.subscribed.update(new)
+            self.loop.call_soon_threadsafe(self._add, new)
+
+    def _add(self, streams: List[str]) -> None:
+        while streams:
+            connection = next((connection for connection in self._connections
+                               if len(connection.streams) < MAX_STREAMS), None)
+            if connection is None:
+                connection = _Connection(self, len(self._connections) + 1)
+                self._connections.append(connection)
+            room = MAX_STREAMS - len(connection.streams)
+            connection.add(streams[:room])
+            streams = streams[room:]
+
+    def resync(self, streams: Iterable[str]) -> None:
+        """Tampons des flux kline donnés à reprendre en REST"""
+        for stream in streams:
+            symbol, _, kind = stream.partition('@')
+            pair = self.symbols.get(symbol)
+            if pair is not None and kind.startswith('kline_'):
+                self.buffer.resync(pair, kind[len('kline_'):])
+
+    def handle(self, raw) -> None:
+        message = json.loads(raw)
+        data = message.get('data', message)
+        if not isinstance(data, dict) or 's' not in data:
+            # Accusés de réception des SUBSCRIBE
+            return
+        buffer = self.buffer
+        buffer.last_message = time.time()
+        buffer.messages += 1
+        pair = self.symbols.get(data['s'].lower())
+        if pair is None:
+            return
+        if data.get('e') == 'kline':
+            kline = data['k']
+            buffer.on_kline(pair, kline['i'], int(kline['t']),
+                            (float(kline['o']), float(kline['h']), float(kline['l']),
+                             float(kline['c']), float(kline['v'])),
+                            bool(kline['x']))
+        elif 'b' in data and 'a' in data:
+            buffer.on_quote(pair, Quote(float(data['b']), float(data['B']),
+                                        float(data['a']), float(data['A']), buffer.last_message))
+
+    def stop(self) -> None:
+        def cancel():
+            for connection in self._connections:
+                connection.task.cancel()
+            self.loop.call_later(0.1, self.loop.stop)
+
+        if self._thread.is_alive():
+            self.loop.call_soon_threadsafe(cancel)
+            self._thread.join(timeout=5)
+
+
+class SharedStream:
+    """Branche le flux poussé sur l'exchange d'un bot (voir le module)"""
+
+    def __init__(self):
+        self.candles_served = 0
+        self.candles_fetched = 0
+        self.books_served = 0
+        self.books_fetched = 0
+        self._attached: Dict[int, Tuple[StreamBuffer, StreamClient]] = {}
+
+    def attach(self, strategy) -> Optional[StreamBuffer]:
+        settings = strategy.config.get('stream_feed')
+        dp = getattr(strategy, 'dp', None)
+        if not settings or dp is None or dp.runmode not in (RunMode.LIVE, RunMode.DRY_RUN):
+            return None
+        exchange = dp._exchange
+        if id(exchange) in self._attached:
+            return self._attached[id(exchange)][0]
+        if exchange.trading_mode != TradingMode.SPOT:
+            logger.warning("stream_feed : seul le marché spot est pris en charge, bougies en REST")
+            return None
+        if not compatible(exchange, 'stream_feed', ('refresh_latest_ohlcv', 'fetch_l2_order_book', 'fetch_ticker'),
+                          klines=True):
+            return None
+        limit = exchange.ohlcv_candle_limit(strategy.timeframe, strategy.config['candle_type_def'])
+        limit += strategy.startup_candle_count
+        buffer = StreamBuffer(max(settings.get('capacity', DEFAULT_CAPACITY), limit))
+        symbols = {market['id'].lower(): pair for pair, market in exchange.markets.items()
+                   if market.get('spot')}
+        streams = {pair: symbol for symbol, pair in symbols.items()}
+        client = StreamClient(settings.get('url', DEFAULT_URL), buffer, symbols)
+        client.start()
+        stale_seconds = settings.get('stale_seconds', STALE_SECONDS)
+        refresh = exchange.refresh_latest_ohlcv
+        fetch_l2_order_book = exchange.fetch_l2_order_book
+        fetch_ticker = exchange.fetch_ticker
+
+        def refresh_latest_ohlcv(pair_list, *, since_ms=None, cache=True, drop_incomplete=None):
+            if since_ms is not None:
+                return refresh(pair_list, since_ms=since_ms, cache=cache, drop_incomplete=drop_incomplete)
+            served, remaining, subscribe = {}, [], []
+            for key in pair_list:
+                pair, timeframe, candle_type = key
+                if CandleType.from_string(candle_type) != CandleType.SPOT or pair not in streams:
+                    remaining.append(key)
+                    continue
+                subscribe += [kline_stream(streams[pair], timeframe), book_stream(streams[pair])]
+                frame = buffer.fresh_frame(pair, timeframe, limit, stale_seconds)
+                if frame is not None:
+                    served[key] = frame
+                else:
+                    remaining.append(key)
+            client.subscribe(subscribe)
+            if cache:
+                cache_klines(exchange, served)
+            self.candles_served += len(served)
+            self.candles_fetched += len(remaining)
+            result = refresh(remaining, cache=cache, drop_incomplete=drop_incomplete) if remaining else {}
+            for (pair, timeframe, candle_type), dataframe in result.items():
+                if (pair in streams and not dataframe.empty
+                        and CandleType.from_string(candle_type) == CandleType.SPOT):
+                    buffer.seed(pair, timeframe, dataframe)
+            result.update(served)
+            return result
+
+        def fresh_quote(pair: str) -> Optional[Quote]:
+            if pair not in streams:
+                return None
+            client.subscribe([book_stream(streams[pair])])
+            return buffer.quote(pair, stale_seconds)
+
+        def fetch_book(pair: str, limit: int = 100):
+            quote = fresh_quote(pair) if limit <= 1 else None
+            if quote is None:
+                self.books_fetched += 1
+                return fetch_l2_order_book(pair, limit)
+            self.books_served += 1
+            return {'symbol': pair, 'bids': [[quote.bid, quote.bid_size]],
+                    'asks': [[quote.ask, quote.ask_size]],
+                    'timestamp': int(quote.received * 1000), 'datetime': None, 'nonce': None}
+
+        def ticker(pair: str):
+            quote = fresh_quote(pair)
+            if quote is None:
+                return fetch_ticker(pair)
+            last = buffer.last_price(pair) or (quote.bid + quote.ask) / 2
+            return {'symbol': pair, 'bid': quote.bid, 'bidVolume': quote.bid_size,
+                    'ask': quote.ask, 'askVolume': quote.ask_size, 'last': last,
+                    'timestamp': int(quote.received * 1000)}
+
+        install(exchange, refresh_latest_ohlcv=refresh_latest_ohlcv, fetch_l2_order_book=fetch_book,
+                fetch_ticker=ticker)
+        self._attached[id(exchange)] = (buffer, client)
+        logger.info(f"Flux poussé {client.url} branché sur {exchange.name}")
+        return buffer
+
+    def top(self, pair: str) -> Optional[Quote]:
+        """Dernier meilleur prix reçu pour la paire"""
+        for buffer, _ in self._attached.values():
+            if pair in buffer.quotes:
+                return buffer.quotes[pair]
+        return None
+
+    def candles(self, pair: str, timeframe: str, limit: Optional[int] = None) -> Optional[DataFrame]:
+        """Dernières bougies de la paire, bougie en cours comprise"""
+        for buffer, _ in self._attached.values():
+            frame = buffer.candles(pair, timeframe, limit)
+            if frame is not None:
+                return frame
+        return None
+
+    def stop(self) -> None:
+        for _, client in self._attached.values():
+            client.stop()
+
+    def report(self) -> Dict[str, int]:
+        buffers = [buffer for buffer, _ in self._attached.values()]
+        return {'candles_served': self.candles_served, 'candles_fetched': self.candles_fetched,
+                'books_served': self.books_served, 'books_fetched': self.books_fetched,
+                'messages': sum(buffer.messages for buffer in buffers),
+                'resyncs': sum(buffer.resyncs for buffer in buffers),
+                'reconnects': sum(client.reconnects for _, client in self._attached.values())}
+
+
+# Instance partagée par les stratégies du processus
+shared_stream = SharedStream()